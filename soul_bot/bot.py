@@ -64,6 +64,10 @@ async def main():
     logger.info("✅ Database health monitor started")
     
     asyncio.create_task(schedule_())
+
+    # Prometheus /metrics (METRICS_PORT=0 — выключено)
+    from utils import metrics
+    await metrics.start_http_server()
     #await logger.start()
     await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
 
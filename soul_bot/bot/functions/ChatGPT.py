@@ -1,6 +1,8 @@
 import asyncio
-import os
+import hashlib
+import io
 import logging
+from collections import OrderedDict
 
 from openai import AsyncOpenAI
 
@@ -11,6 +13,12 @@ import database.repository.statistic_day as db_statistic_day
 # Новый сервис с ChatCompletion API
 from bot.services import openai_service
 from bot.services.error_notifier import report_exception
+from bot.services.constants import (
+    MODEL_TTS,
+    TTS_VOICE,
+    TTS_RESPONSE_FORMAT,
+    TTS_CACHE_MAX_ITEMS,
+)
 
 client = AsyncOpenAI(
     api_key=OPENAI_API_KEY,
@@ -50,28 +58,51 @@ async def get_assistant_response(user_id: int,
         return None
 
 
-async def generate_audio(voiceover_text, user_id):
-    response = await client.audio.speech.create(
-        model="tts-1",
-        voice="alloy",
-        input=voiceover_text,
-    )
+# sha256(model, voice, text) → готовый OGG/Opus (LRU)
+_tts_cache: OrderedDict[str, bytes] = OrderedDict()
+
+
+def _tts_cache_key(text: str) -> str:
+    return hashlib.sha256(f"{MODEL_TTS}\x1f{TTS_VOICE}\x1f{text}".encode('utf-8')).hexdigest()
+
+
+async def generate_audio(voiceover_text: str) -> bytes | None:
+    """
+    Озвучить текст в OGG/Opus целиком в памяти
+
+    Ответ TTS стримится чанками в буфер — без записи на диск и сканирования
+    папок; результат отправляется через BufferedInputFile как voice.
 
-    user_dir = f'bot/media/voices/{user_id}/'
-    os.makedirs(user_dir, exist_ok=True)
+    Returns:
+        Байты OGG/Opus или None если TTS вернул пустой ответ
+    """
+    cache_key = _tts_cache_key(voiceover_text) if TTS_CACHE_MAX_ITEMS else None
+    if cache_key and cache_key in _tts_cache:
+        _tts_cache.move_to_end(cache_key)
+        return _tts_cache[cache_key]
 
-    audio_files = [f for f in os.listdir(user_dir) if f.startswith("audio")]
-    audio_numbers = [
-        int(f.split('audio')[1].split('.wav')[0]) for f in audio_files if f.endswith(".wav")
-    ]
+    buffer = io.BytesIO()
+    async with client.audio.speech.with_streaming_response.create(
+        model=MODEL_TTS,
+        voice=TTS_VOICE,
+        input=voiceover_text,
+        response_format=TTS_RESPONSE_FORMAT,
+    ) as response:
+        async for chunk in response.iter_bytes():
+            buffer.write(chunk)
+
+    audio = buffer.getvalue()
+    if not audio:
+        return None
 
-    next_number = max(audio_numbers, default=0) + 1
+    logging.info(f"TTS сгенерирован в памяти: {len(audio)} bytes")
 
-    output_file = os.path.join(user_dir, f'audio{next_number}.wav')
-    response.stream_to_file(output_file)
+    if cache_key:
+        _tts_cache[cache_key] = audio
+        if len(_tts_cache) > TTS_CACHE_MAX_ITEMS:
+            _tts_cache.popitem(last=False)
 
-    logging.info(f"Аудиофайл сохранён: {output_file}")
-    return output_file
+    return audio
 
 
 async def analyse_photo(photo: str) -> str:
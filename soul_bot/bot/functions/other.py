@@ -15,7 +15,7 @@ from bot.keyboards.start import start
 from bot.loader import bot
 import uuid
 from aiogram.enums import ChatAction
-from aiogram.types import Message, FSInputFile
+from aiogram.types import Message, BufferedInputFile
 import bot.keyboards.practice as keyboards
 import bot.text as texts
 from utils.date_helpers import add_months
@@ -192,6 +192,11 @@ async def voice_answer(message: Message, assistant: str):
     if not await check_sub(user_id=user_id):
         return
 
+    # Имена файлов до try: finally чистит их даже при раннем падении
+    filename = str(uuid.uuid4())
+    file_name_full = f"./voice/{filename}.ogg"
+    file_name_full_converted = f"./ready/{filename}.wav"
+
     add_user(user_id)
     try:
 
@@ -199,10 +204,6 @@ async def voice_answer(message: Message, assistant: str):
 
         gen_message = await message.answer(texts.gen_wait)
 
-        filename = str(uuid.uuid4())
-        file_name_full = f"./voice/{filename}.ogg"
-        file_name_full_converted = f"./ready/{filename}.wav"
-
         try:
             file_info = await message.bot.get_file(message.voice.file_id)
             await message.bot.download_file(file_info.file_path, file_name_full)
@@ -232,7 +233,7 @@ async def voice_answer(message: Message, assistant: str):
 
         await bot.send_chat_action(user_id, action=ChatAction.UPLOAD_VOICE)
 
-        res_voice = await generate_audio(res_text, user_id)
+        res_voice = await generate_audio(res_text)
         if not res_voice:
             remove_user(user_id)
             return await gen_message.edit_text(
@@ -240,8 +241,8 @@ async def voice_answer(message: Message, assistant: str):
                 reply_markup=keyboards.to_menu
             )
         try:
-            await message.answer_voice(FSInputFile(res_voice))
-            await gen_message.message.delete()
+            await message.answer_voice(BufferedInputFile(res_voice, filename="voice.ogg"))
+            await gen_message.delete()
 
         except Exception as e:
             remove_user(user_id)
@@ -250,7 +251,7 @@ async def voice_answer(message: Message, assistant: str):
                 "voice_answer.send_voice",
                 e,
                 event=message,
-                extras={"voice_file": res_voice},
+                extras={"voice_bytes": len(res_voice)},
             )
             await gen_message.delete()
             return
@@ -259,6 +260,7 @@ async def voice_answer(message: Message, assistant: str):
         await report_exception("voice_answer", e, event=message, extras={"assistant": assistant})
         remove_user(user_id)
     finally:
+        remove_user(user_id)
         for path in (file_name_full, file_name_full_converted):
             if os.path.exists(path):
                 try:
@@ -8,6 +8,7 @@ from bot.loader import dp, bot
 from bot.states.states import Mailing
 from config import ADMINS
 import database.repository.user as db_user
+from utils import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -84,11 +85,13 @@ async def send_mail(user_id, delay, message_id, chat_id, reply_markup):
                                reply_markup=reply_markup)
         global GOOD
         GOOD += 1
+        metrics.MAILING_MESSAGES.inc(result='sent')
     except Exception as e:
         await db_user.block(user_id=user_id)
 
         global BAD
         BAD += 1
+        metrics.MAILING_MESSAGES.inc(result='failed')
         logger.warning("Mailing failed for user %s: %s", user_id, e)
 
 
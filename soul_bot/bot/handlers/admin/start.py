@@ -11,6 +11,7 @@ from bot.loader import dp
 from config import ADMINS
 import database.repository.user as db_user
 import database.repository.statistic_day as db_statistic_day
+from database import query_stats
 from bot.states.states import Media
 
 
@@ -59,6 +60,15 @@ async def text_panel() -> str:
                                           yesterday.refs,
                                           yesterday.ads)
 
+    db_load = query_stats.summary()
+    if db_load:
+        db_text = (f'🗄 БД (последние {db_load.updates} апдейтов):\n'
+                   f' └ Запросов: <code>{db_load.avg_queries} (p95 {db_load.p95_queries}, max {db_load.max_queries})</code>\n'
+                   f' └ Время: <code>{db_load.avg_db_ms} мс (p95 {db_load.p95_db_ms} мс)</code>\n'
+                   f' └ 🐢 Медленных: <code>{db_load.slow_updates}</code>\n\n')
+    else:
+        db_text = ''
+
     return (f'📊 Юзеров: <code>{users}</code>\n'
             f'📍 Актив: <code>{active_users}</code>\n\n'
             f'🟢 Живых: <code>{alive_users} ({alive_percent}%)</code>\n'
@@ -91,6 +101,7 @@ async def text_panel() -> str:
             f'🤔 Ассистент: <code>{yesterday.assistant} ({yesterday_assistant_percent}%)</code>\n'
             f'💤 Соник: <code>{yesterday.sleeper} ({yesterday_sleeper_percent}%)</code>\n'
             f'🦞 Клац-клац: <code>{yesterday.events}</code>\n\n'
+            f'{db_text}'
             f'⌛️ <code>{round(time.time() - start, 3)}</code> сек.')
 
 
@@ -7,8 +7,7 @@ import bot.keyboards.media as kb
 import bot.text as texts
 from bot.functions.other import check_sub
 from bot.loader import dp
-import database.repository.media_category as db_media_category
-import database.repository.media as db_media
+from database.media_catalog import media_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +29,8 @@ async def media_categories_callback(call: CallbackQuery, state: FSMContext):
         case 'videos':
             text = texts.video_intro
 
-    categories = await db_media_category.get_all_by_type(category=category)
+    catalog = await media_catalog.get()
+    categories = catalog.by_type(category)
     await call.message.answer(text=text,
                               reply_markup=kb.categories_menu(categories=categories),
                               parse_mode='HTML')
@@ -50,8 +50,14 @@ async def media_category_callback(call: CallbackQuery, state: FSMContext):
         return
 
     category_id = int(call.data.split()[1])
-    category = await db_media_category.get(id=category_id)
-    medias = await db_media.get_all_by_category(category_id=category_id)
+    catalog = await media_catalog.get()
+    category = catalog.category(category_id)
+
+    if category is None:
+        logger.warning("Media category %s not found in catalog", category_id)
+        return
+
+    medias = category.medias
 
     match category.media_type:
         case 'video':
@@ -88,7 +94,12 @@ async def media_file_callback(call: CallbackQuery, state: FSMContext):
         await call.answer()
 
     media_id = int(call.data.split()[1])
-    media = await db_media.get(id=media_id)
+    catalog = await media_catalog.get()
+    media = catalog.media(media_id)
+
+    if media is None:
+        logger.warning("Media %s not found in catalog", media_id)
+        return
 
     match media.media_type:
         case 'video':
@@ -1,8 +1,12 @@
+import asyncio
 import logging
+from collections import OrderedDict
 from datetime import datetime
 import html
+from typing import Sequence
 
 from aiogram import F
+from aiogram.exceptions import TelegramRetryAfter
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
@@ -20,6 +24,7 @@ import database.repository.user as db_user
 import database.repository.user_profile as db_user_profile
 from bot.states.states import Update_user_info
 from config import is_feature_enabled
+from bot.services.constants import PROFILE_RENDER_CACHE_MAX_ITEMS
 from bot.services.text_formatting import (
     localize_pattern_title,
     safe_shorten,
@@ -28,6 +33,7 @@ from bot.services.quiz_ui import (
     build_quiz_entry_keyboard,
     get_quiz_intro_text,
 )
+from utils import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -40,47 +46,141 @@ MAX_MESSAGE_LENGTH = 4096
 # 🧠 КОМАНДА /MY_PROFILE (STAGE 3)
 # ==========================================
 
+PART_HEADER_TEMPLATE = "📄 <b>Часть {number}/{total}</b>\n\n"
+# Запас под заголовок части, чтобы после него не выйти за лимит
+PART_HEADER_RESERVE = 64
+
+
+def _split_long_paragraph(paragraph: str, limit: int) -> list[str]:
+    """Абзац длиннее лимита: режем по строкам, а строку-гиганта — по символам"""
+    chunks: list[str] = []
+    current = ""
+    for line in paragraph.split('\n'):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        if current and len(current) + len(line) + 1 > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_message(text: str, limit: int = MAX_MESSAGE_LENGTH) -> list[str]:
+    """
+    Разбить текст на части для Telegram (лимит 4096 символов).
+
+    Режем по параграфам (двойной перевод строки), слишком длинные
+    параграфы — по строкам. Если частей больше одной, каждая получает
+    заголовок «Часть N/M».
+    """
+    if len(text) <= limit:
+        return [text]
+
+    budget = limit - PART_HEADER_RESERVE
+    parts: list[str] = []
+    current_part = ""
+
+    for paragraph in text.split('\n\n'):
+        chunks = [paragraph] if len(paragraph) <= budget else _split_long_paragraph(paragraph, budget)
+        for chunk in chunks:
+            if current_part and len(current_part) + len(chunk) + 2 > budget:
+                parts.append(current_part)
+                current_part = ""
+            current_part = f"{current_part}\n\n{chunk}" if current_part else chunk
+
+    if current_part:
+        parts.append(current_part)
+
+    total = len(parts)
+    return [
+        PART_HEADER_TEMPLATE.format(number=number, total=total) + part
+        for number, part in enumerate(parts, start=1)
+    ]
+
+
+async def _send_parts(message: Message, parts: Sequence[str], parse_mode: str = 'HTML'):
+    """
+    Отправить готовые части по порядку.
+
+    Части одного чата уходят последовательно (иначе Telegram может
+    перемешать их), при flood control ждём retry_after и повторяем.
+    """
+    for part in parts:
+        try:
+            await message.answer(part, parse_mode=parse_mode)
+        except TelegramRetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+            await message.answer(part, parse_mode=parse_mode)
+
+
 async def _send_long_message(message: Message, text: str, parse_mode: str = 'HTML'):
     """
     Отправка длинного сообщения, разбивая его на части если нужно.
-    
-    Telegram имеет лимит 4096 символов на сообщение.
-    Если текст длиннее - разбиваем на части по разделителям (двойной перевод строки).
-    
+
     Args:
         message: Исходное сообщение для ответа
         text: Текст для отправки
         parse_mode: Режим парсинга (HTML, Markdown)
     """
-    if len(text) <= MAX_MESSAGE_LENGTH:
-        await message.answer(text, parse_mode=parse_mode)
-        return
-    
-    # Разбиваем по двойным переводам строки (параграфы)
-    parts = text.split('\n\n')
-    current_part = ""
-    part_number = 1
-    total_parts = (len(text) // MAX_MESSAGE_LENGTH) + 1
-    
-    for paragraph in parts:
-        # Если добавление параграфа превысит лимит - отправляем текущую часть
-        if len(current_part) + len(paragraph) + 2 > MAX_MESSAGE_LENGTH:
-            if current_part:
-                header = f"📄 <b>Часть {part_number}/{total_parts}</b>\n\n" if part_number > 1 or total_parts > 1 else ""
-                await message.answer(header + current_part, parse_mode=parse_mode)
-                part_number += 1
-                current_part = ""
-        
-        # Добавляем параграф к текущей части
-        if current_part:
-            current_part += "\n\n" + paragraph
-        else:
-            current_part = paragraph
-    
-    # Отправляем остаток
-    if current_part:
-        header = f"📄 <b>Часть {part_number}/{total_parts}</b>\n\n" if part_number > 1 or total_parts > 1 else ""
-        await message.answer(header + current_part, parse_mode=parse_mode)
+    await _send_parts(message, _split_message(text), parse_mode=parse_mode)
+
+
+async def _delete_quietly(message: Message):
+    """Удалить служебное сообщение, если оно ещё существует"""
+    try:
+        await message.delete()
+    except Exception:
+        pass  # Игнорируем если сообщение уже удалено
+
+
+# user_id → ((updated_at профиля, имя, возраст), готовые части)
+_PROFILE_RENDER_CACHE: OrderedDict[int, tuple[tuple, tuple[str, ...]]] = OrderedDict()
+
+
+async def _render_profile_parts(user_id: int) -> tuple[str, ...] | None:
+    """
+    Отрисованный и уже разбитый на части профиль.
+
+    Результат кэшируется по версии профиля (updated_at) и полям пользователя,
+    попадающим в шапку. Повторный просмотр неизменного профиля стоит двух
+    лёгких запросов (users + updated_at) вместо загрузки JSONB и форматирования.
+
+    Returns:
+        None, если пользователь не найден
+    """
+    user, updated_at = await asyncio.gather(
+        db_user.get(user_id),
+        db_user_profile.get_updated_at(user_id),
+    )
+    if user is None:
+        return None
+
+    cached = _PROFILE_RENDER_CACHE.get(user_id)
+    hit = updated_at is not None and cached is not None and cached[0] == (updated_at, user.real_name, user.age)
+    metrics.cache_lookup('profile_render', hit=hit)
+    if hit:
+        _PROFILE_RENDER_CACHE.move_to_end(user_id)
+        return cached[1]
+
+    profile = await db_user_profile.get_view(user_id)
+    parts = tuple(_split_message(_format_profile_compact(profile, user)))
+
+    # Версию берём из самого профиля: он мог измениться после get_updated_at
+    if profile.updated_at is not None:
+        _PROFILE_RENDER_CACHE[user_id] = ((profile.updated_at, user.real_name, user.age), parts)
+        _PROFILE_RENDER_CACHE.move_to_end(user_id)
+        while len(_PROFILE_RENDER_CACHE) > PROFILE_RENDER_CACHE_MAX_ITEMS:
+            _PROFILE_RENDER_CACHE.popitem(last=False)
+
+    return parts
+
 
 STYLE_TONE_LABELS = {
     'friendly': 'дружелюбный',
@@ -305,25 +405,16 @@ async def my_profile_command(message: Message):
     status_msg = await message.answer("🔄 Формирую ваш профиль...")
     
     try:
-        profile = await db_user_profile.get_or_create(user_id)
-        user = await db_user.get(user_id)
-        
+        parts = await _render_profile_parts(user_id)
+
         # ✅ FIX: Check if user exists
-        if user is None:
+        if parts is None:
             await status_msg.edit_text("❌ Ошибка: пользователь не найден")
             return
-        
-        formatted_profile = _format_profile_compact(profile, user)
-        
-        # Удаляем "печатаю..." (с защитой от ошибки если уже удалено)
-        try:
-            await status_msg.delete()
-        except Exception:
-            pass  # Игнорируем если сообщение уже удалено
-        
-        # Отправляем профиль (разбиваем если слишком длинный)
-        await _send_long_message(message, formatted_profile)
-        
+
+        # Удаляем "печатаю..." параллельно с отправкой профиля
+        await asyncio.gather(_delete_quietly(status_msg), _send_parts(message, parts))
+
     except Exception as e:
         try:
             await status_msg.delete()
@@ -347,23 +438,15 @@ async def view_psychological_profile_callback(call: CallbackQuery):
     await call.answer("🔄 Формирую профиль...", show_alert=False)
     
     try:
-        profile = await db_user_profile.get_or_create(user_id)
-        user = await db_user.get(user_id)
-        
+        parts = await _render_profile_parts(user_id)
+
         # ✅ FIX: Check if user exists
-        if user is None:
+        if parts is None:
             await call.answer("❌ Ошибка: пользователь не найден", show_alert=True)
             return
-        
-        formatted_profile = _format_profile_compact(profile, user)
-        
-        try:
-            await call.message.delete()
-        except Exception:
-            pass
-        
-        await _send_long_message(call.message, formatted_profile)
-        
+
+        await asyncio.gather(_delete_quietly(call.message), _send_parts(call.message, parts))
+
     except Exception as e:
         await call.answer(f"⚠️ Ошибка: {e}", show_alert=True)
 
@@ -378,7 +461,7 @@ async def profile_callback(call: CallbackQuery, state: FSMContext):
         await call.answer("❌ Ошибка: пользователь не найден", show_alert=True)
         return
     
-    profile_data = await db_user_profile.get_or_create(user_id)
+    profile_data = await db_user_profile.get_style(user_id)
 
     sub_date = '❌' if user.sub_date < datetime.now() else f'{user.sub_date}'[:-10]
     gender_label = "Не указан"
@@ -610,7 +693,7 @@ async def style_settings_callback(call: CallbackQuery, state: FSMContext):
         return
     
     user_id = call.from_user.id
-    profile = await db_user_profile.get_or_create(user_id)
+    profile = await db_user_profile.get_style(user_id)
     
     # Используем новое unified меню (всё на одном экране)
     keyboard = build_style_settings_menu_v2(
@@ -795,7 +878,7 @@ async def unified_style_handler(call: CallbackQuery):
         return
     
     # Обновляем меню (перерисовываем с новыми галочками)
-    profile = await db_user_profile.get_or_create(user_id)
+    profile = await db_user_profile.get_style(user_id)
     keyboard = build_style_settings_menu_v2(
         current_tone=profile.tone_style,
         current_personality=profile.personality,
@@ -9,6 +9,7 @@ Flow:
 3. Проходит 8–12 вопросов диалогового квиза (FSM state: waiting_for_answer)
 4. Получает результаты + обновление профиля
 """
+import asyncio
 import html
 import logging
 import os
@@ -37,6 +38,8 @@ from bot.functions.other import check_user_info
 import database.repository.user as db_user
 from bot.keyboards.premium import sub_menu
 from bot.services.error_notifier import report_exception
+from bot.services.constants import QUIZ_INITIAL_QUESTIONS, QUIZ_PREFETCH_MAX_BRANCHES
+from utils.task_helpers import create_safe_task
 
 # Initialize adaptive quiz service
 gpt_service = GPTService()
@@ -193,16 +196,13 @@ async def _start_quiz_for_category(call: CallbackQuery, state: FSMContext, categ
     user_id = call.from_user.id
 
     try:
-        profile = await db_user_profile.get_or_create(user_id)
         profile_data = {
-            "patterns": profile.patterns.get('patterns', [])
+            "patterns": await db_user_profile.get_patterns_light(user_id)
         }
 
-        questions = await generator.generate_questions(
-            category=category,
-            count=3,
-            user_profile=profile_data
-        )
+        # Seed-вопросы готовы без GPT: первый вопрос показываем сразу,
+        # остаток стартовой пачки догенерируется в фоне
+        questions = generator.build_initial_questions(category, profile_data)
 
         quiz_session = await db_quiz_session.create(
             user_id=user_id,
@@ -210,6 +210,7 @@ async def _start_quiz_for_category(call: CallbackQuery, state: FSMContext, categ
             questions=questions,
             total_questions=generator.TARGET_QUESTION_COUNT,
         )
+        _schedule_initial_batch(quiz_session, profile_data)
 
         await state.update_data(
             selected_quiz_category=None,
@@ -296,8 +297,14 @@ async def handle_quiz_answer(call: CallbackQuery, state: FSMContext):
     quiz_session = await db_quiz_session.update_answer(
         session_id=session_id,
         question_id=current_question['id'],
-        answer_value=answer_value
+        answer_value=answer_value,
+        expected_index=current_idx
     )
+
+    if quiz_session is None:
+        # Двойной клик: ответ на этот вопрос уже записан
+        await call.answer()
+        return
     
     await call.answer("✅ Ответ сохранён")
 
@@ -415,8 +422,12 @@ async def handle_text_answer(message: Message, state: FSMContext):
     quiz_session = await db_quiz_session.update_answer(
         session_id=session_id,
         question_id=current_question['id'],
-        answer_value=answer_value
+        answer_value=answer_value,
+        expected_index=current_idx
     )
+
+    if quiz_session is None:
+        return
     
     quiz_session, status_msg = await _ensure_next_question(message, quiz_session)
     await _maybe_send_mid_insight(message, quiz_session, state)
@@ -501,9 +512,13 @@ async def handle_voice_answer(message: Message, state: FSMContext):
     quiz_session = await db_quiz_session.update_answer(
         session_id=session_id,
         question_id=question['id'],
-        answer_value=transcript
+        answer_value=transcript,
+        expected_index=current_idx
     )
 
+    if quiz_session is None:
+        return
+
     await message.answer(f"🎙️ Принял голосовой ответ: {transcript}")
 
     quiz_session, status_msg = await _ensure_next_question(message, quiz_session)
@@ -598,6 +613,8 @@ async def _show_current_question(
     # Сохраняем ID последнего вопроса для последующего удаления
     await state.update_data(last_question_message_id=sent_message.message_id)
 
+    _schedule_prefetch(quiz_session)
+
 
 # ==========================================
 # 🎉 ЗАВЕРШЕНИЕ КВИЗА
@@ -614,6 +631,16 @@ async def _finish_quiz(message: Message, quiz_session, state: FSMContext):
 
     # Показываем loading
     status_msg = await message.answer("🔄 Анализирую результаты...")
+    patterns_sent = False
+
+    async def _send_patterns(partial_results: dict) -> None:
+        # Паттерны показываем сразу, рекомендации придут вторым сообщением
+        nonlocal patterns_sent
+        await status_msg.edit_text(
+            text=analyzer.format_patterns_for_telegram(partial_results),
+            parse_mode='HTML'
+        )
+        patterns_sent = True
     
     try:
         # Анализируем результаты (переиспользуем pattern_analyzer!)
@@ -628,17 +655,21 @@ async def _finish_quiz(message: Message, quiz_session, state: FSMContext):
         results = await analyzer.analyze_quiz_results(
             user_id=user_id,
             quiz_session=quiz_data,
-            category=quiz_session.category
+            category=quiz_session.category,
+            on_patterns=_send_patterns
         )
         
         # Сохраняем результаты
         await db_quiz_session.complete(quiz_session.id, results)
         
-        # Форматируем для отображения
-        formatted_text = await analyzer.format_results_for_telegram(results, user_id)
-        
-        # Удаляем loading
-        await status_msg.delete()
+        if patterns_sent:
+            formatted_text = analyzer.format_recommendations_for_telegram(results)
+        else:
+            # Форматируем для отображения
+            formatted_text = await analyzer.format_results_for_telegram(results, user_id)
+            
+            # Удаляем loading
+            await status_msg.delete()
         
         # Показываем результаты
         await message.answer(
@@ -660,7 +691,8 @@ async def _finish_quiz(message: Message, quiz_session, state: FSMContext):
             user_id,
             quiz_session.id,
         )
-        await status_msg.delete()
+        if not patterns_sent:
+            await status_msg.delete()
         await message.answer(
             f"⚠️ Ошибка при анализе: {e}\n\n"
             "Ваши ответы сохранены, попробуйте позже."
@@ -750,6 +782,186 @@ async def _compose_answer_history(quiz_session) -> list[dict]:
     return history
 
 
+# session_id → (индекс вопроса, задача предгенерации следующего)
+_prefetch_tasks: dict[int, tuple[int, asyncio.Task]] = {}
+# session_id → фоновая догенерация стартовых вопросов
+_initial_batch_tasks: dict[int, asyncio.Task] = {}
+
+
+def _prefetch_options(quiz_session) -> list[str]:
+    """Варианты ответа текущего вопроса, если для него имеет смысл предгенерация"""
+    idx = quiz_session.current_question_index
+    questions = quiz_session.questions or []
+
+    if not quiz_session.is_in_progress or idx + 1 >= (quiz_session.total_questions or 0):
+        return []
+    # Следующий вопрос уже есть (seed-вопросы или adaptive branching)
+    if len(questions) != idx + 1:
+        return []
+    if (quiz_session.prefetched_questions or {}).get('question_index') == idx:
+        return []
+
+    question = questions[idx]
+    options = question.get('options') or []
+    if question.get('type') == 'text' or not 0 < len(options) <= QUIZ_PREFETCH_MAX_BRANCHES:
+        return []
+    return list(options)
+
+
+def _schedule_initial_batch(quiz_session, profile_data: dict) -> None:
+    """Догенерировать стартовые вопросы, пока пользователь отвечает на первый"""
+    needed = QUIZ_INITIAL_QUESTIONS - len(quiz_session.questions or [])
+    if needed <= 0:
+        return
+
+    session_id = quiz_session.id
+    task = create_safe_task(
+        _append_initial_batch(quiz_session, profile_data, needed),
+        f"quiz_initial_batch_{session_id}",
+    )
+    _initial_batch_tasks[session_id] = task
+    task.add_done_callback(lambda _: _initial_batch_tasks.pop(session_id, None))
+
+
+async def _append_initial_batch(quiz_session, profile_data: dict, needed: int) -> None:
+    existing = list(quiz_session.questions or [])
+    dynamic = await generator.generate_dynamic_questions(
+        category=quiz_session.category,
+        needed=needed,
+        existing_questions=existing,
+        user_profile=profile_data,
+    )
+
+    if await db_quiz_session.append_questions(quiz_session.id, dynamic, len(existing)):
+        logging.info(
+            "[quiz] Appended %s background question(s) (session=%s)",
+            len(dynamic),
+            quiz_session.id,
+        )
+
+
+async def _wait_initial_batch(quiz_session) -> None:
+    """Если стартовая пачка ещё генерируется — дождаться её и подтянуть вопросы"""
+    task = _initial_batch_tasks.get(quiz_session.id)
+    if task is None or task.done():
+        return
+
+    await asyncio.shield(task)
+    fresh = await db_quiz_session.get(quiz_session.id)
+    if fresh:
+        quiz_session.questions = fresh.questions
+
+
+def _schedule_prefetch(quiz_session) -> None:
+    """
+    Начать генерировать следующий вопрос, пока пользователь думает над текущим
+
+    Для вопроса с вариантами генерируем по кандидату на каждый вариант —
+    после ответа берём нужную ветку без ожидания GPT.
+    """
+    if not is_feature_enabled('ENABLE_QUIZ_PREFETCH'):
+        return
+
+    if quiz_session.id in _initial_batch_tasks:
+        # Следующий вопрос придёт из стартовой пачки
+        return
+
+    options = _prefetch_options(quiz_session)
+    if not options:
+        return
+
+    session_id = quiz_session.id
+    idx = quiz_session.current_question_index
+    running = _prefetch_tasks.get(session_id)
+    if running and running[0] == idx and not running[1].done():
+        return
+
+    task = create_safe_task(
+        _prefetch_next_question(quiz_session, options),
+        f"quiz_prefetch_{session_id}_{idx}",
+    )
+    _prefetch_tasks[session_id] = (idx, task)
+
+    def _forget(done_task: asyncio.Task) -> None:
+        if _prefetch_tasks.get(session_id, (None, None))[1] is done_task:
+            _prefetch_tasks.pop(session_id, None)
+
+    task.add_done_callback(_forget)
+
+
+async def _prefetch_next_question(quiz_session, options: list[str]) -> None:
+    idx = quiz_session.current_question_index
+    question = quiz_session.questions[idx]
+
+    answer_history = await _compose_answer_history(quiz_session)
+    profile_data = {
+        "patterns": await db_user_profile.get_patterns_light(quiz_session.user_id),
+    }
+
+    candidates = await asyncio.gather(*(
+        generator.generate_adaptive_question(
+            category=quiz_session.category,
+            question_number=idx + 2,
+            previous_answers=answer_history + [
+                {"question_text": question.get('text', ''), "answer_value": option}
+            ],
+            user_profile=profile_data,
+        )
+        for option in options
+    ))
+
+    branches = {}
+    for option, candidate in zip(options, candidates):
+        normalized = generator._normalize_question_list([candidate], quiz_session.category) if candidate else []
+        if normalized:
+            branches[option] = normalized[0]
+
+    if branches and await db_quiz_session.save_prefetched_questions(quiz_session.id, idx, branches):
+        logging.info(
+            "[quiz] Prefetched %s branch(es) for question %s (session=%s)",
+            len(branches),
+            idx + 2,
+            quiz_session.id,
+        )
+
+
+def _prefetched_branch_ready(quiz_session) -> bool:
+    prefetched = quiz_session.prefetched_questions or {}
+    if prefetched.get('question_index') != quiz_session.current_question_index - 1:
+        return False
+    if not quiz_session.answers:
+        return False
+    return quiz_session.answers[-1].get('value') in (prefetched.get('branches') or {})
+
+
+async def _take_prefetched_question(quiz_session) -> dict | None:
+    """
+    Взять предгенерированный вопрос для только что данного ответа
+
+    Кандидаты сбрасываются в любом случае: если ответ не совпал ни с одной
+    веткой (или вопрос был текстовым), они уже не пригодятся.
+    """
+    answered_index = quiz_session.current_question_index - 1
+
+    running = _prefetch_tasks.get(quiz_session.id)
+    if running and running[0] == answered_index and not running[1].done():
+        # Генерация уже идёт — дожидаемся её, а не запускаем вторую
+        await asyncio.shield(running[1])
+        fresh = await db_quiz_session.get(quiz_session.id)
+        if fresh:
+            quiz_session.prefetched_questions = fresh.prefetched_questions
+
+    question = None
+    if _prefetched_branch_ready(quiz_session):
+        branches = quiz_session.prefetched_questions['branches']
+        question = branches[quiz_session.answers[-1].get('value')]
+    quiz_session.prefetched_questions = None
+
+    if question:
+        logging.info("[quiz] Served prefetched question (session=%s)", quiz_session.id)
+    return question
+
+
 async def _queue_next_question_if_needed(quiz_session):
     """Гарантировать, что следующий вопрос уже готов перед показом."""
     if not quiz_session:
@@ -764,19 +976,25 @@ async def _queue_next_question_if_needed(quiz_session):
     if len(quiz_session.questions or []) >= quiz_session.total_questions:
         return quiz_session
 
-    answer_history = await _compose_answer_history(quiz_session)
-    user_profile = await db_user_profile.get_or_create(quiz_session.user_id)
-    profile_data = {
-        "patterns": user_profile.patterns.get('patterns', []),
-    }
+    await _wait_initial_batch(quiz_session)
+    if len(quiz_session.questions or []) > quiz_session.current_question_index:
+        return quiz_session
 
-    next_number = len(quiz_session.questions or []) + 1
-    new_question = await generator.generate_adaptive_question(
-        category=quiz_session.category,
-        question_number=next_number,
-        previous_answers=answer_history,
-        user_profile=profile_data,
-    )
+    new_question = await _take_prefetched_question(quiz_session)
+
+    if not new_question:
+        answer_history = await _compose_answer_history(quiz_session)
+        profile_data = {
+            "patterns": await db_user_profile.get_patterns_light(quiz_session.user_id),
+        }
+
+        next_number = len(quiz_session.questions or []) + 1
+        new_question = await generator.generate_adaptive_question(
+            category=quiz_session.category,
+            question_number=next_number,
+            previous_answers=answer_history,
+            user_profile=profile_data,
+        )
 
     if not new_question:
         logging.debug("[quiz] No adaptive question generated (session=%s)", quiz_session.id)
@@ -804,7 +1022,6 @@ async def _ensure_next_question(message: Message, quiz_session) -> tuple:
     Returns:
         (updated_session, status_msg) - session и опциональное статус-сообщение для удаления позже
     """
-    import asyncio
     import time
     
     needs_generation = (
@@ -816,6 +1033,10 @@ async def _ensure_next_question(message: Message, quiz_session) -> tuple:
     status_msg = None
     updated_session = quiz_session
 
+    if needs_generation and _prefetched_branch_ready(quiz_session):
+        # Вопрос уже предгенерирован — показываем без статуса и ожидания
+        return await _queue_next_question_if_needed(quiz_session), None
+
     if needs_generation:
         status_msg = await message.answer("⏳ Генерирую следующий вопрос...")
 
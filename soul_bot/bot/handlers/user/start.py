@@ -296,7 +296,7 @@ async def settings_message(message: Message):
         return
     
     user_id = message.from_user.id
-    profile = await db_user_profile.get_or_create(user_id)
+    profile = await db_user_profile.get_style(user_id)
     
     tone_map = {
         'formal': '🎩 Формальный',
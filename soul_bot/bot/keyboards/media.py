@@ -1,9 +1,10 @@
+from typing import Sequence
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-from database.models.media_category import Media_category
-from database.models.media import Media
+from database.media_catalog import CatalogCategory, CatalogMedia
 
 
-def categories_menu(categories: list[Media_category]) -> InlineKeyboardMarkup:
+def categories_menu(categories: Sequence[CatalogCategory]) -> InlineKeyboardMarkup:
     keyboard = []
 
     for category in categories:
@@ -20,7 +21,7 @@ def categories_menu(categories: list[Media_category]) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def medias_menu(medias: list[Media], category: str) -> InlineKeyboardMarkup:
+def medias_menu(medias: Sequence[CatalogMedia], category: str) -> InlineKeyboardMarkup:
     keyboard = []
     for media in medias:
         keyboard.append([InlineKeyboardButton(text=media.name,
@@ -1,10 +1,13 @@
 import asyncio
+import time
 
 from aiogram import Dispatcher, BaseMiddleware
 from aiogram.types import Message, TelegramObject
 from typing import Dict, Any, Callable, Awaitable
 import database.repository.statistic_day as db_statistic_day
 import database.repository.user as db_user
+from database import query_stats
+from utils import metrics, tracing
 
 
 class EventsMiddleware(BaseMiddleware):
@@ -20,4 +23,16 @@ class EventsMiddleware(BaseMiddleware):
         user_id = event.from_user.id
         asyncio.get_event_loop().create_task(db_user.update_active(user_id=user_id))
 
-        return await handler(event, data)
+        # Корневой span обновления: всё, что ниже по стеку, попадает в этот trace
+        event_name = type(event).__name__
+        started = time.perf_counter()
+        status = 'error'
+        with tracing.span("telegram.update", event=event_name, user_id=user_id) as update_span, \
+                query_stats.track(f"update {event_name} user={user_id}") as stats:
+            try:
+                result = await handler(event, data)
+                status = 'ok'
+                return result
+            finally:
+                update_span.set(db_queries=stats.queries, db_ms=round(stats.db_ms, 1))
+                metrics.UPDATE_DURATION.observe(time.perf_counter() - started, event=event_name, status=status)
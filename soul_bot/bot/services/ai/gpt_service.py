@@ -10,6 +10,7 @@ from typing import Optional
 from openai import AsyncOpenAI
 
 from config import OPENAI_API_KEY
+from utils import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +21,7 @@ class GPTService:
     """
     
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+        self.client = metrics.instrument_openai(AsyncOpenAI(api_key=OPENAI_API_KEY), lane='adaptive_quiz')
     
     async def generate_completion(
         self,
@@ -32,6 +32,9 @@ DEEP_ANALYSIS_CONTEXT_SIZE = 30    # Сообщений для deep analysis
 QUICK_ANALYSIS_MIN_MESSAGES = 4   # Минимум для quick analysis
 DEEP_ANALYSIS_MIN_MESSAGES = 10   # Минимум для deep analysis
 
+# Сохранение результатов анализа (ProfileDelta)
+PROFILE_UPDATE_MAX_ATTEMPTS = 3   # Попыток при конкурентном изменении профиля
+
 # ==========================================
 # 🚨 SAFETY NET THRESHOLDS (Critical Patterns)
 # ==========================================
@@ -129,6 +132,9 @@ PATTERN_TITLE_ASCII_REGEX = r"^[A-Za-z0-9 ,\-()']+$"
 MODEL_CHAT = "gpt-4o"           # Основной чат
 MODEL_ANALYSIS = "gpt-4o"       # Анализ паттернов (was gpt-4o-mini, upgraded for V2 depth)
 MODEL_EMBEDDING = "text-embedding-3-small"  # Embeddings (1536 dim)
+MODEL_TTS = "tts-1"             # Голосовые ответы
+TTS_VOICE = "alloy"
+TTS_RESPONSE_FORMAT = "opus"    # OGG/Opus — нативный формат voice в Telegram
 
 # Temperature
 TEMPERATURE_CHAT = 0.7          # Для обычного чата
@@ -149,6 +155,26 @@ QUIZ_DEFAULT_QUESTIONS_COUNT = 10
 QUIZ_MIN_QUESTIONS = 5
 QUIZ_MAX_QUESTIONS = 20
 
+# Сколько вопросов в стартовой пачке (seed + сверка профиля + GPT в фоне)
+QUIZ_INITIAL_QUESTIONS = 3
+
+# Предгенерация следующего вопроса, пока пользователь отвечает на текущий:
+# по кандидату на каждый вариант ответа (вопросы с бóльшим числом вариантов
+# и текстовые вопросы не предгенерируются)
+QUIZ_PREFETCH_MAX_BRANCHES = 5
+
+# Пул заранее сгенерированных вопросов (ночная задача): размер на категорию
+# и как часто процесс перечитывает пул из БД (сек)
+QUIZ_QUESTION_POOL_SIZE = 12
+QUIZ_QUESTION_POOL_TTL = 3600
+
+# Общий бюджет (сек) на GPT-вызовы разбора результатов квиза:
+# каждый следующий вызов получает только оставшееся время
+QUIZ_ANALYSIS_TIMEOUT = 60.0
+
+# Общий бюджет (сек) на адаптивный вопрос: поиск противоречий + генерация
+QUIZ_ADAPTIVE_QUESTION_TIMEOUT = 30.0
+
 # ==========================================
 # 📈 CONVERSATION SETTINGS
 # ==========================================
@@ -197,6 +223,12 @@ CACHE_TTL_USER_PROFILE = 300      # 5 минут
 CACHE_TTL_CONVERSATION = 60       # 1 минута
 CACHE_TTL_SYSTEM_PROMPT_BASE = 3600  # 1 час (базовая часть)
 
+# TTS: in-memory кэш озвучки по хэшу текста (0 = выключен)
+TTS_CACHE_MAX_ITEMS = 32          # ~50-300 KB на ответ
+
+# /my_profile: кэш отрисованного профиля по (user_id, updated_at)
+PROFILE_RENDER_CACHE_MAX_ITEMS = 256
+
 # Batch sizes
 BATCH_SIZE_EMBEDDINGS = 10        # Генерация embeddings батчами
 BATCH_SIZE_DB_QUERIES = 50        # Batch queries
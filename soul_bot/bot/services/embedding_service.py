@@ -16,11 +16,12 @@ import numpy as np
 from openai import AsyncOpenAI
 
 from config import OPENAI_API_KEY
+from utils import metrics
 
 logger = logging.getLogger(__name__)
 
 # Инициализация клиента
-client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+client = metrics.instrument_openai(AsyncOpenAI(api_key=OPENAI_API_KEY), lane='embeddings')
 
 # Импортируем константы из централизованного модуля
 from bot.services.constants import (
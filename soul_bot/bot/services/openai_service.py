@@ -7,13 +7,19 @@
 
 Основные функции:
 - get_chat_completion() - получить ответ от ChatCompletion API
+- stream_chat_completion() - тот же ответ, но потоково (для WebApp)
 - build_system_prompt() - динамически построить system prompt
 - save_conversation() - сохранить сообщения в историю
 """
 import asyncio
+import hashlib
 import logging
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, is_dataclass, replace
 from functools import lru_cache
-from typing import List, Dict, Optional
+from types import SimpleNamespace
+from typing import AsyncIterator, List, Dict, Optional
 from datetime import datetime
 
 from openai import AsyncOpenAI
@@ -25,6 +31,7 @@ import database.repository.user as db_user
 import database.repository.statistic_day as db_statistic_day
 
 from bot.services.personalization import build_personalized_response
+from bot.services.pattern_context_filter import attach_topic_vector
 from bot.services.prompt.sections import (
     render_base_instructions,
     render_active_hints_section,
@@ -47,9 +54,10 @@ from bot.services.temperature_adapter import adapt_style_to_temperature, apply_o
 from bot.services.formatting import format_bot_message
 from bot.services.user_style_detector import analyze_user_style
 from bot.services.error_notifier import schedule_exception_report
+from utils import metrics, tracing
 
 # Инициализация OpenAI клиента
-client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+client = metrics.instrument_openai(AsyncOpenAI(api_key=OPENAI_API_KEY), lane='chat')
 
 logger = logging.getLogger(__name__)
 
@@ -237,12 +245,116 @@ def _render_dialogue_state_section(
 # 🎨 ДИНАМИЧЕСКИЙ SYSTEM PROMPT
 # ==========================================
 
+# ==========================================
+# 🛡️ ВАЛИДАЦИЯ EVIDENCE (anti-hallucination)
+# ==========================================
+
+_WORD_RE = re.compile(r'\w+')
+
+# (user_id, profile.updated_at, digest недавних сообщений) → валидированные паттерны
+_EVIDENCE_CACHE: OrderedDict[tuple, list] = OrderedDict()
+_EVIDENCE_CACHE_MAX_SIZE = 512
+
+
+def _build_recent_index(messages: List[str]) -> tuple[str, frozenset]:
+    """Индекс недавних сообщений: склеенный текст (для цитат) + множество слов"""
+    recent_text = ' '.join(msg.lower() for msg in messages)
+    return recent_text, frozenset(_WORD_RE.findall(recent_text))
+
+
+def _is_grounded_quote(quote: str, recent_text: str, recent_words: frozenset) -> bool:
+    """Цитата есть в недавних сообщениях целиком или совпадает минимум на 70% слов"""
+    quote_lower = quote.lower()
+    if len(quote_lower) >= 5 and quote_lower in recent_text:
+        return True
+    if len(quote_lower.split()) > 2:
+        quote_words = set(_WORD_RE.findall(quote_lower))
+        if quote_words:
+            return len(quote_words & recent_words) / len(quote_words) >= 0.7
+    return False
+
+
+def _validate_pattern_evidence(patterns: List[dict], recent_messages: List[str]) -> List[dict]:
+    """
+    Оставить в паттернах только evidence, подтверждённые недавними сообщениями
+
+    Индекс сообщений строится один раз, проверка слова — O(1) lookup в множестве.
+    Исходные dict'ы паттернов не мутируются: паттерны с evidence копируются.
+    Копии идут в секцию паттернов промпта, где get_relevant_patterns_for_chat
+    берёт сохранённый topic_vector — поэтому он пересчитывается по оставшимся
+    evidence (только для копий, где evidence были).
+    """
+    recent_text, recent_words = _build_recent_index(recent_messages)
+
+    validated_patterns = []
+    for pattern in patterns:
+        evidence = pattern.get('evidence', [])
+        if evidence:
+            pattern = attach_topic_vector({
+                **pattern,
+                'evidence': [
+                    quote for quote in evidence
+                    if _is_grounded_quote(quote, recent_text, recent_words)
+                ],
+            })
+        validated_patterns.append(pattern)
+
+    return validated_patterns
+
+
+def _get_validated_patterns(
+    user_id: int,
+    profile,
+    patterns: List[dict],
+    recent_messages: List[str],
+) -> List[dict]:
+    """
+    Валидированные паттерны с кэшем по (версия профиля, хэш недавних сообщений)
+
+    Версия профиля — updated_at: меняется при каждой записи паттернов.
+    Без updated_at (новый профиль, тестовые объекты) считаем без кэша.
+    """
+    profile_version = getattr(profile, 'updated_at', None)
+    if profile_version is None:
+        return _validate_pattern_evidence(patterns, recent_messages)
+
+    history_digest = hashlib.blake2b(
+        '\x1f'.join(recent_messages).encode('utf-8'),
+        digest_size=16,
+    ).digest()
+    cache_key = (user_id, profile_version, history_digest)
+
+    cached = _EVIDENCE_CACHE.get(cache_key)
+    metrics.cache_lookup('pattern_evidence', hit=cached is not None)
+    if cached is not None:
+        _EVIDENCE_CACHE.move_to_end(cache_key)
+        return cached
+
+    validated_patterns = _validate_pattern_evidence(patterns, recent_messages)
+    _EVIDENCE_CACHE[cache_key] = validated_patterns
+    if len(_EVIDENCE_CACHE) > _EVIDENCE_CACHE_MAX_SIZE:
+        _EVIDENCE_CACHE.popitem(last=False)
+
+    return validated_patterns
+
+
+def _profile_with_patterns(profile, patterns: List[dict]):
+    """Копия профиля для рендеринга промпта с другим списком паттернов"""
+    patterns_data = {**(profile.patterns or {}), 'patterns': patterns}
+    if is_dataclass(profile):
+        return replace(profile, patterns=patterns_data)
+    # UserProfile / тестовые объекты: плоская копия атрибутов, ORM-объект не трогаем
+    return SimpleNamespace(**{**vars(profile), 'patterns': patterns_data})
+
+
+@tracing.traced("build_system_prompt")
 async def build_system_prompt(
     user_id: int,
     assistant_type: str,
     base_instructions: str = None,
     extra_sections: Optional[List[str]] = None,
     user_message: Optional[str] = None,
+    profile: Optional[user_profile.ProfileView] = None,
 ) -> str:
     """
     Построить динамический system prompt на основе профиля пользователя
@@ -251,11 +363,13 @@ async def build_system_prompt(
         user_id: Telegram ID пользователя
         assistant_type: Тип ассистента (helper, sleeper, etc.)
         base_instructions: Базовые инструкции (если None, используются дефолтные)
+        profile: Уже загруженный профиль (иначе читается get_view)
         
     Returns:
         Полный system prompt
     """
-    profile = await user_profile.get_or_create(user_id)
+    if profile is None:
+        profile = await user_profile.get_view(user_id)
     user = await db_user.get(user_id)
     
     # ✅ FIX: Check if user exists (fallback to defaults)
@@ -305,6 +419,21 @@ async def build_system_prompt(
 
     pattern_message = user_message or (style_messages[-1] if style_messages else "")
 
+    # ⚠️ Валидация: проверяем что evidence в паттернах действительно из недавних сообщений
+    # Это предотвращает "галлюцинации" когда GPT ссылается на несуществующие фразы.
+    # Промпт рендерится из копии профиля: тот же профиль дальше идёт в персонализацию,
+    # где нужны все evidence, поэтому profile.patterns не перезаписываем
+    validated_patterns = []
+    prompt_profile = profile
+    if patterns_list:
+        validated_patterns = _get_validated_patterns(
+            user_id,
+            profile,
+            patterns_list,
+            style_messages,
+        )
+        prompt_profile = _profile_with_patterns(profile, validated_patterns)
+
     sections = [
         render_style_section(_build_style_instructions(
             profile,
@@ -315,9 +444,9 @@ async def build_system_prompt(
         )),
         render_base_instructions(base_instructions),
         render_user_info(user),
-        render_patterns_section_contextual(profile, user_message=pattern_message),
+        render_patterns_section_contextual(prompt_profile, user_message=pattern_message),
         render_insights_section(profile),
-        render_active_hints_section(preferences, patterns=patterns_list),
+        render_active_hints_section(preferences, patterns=validated_patterns),
     ]
 
     sections.append(render_recent_messages_section(recent_user_messages))
@@ -353,40 +482,6 @@ async def build_system_prompt(
 Пользователь написал развёрнуто ({} символов). Он готов к глубокому разговору. Ответь подробно (3–5 абзацев), раскрой тему и задай уточняющие вопросы.""".format(msg_len))
         # Средняя длина (20-200) — без дополнительных инструкций, используем профиль
     
-    # ⚠️ Валидация: проверяем что evidence в паттернах действительно из недавних сообщений
-    # Это предотвращает "галлюцинации" когда GPT ссылается на несуществующие фразы
-    if profile.patterns and profile.patterns.get('patterns'):
-        validated_patterns = []
-        patterns = profile.patterns.get('patterns', [])
-        
-        # Собираем весь текст недавних сообщений пользователя
-        recent_text = ' '.join([msg.lower() for msg in style_messages])
-        
-        for pattern in patterns:
-            # Валидируем evidence
-            evidence = pattern.get('evidence', [])
-            if evidence:
-                validated_evidence = []
-                for quote in evidence:
-                    quote_lower = quote.lower()
-                    # Проверяем что цитата есть в недавних сообщениях
-                    if len(quote_lower) >= 5 and quote_lower in recent_text:
-                        validated_evidence.append(quote)
-                    elif len(quote_lower.split()) > 2:
-                        # Проверяем частичное совпадение (70% слов)
-                        quote_words = set(quote_lower.split())
-                        matched = sum(1 for word in quote_words if word in recent_text)
-                        if matched / len(quote_words) >= 0.7:
-                            validated_evidence.append(quote)
-                
-                # Обновляем evidence только валидированными
-                pattern['evidence'] = validated_evidence
-            
-            validated_patterns.append(pattern)
-        
-        # Обновляем профиль с валидированными паттернами (только для рендеринга промпта)
-        profile.patterns['patterns'] = validated_patterns
-
     sections.extend(
         [
             render_emotional_state_section(profile),
@@ -395,7 +490,7 @@ async def build_system_prompt(
         ]
     )
 
-    has_patterns = bool((profile.patterns or {}).get('patterns'))
+    has_patterns = bool(validated_patterns)
     has_insights = bool((profile.insights or {}).get('insights'))
     sections.append(render_meta_instructions(has_patterns, has_insights))
 
@@ -714,6 +809,217 @@ def _enforce_message_length(text: str, message_length: str) -> str:
 # 💬 ОСНОВНАЯ ФУНКЦИЯ ChatCompletion
 # ==========================================
 
+@dataclass
+class _CompletionContext:
+    """Всё, что нужно для вызова модели и финализации ответа"""
+    user_id: int
+    message: str
+    assistant_type: str
+    messages: List[Dict[str, str]]
+    temperature: float
+    profile: object
+    urgent_signal: object
+    dialogue_state: Optional[Dict[str, object]] = None
+    expected_dialogue_role: Optional[str] = None
+
+
+async def _prepare_completion(
+    user_id: int,
+    message: str,
+    assistant_type: str,
+    max_history_messages: int,
+    temperature: float
+) -> _CompletionContext:
+    """Шаги 0-3: экстренные сигналы, system prompt, история, temperature"""
+    # 🚨 STEP 0: Проверяем экстренные эмоциональные сигналы (< 1ms)
+    urgent_signal = detect_urgent_emotional_signals(message)
+    emergency_override = should_override_system_prompt(urgent_signal)
+
+    # Профиль без embeddings: один SELECT на весь запрос (prompt,
+    # temperature, персонализация, форматирование)
+    profile = await user_profile.get_view(user_id)
+
+    dialogue_config = DIALOGUE_CONFIG.get(assistant_type)
+    dialogue_state = None
+    expected_dialogue_role = None
+    extra_sections: List[str] = []
+
+    if dialogue_config:
+        raw_history_for_dialogue = await conversation_history.get_history(
+            user_id=user_id,
+            assistant_type=assistant_type,
+            limit=100
+        )
+        dialogue_state = _calculate_dialogue_state(raw_history_for_dialogue, dialogue_config)
+        if not emergency_override:
+            expected_dialogue_role = _determine_expected_role(dialogue_state)
+            dialogue_section = _render_dialogue_state_section(
+                assistant_type,
+                dialogue_state,
+                expected_dialogue_role
+            )
+            if dialogue_section:
+                extra_sections.append(dialogue_section)
+
+    # 1. Строим system prompt (emergency или normal mode)
+    if emergency_override:
+        # EMERGENCY MODE: используем экстренный prompt
+        base_instructions = _get_base_instructions(assistant_type)
+        system_prompt = build_emergency_prompt(
+            emotion=urgent_signal.emotion,
+            base_instructions=base_instructions
+        )
+
+        logger.warning(
+            f"🚨 EMERGENCY MODE activated for user {user_id}: "
+            f"{urgent_signal.emotion} (urgency: {urgent_signal.urgency}, "
+            f"confidence: {urgent_signal.confidence:.2f})"
+        )
+    else:
+        # NORMAL MODE: стандартный персонализированный prompt
+        system_prompt = await build_system_prompt(
+            user_id,
+            assistant_type,
+            extra_sections=extra_sections if extra_sections else None,
+            user_message=message,
+            profile=profile,
+        )
+
+    # 2. Загружаем историю сообщений
+    history = await conversation_history.get_context(
+        user_id=user_id,
+        assistant_type=assistant_type,
+        max_messages=max_history_messages
+    )
+
+    # 3. Формируем messages для OpenAI
+    messages = [
+        {"role": "system", "content": system_prompt}
+    ]
+    messages.extend(history)
+    messages.append({"role": "user", "content": message})
+
+    # 🌡️ Применяем temperature adaptation
+    temp_overrides = adapt_style_to_temperature(profile)
+
+    return _CompletionContext(
+        user_id=user_id,
+        message=message,
+        assistant_type=assistant_type,
+        messages=messages,
+        temperature=temperature * temp_overrides['intensity_modifier'],
+        profile=profile,
+        urgent_signal=urgent_signal,
+        dialogue_state=dialogue_state,
+        expected_dialogue_role=expected_dialogue_role,
+    )
+
+
+async def _finalize_completion(
+    context: _CompletionContext,
+    assistant_message: str,
+    model: str,
+    tokens_used: Optional[int]
+) -> str:
+    """Шаги 5-9: персонализация, форматирование, сохранение, фоновые задачи"""
+    user_id = context.user_id
+    assistant_type = context.assistant_type
+    profile = context.profile
+
+    with tracing.span("build_personalized_response"):
+        assistant_message = await build_personalized_response(
+            user_id=user_id,
+            assistant_type=assistant_type,
+            profile=profile,
+            base_response=assistant_message,
+            user_message=context.message,
+        )
+
+    if profile and profile.message_length:
+        with tracing.span("format_response"):
+            assistant_message = _enforce_message_length(assistant_message, profile.message_length)
+
+            # 📝 НОВОЕ: Adaptive formatting (адаптивное форматирование)
+            assistant_message = format_bot_message(
+                text=assistant_message,
+                message_length_preference=profile.message_length,
+                learning_preferences=profile.learning_preferences,
+                assistant_type=assistant_type
+            )
+
+    # 6. Сохраняем сообщения в историю
+    dialogue_state = context.dialogue_state
+    expected_dialogue_role = context.expected_dialogue_role
+    assistant_metadata: Dict[str, object] = {}
+    if dialogue_state and expected_dialogue_role:
+        if expected_dialogue_role == 'question':
+            assistant_metadata['dialogue_role'] = 'question'
+            assistant_metadata['dialogue_question_index'] = dialogue_state['questions'] + 1
+        elif expected_dialogue_role == 'summary':
+            assistant_metadata['dialogue_role'] = 'summary'
+            assistant_metadata['dialogue_question_index'] = dialogue_state['questions']
+        else:
+            assistant_metadata['dialogue_role'] = 'post_summary'
+            assistant_metadata['dialogue_question_index'] = dialogue_state['questions']
+
+    # Разбивка времени ответа по шагам (save_conversation ещё не учтён)
+    timings = tracing.timings()
+    if timings:
+        assistant_metadata['timings_ms'] = timings
+
+    await save_conversation(
+        user_id=user_id,
+        assistant_type=assistant_type,
+        user_message=context.message,
+        assistant_message=assistant_message,
+        model=model,
+        tokens_used=tokens_used,
+        assistant_metadata=assistant_metadata if assistant_metadata else None
+    )
+
+    # 7. 🚨 Логируем emergency events (если были)
+    urgent_signal = context.urgent_signal
+    if urgent_signal and urgent_signal.urgency == 'high':
+        logger.info(
+            f"✅ Emergency response sent to user {user_id}: "
+            f"emotion={urgent_signal.emotion}, "
+            f"confidence={urgent_signal.confidence:.2f}, "
+            f"keywords={urgent_signal.trigger_keywords}"
+        )
+
+    from utils.task_helpers import create_safe_task
+
+    # 8. ⭐ STAGE 3: Анализ паттернов (в фоне, не блокирует ответ)
+    if is_feature_enabled('ENABLE_PATTERN_ANALYSIS'):
+        from bot.services import pattern_analyzer
+        create_safe_task(
+            pattern_analyzer.analyze_if_needed(user_id, assistant_type),
+            f"pattern_analysis_user_{user_id}"
+        )
+
+    # 9. Обновляем статистику
+    create_safe_task(_update_statistics(assistant_type, success=True), "update_statistics")
+
+    return assistant_message
+
+
+def _report_completion_error(source: str, error: Exception, user_id: int, assistant_type: str) -> None:
+    logger.error(f"Error in {source}: {error}", exc_info=True)
+
+    # Обновляем статистику ошибок
+    from utils.task_helpers import create_safe_task
+    create_safe_task(_update_statistics(assistant_type, success=False), "update_statistics_error")
+
+    schedule_exception_report(
+        f"openai_service.{source}",
+        error,
+        extras={
+            "user_id": user_id,
+            "assistant_type": assistant_type,
+        },
+    )
+
+
 async def get_chat_completion(
     user_id: int,
     message: str,
@@ -737,171 +1043,154 @@ async def get_chat_completion(
         Ответ ассистента или None при ошибке
     """
     try:
-        # 🚨 STEP 0: Проверяем экстренные эмоциональные сигналы (< 1ms)
-        urgent_signal = detect_urgent_emotional_signals(message)
-        emergency_override = should_override_system_prompt(urgent_signal)
-
-        dialogue_config = DIALOGUE_CONFIG.get(assistant_type)
-        dialogue_state = None
-        expected_dialogue_role = None
-        extra_sections: List[str] = []
-
-        if dialogue_config:
-            raw_history_for_dialogue = await conversation_history.get_history(
-                user_id=user_id,
-                assistant_type=assistant_type,
-                limit=100
+        with tracing.span("chat_completion", assistant_type=assistant_type, model=model):
+            context = await _prepare_completion(
+                user_id, message, assistant_type, max_history_messages, temperature
             )
-            dialogue_state = _calculate_dialogue_state(raw_history_for_dialogue, dialogue_config)
-            if not emergency_override:
-                expected_dialogue_role = _determine_expected_role(dialogue_state)
-                dialogue_section = _render_dialogue_state_section(
-                    assistant_type,
-                    dialogue_state,
-                    expected_dialogue_role
+
+            # 4. Вызываем ChatCompletion API
+            with tracing.span("openai.chat.completions", model=model) as api_span:
+                response: ChatCompletion = await client.chat.completions.create(
+                    model=model,
+                    messages=context.messages,
+                    temperature=context.temperature,
+                    max_tokens=2000
                 )
-                if dialogue_section:
-                    extra_sections.append(dialogue_section)
-        
-        # 1. Строим system prompt (emergency или normal mode)
-        if emergency_override:
-            # EMERGENCY MODE: используем экстренный prompt
-            base_instructions = _get_base_instructions(assistant_type)
-            system_prompt = build_emergency_prompt(
-                emotion=urgent_signal.emotion,
-                base_instructions=base_instructions
+                tokens_used = response.usage.total_tokens if response.usage else None
+                api_span.set(tokens=tokens_used or 0)
+
+            # 5. Извлекаем ответ
+            return await _finalize_completion(
+                context,
+                response.choices[0].message.content,
+                model=model,
+                tokens_used=tokens_used,
             )
-            
-            logger.warning(
-                f"🚨 EMERGENCY MODE activated for user {user_id}: "
-                f"{urgent_signal.emotion} (urgency: {urgent_signal.urgency}, "
-                f"confidence: {urgent_signal.confidence:.2f})"
-            )
-        else:
-            # NORMAL MODE: стандартный персонализированный prompt
-            system_prompt = await build_system_prompt(
-                user_id,
-                assistant_type,
-                extra_sections=extra_sections if extra_sections else None,
-                user_message=message,
-            )
-        
-        # 2. Загружаем историю сообщений
-        history = await conversation_history.get_context(
-            user_id=user_id,
-            assistant_type=assistant_type,
-            max_messages=max_history_messages
-        )
-        
-        # 3. Формируем messages для OpenAI
-        messages = [
-            {"role": "system", "content": system_prompt}
-        ]
-        messages.extend(history)
-        messages.append({"role": "user", "content": message})
-        
-        # 🌡️ Применяем temperature adaptation
-        profile = await user_profile.get_or_create(user_id)
-        temp_overrides = adapt_style_to_temperature(profile)
-        effective_temperature = temperature * temp_overrides['intensity_modifier']
-        
-        # 4. Вызываем ChatCompletion API
-        response: ChatCompletion = await client.chat.completions.create(
+
+    except Exception as e:
+        _report_completion_error("get_chat_completion", e, user_id, assistant_type)
+        return None
+
+
+def _save_interrupted_stream(
+    context: _CompletionContext,
+    partial_message: str,
+    model: str,
+    tokens_used: Optional[int],
+) -> None:
+    """Сохранить диалог оборванного стрима в фоне (генератор уже не может await)"""
+    from utils.task_helpers import create_safe_task
+
+    if partial_message:
+        coro = save_conversation(
+            user_id=context.user_id,
+            assistant_type=context.assistant_type,
+            user_message=context.message,
+            assistant_message=partial_message,
             model=model,
-            messages=messages,
-            temperature=effective_temperature,
-            max_tokens=2000
+            tokens_used=tokens_used,
+            assistant_metadata={'interrupted': True},
         )
-        
-        # 5. Извлекаем ответ
-        assistant_message = response.choices[0].message.content
-        
-        profile = await user_profile.get_or_create(user_id)
-        assistant_message = await build_personalized_response(
-            user_id=user_id,
-            assistant_type=assistant_type,
-            profile=profile,
-            base_response=assistant_message,
-            user_message=message,
+    else:
+        coro = conversation_history.add_message(
+            user_id=context.user_id,
+            assistant_type=context.assistant_type,
+            role='user',
+            content=context.message,
+            extra_metadata={'timestamp': datetime.utcnow().isoformat()},
         )
+    create_safe_task(coro, f"save_interrupted_stream_{context.user_id}")
 
-        if profile and profile.message_length:
-            assistant_message = _enforce_message_length(assistant_message, profile.message_length)
-            
-            # 📝 НОВОЕ: Adaptive formatting (адаптивное форматирование)
-            assistant_message = format_bot_message(
-                text=assistant_message,
-                message_length_preference=profile.message_length,
-                learning_preferences=profile.learning_preferences,
-                assistant_type=assistant_type
-            )
-        
-        # 6. Сохраняем сообщения в историю
-        assistant_metadata: Dict[str, object] = {}
-        if dialogue_state and expected_dialogue_role:
-            if expected_dialogue_role == 'question':
-                assistant_metadata['dialogue_role'] = 'question'
-                assistant_metadata['dialogue_question_index'] = dialogue_state['questions'] + 1
-            elif expected_dialogue_role == 'summary':
-                assistant_metadata['dialogue_role'] = 'summary'
-                assistant_metadata['dialogue_question_index'] = dialogue_state['questions']
-            else:
-                assistant_metadata['dialogue_role'] = 'post_summary'
-                assistant_metadata['dialogue_question_index'] = dialogue_state['questions']
 
-        await save_conversation(
-            user_id=user_id,
-            assistant_type=assistant_type,
-            user_message=message,
-            assistant_message=assistant_message,
-            model=model,
-            tokens_used=response.usage.total_tokens if response.usage else None,
-            assistant_metadata=assistant_metadata if assistant_metadata else None
-        )
-        
-        # 7. 🚨 Логируем emergency events (если были)
-        if urgent_signal and urgent_signal.urgency == 'high':
-            logger.info(
-                f"✅ Emergency response sent to user {user_id}: "
-                f"emotion={urgent_signal.emotion}, "
-                f"confidence={urgent_signal.confidence:.2f}, "
-                f"keywords={urgent_signal.trigger_keywords}"
-            )
-        
-        # 8. ⭐ STAGE 3: Анализ паттернов (в фоне, не блокирует ответ)
-        if is_feature_enabled('ENABLE_PATTERN_ANALYSIS'):
-            from bot.services import pattern_analyzer
-            from utils.task_helpers import create_safe_task
-            create_safe_task(
-                pattern_analyzer.analyze_if_needed(user_id, assistant_type),
-                f"pattern_analysis_user_{user_id}"
+async def stream_chat_completion(
+    user_id: int,
+    message: str,
+    assistant_type: str,
+    model: str = "gpt-4-turbo-preview",
+    max_history_messages: int = 10,
+    temperature: float = 0.7
+) -> AsyncIterator[Dict[str, object]]:
+    """
+    Потоковый вариант get_chat_completion
+
+    Тот же pipeline (prompt, история, персонализация, сохранение), но
+    токены модели отдаются по мере генерации.
+
+    Yields:
+        {'type': 'delta', 'content': str} — очередной фрагмент ответа модели
+        {'type': 'done', 'response': str} — финальный текст после персонализации
+            и форматирования (именно он сохраняется в историю)
+        {'type': 'error'} — ошибка; диалог не сохраняется
+
+    Если клиент отключился посреди стрима (генератор закрыт или отменён),
+    сообщение пользователя и уже полученная часть ответа сохраняются
+    фоновой задачей с пометкой interrupted. Финализация после стрима
+    защищена от отмены и доводит сохранение до конца.
+    """
+    # Span'ы нельзя держать текущими через yield: span запроса активируется
+    # только на участках между yield, OpenAI-span закрывается вручную
+    completion_span = tracing.start_span(
+        "chat_completion", assistant_type=assistant_type, model=model, stream=True
+    )
+    try:
+        with tracing.use_span(completion_span):
+            context = await _prepare_completion(
+                user_id, message, assistant_type, max_history_messages, temperature
             )
-        
-        # 9. Обновляем статистику
-        from utils.task_helpers import create_safe_task
-        create_safe_task(_update_statistics(assistant_type, success=True), "update_statistics")
-        
-        return assistant_message
-        
+            api_span = tracing.start_span("openai.chat.completions", model=model, stream=True)
+
+        parts: List[str] = []
+        tokens_used = None
+        usage = None
+
+        try:
+            with tracing.use_span(api_span):
+                stream = await client.chat.completions.create(
+                    model=model,
+                    messages=context.messages,
+                    temperature=context.temperature,
+                    max_tokens=2000,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+            async with stream:
+                async for chunk in stream:
+                    if chunk.usage:
+                        usage = chunk.usage
+                        tokens_used = usage.total_tokens
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if not parts:
+                            api_span.set(ttft_ms=round(api_span.elapsed_ms(), 1))
+                        parts.append(delta)
+                        yield {'type': 'delta', 'content': delta}
+        except (GeneratorExit, asyncio.CancelledError):
+            _save_interrupted_stream(context, ''.join(parts), model=model, tokens_used=tokens_used)
+            raise
+        finally:
+            api_span.set(tokens=tokens_used or 0)
+            api_span.end()
+            metrics.record_usage(usage, model, lane='chat')
+
+        with tracing.use_span(completion_span):
+            finalize_task = asyncio.ensure_future(_finalize_completion(
+                context, ''.join(parts), model=model, tokens_used=tokens_used
+            ))
+        # shield: отключение клиента не обрывает сохранение диалога
+        final_message = await asyncio.shield(finalize_task)
+        yield {'type': 'done', 'response': final_message}
+
     except Exception as e:
-        logger.error(f"Error in get_chat_completion: {e}", exc_info=True)
-        
-        # Обновляем статистику ошибок
-        from utils.task_helpers import create_safe_task
-        create_safe_task(_update_statistics(assistant_type, success=False), "update_statistics_error")
-        
-        schedule_exception_report(
-            "openai_service.get_chat_completion",
-            e,
-            extras={
-                "user_id": user_id,
-                "assistant_type": assistant_type,
-            },
-        )
-        
-        return None
+        completion_span.error = type(e).__name__
+        _report_completion_error("stream_chat_completion", e, user_id, assistant_type)
+        yield {'type': 'error'}
+    finally:
+        completion_span.end()
 
 
+@tracing.traced("save_conversation")
 async def save_conversation(
     user_id: int,
     assistant_type: str,
@@ -6,6 +6,7 @@
 2. Deep Analysis (после 20 сообщений) - инсайты + recommendations
 3. Дедупликация через embeddings
 4. Learning loop (что работает/не работает)
+5. Изменения профиля за анализ сохраняются одним UPDATE (ProfileDelta)
 
 Architecture: Moderate + Embeddings
 """
@@ -18,12 +19,13 @@ from typing import Optional
 import json
 
 from openai import AsyncOpenAI
-from sqlalchemy import update
 
 from config import OPENAI_API_KEY, is_feature_enabled
-from bot.services import embedding_service
+from bot.services import embedding_service, profile_delta, symptom_scanner
+from bot.services.profile_delta import ProfileDelta
 from bot.services.pattern_context_filter import (
     TOPIC_KEYWORDS,
+    attach_topic_vector,
     infer_context_weights_from_tags,
     merge_context_weights,
     normalize_topic,
@@ -51,13 +53,12 @@ from bot.services.constants import (
 )
 from bot.services.prompt.analysis_prompts import get_quick_analysis_prompt, get_deep_analysis_prompt
 from database.repository import user_profile, conversation_history
-from database.database import db
-from database.models.user_profile import UserProfile
 import database.repository.user as db_user
+from utils import metrics
 
 logger = logging.getLogger(__name__)
 
-client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+client = metrics.instrument_openai(AsyncOpenAI(api_key=OPENAI_API_KEY), lane='pattern_analysis')
 
 
 QUICK_ANALYSIS_RESPONSE_FORMAT = {
@@ -332,7 +333,11 @@ def _build_response_hint_from_insight(insight: dict) -> Optional[dict]:
 # 🎯 QUICK ANALYSIS (каждые 5 сообщений)
 # ==========================================
 
-async def quick_analysis(user_id: int, assistant_type: str = 'helper'):
+async def quick_analysis(
+    user_id: int,
+    assistant_type: str = 'helper',
+    messages: Optional[list[dict]] = None
+):
     """
     Быстрый анализ последних 5-10 сообщений
     
@@ -344,6 +349,7 @@ async def quick_analysis(user_id: int, assistant_type: str = 'helper'):
     Args:
         user_id: ID пользователя
         assistant_type: Тип ассистента
+        messages: Уже загруженная история (иначе читается из БД)
     """
     if not is_feature_enabled('ENABLE_PATTERN_ANALYSIS'):
         return
@@ -352,11 +358,12 @@ async def quick_analysis(user_id: int, assistant_type: str = 'helper'):
         logger.info(f"Quick analysis for user {user_id}")
         
         # Получаем последние сообщения (из constants)
-        messages = await conversation_history.get_context(
-            user_id=user_id,
-            assistant_type=assistant_type,
-            max_messages=QUICK_ANALYSIS_CONTEXT_SIZE
-        )
+        if messages is None:
+            messages = await conversation_history.get_context(
+                user_id=user_id,
+                assistant_type=assistant_type,
+                max_messages=QUICK_ANALYSIS_CONTEXT_SIZE
+            )
         
         if len(messages) < QUICK_ANALYSIS_MIN_MESSAGES:
             logger.debug("Not enough messages for analysis")
@@ -405,43 +412,43 @@ async def quick_analysis(user_id: int, assistant_type: str = 'helper'):
                 analysis['new_patterns'] = []
             analysis['new_patterns'].extend(critical_missing)
         
-        # Обновляем паттерны (с дедупликацией)
-        if analysis.get('new_patterns'):
-            await _add_patterns_with_dedup(user_id, analysis['new_patterns'], existing_patterns)
-            # LOG: Сколько паттернов после мерджа
-            updated_profile = await user_profile.get_or_create(user_id)
-            total_patterns = len(updated_profile.patterns.get('patterns', []))
-            logger.info(f"[QUICK ANALYSIS] User {user_id}: Total patterns after merge: {total_patterns}")
-
-            pattern_hints = [
-                _build_response_hint_from_pattern(pattern)
-                for pattern in analysis['new_patterns']
-            ]
-            pattern_hints = [hint for hint in pattern_hints if hint]
-            if pattern_hints:
-                await user_profile.add_response_hints(user_id, pattern_hints)
-        
-        # Обновляем emotional state
-        if analysis.get('mood'):
-            mood_data = analysis['mood'].copy()
-            
-            # ⚠️ Двойная проверка stress level: наша heuristic vs GPT
-            # Если наша функция находит более высокий стресс - используем её
-            updated_profile = await user_profile.get_or_create(user_id)
-            all_patterns = updated_profile.patterns.get('patterns', [])
-            calculated_stress = _calculate_stress_level(all_patterns, messages)
-            gpt_stress = mood_data.get('stress_level', 'medium')
-            
-            # Приоритет: critical > high > medium > low
-            stress_priority = {'critical': 4, 'high': 3, 'medium': 2, 'low': 1}
-            if stress_priority.get(calculated_stress, 0) > stress_priority.get(gpt_stress, 0):
-                logger.info(
-                    f"⚠️ Stress level override: GPT={gpt_stress}, "
-                    f"calculated={calculated_stress}. Using calculated value."
-                )
-                mood_data['stress_level'] = calculated_stress
+        async def apply(delta: ProfileDelta):
+            # Обновляем паттерны (с дедупликацией)
+            if analysis.get('new_patterns'):
+                # Копии: при конфликте apply повторяется поверх свежего профиля
+                new_patterns = [dict(pattern) for pattern in analysis['new_patterns']]
+                await _add_patterns_with_dedup(delta, new_patterns)
+                # LOG: Сколько паттернов после мерджа
+                logger.info(f"[QUICK ANALYSIS] User {user_id}: Total patterns after merge: {len(delta.patterns)}")
+
+                pattern_hints = [
+                    _build_response_hint_from_pattern(pattern)
+                    for pattern in new_patterns
+                ]
+                delta.add_response_hints([hint for hint in pattern_hints if hint])
             
-            await _update_emotional_state(user_id, mood_data)
+            # Обновляем emotional state
+            if analysis.get('mood'):
+                mood_data = analysis['mood'].copy()
+                
+                # ⚠️ Двойная проверка stress level: наша heuristic vs GPT
+                # Если наша функция находит более высокий стресс - используем её
+                calculated_stress = _calculate_stress_level(delta.patterns, messages)
+                gpt_stress = mood_data.get('stress_level', 'medium')
+                
+                # Приоритет: critical > high > medium > low
+                stress_priority = {'critical': 4, 'high': 3, 'medium': 2, 'low': 1}
+                if stress_priority.get(calculated_stress, 0) > stress_priority.get(gpt_stress, 0):
+                    logger.info(
+                        f"⚠️ Stress level override: GPT={gpt_stress}, "
+                        f"calculated={calculated_stress}. Using calculated value."
+                    )
+                    mood_data['stress_level'] = calculated_stress
+                
+                _update_emotional_state(delta, mood_data)
+        
+        # Все изменения профиля — одним UPDATE
+        await profile_delta.commit(user_id, apply, profile=profile)
         
         logger.info(f"Quick analysis complete: {len(analysis.get('new_patterns', []))} patterns, mood={analysis.get('mood', {}).get('current_mood')}")
         
@@ -515,7 +522,11 @@ async def _analyze_conversation_quick(
 # 🔍 DEEP ANALYSIS (каждые 20 сообщений)
 # ==========================================
 
-async def deep_analysis(user_id: int, assistant_type: str = 'helper'):
+async def deep_analysis(
+    user_id: int,
+    assistant_type: str = 'helper',
+    messages: Optional[list[dict]] = None
+):
     """
     Глубокий анализ паттернов и генерация инсайтов
     
@@ -528,6 +539,7 @@ async def deep_analysis(user_id: int, assistant_type: str = 'helper'):
     Args:
         user_id: ID пользователя
         assistant_type: Тип ассистента
+        messages: Уже загруженная история (иначе читается из БД)
     """
     if not is_feature_enabled('ENABLE_PATTERN_ANALYSIS'):
         return
@@ -536,11 +548,12 @@ async def deep_analysis(user_id: int, assistant_type: str = 'helper'):
         logger.info(f"Deep analysis for user {user_id}")
         
         # Получаем последние сообщения (из constants)
-        messages = await conversation_history.get_context(
-            user_id=user_id,
-            assistant_type=assistant_type,
-            max_messages=DEEP_ANALYSIS_CONTEXT_SIZE
-        )
+        if messages is None:
+            messages = await conversation_history.get_context(
+                user_id=user_id,
+                assistant_type=assistant_type,
+                max_messages=DEEP_ANALYSIS_CONTEXT_SIZE
+            )
         
         if len(messages) < DEEP_ANALYSIS_MIN_MESSAGES:
             logger.debug("Not enough messages for deep analysis")
@@ -568,28 +581,33 @@ async def deep_analysis(user_id: int, assistant_type: str = 'helper'):
                 f"[DEEP ANALYSIS] User {user_id}: Safety net found {len(critical_missing)} "
                 f"missing critical patterns. Force-adding."
             )
-            # Добавляем прямо в профиль (минуя GPT)
-            await _add_patterns_with_dedup(user_id, critical_missing, existing_patterns)
         
-        # Генерируем инсайты
-        if analysis.get('insights'):
-            await _add_insights(user_id, analysis['insights'], existing_patterns)
-
-            insight_hints = [
-                _build_response_hint_from_insight(insight)
-                for insight in analysis['insights']
-            ]
-            insight_hints = [hint for hint in insight_hints if hint]
-            if insight_hints:
-                await user_profile.add_response_hints(user_id, insight_hints)
-        
-        # Обновляем related patterns
-        if existing_patterns:
-            await _update_related_patterns(user_id, existing_patterns)
+        async def apply(delta: ProfileDelta):
+            # Добавляем прямо в профиль (минуя GPT)
+            if critical_missing:
+                await _add_patterns_with_dedup(delta, [dict(pattern) for pattern in critical_missing])
+            
+            # Генерируем инсайты
+            if analysis.get('insights'):
+                new_insights = [dict(insight) for insight in analysis['insights']]
+                _add_insights(delta, new_insights)
+
+                insight_hints = [
+                    _build_response_hint_from_insight(insight)
+                    for insight in new_insights
+                ]
+                delta.add_response_hints([hint for hint in insight_hints if hint])
+            
+            # Обновляем related patterns
+            if delta.patterns:
+                await _update_related_patterns(delta)
+            
+            # Обновляем learning preferences
+            if analysis.get('learning'):
+                _update_learning_preferences(delta, analysis['learning'])
         
-        # Обновляем learning preferences
-        if analysis.get('learning'):
-            await _update_learning_preferences(user_id, analysis['learning'])
+        # Все изменения профиля — одним UPDATE
+        await profile_delta.commit(user_id, apply, profile=profile)
         
         logger.info(f"Deep analysis complete: {len(analysis.get('insights', []))} insights generated")
         
@@ -709,6 +727,18 @@ def _validate_pattern_examples(pattern: dict, recent_messages: list[dict]) -> di
     return pattern
 
 
+def _log_scan(scan: symptom_scanner.ScanResult, category: str) -> int:
+    score = scan.score(category)
+    weights = {hit.rule: hit.weight for hit in scan.hits.get(category, ())}
+    for rule in scan.rules(category):
+        if category == 'depression' and weights[rule] >= symptom_scanner.DEPRESSION_CRITICAL_WEIGHT:
+            logger.warning(f"🚨 CRITICAL depression symptom detected: {rule}")
+        else:
+            logger.debug(f"🔎 {category} symptom detected: {rule}")
+    logger.info(f"🔎 {category.capitalize()} score calculated: {score}")
+    return score
+
+
 def _calculate_burnout_score(recent_text: str) -> int:
     """
     Рассчитывает burnout score на основе ключевых симптомов
@@ -719,54 +749,8 @@ def _calculate_burnout_score(recent_text: str) -> int:
     Returns:
         Burnout score (0-20+)
     """
-    import re
-    
-    score = 0
-    
-    # CRITICAL SYMPTOMS (3 points each):
-    critical_symptoms = {
-        'overwork': r'работа\w* (по )?\d+ час',  # работаю 14 часов
-        'cognitive_dysfunction': r'(забыл|выпало из головы).*(важн|встреч|дедлайн|задач)',
-        'concentration': r'не могу (сконцентр|концентр|сосредоточ|думать)',  # fixed: added "сконцентр"
-        'anhedonia': r'не помню когда.*(счастлив|радовал|удовольств)',
-    }
-    
-    for symptom, pattern in critical_symptoms.items():
-        if re.search(pattern, recent_text):
-            score += 3
-            logger.debug(f"🔥 Burnout critical symptom detected: {symptom}")
-    
-    # MAJOR SYMPTOMS (2 points each):
-    major_symptoms = [
-        r'нет сил',
-        r'устал\w*',
-        r'выгоран\w*',
-        r'как робот',
-        r'на износ',
-        r'каждый день работ',
-        r'без выходных',
-        r'не отдыхал',
-    ]
-    
-    for pattern in major_symptoms:
-        if re.search(pattern, recent_text):
-            score += 2
-            logger.debug(f"🔥 Burnout major symptom detected: {pattern}")
-    
-    # MINOR SYMPTOMS (1 point each):
-    minor_symptoms = [
-        r'зачем стараться',
-        r'нет смысла',
-        r'всё надоело',
-        r'хочется бросить',
-    ]
-    
-    for pattern in minor_symptoms:
-        if re.search(pattern, recent_text):
-            score += 1
-    
-    logger.info(f"🔥 Burnout score calculated: {score}")
-    return score
+    scan = symptom_scanner.scan_text(recent_text, {'burnout': symptom_scanner.SCORE_RULES['burnout']})
+    return _log_scan(scan, 'burnout')
 
 
 def _extract_burnout_evidence(messages: list[dict], max_evidence: int = 3) -> list[str]:
@@ -780,36 +764,7 @@ def _extract_burnout_evidence(messages: list[dict], max_evidence: int = 3) -> li
     Returns:
         Список цитат (evidence)
     """
-    import re
-    
-    evidence = []
-    
-    burnout_keywords = [
-        r'работа\w* (по )?\d+ час',
-        r'забыл.*(встреч|дедлайн)',
-        r'не могу (сконцентр|концентр|думать)',  # fixed: added "сконцентр"
-        r'нет сил',
-        r'не помню когда.*счастлив',
-        r'как робот',
-        r'выгоран',
-    ]
-    
-    for msg in messages:
-        if msg.get('role') != 'user':
-            continue
-        
-        content = msg.get('content', '')
-        content_lower = content.lower()
-        
-        for pattern in burnout_keywords:
-            if re.search(pattern, content_lower) and content not in evidence:
-                evidence.append(content)
-                break
-        
-        if len(evidence) >= max_evidence:
-            break
-    
-    return evidence
+    return symptom_scanner.extract_evidence(messages, 'burnout', max_evidence)
 
 
 def _calculate_depression_score(recent_text: str) -> int:
@@ -822,85 +777,15 @@ def _calculate_depression_score(recent_text: str) -> int:
     Returns:
         Depression score (0-20+)
     """
-    import re
-    
-    score = 0
-    
-    # CRITICAL SYMPTOMS (4 points each):
-    critical_symptoms = {
-        'suicidal_ideation': r'(хочу умереть|хочется исчезнуть|суицид|покончить с)',
-        'severe_hopelessness': r'(нет смысла жить|всё бессмысленно|зачем жить)',
-    }
-    
-    for symptom, pattern in critical_symptoms.items():
-        if re.search(pattern, recent_text):
-            score += 4
-            logger.warning(f"🚨 CRITICAL depression symptom detected: {symptom}")
-    
-    # MAJOR SYMPTOMS (3 points each):
-    major_symptoms = {
-        'hopelessness': r'(нет смысла|зачем стараться|всё бесполезно|не вижу смысла|какой смысл)',
-        'anhedonia': r'не помню когда.*(счастлив|радовал|удовольств)',
-        'worthlessness': r'(лузер|неудачник|всё неправильно|некомпетент|ничего не стою|бесполезн)',
-        'no_way_out': r'(не вижу выхода|нет выхода|безвыходн)',  # 🆕 V2.1: Added pattern
-    }
-    
-    for symptom, pattern in major_symptoms.items():
-        if re.search(pattern, recent_text):
-            score += 3
-            logger.debug(f"⚠️ Depression major symptom detected: {symptom}")
-    
-    # MINOR SYMPTOMS (1 point each):
-    minor_symptoms = [
-        r'нет сил',
-        r'устал\w* от всего',
-        r'всё надоело',
-    ]
-    
-    for pattern in minor_symptoms:
-        if re.search(pattern, recent_text):
-            score += 1
-    
-    logger.info(f"⚠️ Depression score calculated: {score}")
-    return score
+    scan = symptom_scanner.scan_text(recent_text, {'depression': symptom_scanner.SCORE_RULES['depression']})
+    return _log_scan(scan, 'depression')
 
 
 def _extract_depression_evidence(messages: list[dict], max_evidence: int = 3) -> list[str]:
     """
     Извлекает evidence для depression паттерна из сообщений
     """
-    import re
-    
-    evidence = []
-    
-    depression_keywords = [
-        r'нет смысла',
-        r'не вижу смысла',
-        r'зачем стараться',
-        r'не помню когда.*счастлив',
-        r'не вижу выхода',
-        r'лузер',
-        r'всё неправильно',
-        r'ничего не стою',
-        r'хочу умереть',
-    ]
-    
-    for msg in messages:
-        if msg.get('role') != 'user':
-            continue
-        
-        content = msg.get('content', '')
-        content_lower = content.lower()
-        
-        for pattern in depression_keywords:
-            if re.search(pattern, content_lower) and content not in evidence:
-                evidence.append(content)
-                break
-        
-        if len(evidence) >= max_evidence:
-            break
-    
-    return evidence
+    return symptom_scanner.extract_evidence(messages, 'depression', max_evidence)
 
 
 def _check_critical_patterns_missing(
@@ -922,12 +807,8 @@ def _check_critical_patterns_missing(
     """
     missing = []
     
-    # Собираем текст последних 10 user messages
-    recent_text = ' '.join([
-        msg.get('content', '').lower()
-        for msg in messages[-15:]
-        if msg.get('role') == 'user'
-    ])
+    # Один проход по user messages из последних 15 — оба score сразу
+    scan = symptom_scanner.scan_messages(symptom_scanner.user_texts(messages, last=15))
     
     # CHECK 1: Burnout
     has_burnout = any(
@@ -936,7 +817,7 @@ def _check_critical_patterns_missing(
     )
     
     if not has_burnout:
-        burnout_score = _calculate_burnout_score(recent_text)
+        burnout_score = _log_scan(scan, 'burnout')
         
         # 🆕 V2.1: Use constant threshold
         if burnout_score >= BURNOUT_SCORE_THRESHOLD:
@@ -965,7 +846,7 @@ def _check_critical_patterns_missing(
     )
     
     if not has_depression:
-        depression_score = _calculate_depression_score(recent_text)
+        depression_score = _log_scan(scan, 'depression')
         logger.info(
             "⚠️ Safety net depression score: %s (threshold: %s)",
             depression_score,
@@ -999,13 +880,24 @@ def _check_critical_patterns_missing(
     return missing
 
 
-async def _add_patterns_with_dedup(
-    user_id: int,
+async def _add_patterns_with_dedup(delta: ProfileDelta, new_patterns: list[dict]):
+    """
+    Добавить паттерны в профиль (ProfileDelta) с дедупликацией
+
+    Сохраняет profile_delta.commit() вместе с остальными изменениями анализа
+    """
+    delta.set_patterns(await _merge_patterns(new_patterns, delta.patterns))
+
+
+async def _merge_patterns(
     new_patterns: list[dict],
     existing_patterns: list[dict]
-):
+) -> list[dict]:
     """
-    Добавить паттерны с проверкой на дубликаты через embeddings
+    Смерджить новые паттерны с существующими (через embeddings)
+    
+    Returns:
+        Итоговый список паттернов (не больше 20)
     
     Двухфакторный мердж:
     1. Keyword match (exact title) → форсированный мердж (100% уверенность)
@@ -1100,15 +992,19 @@ async def _add_patterns_with_dedup(
             reverse=True
         )
         existing_patterns = existing_patterns[:20]
+
+    # Topic vectors хранятся в паттерне: relevance scoring в чате не пересканирует evidence
+    for pattern in existing_patterns:
+        attach_topic_vector(pattern)
     
-    # Сохраняем
-    await user_profile.update_patterns(user_id, existing_patterns)
+    return existing_patterns
 
 
-async def _update_related_patterns(user_id: int, patterns: list[dict]):
+async def _update_related_patterns(delta: ProfileDelta):
     """
     Обновить related_patterns через semantic similarity
     """
+    patterns = delta.patterns
     for i, pattern in enumerate(patterns):
         if 'embedding' not in pattern or not pattern['embedding']:
             continue
@@ -1125,20 +1021,19 @@ async def _update_related_patterns(user_id: int, patterns: list[dict]):
         
         pattern['related_patterns'] = [p['id'] for p, _ in related]
     
-    # Сохраняем обновлённые паттерны
-    await user_profile.update_patterns(user_id, patterns)
+    delta.set_patterns(patterns)
 
 
 # ==========================================
 # 💡 ИНСАЙТЫ
 # ==========================================
 
-async def _add_insights(user_id: int, new_insights: list[dict], existing_patterns: list[dict]):
+def _add_insights(delta: ProfileDelta, new_insights: list[dict]):
     """
     Добавить инсайты (с связью к паттернам)
     """
-    profile = await user_profile.get_or_create(user_id)
-    existing_insights = profile.insights.get('insights', [])
+    existing_patterns = delta.patterns
+    existing_insights = delta.insights
     
     for insight in new_insights:
         # Генерируем ID
@@ -1159,8 +1054,7 @@ async def _add_insights(user_id: int, new_insights: list[dict], existing_pattern
     if len(existing_insights) > 10:
         existing_insights = existing_insights[-10:]
     
-    # Сохраняем
-    await user_profile.update_insights(user_id, existing_insights)
+    delta.set_insights(existing_insights)
 
 
 # ==========================================
@@ -1206,13 +1100,11 @@ def _calculate_stress_level(patterns: list[dict], recent_messages: list[dict]) -
             stress_score += 2 * frequency
     
     # 2. DIRECT BURNOUT SCORE from messages (more accurate)
-    recent_text = ' '.join([
-        msg.get('content', '').lower() 
-        for msg in recent_messages[-10:]
-        if msg.get('role') == 'user'
-    ])
-    
-    burnout_score = _calculate_burnout_score(recent_text)
+    scan = symptom_scanner.scan_messages(
+        symptom_scanner.user_texts(recent_messages, last=10),
+        {'burnout': symptom_scanner.SCORE_RULES['burnout']},
+    )
+    burnout_score = _log_scan(scan, 'burnout')
     
     # If burnout score is high, it contributes directly to stress
     # Scaling: burnout_score 6-12 → stress +6-12
@@ -1306,12 +1198,11 @@ def _detect_contradictions(emotional_state: dict, patterns: list[dict]) -> dict:
     return corrected_state
 
 
-async def _update_emotional_state(user_id: int, mood_data: dict):
+def _update_emotional_state(delta: ProfileDelta, mood_data: dict):
     """
     Обновить эмоциональное состояние
     """
-    profile = await user_profile.get_or_create(user_id)
-    emotional_state = profile.emotional_state
+    emotional_state = delta.emotional_state
     
     # Обновляем текущее состояние
     emotional_state['current_mood'] = mood_data.get('current_mood', 'neutral')
@@ -1336,35 +1227,23 @@ async def _update_emotional_state(user_id: int, mood_data: dict):
     emotional_state['mood_history'] = mood_history[-30:]
     
     # ⚠️ Проверка противоречий: если GPT сказал "stress=low", но паттерны говорят "burnout"
-    patterns = profile.patterns.get('patterns', [])
-    emotional_state = _detect_contradictions(emotional_state, patterns)
-    
-    # Сохраняем
-    async with db() as session:
-        await session.execute(
-            update(UserProfile)
-            .where(UserProfile.user_id == user_id)
-            .values(
-                emotional_state=emotional_state,
-                updated_at=datetime.now()
-            )
-        )
-        await session.commit()
+    emotional_state = _detect_contradictions(emotional_state, delta.patterns)
+    
+    delta.set_emotional_state(emotional_state)
 
 
 # ==========================================
 # 🎓 LEARNING PREFERENCES
 # ==========================================
 
-async def _update_learning_preferences(user_id: int, learning_data: dict):
+def _update_learning_preferences(delta: ProfileDelta, learning_data: dict):
     """
     Обновить learning preferences (что работает/не работает)
     
     Использует OrderedDict для сохранения порядка (новые элементы в конец).
     Это важно для UI - показываем последние предпочтения первыми.
     """
-    profile = await user_profile.get_or_create(user_id)
-    learning_prefs = profile.learning_preferences
+    learning_prefs = delta.learning_preferences
     
     # Используем OrderedDict для сохранения порядка (новые в конец)
     # Ключи = items, значения = None (нужны только уникальные ключи)
@@ -1381,23 +1260,73 @@ async def _update_learning_preferences(user_id: int, learning_data: dict):
     learning_prefs['works_well'] = list(works_well.keys())[-MAX_LEARNING_ITEMS:]
     learning_prefs['doesnt_work'] = list(doesnt_work.keys())[-MAX_LEARNING_ITEMS:]
     
-    # Сохраняем
-    async with db() as session:
-        await session.execute(
-            update(UserProfile)
-            .where(UserProfile.user_id == user_id)
-            .values(
-                learning_preferences=learning_prefs,
-                updated_at=datetime.now()
-            )
-        )
-        await session.commit()
+    delta.set_learning_preferences(learning_prefs)
 
 
 # ==========================================
 # 🎯 PUBLIC API
 # ==========================================
 
+class _AnalysisScheduler:
+    """
+    Single-flight анализ на пользователя
+
+    Пока для (user_id, assistant_type) идёт анализ, новые запросы не
+    запускают второй параллельный: они копятся в pending (quick/deep
+    сливаются флагами), и текущий run после завершения делает ещё один
+    проход по свежей истории. Так пачка сообщений даёт максимум один
+    дополнительный анализ, а паттерны профиля не перезаписываются
+    конкурирующими run'ами.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[tuple[int, str], dict[str, bool]] = {}
+        self._running: set[tuple[int, str]] = set()
+
+    def is_running(self, user_id: int, assistant_type: str = 'helper') -> bool:
+        return (user_id, assistant_type) in self._running
+
+    async def submit(self, user_id: int, assistant_type: str, quick: bool, deep: bool) -> None:
+        key = (user_id, assistant_type)
+        pending = self._pending.setdefault(key, {'quick': False, 'deep': False})
+        pending['quick'] |= quick
+        pending['deep'] |= deep
+
+        if key in self._running:
+            logger.debug(f"Analysis for user {user_id} already running, request merged")
+            return
+
+        self._running.add(key)
+        try:
+            while True:
+                pending = self._pending.pop(key, None)
+                if not pending or not (pending['quick'] or pending['deep']):
+                    break
+                await _run_analysis(user_id, assistant_type, pending['quick'], pending['deep'])
+        finally:
+            self._running.discard(key)
+            self._pending.pop(key, None)
+
+
+_scheduler = _AnalysisScheduler()
+
+
+async def _run_analysis(user_id: int, assistant_type: str, quick: bool, deep: bool):
+    """Один run: история читается один раз, deep идёт после quick"""
+    if quick and deep:
+        messages = await conversation_history.get_context(
+            user_id=user_id,
+            assistant_type=assistant_type,
+            max_messages=DEEP_ANALYSIS_CONTEXT_SIZE
+        )
+        await quick_analysis(user_id, assistant_type, messages=messages[-QUICK_ANALYSIS_CONTEXT_SIZE:])
+        await deep_analysis(user_id, assistant_type, messages=messages)
+    elif quick:
+        await quick_analysis(user_id, assistant_type)
+    else:
+        await deep_analysis(user_id, assistant_type)
+
+
 async def analyze_if_needed(user_id: int, assistant_type: str = 'helper'):
     """
     Проверить нужен ли анализ и запустить если нужно
@@ -1406,6 +1335,9 @@ async def analyze_if_needed(user_id: int, assistant_type: str = 'helper'):
     - После 3 сообщений → quick analysis (увеличено с 5 для роста occurrences)
     - После 20 сообщений → deep analysis
     
+    Если анализ пользователя уже идёт, запрос сливается с ним
+    (см. _AnalysisScheduler) и функция сразу возвращается.
+    
     Args:
         user_id: ID пользователя
         assistant_type: Тип ассистента
@@ -1416,11 +1348,9 @@ async def analyze_if_needed(user_id: int, assistant_type: str = 'helper'):
     # Считаем сообщения
     message_count = await conversation_history.count_messages(user_id, assistant_type)
     
-    # Quick analysis (частота из constants)
-    if message_count > 0 and message_count % QUICK_ANALYSIS_FREQUENCY == 0:
-        await quick_analysis(user_id, assistant_type)
-    
-    # Deep analysis (частота из constants)
-    if message_count > 0 and message_count % DEEP_ANALYSIS_FREQUENCY == 0:
-        await deep_analysis(user_id, assistant_type)
+    # Quick / deep analysis (частота из constants)
+    quick = message_count > 0 and message_count % QUICK_ANALYSIS_FREQUENCY == 0
+    deep = message_count > 0 and message_count % DEEP_ANALYSIS_FREQUENCY == 0
 
+    if quick or deep:
+        await _scheduler.submit(user_id, assistant_type, quick, deep)
@@ -11,6 +11,13 @@ pattern analyser itself.  It combines several signals:
 - freshness (recent detections outrank stale ones)
 - plain-text semantic cues from the current user message
 
+Topic detection is word-level: `TOPIC_KEYWORDS` is compiled once at import
+into an inverted index (keyword stem -> topics) and every word of a text is
+looked up by its substrings, so prefixed forms still match ("неуверенность"
+-> "уверен", "переработка" -> "работ").  Each pattern carries a precomputed
+`topic_vector` (topic -> keyword hits in its evidence/description), so
+scoring a pattern against a message is a lookup instead of a rescan.
+
 The entry-points are `get_relevant_patterns_for_quiz` and
 `get_relevant_patterns_for_chat`.
 """
@@ -21,7 +28,8 @@ import logging
 import math
 import re
 from datetime import datetime
-from typing import Dict, Iterable, List, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
 
 TOPIC_KEYWORDS: Dict[str, Tuple[str, ...]] = {
@@ -87,21 +95,6 @@ UNIVERSAL_PATTERN_HINTS: Tuple[str, ...] = (
 logger = logging.getLogger(__name__)
 
 
-def _stem(text: str) -> str:
-    """Very small stemmer: lowercase + strip Russian endings."""
-
-    text = text.lower()
-    if len(text) <= 4:
-        return text
-    for suffix in ("ами", "ями", "ями", "ами", "ого", "ому", "ими", "ыми", "ого",
-                   "ему", "ого", "ой", "ый", "ий", "ое", "ее", "ая", "яя", "ое",
-                   "ие", "ые", "ом", "ем", "ах", "ях", "ой", "ей", "ов", "ев",
-                   "ов", "ев", "ью", "ся", "ть", "ти", "ие", "ый", "ой", "ий"):
-        if text.endswith(suffix) and len(text) - len(suffix) >= 4:
-            return text[:-len(suffix)]
-    return text
-
-
 def normalize_topic(topic: str) -> str:
     topic_lower = topic.lower().strip()
     for canonical, aliases in CATEGORY_ALIASES.items():
@@ -110,20 +103,98 @@ def normalize_topic(topic: str) -> str:
     return topic_lower
 
 
+def _build_keyword_index(
+    topic_keywords: Dict[str, Tuple[str, ...]],
+) -> Dict[str, Tuple[str, ...]]:
+    """Invert TOPIC_KEYWORDS: keyword stem -> topics (e.g. "страх" -> confidence, fears)."""
+
+    index: Dict[str, List[str]] = {}
+    for topic, keywords in topic_keywords.items():
+        for keyword in keywords:
+            topics = index.setdefault(keyword, [])
+            if topic not in topics:
+                topics.append(topic)
+    return {keyword: tuple(topics) for keyword, topics in index.items()}
+
+
+KEYWORD_INDEX: Dict[str, Tuple[str, ...]] = _build_keyword_index(TOPIC_KEYWORDS)
+
+# Stems shorter than this only match a whole word ("я" must not match "ясно").
+_MIN_PREFIX_LENGTH = 3
+_MAX_KEYWORD_LENGTH = max(len(keyword) for keyword in KEYWORD_INDEX)
+_WORD_RE = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=8192)
+def _match_word(word: str) -> Tuple[str, ...]:
+    """Keyword stems found anywhere inside a lowercase word (short stems: whole word only)."""
+
+    found = {word} if word in KEYWORD_INDEX else set()
+    for start in range(len(word) - _MIN_PREFIX_LENGTH + 1):
+        longest = min(len(word), start + _MAX_KEYWORD_LENGTH)
+        for end in range(start + _MIN_PREFIX_LENGTH, longest + 1):
+            if word[start:end] in KEYWORD_INDEX:
+                found.add(word[start:end])
+    return tuple(found)
+
+
 def detect_topics_from_text(text: str) -> Dict[str, int]:
-    stemmed = _stem(text)
-    scores: Dict[str, int] = {}
-    for topic, keywords in TOPIC_KEYWORDS.items():
-        count = sum(1 for kw in keywords if kw in stemmed)
-        if count:
-            scores[topic] = count
-    return scores
+    """Topic -> number of distinct keyword stems found, in TOPIC_KEYWORDS order."""
+
+    if not text:
+        return {}
+    matched: set = set()
+    for word in set(_WORD_RE.findall(text.lower())):
+        matched.update(_match_word(word))
+    if not matched:
+        return {}
+
+    counts: Dict[str, int] = {}
+    for keyword in matched:
+        for topic in KEYWORD_INDEX[keyword]:
+            counts[topic] = counts.get(topic, 0) + 1
+    return {topic: counts[topic] for topic in TOPIC_KEYWORDS if topic in counts}
+
+
+@lru_cache(maxsize=4096)
+def _compute_topic_vector(evidence: Tuple[str, ...], description: str) -> Dict[str, int]:
+    evidence_scores = detect_topics_from_text(" ".join(evidence))
+    description_scores = detect_topics_from_text(description)
+    vector: Dict[str, int] = {}
+    for topic in TOPIC_KEYWORDS:
+        # Evidence (user quotes) wins; description is a fallback per topic.
+        hits = evidence_scores.get(topic) or description_scores.get(topic)
+        if hits:
+            vector[topic] = hits
+    return vector
+
+
+def build_topic_vector(pattern: dict) -> Dict[str, int]:
+    evidence = tuple(str(item) for item in pattern.get("evidence", []) or [])
+    description = str(pattern.get("description") or "")
+    return dict(_compute_topic_vector(evidence, description))
+
+
+def attach_topic_vector(pattern: dict) -> dict:
+    """Store the pattern's topic vector on it (call whenever evidence/description change)."""
+
+    pattern["topic_vector"] = build_topic_vector(pattern)
+    return pattern
+
+
+def pattern_topic_vector(pattern: dict) -> Dict[str, int]:
+    stored = pattern.get("topic_vector")
+    if isinstance(stored, dict):
+        return stored
+    # Patterns saved before topic vectors existed: memoized by content.
+    evidence = tuple(str(item) for item in pattern.get("evidence", []) or [])
+    return _compute_topic_vector(evidence, str(pattern.get("description") or ""))
 
 
 def detect_topic_from_message(message: str) -> str:
     if not message:
         return "self"
-    scores = detect_topics_from_text(message.lower())
+    scores = detect_topics_from_text(message)
     if not scores:
         return "self"
     return max(scores, key=scores.get)
@@ -191,21 +262,10 @@ def _context_weight(pattern: dict, topic: str, *, weights: Optional[Dict[str, fl
     return 0.0
 
 
-def _semantic_boost(pattern: dict, topic: str, user_message: Optional[str]) -> float:
-    if not user_message:
+def _semantic_boost(pattern: dict, topic: str, message_topics: Dict[str, int]) -> float:
+    if not message_topics.get(topic):
         return 0.0
-    topic_keywords = TOPIC_KEYWORDS.get(topic)
-    if not topic_keywords:
-        return 0.0
-    user_lower = user_message.lower()
-    if not any(kw in user_lower for kw in topic_keywords):
-        return 0.0
-    evidence: Iterable[str] = pattern.get("evidence", []) or []
-    text_blob = " ".join(str(item) for item in evidence).lower()
-    matches = sum(1 for kw in topic_keywords if kw in text_blob)
-    if matches == 0:
-        description = (pattern.get("description") or "").lower()
-        matches = sum(1 for kw in topic_keywords if kw in description)
+    matches = pattern_topic_vector(pattern).get(topic, 0)
     if matches == 0:
         return 0.0
     return min(0.35, 0.15 + matches * 0.05)
@@ -214,7 +274,7 @@ def _semantic_boost(pattern: dict, topic: str, user_message: Optional[str]) -> f
 def _score_pattern(
     pattern: dict,
     topic: str,
-    user_message: Optional[str],
+    message_topics: Dict[str, int],
     *,
     min_relevance: float,
     strict: bool,
@@ -222,7 +282,7 @@ def _score_pattern(
     canonical_topic = normalize_topic(topic)
     weights = _extract_context_weights(pattern)
     context_value = _context_weight(pattern, canonical_topic, weights=weights)
-    semantic = _semantic_boost(pattern, canonical_topic, user_message)
+    semantic = _semantic_boost(pattern, canonical_topic, message_topics)
     relevance = max(context_value, semantic)
 
     snippets = pattern.get("context_snippets") or {}
@@ -286,12 +346,14 @@ def filter_patterns_by_relevance(
     max_patterns: int = 5,
 ) -> List[dict]:
     topic = normalize_topic(current_topic)
+    # Message is classified once; each pattern is scored against its stored vector.
+    message_topics = detect_topics_from_text(user_message) if user_message else {}
     scored: List[Tuple[float, float, dict]] = []
     for pattern in patterns or []:
         result = _score_pattern(
             pattern,
             topic,
-            user_message,
+            message_topics,
             min_relevance=min_relevance,
             strict=True,
         )
@@ -304,7 +366,7 @@ def filter_patterns_by_relevance(
             result = _score_pattern(
                 pattern,
                 topic,
-                user_message,
+                message_topics,
                 min_relevance=max(0.2, min_relevance * 0.75),
                 strict=False,
             )
@@ -0,0 +1,143 @@
+"""
+🧾 ProfileDelta — изменения профиля за один анализ
+
+Зачем:
+- Quick/deep analysis писали каждое поле отдельным UPDATE (паттерны,
+  response hints, emotional state, инсайты, related patterns, learning
+  preferences) и перечитывали профиль между шагами — 6-8 походов в БД
+- Теперь анализ меняет копию профиля в памяти, а изменения уходят
+  одним UPDATE ... WHERE user_id = $1 AND updated_at = $2
+
+Optimistic concurrency:
+- Если профиль успели изменить (сменился updated_at), UPDATE ничего не
+  пишет. commit() перечитывает профиль и заново применяет изменения
+  поверх свежей версии (до PROFILE_UPDATE_MAX_ATTEMPTS раз)
+- Поэтому apply-функция не должна полагаться на состояние прошлых попыток
+"""
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from bot.services.constants import PROFILE_UPDATE_MAX_ATTEMPTS
+from database.models.user_profile import UserProfile
+from database.repository import user_profile
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileDelta:
+    """Рабочая копия полей профиля + какие из них изменены"""
+
+    def __init__(self, profile: UserProfile):
+        self.user_id: int = profile.user_id
+        self.expected_updated_at: datetime = profile.updated_at
+
+        # Профиль перечитывается на каждой попытке, поэтому JSON можно
+        # менять на месте — объект отсоединён от сессии
+        self.patterns: list[dict] = list((profile.patterns or {}).get('patterns', []))
+        self.insights: list[dict] = list((profile.insights or {}).get('insights', []))
+        self.emotional_state: dict = dict(profile.emotional_state or {})
+        self.learning_preferences: dict = dict(profile.learning_preferences or {})
+        self.preferences: dict = dict(profile.preferences or {})
+
+        self._dirty: set[str] = set()
+
+    # ------------------------------------------
+    # Изменения
+    # ------------------------------------------
+
+    def set_patterns(self, patterns: list[dict]) -> None:
+        self.patterns = patterns
+        self._dirty.add('patterns')
+
+    def set_insights(self, insights: list[dict]) -> None:
+        self.insights = insights
+        self._dirty.add('insights')
+
+    def set_emotional_state(self, emotional_state: dict) -> None:
+        self.emotional_state = emotional_state
+        self._dirty.add('emotional_state')
+
+    def set_learning_preferences(self, learning_preferences: dict) -> None:
+        self.learning_preferences = learning_preferences
+        self._dirty.add('learning_preferences')
+
+    def add_response_hints(self, hints: list[dict]) -> None:
+        if hints and user_profile.merge_response_hints(self.preferences, hints):
+            self._dirty.add('preferences')
+
+    # ------------------------------------------
+    # Сохранение
+    # ------------------------------------------
+
+    @property
+    def changed_fields(self) -> frozenset[str]:
+        return frozenset(self._dirty)
+
+    def values(self) -> dict:
+        """Значения колонок для UPDATE (только изменённые поля)"""
+        columns = {
+            'patterns': {'patterns': self.patterns},
+            'insights': {'insights': self.insights},
+            'emotional_state': self.emotional_state,
+            'learning_preferences': self.learning_preferences,
+            'preferences': self.preferences,
+        }
+        return {field: columns[field] for field in self._dirty}
+
+    async def flush(self) -> bool:
+        """
+        Записать изменения одним UPDATE
+
+        Returns:
+            True если записано (или нечего писать); False при конфликте
+        """
+        if not self._dirty:
+            return True
+
+        return await user_profile.apply_changes(
+            self.user_id,
+            self.expected_updated_at,
+            self.values(),
+            # Как раньше update_patterns: сохранение паттернов = анализ
+            count_analysis='patterns' in self._dirty,
+        )
+
+
+async def commit(
+    user_id: int,
+    apply: Callable[[ProfileDelta], Awaitable[None]],
+    profile: Optional[UserProfile] = None,
+    max_attempts: int = PROFILE_UPDATE_MAX_ATTEMPTS,
+) -> Optional[ProfileDelta]:
+    """
+    Применить изменения к профилю и сохранить их одним UPDATE
+
+    Args:
+        user_id: ID пользователя
+        apply: async-функция, которая меняет ProfileDelta
+        profile: Уже загруженный профиль (для первой попытки)
+        max_attempts: Сколько раз пересчитать изменения при конфликте
+
+    Returns:
+        Сохранённый ProfileDelta или None, если профиль так и не удалось
+        записать без конфликта
+    """
+    for attempt in range(1, max_attempts + 1):
+        if profile is None:
+            profile = await user_profile.get_or_create(user_id)
+
+        delta = ProfileDelta(profile)
+        await apply(delta)
+
+        if await delta.flush():
+            return delta
+
+        logger.info(
+            f"Profile of user {user_id} changed during analysis, "
+            f"re-applying ({attempt}/{max_attempts})"
+        )
+        profile = None
+
+    logger.warning(f"Profile update for user {user_id} dropped after {max_attempts} conflicts")
+    return None
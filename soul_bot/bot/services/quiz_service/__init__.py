@@ -6,9 +6,11 @@ Quiz Service (Stage 4 - Modular Architecture)
 Модули:
 - generator: Генерация вопросов (MVP → V2 → V3)
 - analyzer: Анализ результатов (переиспользует pattern_analyzer)
+- question_pool: Заранее сгенерированные запасные вопросы (ночная задача)
 """
 from . import generator
 from . import analyzer
+from . import question_pool
 
-__all__ = ['generator', 'analyzer']
+__all__ = ['generator', 'analyzer', 'question_pool']
 
@@ -8,13 +8,18 @@
 - Переиспользуем pattern_analyzer из Stage 3
 - Легко расширяется для deep analysis в V2
 """
+import asyncio
+import html
 import logging
 import json
+from typing import Awaitable, Callable, Optional
+
 from openai import AsyncOpenAI
 
 from config import OPENAI_API_KEY
-from bot.services import pattern_analyzer
-import database.repository.user_profile as db_user_profile
+from utils import metrics
+from bot.services import pattern_analyzer, profile_delta
+from bot.services.constants import QUIZ_ANALYSIS_TIMEOUT
 from bot.services.text_formatting import (
     get_topic_emoji,
     localize_pattern_title,
@@ -23,7 +28,7 @@ from bot.services.text_formatting import (
 
 logger = logging.getLogger(__name__)
 
-client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+client = metrics.instrument_openai(AsyncOpenAI(api_key=OPENAI_API_KEY), lane='quiz')
 
 
 # ==========================================
@@ -33,15 +38,23 @@ client = AsyncOpenAI(api_key=OPENAI_API_KEY)
 async def analyze_quiz_results(
     user_id: int,
     quiz_session: dict,
-    category: str
+    category: str,
+    on_patterns: Optional[Callable[[dict], Awaitable[None]]] = None
 ) -> dict:
     """
     Анализировать результаты квиза
     
+    Рекомендации строятся из тех же паттернов, что уходят в профиль,
+    поэтому GPT-вызов рекомендаций идёт параллельно с обновлением профиля
+    (embeddings + БД). Все GPT-вызовы делят бюджет QUIZ_ANALYSIS_TIMEOUT.
+    
     Args:
         user_id: ID пользователя
         quiz_session: Объект сессии с ответами
         category: Категория квиза
+        on_patterns: Callback с частичным результатом (без recommendations),
+            вызывается как только паттерны сохранены — пока рекомендации
+            ещё генерируются
         
     Returns:
         Результаты анализа:
@@ -52,17 +65,34 @@ async def analyze_quiz_results(
             "confidence": 0.85
         }
     """
+    recommendations_task = None
     try:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + QUIZ_ANALYSIS_TIMEOUT
+
         # 1. Извлекаем ответы (модуль)
         answers = _extract_answers(quiz_session)
         
         # 2. Генерируем паттерны через GPT-4 (модуль)
-        generated_patterns = await _generate_patterns_from_quiz(answers, category)
+        generated_patterns = await _with_budget(
+            _generate_patterns_from_quiz(answers, category),
+            deadline,
+            fallback=[],
+            name="patterns",
+        )
         
         # 3. Локальная дедупликация перед сохранением
         deduplicated_patterns = _deduplicate_patterns(generated_patterns)
         
-        # 4. Переиспользуем pattern_analyzer из Stage 3 и получаем финальные паттерны
+        # 4. Рекомендации (модуль) — параллельно с обновлением профиля
+        recommendations_task = asyncio.create_task(_with_budget(
+            _generate_recommendations(deduplicated_patterns, category),
+            deadline,
+            fallback=["Продолжайте практики самопознания"],
+            name="recommendations",
+        ))
+        
+        # 5. Переиспользуем pattern_analyzer из Stage 3 и получаем финальные паттерны
         finalized_patterns = await _update_profile_with_patterns(
             user_id,
             deduplicated_patterns
@@ -70,16 +100,21 @@ async def analyze_quiz_results(
         # Используем финальные паттерны из профиля, если они есть, иначе fallback на дедуплицированные
         patterns_for_output = finalized_patterns if finalized_patterns else deduplicated_patterns
         
-        # 5. Генерируем рекомендации (модуль)
-        recommendations = await _generate_recommendations(patterns_for_output, category)
-        
-        # 5. Формируем результат
+        # 6. Формируем результат
         result = {
             "new_patterns": patterns_for_output,
-            "recommendations": recommendations,
+            "recommendations": [],
             "confidence": _calculate_confidence(answers),
             "category": category
         }
+
+        if on_patterns is not None:
+            try:
+                await on_patterns(dict(result))
+            except Exception as e:
+                logger.warning(f"Quiz patterns callback failed: {e}")
+
+        result["recommendations"] = await recommendations_task
         
         logger.info(f"Quiz analysis complete for user {user_id}: {len(patterns_for_output)} patterns")
         
@@ -94,6 +129,20 @@ async def analyze_quiz_results(
             "error": str(e)
         }
 
+    finally:
+        if recommendations_task is not None and not recommendations_task.done():
+            recommendations_task.cancel()
+
+
+async def _with_budget(coro: Awaitable, deadline: float, fallback, name: str):
+    """Дождаться GPT-вызова в пределах общего дедлайна, иначе вернуть fallback"""
+    remaining = deadline - asyncio.get_running_loop().time()
+    try:
+        return await asyncio.wait_for(coro, timeout=max(remaining, 0.1))
+    except asyncio.TimeoutError:
+        logger.warning(f"Quiz analysis step '{name}' exceeded {QUIZ_ANALYSIS_TIMEOUT}s budget - using fallback")
+        return fallback
+
 
 # ==========================================
 # 📊 МОДУЛЬ: ИЗВЛЕЧЕНИЕ ОТВЕТОВ
@@ -256,10 +305,6 @@ async def _update_profile_with_patterns(user_id: int, new_patterns: list[dict])
         user_id: ID пользователя
         new_patterns: Новые паттерны (без embeddings)
     """
-    # Получаем профиль
-    profile = await db_user_profile.get_or_create(user_id)
-    existing_patterns = profile.patterns.get('patterns', [])
-    
     # Фиксируем сигнатуры новых паттернов (до мерджа)
     target_signatures = {
         _pattern_signature(pattern)
@@ -271,11 +316,12 @@ async def _update_profile_with_patterns(user_id: int, new_patterns: list[dict])
     # (он автоматически добавит embeddings и проверит дубликаты!)
     from bot.services.pattern_analyzer import _add_patterns_with_dedup
     
-    await _add_patterns_with_dedup(user_id, new_patterns, existing_patterns)
+    async def apply(delta: profile_delta.ProfileDelta):
+        await _add_patterns_with_dedup(delta, [dict(pattern) for pattern in new_patterns])
     
-    # Получаем обновлённый профиль и финальные версии паттернов
-    updated_profile = await db_user_profile.get_or_create(user_id)
-    updated_patterns = updated_profile.patterns.get('patterns', [])
+    # Чтение профиля + один UPDATE; финальные паттерны берём из delta
+    delta = await profile_delta.commit(user_id, apply)
+    updated_patterns = delta.patterns if delta else []
     
     if not updated_patterns:
         return []
@@ -463,8 +509,17 @@ async def format_results_for_telegram(
     
     Стиль: Разговор с другом, который знает тебя 10 лет
     """
-    import html
+    return "\n\n".join(
+        part for part in (
+            format_patterns_for_telegram(results),
+            format_recommendations_for_telegram(results),
+        )
+        if part
+    )
+
 
+def format_patterns_for_telegram(results: dict) -> str:
+    """Первая часть результатов: вступление + паттерны"""
     category_code = (results.get('category') or 'общие')
     category_labels = {
         'relationships': 'отношения',
@@ -477,7 +532,6 @@ async def format_results_for_telegram(
     }
     category_label = category_labels.get(str(category_code).lower(), str(category_code))
     patterns = _deduplicate_patterns(results.get('new_patterns') or [])
-    recommendations = results.get('recommendations') or []
 
     topic_emoji = get_topic_emoji(category_code, "💬")
     sections: list[str] = [
@@ -533,6 +587,14 @@ async def format_results_for_telegram(
     else:
         sections.append("🧩 Пока без ярких паттернов — продолжим диалог, чтобы услышать больше контекста.")
 
+    return "\n\n".join([line for line in sections if line and line.strip()])
+
+
+def format_recommendations_for_telegram(results: dict) -> str:
+    """Вторая часть результатов: шаги + призыв к действию"""
+    recommendations = results.get('recommendations') or []
+    sections: list[str] = []
+
     if recommendations:
         rec_lines = ["🪷 <b>Что попробовать</b>", ""]
         for idx, rec in enumerate(recommendations[:3], 1):
@@ -8,18 +8,22 @@
 - V2: Учёт профиля пользователя (параметр уже предусмотрен!)
 - V3: Adaptive logic (параметр previous_answers тоже готов!)
 """
+import asyncio
 import logging
 import json
 import uuid
-from typing import Optional
+from types import MappingProxyType
+from typing import Mapping, Optional
 from openai import AsyncOpenAI
 
 from config import OPENAI_API_KEY
+from utils import metrics
+from bot.services.constants import QUIZ_ADAPTIVE_QUESTION_TIMEOUT
 from bot.services.pattern_context_filter import get_relevant_patterns_for_quiz
 
 logger = logging.getLogger(__name__)
 
-client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+client = metrics.instrument_openai(AsyncOpenAI(api_key=OPENAI_API_KEY), lane='quiz')
 
 
 # ==========================================
@@ -521,9 +525,18 @@ async def generate_adaptive_question(
     Returns:
         Один адаптивный вопрос (dict)
     """
+    # Поиск противоречий и генерация вопроса идут последовательно (второй
+    # промпт строится из первого), поэтому делят один бюджет времени
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + QUIZ_ADAPTIVE_QUESTION_TIMEOUT
+
     try:
         # 🔥 SEMANTIC ANALYSIS: Анализируем предыдущие ответы через GPT
-        contradictions = await _detect_contradictions_via_gpt(previous_answers, category)
+        contradictions = await _detect_contradictions_via_gpt(
+            previous_answers,
+            category,
+            timeout=QUIZ_ADAPTIVE_QUESTION_TIMEOUT / 2,
+        )
         
         category_info = QUIZ_CATEGORIES.get(
             category,
@@ -651,9 +664,7 @@ Q3: "Что вас беспокоит?" (text)
 REMEMBER: Generate question in RUSSIAN. Mix types. Reference previous answers when possible.
 """
         
-        # ✅ TIER 1: Add timeout to GPT call (20 seconds)
-        import asyncio
-        
+        # ✅ TIER 1: Timeout — остаток общего бюджета
         response = await asyncio.wait_for(
             client.chat.completions.create(
             model="gpt-4o",
@@ -664,7 +675,7 @@ REMEMBER: Generate question in RUSSIAN. Mix types. Reference previous answers wh
             response_format={"type": "json_object"},
             temperature=0.5
             ),
-            timeout=20.0  # ✅ TIER 1: 20 second timeout for GPT
+            timeout=max(deadline - loop.time(), 1.0)
         )
         
         question = json.loads(response.choices[0].message.content)
@@ -691,28 +702,49 @@ REMEMBER: Generate question in RUSSIAN. Mix types. Reference previous answers wh
         return final_question
         
     except asyncio.TimeoutError:
-        logger.warning(f"⏱ Adaptive question generation timed out after 20s - using fallback")
-        # ✅ TIER 1: Fallback при timeout - генерируем базовый вопрос
-        fallback = {
-            "id": f"q{question_number}",
-            "text": "Расскажи больше об этой теме.",
-            "type": "text",
-            "category": category
-        }
-        return _normalize_question_list([fallback], category)[0]
+        logger.warning(f"⏱ Adaptive question generation timed out after {QUIZ_ADAPTIVE_QUESTION_TIMEOUT}s - using fallback")
+        # ✅ TIER 1: Fallback при timeout — вопрос из заранее сгенерированного пула
+        return await _adaptive_fallback_question(category, question_number, previous_answers)
     except Exception as e:
         logger.error(f"Adaptive question generation failed: {e}")
-        # Fallback: generate basic question
-        fallback = {
-            "id": f"q{question_number}",
-            "text": "Расскажи больше об этой теме.",
-            "type": "text",
-            "category": category
-        }
-        return _normalize_question_list([fallback], category)[0]
+        return await _adaptive_fallback_question(category, question_number, previous_answers)
 
 
-async def _detect_contradictions_via_gpt(answers: list[dict], category: str) -> list[str]:
+async def _adaptive_fallback_question(
+    category: str,
+    question_number: int,
+    previous_answers: list[dict]
+) -> dict:
+    """Вопрос из ночного пула, а если пул пуст — базовый текстовый вопрос"""
+    from bot.services.quiz_service import question_pool
+
+    try:
+        pooled = await question_pool.pick_questions(
+            category,
+            1,
+            exclude_texts=[a.get('question_text') for a in previous_answers],
+        )
+    except Exception as e:
+        logger.warning(f"Quiz question pool unavailable: {e}")
+        pooled = []
+
+    if pooled:
+        return pooled[0]
+
+    fallback = {
+        "id": f"q{question_number}",
+        "text": "Расскажи больше об этой теме.",
+        "type": "text",
+        "category": category
+    }
+    return _normalize_question_list([fallback], category)[0]
+
+
+async def _detect_contradictions_via_gpt(
+    answers: list[dict],
+    category: str,
+    timeout: float = 20.0
+) -> list[str]:
     """
     🔥 V2: Детектировать СКРЫТЫЕ противоречия через GPT (semantic analysis)
     
@@ -723,6 +755,7 @@ async def _detect_contradictions_via_gpt(answers: list[dict], category: str) ->
     Args:
         answers: Список ответов с вопросами
         category: Категория квиза (для контекста)
+        timeout: Таймаут GPT-вызова (сек), после него — keyword fallback
         
     Returns:
         Список противоречий (1-3 самых интересных)
@@ -782,9 +815,7 @@ QUALITY over QUANTITY: Better 1 good insight than 3 obvious ones.
 """
     
     try:
-        # ✅ TIER 1: Add timeout to GPT call (20 seconds)
-        import asyncio
-        
+        # ✅ TIER 1: Add timeout to GPT call
         response = await asyncio.wait_for(
             client.chat.completions.create(
             model="gpt-4o-mini",  # Fast & cheap для mid-quiz analysis
@@ -795,7 +826,7 @@ QUALITY over QUANTITY: Better 1 good insight than 3 obvious ones.
             response_format={"type": "json_object"},
             temperature=0.3  # Low temperature для более deterministic
             ),
-            timeout=20.0  # ✅ TIER 1: 20 second timeout for GPT
+            timeout=timeout
         )
         
         result = json.loads(response.choices[0].message.content)
@@ -808,7 +839,7 @@ QUALITY over QUANTITY: Better 1 good insight than 3 obvious ones.
         return contradictions[:2]  # Limit to top 2
         
     except asyncio.TimeoutError:
-        logger.warning(f"⏱ GPT contradiction detection timed out after 20s - using fallback")
+        logger.warning(f"⏱ GPT contradiction detection timed out after {timeout}s - using fallback")
         # ✅ TIER 1: Fallback при timeout
         return _detect_answer_contradictions_keyword_fallback(answers)
     except Exception as e:
@@ -1014,47 +1045,18 @@ async def generate_questions(
 ) -> list[dict]:
     """Сформировать первые вопросы живого квиз-диалога."""
     try:
-        category_info = QUIZ_CATEGORIES.get(
-            category,
-            {
-                "name": category,
-                "description": "",
-                "emoji": "🧠",
-                "tone_hint": "Говори по-человечески."
-            },
-        )
-
         target_count = min(max(count, 3), TARGET_QUESTION_COUNT)
-        questions: list[dict] = []
-
-        # 1. Крючки на прогрев — для новых людей берём больше (3), для тёплой базы меньше (1-2)
-        seed_pack = _clone_seed_questions(category)
-        if not user_profile or not user_profile.get("patterns"):
-            # Новые пользователи: даём 3 seed вопроса (включая сценарный)
-            questions.extend(seed_pack[:3])
-        else:
-            # Пользователи с историей: 1-2 вопроса в зависимости от количества паттернов
-            patterns_count = len(user_profile.get("patterns", []))
-            seed_count = 1 if patterns_count >= 3 else 2
-            questions.extend(seed_pack[:seed_count])
-
-        # 2. Быстро сверяем, жив ли прежний анализ.
-        questions.extend(_build_profile_probe_questions(user_profile, category))
-
-        questions = _normalize_question_list(questions, category)
+        questions = build_initial_questions(category, user_profile)
 
         # 3. Остаток докидываем через GPT, чтобы не упасть в унылый тест.
         if len(questions) < target_count:
-            remaining = target_count - len(questions)
-            dynamic_questions = await _generate_dynamic_batch(
+            questions.extend(await generate_dynamic_questions(
                 category=category,
-                category_info=category_info,
-                needed=remaining,
+                needed=target_count - len(questions),
                 existing_questions=questions,
                 user_profile=user_profile,
-                previous_answers=previous_answers or [],
-            )
-            questions.extend(dynamic_questions)
+                previous_answers=previous_answers,
+            ))
 
         return questions[:target_count]
 
@@ -1063,15 +1065,91 @@ async def generate_questions(
         return _get_fallback_questions(category, count)
 
 
+def build_initial_questions(
+    category: str,
+    user_profile: Optional[dict] = None
+) -> list[dict]:
+    """
+    Первые вопросы квиза без обращения к GPT: seed-крючки + сверка профиля
+
+    Первый вопрос можно показать сразу, а остаток догенерировать
+    в фоне через generate_dynamic_questions.
+    """
+    questions: list[dict] = []
+
+    # 1. Крючки на прогрев — для новых людей берём больше (3), для тёплой базы меньше (1-2)
+    seed_pack = _clone_seed_questions(category)
+    if not user_profile or not user_profile.get("patterns"):
+        # Новые пользователи: даём 3 seed вопроса (включая сценарный)
+        questions.extend(seed_pack[:3])
+    else:
+        # Пользователи с историей: 1-2 вопроса в зависимости от количества паттернов
+        patterns_count = len(user_profile.get("patterns", []))
+        seed_count = 1 if patterns_count >= 3 else 2
+        questions.extend(seed_pack[:seed_count])
+
+    # 2. Быстро сверяем, жив ли прежний анализ.
+    questions.extend(_build_profile_probe_questions(user_profile, category))
+
+    return _normalize_question_list(questions, category)
+
+
+async def generate_dynamic_questions(
+    category: str,
+    needed: int,
+    existing_questions: list[dict],
+    user_profile: Optional[dict] = None,
+    previous_answers: Optional[list[dict]] = None
+) -> list[dict]:
+    """
+    Догенерировать needed вопросов через GPT
+
+    Если GPT не успел или вернул меньше вопросов, недостающие берутся
+    из пула, заранее сгенерированного ночной задачей.
+    """
+    if needed <= 0:
+        return []
+
+    category_info = QUIZ_CATEGORIES.get(
+        category,
+        {
+            "name": category,
+            "description": "",
+            "emoji": "🧠",
+            "tone_hint": "Говори по-человечески."
+        },
+    )
+
+    questions = await _generate_dynamic_batch(
+        category=category,
+        category_info=category_info,
+        needed=needed,
+        existing_questions=existing_questions,
+        user_profile=user_profile,
+        previous_answers=previous_answers or [],
+    )
+
+    if len(questions) < needed:
+        from bot.services.quiz_service import question_pool
+
+        asked_texts = [q.get("text") for q in existing_questions + questions]
+        questions.extend(await question_pool.pick_questions(
+            category,
+            needed - len(questions),
+            exclude_texts=asked_texts,
+        ))
+
+    return questions
+
+
 # ===== Helper utilities for conversational quiz v2 =====
 
 def _clone_seed_questions(category: str) -> list[dict]:
-    seeds = SEED_QUESTIONS.get(category, [])
-    try:
-        # Быстрый deep copy без импортов copy.deepcopy
-        return json.loads(json.dumps(seeds))
-    except Exception:
-        return [dict(seed) for seed in seeds]
+    # Пул нормализован и заморожен при импорте: копия — это dict + list опций
+    return [
+        {key: list(value) if isinstance(value, tuple) else value for key, value in seed.items()}
+        for seed in _SEED_POOL.get(category, ())
+    ]
 
 
 def _build_profile_probe_questions(
@@ -1164,6 +1242,23 @@ def _normalize_question_list(questions: list[dict], category: str) -> list[dict]
     return normalized
 
 
+def _freeze_seed_pool(seeds: dict[str, list[dict]]) -> Mapping[str, tuple[Mapping, ...]]:
+    return MappingProxyType({
+        category: tuple(
+            MappingProxyType({
+                key: tuple(value) if isinstance(value, list) else value
+                for key, value in question.items()
+            })
+            for question in _normalize_question_list(questions, category)
+        )
+        for category, questions in seeds.items()
+    })
+
+
+# Неизменяемый, заранее нормализованный пул seed-вопросов
+_SEED_POOL = _freeze_seed_pool(SEED_QUESTIONS)
+
+
 async def _generate_dynamic_batch(
     *,
     category: str,
@@ -1172,6 +1267,7 @@ async def _generate_dynamic_batch(
     existing_questions: list[dict],
     user_profile: Optional[dict],
     previous_answers: list[dict],
+    timeout: float = 20.0,
 ) -> list[dict]:
     if needed <= 0:
         return []
@@ -1299,9 +1395,7 @@ async def _generate_dynamic_batch(
 """
 
     try:
-        # ✅ TIER 1: Add timeout to GPT call (20 seconds)
-        import asyncio
-        
+        # ✅ TIER 1: Add timeout to GPT call
         response = await asyncio.wait_for(
             client.chat.completions.create(
             model="gpt-4o-mini",
@@ -1315,12 +1409,12 @@ async def _generate_dynamic_batch(
             response_format={"type": "json_object"},
             temperature=0.6,
             ),
-            timeout=20.0  # ✅ TIER 1: 20 second timeout for GPT
+            timeout=timeout
         )
         data = json.loads(response.choices[0].message.content)
         generated = data.get("questions", [])
     except asyncio.TimeoutError:
-        logger.warning(f"⏱ Dynamic quiz batch generation timed out after 20s")
+        logger.warning(f"⏱ Dynamic quiz batch generation timed out after {timeout}s")
         return []  # ✅ TIER 1: Fallback - пустой массив
     except Exception as err:
         logger.error("Dynamic quiz batch failed: %s", err)
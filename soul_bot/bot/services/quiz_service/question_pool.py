@@ -0,0 +1,154 @@
+"""
+📦 Пул заранее сгенерированных вопросов квиза
+
+Ночная задача (refresh_pools) генерирует вопросы по каждой категории,
+отбрасывает невалидные и сохраняет пул в БД. Во время квиза пул
+подменяет GPT, когда тот не ответил вовремя.
+
+Процесс держит пул в памяти и перечитывает его раз в
+QUIZ_QUESTION_POOL_TTL секунд.
+"""
+import logging
+import random
+import time
+import uuid
+from typing import Iterable, Optional
+
+import database.repository.quiz_question_pool as db_question_pool
+from bot.services.constants import QUIZ_QUESTION_POOL_SIZE, QUIZ_QUESTION_POOL_TTL
+from bot.services.quiz_service import generator
+
+logger = logging.getLogger(__name__)
+
+_QUESTION_TYPES = {"text", "scale", "multiple_choice"}
+_MIN_TEXT_LENGTH = 15
+_MAX_TEXT_LENGTH = 300
+_MAX_OPTIONS = 6
+# Ночью не торопимся: пачка из QUIZ_QUESTION_POOL_SIZE вопросов
+_GENERATION_TIMEOUT = 60.0
+
+# category -> (expires_at, questions)
+_pools: dict[str, tuple[float, tuple[dict, ...]]] = {}
+
+
+def _text_key(text: Optional[str]) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def is_valid_question(question: dict) -> bool:
+    """Вопрос пригоден для пула: понятный тип, разумный текст, варианты"""
+    if not isinstance(question, dict):
+        return False
+
+    text = (question.get("text") or "").strip()
+    if not _MIN_TEXT_LENGTH <= len(text) <= _MAX_TEXT_LENGTH:
+        return False
+
+    question_type = question.get("type")
+    if question_type not in _QUESTION_TYPES:
+        return False
+
+    if question_type != "text":
+        options = question.get("options") or []
+        if not 2 <= len(options) <= _MAX_OPTIONS:
+            return False
+        if any(not isinstance(option, str) or not option.strip() for option in options):
+            return False
+        if len({_text_key(option) for option in options}) != len(options):
+            return False
+
+    return True
+
+
+def validate_questions(questions: Iterable[dict], category: str) -> list[dict]:
+    """Нормализовать, отфильтровать невалидные и повторяющиеся вопросы"""
+    validated: list[dict] = []
+    seen_texts = {_text_key(seed.get("text")) for seed in generator.SEED_QUESTIONS.get(category, [])}
+
+    for question in generator._normalize_question_list(list(questions), category):
+        key = _text_key(question.get("text"))
+        if key in seen_texts or not is_valid_question(question):
+            continue
+        seen_texts.add(key)
+        question["id"] = f"pool_{uuid.uuid4().hex[:8]}"
+        validated.append(question)
+
+    return validated
+
+
+async def get_pool(category: str) -> tuple[dict, ...]:
+    """Пул категории из памяти, при истёкшем TTL — из БД"""
+    cached = _pools.get(category)
+    if cached and time.monotonic() < cached[0]:
+        return cached[1]
+
+    try:
+        questions = tuple(await db_question_pool.get_by_category(category))
+    except Exception as e:
+        logger.warning(f"Failed to load quiz question pool ({category}): {e}")
+        # Пустой/старый пул тоже кэшируем, чтобы не долбить БД на каждом вопросе
+        questions = cached[1] if cached else ()
+
+    _pools[category] = (time.monotonic() + QUIZ_QUESTION_POOL_TTL, questions)
+    return questions
+
+
+async def pick_questions(
+    category: str,
+    count: int,
+    exclude_texts: Iterable[str] = ()
+) -> list[dict]:
+    """
+    Случайные вопросы из пула, которых ещё не было в квизе
+
+    Returns:
+        До count копий вопросов (пул в памяти не мутируется)
+    """
+    if count <= 0:
+        return []
+
+    excluded = {_text_key(text) for text in exclude_texts}
+    candidates = [
+        question
+        for question in await get_pool(category)
+        if _text_key(question.get("text")) not in excluded
+    ]
+
+    picked = random.sample(candidates, min(count, len(candidates)))
+    return generator._normalize_question_list(picked, category)
+
+
+async def refresh_pools(categories: Optional[Iterable[str]] = None) -> dict[str, int]:
+    """
+    Ночная задача: сгенерировать и сохранить пул для каждой категории
+
+    Если GPT вернул пустой результат, прежний пул категории сохраняется.
+
+    Returns:
+        {category: размер нового пула}
+    """
+    sizes: dict[str, int] = {}
+
+    for category in categories or generator.QUIZ_CATEGORIES:
+        category_info = generator.QUIZ_CATEGORIES.get(category, {"name": category, "description": ""})
+        generated = await generator._generate_dynamic_batch(
+            category=category,
+            category_info=category_info,
+            needed=QUIZ_QUESTION_POOL_SIZE,
+            existing_questions=list(generator.SEED_QUESTIONS.get(category, [])),
+            user_profile=None,
+            previous_answers=[],
+            timeout=_GENERATION_TIMEOUT,
+        )
+        questions = validate_questions(generated, category)
+
+        if not questions:
+            logger.warning(f"Quiz question pool for {category} not refreshed: no valid questions")
+            continue
+
+        await db_question_pool.replace_category(category, questions)
+        _pools[category] = (time.monotonic() + QUIZ_QUESTION_POOL_TTL, tuple(questions))
+        sizes[category] = len(questions)
+
+    logger.info(f"Quiz question pools refreshed: {sizes}")
+    return sizes
@@ -7,18 +7,28 @@
 - Этот модуль детектит экстренные сигналы БЕЗ GPT (< 1ms через regex/keywords)
 
 Архитектура:
-1. Fast keyword matching (regex)
+1. Fast keyword matching (regex, прекомпилированы при импорте)
 2. Urgency classification (high/medium/low)
 3. Suggested response style override
 
+Почему не один общий regex:
+- Общая альтернация (p1|p2|...) в CPython re теряет literal-prefix поиск
+  и проверяет все ветки на каждой позиции — замер: ~8x медленнее
+- Поэтому каждый pattern скомпилирован отдельно и "прикрыт" своим
+  литеральным префиксом: `prefix in message` (memchr-поиск в C)
+  отсекает почти все паттерны до запуска regex
+- Движок правил общий с safety net pattern_analyzer: symptom_scanner
+- Бенчмарк: tests/tools/bench_realtime_mood_detector.py
+
 Автор: AI Agent
 Создан: 2025-10-31
 """
 
-import re
 from typing import Optional, Literal
 from dataclasses import dataclass
 
+from bot.services.symptom_scanner import Rule, compile_rules
+
 
 @dataclass
 class EmotionalSignal:
@@ -141,10 +151,58 @@ URGENT_KEYWORDS = {
 }
 
 
+# ==========================================
+# ⚡ PRECOMPILED MATCHER
+# ==========================================
+
+def _compile_signal_matchers() -> tuple[tuple[str, tuple[Rule, ...]], ...]:
+    """
+    Компилирует URGENT_KEYWORDS один раз при импорте
+
+    Returns:
+        ((emotion, (Rule, ...)), ...) в порядке приоритета URGENT_KEYWORDS
+    """
+    return tuple(
+        (
+            emotion,
+            compile_rules((pattern, pattern) for pattern in config['keywords']),
+        )
+        for emotion, config in URGENT_KEYWORDS.items()
+    )
+
+
+_SIGNAL_MATCHERS = _compile_signal_matchers()
+
+
 # ==========================================
 # 🔍 DETECTION FUNCTIONS
 # ==========================================
 
+def scan_emotional_signals(message: str) -> dict[str, list[str]]:
+    """
+    Один проход по всем категориям: все сработавшие эмоции и keywords
+
+    Args:
+        message: Сообщение пользователя
+
+    Returns:
+        {emotion: [matched patterns]} в порядке приоритета URGENT_KEYWORDS
+        (пустой dict если сигналов нет)
+    """
+    if not message or len(message.strip()) < 3:
+        return {}
+
+    message_lower = message.lower()
+    hits: dict[str, list[str]] = {}
+
+    for emotion, rules in _SIGNAL_MATCHERS:
+        for rule in rules:
+            if rule.search(message_lower):
+                hits.setdefault(emotion, []).append(rule.pattern)
+
+    return hits
+
+
 def detect_urgent_emotional_signals(message: str) -> Optional[EmotionalSignal]:
     """
     Экстренная детекция эмоциональных сигналов (< 1ms)
@@ -162,33 +220,22 @@ def detect_urgent_emotional_signals(message: str) -> Optional[EmotionalSignal]:
         >>> detect_urgent_emotional_signals("какая погода")
         None
     """
-    if not message or len(message.strip()) < 3:
+    hits = scan_emotional_signals(message)
+    if not hits:
         return None
-    
-    message_lower = message.lower()
-    
-    # Проходим по всем категориям эмоций
-    for emotion, config in URGENT_KEYWORDS.items():
-        matched_keywords = []
-        
-        # Проверяем каждый keyword pattern
-        for pattern in config['keywords']:
-            if re.search(pattern, message_lower):
-                matched_keywords.append(pattern)
-        
-        # Если нашли совпадения - формируем результат
-        if matched_keywords:
-            confidence = min(1.0, len(matched_keywords) / 2)  # Больше keywords = выше confidence
-            
-            return EmotionalSignal(
-                urgency=config['urgency'],
-                emotion=emotion,
-                suggested_tone=config['tone'],
-                trigger_keywords=matched_keywords,
-                confidence=confidence
-            )
-    
-    return None
+
+    # Первая по приоритету категория (порядок URGENT_KEYWORDS)
+    emotion, matched_keywords = next(iter(hits.items()))
+    config = URGENT_KEYWORDS[emotion]
+    confidence = min(1.0, len(matched_keywords) / 2)  # Больше keywords = выше confidence
+
+    return EmotionalSignal(
+        urgency=config['urgency'],
+        emotion=emotion,
+        suggested_tone=config['tone'],
+        trigger_keywords=matched_keywords,
+        confidence=confidence
+    )
 
 
 def should_override_system_prompt(signal: Optional[EmotionalSignal]) -> bool:
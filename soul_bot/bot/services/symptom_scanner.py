@@ -0,0 +1,327 @@
+"""
+🔎 Symptom Scanner — предкомпилированный поиск симптомов burnout/depression
+
+Зачем:
+- Safety net deep analysis считал score каждой категории отдельно:
+  regex-списки собирались внутри функций и прогонялись по склеенному
+  тексту последних сообщений — по разу на каждый pattern
+- Evidence искался ещё одним проходом по сообщениям
+
+Как работает:
+- Правила компилируются один раз при импорте (compile_rules) и
+  "прикрыты" литеральным префиксом: `prefix in text` отсекает почти все
+  правила до запуска regex. Тот же движок использует realtime_mood_detector
+- scan_messages делает один проход по сообщениям пользователя и
+  возвращает попадания (Hit) по категориям: правило, вес, сообщение, span
+- score категории = сумма весов сработавших правил (каждое правило один раз)
+
+Совместимость со старым score по склеенному тексту:
+- Правило могло сработать через границу сообщений (`устал` в одном,
+  `от всего` в следующем). Правила, не найденные ни в одном сообщении,
+  дополнительно ищутся в ' '.join(texts) — score совпадает со старым
+"""
+import logging
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================
+# ⚙️ ДВИЖОК ПРАВИЛ
+# ==========================================
+
+_REGEX_META = frozenset('\\[(.*+?{|^$')
+_QUANTIFIERS = frozenset('*+?{')
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+    return False
+
+
+def literal_prefix(pattern: str) -> str:
+    """Литеральное начало pattern'а, которое обязано быть в тексте при совпадении"""
+    if _has_top_level_alternation(pattern):
+        # 'a|b' — общего префикса нет
+        return ''
+
+    prefix = []
+    for char in pattern:
+        if char in _REGEX_META:
+            if char in _QUANTIFIERS and prefix:
+                # 'ab?' — 'b' необязателен
+                prefix.pop()
+            break
+        prefix.append(char)
+    return ''.join(prefix)
+
+
+@dataclass(frozen=True)
+class Rule:
+    """Скомпилированное правило"""
+    name: str
+    pattern: str
+    weight: int
+    prefix: str
+    compiled: re.Pattern
+
+    def search(self, text: str) -> Optional[re.Match]:
+        # Дешёвый substring-фильтр перед regex
+        if self.prefix not in text:
+            return None
+        return self.compiled.search(text)
+
+
+def compile_rules(specs: Iterable[tuple]) -> tuple[Rule, ...]:
+    """
+    Скомпилировать правила
+
+    Args:
+        specs: (name, pattern) или (name, pattern, weight)
+    """
+    rules = []
+    for spec in specs:
+        name, pattern = spec[0], spec[1]
+        weight = spec[2] if len(spec) > 2 else 0
+        rules.append(Rule(
+            name=name,
+            pattern=pattern,
+            weight=weight,
+            prefix=literal_prefix(pattern),
+            compiled=re.compile(pattern),
+        ))
+    return tuple(rules)
+
+
+# ==========================================
+# 📋 ПРАВИЛА
+# ==========================================
+
+# Веса: critical / major / minor симптомы
+# Critical-симптомы депрессии логируются как warning
+DEPRESSION_CRITICAL_WEIGHT = 4
+
+SCORE_RULES: dict[str, tuple[Rule, ...]] = {
+    'burnout': compile_rules([
+        # CRITICAL (3)
+        ('overwork', r'работа\w* (по )?\d+ час', 3),  # работаю 14 часов
+        ('cognitive_dysfunction', r'(забыл|выпало из головы).*(важн|встреч|дедлайн|задач)', 3),
+        ('concentration', r'не могу (сконцентр|концентр|сосредоточ|думать)', 3),
+        ('anhedonia', r'не помню когда.*(счастлив|радовал|удовольств)', 3),
+        # MAJOR (2)
+        ('no_energy', r'нет сил', 2),
+        ('tired', r'устал\w*', 2),
+        ('burnout', r'выгоран\w*', 2),
+        ('robot', r'как робот', 2),
+        ('worn_out', r'на износ', 2),
+        ('daily_work', r'каждый день работ', 2),
+        ('no_days_off', r'без выходных', 2),
+        ('no_rest', r'не отдыхал', 2),
+        # MINOR (1)
+        ('why_try', r'зачем стараться', 1),
+        ('no_meaning', r'нет смысла', 1),
+        ('fed_up', r'всё надоело', 1),
+        ('want_to_quit', r'хочется бросить', 1),
+    ]),
+    'depression': compile_rules([
+        # CRITICAL (4)
+        ('suicidal_ideation', r'(хочу умереть|хочется исчезнуть|суицид|покончить с)', 4),
+        ('severe_hopelessness', r'(нет смысла жить|всё бессмысленно|зачем жить)', 4),
+        # MAJOR (3)
+        ('hopelessness', r'(нет смысла|зачем стараться|всё бесполезно|не вижу смысла|какой смысл)', 3),
+        ('anhedonia', r'не помню когда.*(счастлив|радовал|удовольств)', 3),
+        ('worthlessness', r'(лузер|неудачник|всё неправильно|некомпетент|ничего не стою|бесполезн)', 3),
+        ('no_way_out', r'(не вижу выхода|нет выхода|безвыходн)', 3),
+        # MINOR (1)
+        ('no_energy', r'нет сил', 1),
+        ('tired_of_everything', r'устал\w* от всего', 1),
+        ('fed_up', r'всё надоело', 1),
+    ]),
+}
+
+# Правила для цитат: сообщение попадает в evidence, если сработало любое
+EVIDENCE_RULES: dict[str, tuple[Rule, ...]] = {
+    'burnout': compile_rules([
+        ('overwork', r'работа\w* (по )?\d+ час'),
+        ('forgot', r'забыл.*(встреч|дедлайн)'),
+        ('concentration', r'не могу (сконцентр|концентр|думать)'),
+        ('no_energy', r'нет сил'),
+        ('anhedonia', r'не помню когда.*счастлив'),
+        ('robot', r'как робот'),
+        ('burnout', r'выгоран'),
+    ]),
+    'depression': compile_rules([
+        ('no_meaning', r'нет смысла'),
+        ('no_meaning_seen', r'не вижу смысла'),
+        ('why_try', r'зачем стараться'),
+        ('anhedonia', r'не помню когда.*счастлив'),
+        ('no_way_out', r'не вижу выхода'),
+        ('loser', r'лузер'),
+        ('all_wrong', r'всё неправильно'),
+        ('worthless', r'ничего не стою'),
+        ('want_to_die', r'хочу умереть'),
+    ]),
+}
+
+
+# ==========================================
+# 🔍 СКАН
+# ==========================================
+
+@dataclass(frozen=True)
+class Hit:
+    """Сработавшее правило"""
+    category: str
+    rule: str
+    weight: int
+    message_index: int  # индекс в переданном списке текстов
+    span: tuple[int, int]  # для совпадения через границу — обрезан по концу сообщения
+
+
+@dataclass
+class ScanResult:
+    """Попадания по категориям за один проход"""
+    texts: Sequence[str]
+    hits: dict[str, list[Hit]] = field(default_factory=dict)
+
+    def score(self, category: str) -> int:
+        """Сумма весов сработавших правил (каждое правило учитывается один раз)"""
+        seen: dict[str, int] = {}
+        for hit in self.hits.get(category, ()):
+            seen.setdefault(hit.rule, hit.weight)
+        return sum(seen.values())
+
+    def rules(self, category: str) -> list[str]:
+        """Сработавшие правила в порядке первого попадания"""
+        return list(dict.fromkeys(hit.rule for hit in self.hits.get(category, ())))
+
+    def evidence_indexes(self, category: str) -> list[int]:
+        """Индексы сообщений с попаданиями, по порядку"""
+        return sorted({hit.message_index for hit in self.hits.get(category, ())})
+
+
+def scan_messages(
+    texts: Sequence[str],
+    rules: dict[str, tuple[Rule, ...]] = SCORE_RULES,
+) -> ScanResult:
+    """
+    Скан сообщений всеми правилами
+
+    Args:
+        texts: Тексты сообщений в хронологическом порядке (уже lowercase)
+        rules: {category: правила}
+
+    Returns:
+        ScanResult с попаданиями; для score эквивалентно поиску
+        по ' '.join(texts)
+    """
+    result = ScanResult(texts=texts)
+    missed: list[tuple[str, Rule]] = []
+
+    for category, category_rules in rules.items():
+        for rule in category_rules:
+            found = False
+            for index, text in enumerate(texts):
+                match = rule.search(text)
+                if match is not None:
+                    found = True
+                    result.hits.setdefault(category, []).append(Hit(
+                        category=category,
+                        rule=rule.name,
+                        weight=rule.weight,
+                        message_index=index,
+                        span=match.span(),
+                    ))
+            if not found:
+                missed.append((category, rule))
+
+    if missed and len(texts) > 1:
+        # Совпадения через границу сообщений — как в старом score по склеенному тексту
+        joined = ' '.join(texts)
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+
+        for category, rule in missed:
+            match = rule.search(joined)
+            if match is None:
+                continue
+            index = bisect_right(starts, match.start()) - 1
+            begin = match.start() - starts[index]
+            result.hits.setdefault(category, []).append(Hit(
+                category=category,
+                rule=rule.name,
+                weight=rule.weight,
+                message_index=index,
+                span=(begin, min(match.end() - starts[index], len(texts[index]))),
+            ))
+
+    return result
+
+
+def scan_text(text: str, rules: dict[str, tuple[Rule, ...]] = SCORE_RULES) -> ScanResult:
+    """Скан одного текста (например, склеенного окна сообщений)"""
+    return scan_messages([text], rules)
+
+
+def user_texts(messages: list[dict], last: Optional[int] = None) -> list[str]:
+    """Lowercase-тексты сообщений пользователя (из последних `last` сообщений)"""
+    window = messages[-last:] if last else messages
+    return [
+        msg.get('content', '').lower()
+        for msg in window
+        if msg.get('role') == 'user'
+    ]
+
+
+def extract_evidence(
+    messages: list[dict],
+    category: str,
+    max_evidence: int = 3,
+) -> list[str]:
+    """
+    Цитаты пользователя с симптомами категории (оригинальный регистр)
+
+    Args:
+        messages: Сообщения диалога
+        category: 'burnout' | 'depression'
+        max_evidence: Максимум цитат
+    """
+    contents = [
+        msg.get('content', '')
+        for msg in messages
+        if msg.get('role') == 'user'
+    ]
+    category_rules = {category: EVIDENCE_RULES[category]}
+
+    evidence: list[str] = []
+    for content in contents:
+        # Evidence ищется строго внутри сообщения — сканируем по одному
+        if scan_text(content.lower(), category_rules).hits and content not in evidence:
+            evidence.append(content)
+        if len(evidence) >= max_evidence:
+            break
+
+    return evidence
@@ -6,6 +6,7 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import database.repository.user as db_user
 from bot.handlers.user.retention import send_next_retention_message
 from bot.handlers.user.broadcast import send_next_broadcast_message
+from bot.services.quiz_service import question_pool
 
 
 async def refresh_requests():
@@ -72,12 +73,26 @@ async def check_broadcast_messages():
         print(f"Ошибка в check_broadcast_messages: {e}")
 
 
+async def refresh_quiz_question_pools():
+    """
+    Каждую ночь перегенерировать пул запасных вопросов квиза по категориям.
+    Пул используется, когда GPT не успевает сгенерировать вопрос.
+    """
+    try:
+        await question_pool.refresh_pools()
+    except Exception as e:
+        print(f"Ошибка в refresh_quiz_question_pools: {e}")
+
+
 async def schedule_():
     scheduler = AsyncIOScheduler()
 
     # Обновление запросов в 1:00 UTC (4:00 MSK)
     scheduler.add_job(refresh_requests, 'cron', hour=1, minute=0)
 
+    # Пул запасных вопросов квиза в 2:00 UTC (5:00 MSK)
+    scheduler.add_job(refresh_quiz_question_pools, 'cron', hour=2, minute=0)
+
     # Проверка retention сообщений каждый день в 6:00 UTC (9:00 MSK)
     scheduler.add_job(check_retention_messages, 'cron', hour=6, minute=0)
 
@@ -71,6 +71,19 @@ else:
 # Опциональные ключи (для расширенных фич)
 ELEVEN_LABS_KEY = os.getenv('ELEVEN_LABS_KEY')
 
+# Трейсинг запросов (utils/tracing.py): '' — без экспорта, 'log' — JSON lines, 'otlp' — OTLP/HTTP collector
+TRACING_EXPORTER = os.getenv('TRACING_EXPORTER', '').lower()
+TRACING_LOG_PATH = os.getenv('TRACING_LOG_PATH', 'logs/traces.jsonl')
+TRACING_OTLP_ENDPOINT = os.getenv('TRACING_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+
+# Пороги slow-лога БД на одно обновление (database/query_stats.py)
+SLOW_UPDATE_QUERIES = int(os.getenv('SLOW_UPDATE_QUERIES', '25'))
+SLOW_UPDATE_DB_MS = float(os.getenv('SLOW_UPDATE_DB_MS', '300'))
+
+# Prometheus /metrics процесса бота (utils/metrics.py): 0 — не поднимать
+METRICS_HOST = os.getenv('METRICS_HOST', '0.0.0.0')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
 # ==========================================
 # 🚩 FEATURE FLAGS
 # ==========================================
@@ -90,6 +103,10 @@ FEATURE_FLAGS = {
     # Этап 4: Динамический квиз
     'ENABLE_DYNAMIC_QUIZ': os.getenv('ENABLE_DYNAMIC_QUIZ', 'false').lower() == 'true',
     'ENABLE_ADAPTIVE_QUIZ': os.getenv('ENABLE_ADAPTIVE_QUIZ', 'false').lower() == 'true',
+    # Предгенерация следующего вопроса: на каждый показанный choice/scale вопрос
+    # до QUIZ_PREFETCH_MAX_BRANCHES (5) спекулятивных GPT-генераций — до 5x
+    # расхода GPT на квиз. Включать осознанно
+    'ENABLE_QUIZ_PREFETCH': os.getenv('ENABLE_QUIZ_PREFETCH', 'false').lower() == 'true',
     
     # Этап 6: Файнтюнинг стиля
     'ENABLE_TUNE_STYLE': os.getenv('ENABLE_TUNE_STYLE', 'false').lower() == 'true',
@@ -12,14 +12,19 @@ from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 
 from config import POSTGRES_DB, POSTGRES_HOST, POSTGRES_PASSWORD, POSTGRES_PORT, POSTGRES_USER
+from database import query_stats
 from database.models import Base
+from utils import json_codec, metrics
 
 
 logger = logging.getLogger(__name__)
 
+POOL_SIZE = 20
+POOL_MAX_OVERFLOW = 10
+
 
 def _build_engine(database_name: str) -> AsyncEngine:
-    return create_async_engine(
+    engine_obj = create_async_engine(
         URL(
             drivername='postgresql+asyncpg',
             username=POSTGRES_USER,
@@ -30,12 +35,16 @@ def _build_engine(database_name: str) -> AsyncEngine:
             query={},
         ),
         future=True,
-        pool_size=20,
-        max_overflow=10,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
         pool_pre_ping=True,  # Test connections before using them
         pool_recycle=3600,  # Recycle connections after 1 hour
         pool_timeout=30,  # Wait up to 30s for connection from pool
         echo=False,  # Set to True for SQL query debugging
+        # JSONB (профили с embeddings, квизы, metadata) — через orjson;
+        # jsonb/json codec'и asyncpg диалект регистрирует сам с этими функциями
+        json_serializer=json_codec.dumps,
+        json_deserializer=json_codec.loads,
         connect_args={
             'timeout': 10,  # Connection timeout in seconds (numeric for asyncpg)
             'command_timeout': 30,  # Command execution timeout (numeric)
@@ -45,6 +54,8 @@ def _build_engine(database_name: str) -> AsyncEngine:
             },
         },
     )
+    query_stats.install(engine_obj.sync_engine)
+    return engine_obj
 
 
 _engine: AsyncEngine = _build_engine(POSTGRES_DB)
@@ -142,6 +153,25 @@ class DatabaseManager:
 db = DatabaseManager(_engine, _session_factory)
 
 
+def _pool_usage() -> dict:
+    # db.engine, а не _engine: после _reset_engine пул уже другой
+    pool = db.engine.pool
+    return {
+        ('checked_out',): pool.checkedout(),
+        ('idle',): pool.checkedin(),
+        ('overflow',): max(pool.overflow(), 0),
+        ('capacity',): POOL_SIZE + POOL_MAX_OVERFLOW,
+    }
+
+
+metrics.Gauge(
+    'soulnear_db_pool_connections',
+    'SQLAlchemy pool connections by state (capacity = pool_size + max_overflow)',
+    ['state'],
+    collect=_pool_usage,
+)
+
+
 async def create_tables() -> None:
     await db.ensure_ready()
 
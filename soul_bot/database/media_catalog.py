@@ -0,0 +1,194 @@
+"""
+Versioned in-memory каталог медиа (категории практик/видео + файлы)
+
+Зачем:
+- Бот на каждый клик по практикам ходил в БД (категории, потом медиа)
+- WebApp /practices делал N+1: категории по типам + медиа на каждую категорию
+
+Как работает:
+- Один JOIN-запрос грузит все категории вместе с медиа
+- Результат — неизменяемый snapshot (frozen dataclasses + tuples),
+  который безопасно раздавать параллельным запросам
+- invalidate() вызывается из repository после записи: следующий get()
+  перечитывает каталог
+- TTL страхует от правок из других процессов (бот ↔ webapp)
+- version растёт только когда меняется содержимое;
+  fingerprint (хэш содержимого) одинаков во всех процессах → годится для ETag
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from sqlalchemy import select
+
+from database.database import db
+from database.models.media import Media
+from database.models.media_category import Media_category
+
+
+logger = logging.getLogger(__name__)
+
+CATALOG_TTL_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class CatalogMedia:
+    id: int
+    category_id: int
+    position: int
+    name: str
+    text: Optional[str]
+    media_type: Optional[str]
+    media_id: Optional[str]
+    destination: Optional[str]
+    file_url: Optional[str]
+
+
+@dataclass(frozen=True)
+class CatalogCategory:
+    id: int
+    position: int
+    name: str
+    text: str
+    category: str
+    media_type: Optional[str]
+    media_id: Optional[str]
+    destination: Optional[str]
+    medias: tuple[CatalogMedia, ...] = ()
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    fingerprint: str
+    categories: tuple[CatalogCategory, ...]
+    _categories_by_id: Mapping[int, CatalogCategory] = field(repr=False, compare=False)
+    _medias_by_id: Mapping[int, CatalogMedia] = field(repr=False, compare=False)
+
+    def by_type(self, category: str) -> tuple[CatalogCategory, ...]:
+        """Категории раздела (practices / videos / music) по position"""
+        return tuple(item for item in self.categories if item.category == category)
+
+    def category(self, category_id: int) -> Optional[CatalogCategory]:
+        return self._categories_by_id.get(category_id)
+
+    def media(self, media_id: int) -> Optional[CatalogMedia]:
+        return self._medias_by_id.get(media_id)
+
+
+def _fingerprint(categories: tuple[CatalogCategory, ...]) -> str:
+    return hashlib.sha1(repr(categories).encode('utf-8')).hexdigest()
+
+
+def build_snapshot(rows, version: int) -> CatalogSnapshot:
+    """
+    Собрать snapshot из строк (Media_category, Media | None),
+    отсортированных по category.position, media.position
+    """
+    categories: dict[int, Media_category] = {}
+    medias: dict[int, list[CatalogMedia]] = {}
+
+    for category, media in rows:
+        categories.setdefault(category.id, category)
+        bucket = medias.setdefault(category.id, [])
+        if media is not None:
+            bucket.append(CatalogMedia(
+                id=media.id,
+                category_id=media.category_id,
+                position=media.position,
+                name=media.name,
+                text=media.text,
+                media_type=media.media_type,
+                media_id=media.media_id,
+                destination=media.destination,
+                file_url=media.file_url,
+            ))
+
+    entries = tuple(
+        CatalogCategory(
+            id=category.id,
+            position=category.position,
+            name=category.name,
+            text=category.text,
+            category=category.category,
+            media_type=category.media_type,
+            media_id=category.media_id,
+            destination=category.destination,
+            medias=tuple(medias[category.id]),
+        )
+        for category in categories.values()
+    )
+
+    return CatalogSnapshot(
+        version=version,
+        fingerprint=_fingerprint(entries),
+        categories=entries,
+        _categories_by_id=MappingProxyType({item.id: item for item in entries}),
+        _medias_by_id=MappingProxyType({
+            media.id: media for item in entries for media in item.medias
+        }),
+    )
+
+
+async def _load_rows():
+    async with db() as session:
+        result = await session.execute(
+            select(Media_category, Media)
+            .outerjoin(Media, Media.category_id == Media_category.id)
+            .order_by(Media_category.position, Media.position, Media.id)
+        )
+        return result.all()
+
+
+class MediaCatalog:
+    """Ленивый кэш каталога с TTL и явной инвалидацией"""
+
+    def __init__(self, ttl: float = CATALOG_TTL_SECONDS) -> None:
+        self._ttl = ttl
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._expires_at = float('-inf')
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self._snapshot is not None and time.monotonic() < self._expires_at
+
+    async def get(self) -> CatalogSnapshot:
+        if self._is_fresh():
+            return self._snapshot
+
+        async with self._lock:
+            # Пока ждали lock, каталог мог перечитать другой запрос
+            if not self._is_fresh():
+                await self._reload()
+            return self._snapshot
+
+    def invalidate(self) -> None:
+        """Сбросить TTL: следующий get() перечитает каталог из БД"""
+        self._expires_at = float('-inf')
+
+    async def _reload(self) -> None:
+        previous = self._snapshot
+        version = previous.version if previous else 0
+        snapshot = build_snapshot(await _load_rows(), version=version + 1)
+
+        if previous is not None and previous.fingerprint == snapshot.fingerprint:
+            # Содержимое не изменилось — оставляем прежний snapshot и version
+            snapshot = previous
+        else:
+            logger.info(
+                "Media catalog loaded: version=%s, categories=%s",
+                snapshot.version,
+                len(snapshot.categories),
+            )
+
+        self._snapshot = snapshot
+        self._expires_at = time.monotonic() + self._ttl
+
+
+media_catalog = MediaCatalog()
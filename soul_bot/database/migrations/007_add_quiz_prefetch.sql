@@ -0,0 +1,5 @@
+-- Migration: Speculative prefetch of the next quiz question
+-- Date: 2026-10-19
+
+-- Candidates for the next question, one per answer option of the current question
+ALTER TABLE quiz_sessions ADD COLUMN IF NOT EXISTS prefetched_questions JSONB NULL;
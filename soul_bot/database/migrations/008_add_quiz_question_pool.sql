@@ -0,0 +1,13 @@
+-- Migration: Pool of pre-generated quiz questions
+-- Date: 2026-10-19
+
+-- Validated dynamic questions per category, refreshed by a nightly job.
+-- Used when GPT does not answer in time during a quiz
+CREATE TABLE IF NOT EXISTS quiz_question_pool (
+    id SERIAL PRIMARY KEY,
+    category VARCHAR(64) NOT NULL,
+    question JSONB NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_quiz_question_pool_category ON quiz_question_pool(category);
@@ -11,4 +11,5 @@ from .media_category import Media_category
 from .user_profile import UserProfile
 from .conversation_history import ConversationHistory
 from .quiz_session import QuizSession
+from .quiz_question_pool import QuizQuestionPool
 from .deeplink_event import DeeplinkEvent
\ No newline at end of file
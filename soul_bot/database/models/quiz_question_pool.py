@@ -0,0 +1,25 @@
+"""
+QuizQuestionPool — заранее сгенерированные вопросы квиза
+
+Ночная задача генерирует и валидирует вопросы по каждой категории.
+Они подставляются, когда GPT не успел сгенерировать вопрос вовремя.
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB
+
+from database.models.base import Base
+
+
+class QuizQuestionPool(Base):
+    """Pre-generated quiz question"""
+
+    __tablename__ = 'quiz_question_pool'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    category = Column(String(64), nullable=False)
+    question = Column(JSONB, nullable=False)  # {"id", "text", "type", "options", "preface"}
+    created_at = Column(TIMESTAMP, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<QuizQuestionPool(id={self.id}, category={self.category})>"
@@ -38,6 +38,10 @@ class QuizSession(Base):
     # Data storage (JSONB for flexibility)
     questions = Column(JSONB, nullable=False, default=list)  # [{"id": 0, "text": "..."}]
     answers = Column(JSONB, nullable=False, default=list)    # [{"question_id": 0, "text": "..."}]
+
+    # Speculative prefetch следующего вопроса:
+    # {"question_index": 2, "branches": {"<вариант ответа>": {question}}}
+    prefetched_questions = Column(JSONB, nullable=True)
     
     # Analysis results
     patterns = Column(JSONB, nullable=True)  # Patterns extracted from quiz
@@ -0,0 +1,207 @@
+"""
+Счётчик SQL-запросов и времени БД на одно Telegram-обновление
+
+EventsMiddleware открывает track() на каждое обновление; хуки engine
+(before/after_cursor_execute) добавляют в текущий QueryStats число
+запросов, время и fingerprint выражения. Обновления сверх порогов
+(SLOW_UPDATE_QUERIES / SLOW_UPDATE_DB_MS) пишутся в лог с топом
+fingerprint'ов, агрегаты последних обновлений — в админ-панель.
+
+Фоновые задачи create_safe_task считаются отдельно (root=True, record=False):
+pattern analysis не должен раздувать цифры ответа пользователю.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+
+from config import SLOW_UPDATE_DB_MS, SLOW_UPDATE_QUERIES
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SIZE = 1000          # Последние N обновлений для агрегатов панели
+FINGERPRINT_MAX_LENGTH = 120
+SLOW_LOG_TOP_STATEMENTS = 5
+
+
+# ==========================================
+# 🧮 СЧЁТЧИК
+# ==========================================
+
+@dataclass
+class QueryStats:
+    label: str
+    queries: int = 0
+    db_ms: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def add(self, fingerprint: str, elapsed_ms: float) -> None:
+        self.queries += 1
+        self.db_ms += elapsed_ms
+        self.statements[fingerprint] += 1
+
+    def merge(self, other: 'QueryStats') -> None:
+        self.queries += other.queries
+        self.db_ms += other.db_ms
+        self.statements.update(other.statements)
+
+    @property
+    def is_slow(self) -> bool:
+        return self.queries > SLOW_UPDATE_QUERIES or self.db_ms > SLOW_UPDATE_DB_MS
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar('query_stats_current', default=None)
+
+
+def current() -> Optional[QueryStats]:
+    return _current.get()
+
+
+_NUMBER_RE = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PARAM_LIST_RE = re.compile(r"\((?:\s*\$\d+\s*,)+\s*\$\d+\s*\)|\[POSTCOMPILE_\w+\]")
+_PARAM_RE = re.compile(r"\$\d+|%\(\w+\)s|\?")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Нормализованный вид SQL для группировки: литералы и параметры → ?
+
+    "SELECT ... WHERE user_id = $1 AND id IN ($2, $3)" →
+    "SELECT ... WHERE user_id = ? AND id IN (?...)"
+    """
+    text = _SPACE_RE.sub(' ', statement).strip()
+    text = _STRING_RE.sub('?', text)
+    text = _PARAM_LIST_RE.sub('(?...)', text)
+    text = _PARAM_RE.sub('?', text)
+    text = _NUMBER_RE.sub('?', text)
+    if len(text) > FINGERPRINT_MAX_LENGTH:
+        text = text[:FINGERPRINT_MAX_LENGTH - 1] + '…'
+    return text
+
+
+# ==========================================
+# 🔌 ХУКИ ENGINE
+# ==========================================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None and _current.get() is not None:
+        context._query_stats_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    started = getattr(context, '_query_stats_started', None)
+    if stats is None or started is None:
+        return
+    stats.add(fingerprint(statement), (time.perf_counter() - started) * 1000)
+
+
+def install(sync_engine) -> None:
+    """Повесить хуки на engine (вызывается из database._build_engine)"""
+    event.listen(sync_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(sync_engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+# ==========================================
+# 📊 АГРЕГАТЫ
+# ==========================================
+
+@dataclass
+class QueryStatsSummary:
+    updates: int
+    avg_queries: float
+    p95_queries: int
+    max_queries: int
+    avg_db_ms: float
+    p95_db_ms: float
+    slow_updates: int
+
+
+_window: deque[tuple[int, float]] = deque(maxlen=WINDOW_SIZE)
+_slow_total = 0
+
+
+def _percentile(values: list, q: float):
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), round(q / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+def summary() -> Optional[QueryStatsSummary]:
+    """Агрегаты по последним WINDOW_SIZE обновлениям (None — ещё не было)"""
+    if not _window:
+        return None
+    queries = [item[0] for item in _window]
+    db_ms = [item[1] for item in _window]
+    return QueryStatsSummary(
+        updates=len(_window),
+        avg_queries=round(sum(queries) / len(queries), 1),
+        p95_queries=_percentile(queries, 95),
+        max_queries=max(queries),
+        avg_db_ms=round(sum(db_ms) / len(db_ms), 1),
+        p95_db_ms=round(_percentile(db_ms, 95), 1),
+        slow_updates=_slow_total,
+    )
+
+
+def reset() -> None:
+    global _slow_total
+    _window.clear()
+    _slow_total = 0
+
+
+def _finish(stats: QueryStats, record: bool) -> None:
+    global _slow_total
+
+    if record:
+        _window.append((stats.queries, stats.db_ms))
+        metrics.DB_QUERIES_PER_UPDATE.observe(stats.queries)
+    if not stats.is_slow:
+        return
+    if record:
+        _slow_total += 1
+
+    top = '; '.join(
+        f"{count}× {statement}"
+        for statement, count in stats.statements.most_common(SLOW_LOG_TOP_STATEMENTS)
+    )
+    logger.warning(
+        "🐢 Slow DB usage in %s: %s queries, %.1f ms | %s",
+        stats.label, stats.queries, stats.db_ms, top,
+    )
+
+
+@contextmanager
+def track(label: str, *, root: bool = False, record: bool = True) -> Iterator[QueryStats]:
+    """
+    Считать запросы блока в отдельный QueryStats
+
+    Вложенный track() по выходу добавляет свои цифры во внешний
+    (нагрузочный стенд меряет feed_update поверх EventsMiddleware).
+
+    Args:
+        label: подпись для slow-лога ("update Message user=…")
+        root: не добавлять цифры во внешний счётчик (фоновые задачи)
+        record: учитывать в агрегатах панели
+    """
+    outer = None if root else _current.get()
+    stats = QueryStats(label=label)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        if outer is not None:
+            outer.merge(stats)
+        _finish(stats, record)
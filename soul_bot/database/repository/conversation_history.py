@@ -4,18 +4,22 @@ Repository для работы с историей сообщений (Conversat
 Методы:
 - add_message() - добавить сообщение в историю
 - get_history() - получить последние N сообщений
+- get_history_page() - страница истории по курсору (before/after id)
+- iter_history() - вся история батчами (для экспорта)
 - get_context() - получить контекст для ChatCompletion
 - count_messages() - посчитать количество сообщений пользователя
 - clear_history() - очистить историю (для тестирования)
 """
 from datetime import datetime, timedelta
-from sqlalchemy import select, delete, desc
-from typing import List, Dict
+from sqlalchemy import select, delete, desc, tuple_
+from typing import AsyncIterator, List, Dict, Optional
 
 from database.database import db
 from database.models.conversation_history import ConversationHistory
+from utils import tracing
 
 
+@tracing.traced()
 async def add_message(
     user_id: int,
     assistant_type: str,
@@ -46,6 +50,7 @@ async def add_message(
         await session.commit()
 
 
+@tracing.traced()
 async def get_history(
     user_id: int,
     assistant_type: str,
@@ -81,6 +86,103 @@ async def get_history(
         return list(reversed(messages))
 
 
+def _history_query(user_id: int, assistant_type: str):
+    return select(ConversationHistory).where(
+        ConversationHistory.user_id == user_id,
+        ConversationHistory.assistant_type == assistant_type
+    )
+
+
+def _cursor_position(message_id: int):
+    """(timestamp, id) сообщения-курсора — граница для keyset-пагинации"""
+    return tuple_(
+        select(ConversationHistory.timestamp)
+        .where(ConversationHistory.id == message_id)
+        .scalar_subquery(),
+        message_id,
+    )
+
+
+async def _fetch(query) -> List[ConversationHistory]:
+    async with db() as session:
+        result = await session.execute(query)
+        return list(result.scalars().all())
+
+
+async def get_history_page(
+    user_id: int,
+    assistant_type: str,
+    limit: int = 50,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None
+) -> List[ConversationHistory]:
+    """
+    Получить страницу истории по курсору (keyset-пагинация)
+
+    В отличие от offset, стоимость не растёт с длиной истории:
+    Postgres идёт по idx_user_assistant_timestamp прямо от курсора.
+
+    Args:
+        user_id: Telegram ID пользователя
+        assistant_type: Тип ассистента
+        limit: Максимальное количество сообщений
+        before_id: Сообщения старше сообщения с этим id
+        after_id: Сообщения новее сообщения с этим id
+
+    Returns:
+        Список объектов ConversationHistory (от старых к новым).
+        Без курсора — последние limit сообщений.
+    """
+    position = tuple_(ConversationHistory.timestamp, ConversationHistory.id)
+    query = _history_query(user_id, assistant_type)
+
+    if after_id is not None:
+        return await _fetch(
+            query.where(position > _cursor_position(after_id))
+            .order_by(ConversationHistory.timestamp, ConversationHistory.id)
+            .limit(limit)
+        )
+
+    if before_id is not None:
+        query = query.where(position < _cursor_position(before_id))
+
+    messages = await _fetch(
+        query.order_by(desc(ConversationHistory.timestamp), desc(ConversationHistory.id))
+        .limit(limit)
+    )
+    return list(reversed(messages))
+
+
+async def iter_history(
+    user_id: int,
+    assistant_type: str,
+    batch_size: int = 500
+) -> AsyncIterator[ConversationHistory]:
+    """
+    Пройти по всей истории от старых к новым, батчами по batch_size
+
+    Каждый батч — отдельная короткая сессия, поэтому медленный потребитель
+    (например, HTTP-клиент при экспорте) не держит соединение из пула.
+    """
+    batch = await _fetch(
+        _history_query(user_id, assistant_type)
+        .order_by(ConversationHistory.timestamp, ConversationHistory.id)
+        .limit(batch_size)
+    )
+
+    while batch:
+        for message in batch:
+            yield message
+
+        if len(batch) < batch_size:
+            return
+
+        batch = await get_history_page(
+            user_id, assistant_type, limit=batch_size, after_id=batch[-1].id
+        )
+
+
+@tracing.traced()
 async def get_context(
     user_id: int,
     assistant_type: str,
@@ -118,6 +220,7 @@ async def get_context(
     return context
 
 
+@tracing.traced()
 async def get_recent_messages_for_analysis(
     user_id: int,
     assistant_type: str,
@@ -1,8 +1,9 @@
-from typing import List
+from typing import List, Optional, Sequence
 
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
 from sqlalchemy import delete as delete_
 from database.database import db
+from database.media_catalog import media_catalog
 from database.models.media import Media
 
 
@@ -15,7 +16,8 @@ async def get(id: int) -> Media:
 
 async def get_all() -> List[Media]:
     async with db() as session:
-        result = await session.scalars(select(Media))
+        result = await session.scalars(select(Media).
+                                       order_by(Media.category_id, Media.position))
         return result.all()
 
 
@@ -27,80 +29,85 @@ async def get_all_by_category(category_id: int) -> List[Media]:
         return result.all()
 
 
+# Позиции внутри категории идут с шагом POSITION_GAP: вставка в конец,
+# удаление и перемещение меняют только затронутые строки. Когда между
+# соседями не осталось места, перенумеровывается одна категория.
+POSITION_GAP = 1024
+
+
+def _plan_move(ordered: Sequence[tuple[int, int]], id: int, need_position: int) -> dict[int, int]:
+    """
+    Рассчитать новые позиции при перемещении media на need_position (1-based)
+
+    ordered — (id, position) всех media категории по возрастанию position.
+    Возвращает {id: position} только для строк, которые нужно обновить.
+    """
+    others = [row for row in ordered if row[0] != id]
+    index = min(max(need_position, 1), len(others) + 1) - 1
+
+    prev_position = others[index - 1][1] if index > 0 else 0
+    if index < len(others):
+        next_position = others[index][1]
+    else:
+        next_position = prev_position + 2 * POSITION_GAP
+
+    if next_position - prev_position > 1:
+        return {id: (prev_position + next_position) // 2}
+
+    # Места нет — перенумеровываем категорию с исходным шагом
+    others.insert(index, (id, None))
+    return {
+        row_id: i * POSITION_GAP
+        for i, (row_id, position) in enumerate(others, start=1)
+        if position != i * POSITION_GAP
+    }
+
+
 async def new(name: str,
               text: str,
               category_id: int,
               media_type: str,
               media_id: str,
               destination: str) -> None:
-    medias = await get_all()
-
-    async with db() as session:
+    async with db.begin() as session:
+        last_position = await session.scalar(select(func.max(Media.position)).
+                                             where(Media.category_id == category_id))
         session.add(Media(name=name,
                           text=text,
-                          position=len(medias) + 1,
+                          position=(last_position or 0) + POSITION_GAP,
                           category_id=category_id,
                           media_type=media_type,
                           media_id=media_id,
                           destination=destination))
-        await session.commit()
-
-
-async def delete(id: int) -> None:
-    medias = await get_all()
-
-    tmp_medias = []
 
-    for i, p in enumerate(medias, start=1):
-        if id == p.id:
-            continue
+    media_catalog.invalidate()
 
-        p.position = i
-        tmp_medias.append(p)
-
-    async with db() as session:
-        await session.execute(delete_(Media))
-
-        for p in tmp_medias:
-            session.add(Media(id=p.id,
-                              position=p.position,
-                              name=p.name,
-                              text=p.text,
-                              category_id=p.category_id,
-                              media_type=p.media_type,
-                              media_id=p.media_id,
-                              destination=p.destination
-                              ))
-        await session.commit()
 
+async def delete(id: int) -> None:
+    # Пропуск в нумерации порядок не нарушает — соседей не трогаем
+    async with db.begin() as session:
+        await session.execute(delete_(Media).where(Media.id == id))
 
-async def update_position(now_position: int, need_position: int) -> None:
-    medias = await get_all()
+    media_catalog.invalidate()
 
-    media = medias[now_position - 1]
-    media.position = need_position
 
-    medias.pop(now_position - 1)
-    medias.insert(need_position - 1, media)
+async def update_position(id: int, need_position: int) -> None:
+    """Переместить media на need_position (1-based) внутри своей категории"""
+    async with db.begin() as session:
+        category_id: Optional[int] = await session.scalar(select(Media.category_id).
+                                                          where(Media.id == id))
+        if category_id is None:
+            return
 
-    tmp_medias = []
+        # Блокируем строки категории, чтобы параллельные правки не заняли тот же слот
+        result = await session.execute(select(Media.id, Media.position).
+                                       where(Media.category_id == category_id).
+                                       order_by(Media.position, Media.id).
+                                       with_for_update())
+        changes = _plan_move(result.all(), id, need_position)
 
-    for i, p in enumerate(medias, start=1):
-        p.position = i
-        tmp_medias.append(p)
+        await session.execute(update(Media),
+                              [{'id': row_id, 'position': position}
+                               for row_id, position in changes.items()])
 
-    async with db() as session:
-        await session.execute(delete_(Media))
-
-        for p in tmp_medias:
-            session.add(Media(id=p.id,
-                              name=p.name,
-                              position=p.position,
-                              text=p.text,
-                              category_id=p.category_id,
-                              media_type=p.media_type,
-                              media_id=p.media_id,
-                              destination=p.destination
-                              ))
-
-        await session.commit()
+    media_catalog.invalidate()
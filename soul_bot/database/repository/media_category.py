@@ -2,6 +2,7 @@ from typing import List
 from sqlalchemy import select
 from sqlalchemy import delete as delete_
 from database.database import db
+from database.media_catalog import media_catalog
 from database.models.media_category import Media_category
 
 
@@ -45,6 +46,8 @@ async def new(name: str,
                                    destination=destination))
         await session.commit()
 
+    media_catalog.invalidate()
+
 
 async def delete(id: int) -> None:
     medias = await get_all()
@@ -73,6 +76,8 @@ async def delete(id: int) -> None:
 
         await session.commit()
 
+    media_catalog.invalidate()
+
 
 async def update_position(now_position: int, need_position: int) -> None:
     medias = await get_all()
@@ -104,3 +109,5 @@ async def update_position(now_position: int, need_position: int) -> None:
                                        ))
 
         await session.commit()
+
+    media_catalog.invalidate()
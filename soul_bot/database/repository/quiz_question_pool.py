@@ -0,0 +1,40 @@
+"""
+Repository для пула заранее сгенерированных вопросов квиза
+"""
+import logging
+
+from sqlalchemy import delete, select
+
+from database.database import db
+from database.models.quiz_question_pool import QuizQuestionPool
+
+logger = logging.getLogger(__name__)
+
+
+async def get_by_category(category: str) -> list[dict]:
+    """Вопросы пула категории в порядке генерации"""
+    async with db() as session:
+        result = await session.execute(
+            select(QuizQuestionPool.question)
+            .where(QuizQuestionPool.category == category)
+            .order_by(QuizQuestionPool.id)
+        )
+        return list(result.scalars().all())
+
+
+async def replace_category(category: str, questions: list[dict]) -> None:
+    """
+    Заменить пул категории одной транзакцией
+
+    Читатели видят либо старый пул, либо новый целиком.
+    """
+    async with db.begin() as session:
+        await session.execute(
+            delete(QuizQuestionPool).where(QuizQuestionPool.category == category)
+        )
+        session.add_all(
+            QuizQuestionPool(category=category, question=question)
+            for question in questions
+        )
+
+    logger.info(f"Replaced quiz question pool: category={category}, size={len(questions)}")
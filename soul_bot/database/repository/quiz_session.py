@@ -6,8 +6,9 @@ CRUD operations + business logic queries
 import logging
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, bindparam, cast, func
 from sqlalchemy import update as sql_update
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Session
 
 from database.database import db
@@ -125,52 +126,137 @@ async def get_user_sessions(
 async def update_answer(
     session_id: int,
     question_id: str,
-    answer_value: str
-) -> QuizSession:
+    answer_value: str,
+    expected_index: Optional[int] = None
+) -> Optional[QuizSession]:
     """
     Добавить ответ к quiz session и increment question index
-    
+
+    Один UPDATE: ответ дописывается в JSONB на стороне Postgres
+    (answers || [answer]) без чтения и перезаписи всего массива.
+
     Args:
         session_id: ID quiz session
         question_id: ID вопроса
         answer_value: Значение ответа
-        
+        expected_index: Индекс вопроса, на который отвечают. Если сессия
+            уже ушла дальше (двойной клик по кнопке), ответ не пишется
+
     Returns:
-        Updated QuizSession
+        Updated QuizSession или None, если ответ не записан
     """
+    answer = {
+        'question_id': question_id,
+        'value': answer_value,
+        'answered_at': datetime.utcnow().isoformat()
+    }
+
+    stmt = (
+        sql_update(QuizSession)
+        .where(QuizSession.id == session_id)
+        .values(
+            answers=func.coalesce(QuizSession.answers, cast([], JSONB)).op('||')(
+                bindparam('answer', [answer], type_=JSONB)
+            ),
+            current_question_index=QuizSession.current_question_index + 1,
+            updated_at=datetime.utcnow()
+        )
+        .returning(QuizSession)
+        .execution_options(synchronize_session=False)
+    )
+    if expected_index is not None:
+        stmt = stmt.where(QuizSession.current_question_index == expected_index)
+
     async with db() as session:
-        # Получаем quiz
-        quiz = await session.get(QuizSession, session_id)
-        if not quiz:
+        result = await session.execute(stmt)
+        quiz = result.scalar_one_or_none()
+        await session.commit()
+
+    if quiz is None:
+        if expected_index is None:
             raise ValueError(f"Quiz session {session_id} not found")
-        
-        # Добавляем ответ
-        answers = quiz.answers or []
-        answers.append({
-            'question_id': question_id,
-            'value': answer_value,
-            'answered_at': datetime.utcnow().isoformat()
-        })
-        
-        # Обновляем quiz
-        await session.execute(
+        logger.info(f"Skipped duplicate answer for quiz {session_id}: question={question_id}")
+        return None
+
+    logger.info(f"Added answer to quiz {session_id}: question={question_id}, progress={quiz.current_question_index}/{quiz.total_questions}")
+
+    return quiz
+
+
+async def save_prefetched_questions(
+    session_id: int,
+    question_index: int,
+    branches: dict
+) -> bool:
+    """
+    Сохранить предгенерированные кандидаты следующего вопроса
+
+    Запись происходит, только если пользователь всё ещё на вопросе
+    question_index или только что на него ответил (обработчик ответа
+    в этот момент ждёт предгенерацию) — иначе кандидаты уже не нужны.
+
+    Args:
+        session_id: ID quiz session
+        question_index: Индекс вопроса, на который ещё не ответили
+        branches: {вариант ответа: следующий вопрос}
+
+    Returns:
+        True если кандидаты сохранены
+    """
+    async with db() as session:
+        result = await session.execute(
             sql_update(QuizSession)
-            .where(QuizSession.id == session_id)
+            .where(
+                QuizSession.id == session_id,
+                QuizSession.status == 'in_progress',
+                QuizSession.current_question_index.in_((question_index, question_index + 1))
+            )
+            .values(prefetched_questions={
+                'question_index': question_index,
+                'branches': branches,
+            })
+        )
+        await session.commit()
+
+        return result.rowcount > 0
+
+
+async def append_questions(
+    session_id: int,
+    questions: list[dict],
+    expected_count: int
+) -> bool:
+    """
+    Дописать вопросы в конец quiz session (questions || [...])
+
+    Запись происходит, только если в сессии всё ещё expected_count
+    вопросов: если за это время вопрос уже добавил адаптивный поток,
+    догенерированная пачка не нужна.
+
+    Returns:
+        True если вопросы добавлены
+    """
+    if not questions:
+        return False
+
+    async with db() as session:
+        result = await session.execute(
+            sql_update(QuizSession)
+            .where(
+                QuizSession.id == session_id,
+                QuizSession.status == 'in_progress',
+                func.jsonb_array_length(QuizSession.questions) == expected_count
+            )
             .values(
-                answers=answers,
-                current_question_index=quiz.current_question_index + 1,
+                questions=QuizSession.questions.op('||')(
+                    bindparam('questions', questions, type_=JSONB)
+                ),
                 updated_at=datetime.utcnow()
             )
         )
-        
         await session.commit()
-        
-        # Refresh and return
-        await session.refresh(quiz)
-        
-        logger.info(f"Added answer to quiz {session_id}: question={question_id}, progress={quiz.current_question_index}/{quiz.total_questions}")
-        
-        return quiz
+
+        return result.rowcount > 0
 
 
 async def add_answer(
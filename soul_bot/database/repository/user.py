@@ -6,6 +6,7 @@ from sqlalchemy import select, update as sql_update, func
 from database.database import db
 from database.models.user import User
 from utils.date_helpers import add_months  # ← Fixed circular import!
+from utils import tracing
 import database.repository.statistic_day as db_statistic_day
 
 
@@ -41,6 +42,7 @@ async def is_exist(user_id: int) -> bool:
         return bool(result)
 
 
+@tracing.traced()
 async def get(user_id: int) -> User | None:
     async with db() as session:
         result = await session.scalar(select(User).
@@ -7,16 +7,29 @@ Repository для работы с профилями пользователей
 - add_pattern() - добавить новый паттерн
 - add_insight() - добавить новый инсайт
 - update_preferences() - обновить предпочтения
+- apply_changes() - сохранить изменения анализа одним UPDATE
+
+Узкие проекции для горячих путей (не тянут лишние JSONB):
+- get_style() - только tone/personality/length
+- get_emotional_state() - только emotional_state
+- get_patterns_light() - паттерны без embeddings
+- get_view() - весь профиль, но паттерны без embeddings (чат, отображение)
+- get_updated_at() - только версия профиля (ключ кэша отрисовки)
 """
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Optional
 from uuid import uuid4
-from sqlalchemy import select, update
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import TEXT, cast, column, func, select, update
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by, insert
+from sqlalchemy.orm import load_only
 
 from database.database import db
 from database.models.user_profile import UserProfile
+from utils import tracing
 
 
+@tracing.traced()
 async def get_or_create(user_id: int) -> UserProfile:
     """
     Получить профиль пользователя или создать, если не существует
@@ -53,6 +66,190 @@ async def get_or_create(user_id: int) -> UserProfile:
         return new_profile
 
 
+# ==========================================
+# 🔎 ПРОЕКЦИИ
+# ==========================================
+
+# Значения по умолчанию для пользователя без профиля (как в get_or_create)
+DEFAULT_TONE_STYLE = 'friendly'
+DEFAULT_PERSONALITY = 'coach'
+DEFAULT_MESSAGE_LENGTH = 'brief'
+
+
+@dataclass(frozen=True)
+class ProfileStyle:
+    """Настройки стиля ответов"""
+    tone_style: str = DEFAULT_TONE_STYLE
+    personality: str = DEFAULT_PERSONALITY
+    message_length: str = DEFAULT_MESSAGE_LENGTH
+
+
+@dataclass
+class ProfileView:
+    """
+    Профиль без embeddings паттернов
+
+    Совместим по атрибутам с UserProfile для чтения: чат, промпты,
+    персонализация и отображение embeddings не используют, а это
+    ~90% объёма колонки patterns.
+    """
+    user_id: int
+    tone_style: str = DEFAULT_TONE_STYLE
+    personality: str = DEFAULT_PERSONALITY
+    message_length: str = DEFAULT_MESSAGE_LENGTH
+    patterns: dict = field(default_factory=lambda: {'patterns': []})
+    insights: dict = field(default_factory=lambda: {'insights': []})
+    emotional_state: dict = field(default_factory=dict)
+    learning_preferences: dict = field(default_factory=dict)
+    preferences: dict = field(default_factory=dict)
+    pattern_analysis_count: int = 0
+    last_analysis_at: Optional[datetime] = None
+    # Версия профиля (ключ кэшей, завязанных на паттерны)
+    updated_at: Optional[datetime] = None
+
+
+def _patterns_without_embeddings():
+    """SQL: patterns->'patterns' без ключа embedding (порядок сохраняется)"""
+    elements = (
+        func.jsonb_array_elements(UserProfile.patterns['patterns'])
+        .table_valued(column('value', JSONB), with_ordinality='position')
+        .render_derived()
+    )
+    stripped = elements.c.value.op('-', return_type=JSONB)(cast('embedding', TEXT))
+    return (
+        select(
+            func.coalesce(
+                func.jsonb_agg(
+                    aggregate_order_by(stripped, elements.c.position),
+                    type_=JSONB,
+                ),
+                cast([], JSONB),
+            )
+        )
+        .select_from(elements)
+        .scalar_subquery()
+    )
+
+
+def _strip_embeddings(patterns: list) -> list[dict]:
+    return [
+        {key: value for key, value in pattern.items() if key != 'embedding'}
+        for pattern in patterns
+        if isinstance(pattern, dict)
+    ]
+
+
+@tracing.traced()
+async def get_style(user_id: int) -> ProfileStyle:
+    """
+    Настройки стиля (без JSONB-колонок)
+
+    Если профиля нет — создаёт его: update_style() делает UPDATE
+    и без строки ничего бы не сохранил.
+    """
+    async with db() as session:
+        row = (await session.execute(
+            select(UserProfile.tone_style, UserProfile.personality, UserProfile.message_length)
+            .where(UserProfile.user_id == user_id)
+        )).first()
+
+    if row is None:
+        row = await get_or_create(user_id)
+
+    return ProfileStyle(
+        tone_style=row.tone_style or DEFAULT_TONE_STYLE,
+        personality=row.personality or DEFAULT_PERSONALITY,
+        message_length=row.message_length or DEFAULT_MESSAGE_LENGTH,
+    )
+
+
+@tracing.traced()
+async def get_updated_at(user_id: int) -> Optional[datetime]:
+    """Версия профиля (updated_at) — ключ для кэшей отрисовки, None если профиля нет"""
+    async with db() as session:
+        return await session.scalar(
+            select(UserProfile.updated_at).where(UserProfile.user_id == user_id)
+        )
+
+
+@tracing.traced()
+async def get_emotional_state(user_id: int) -> dict:
+    """Только emotional_state ({} если профиля нет)"""
+    async with db() as session:
+        emotional_state = await session.scalar(
+            select(UserProfile.emotional_state).where(UserProfile.user_id == user_id)
+        )
+    return emotional_state or {}
+
+
+@tracing.traced()
+async def get_patterns_light(user_id: int) -> list[dict]:
+    """Паттерны без embeddings (обрезаются на стороне Postgres)"""
+    async with db() as session:
+        patterns = await session.scalar(
+            select(_patterns_without_embeddings()).where(UserProfile.user_id == user_id)
+        )
+    return patterns or []
+
+
+@tracing.traced()
+async def get_view(user_id: int) -> ProfileView:
+    """
+    Профиль для чтения: все поля, но паттерны без embeddings
+
+    Если профиля нет — создаёт его (как get_or_create).
+    """
+    async with db() as session:
+        row = (await session.execute(
+            select(
+                UserProfile.tone_style,
+                UserProfile.personality,
+                UserProfile.message_length,
+                _patterns_without_embeddings().label('patterns'),
+                UserProfile.insights,
+                UserProfile.emotional_state,
+                UserProfile.learning_preferences,
+                UserProfile.preferences,
+                UserProfile.pattern_analysis_count,
+                UserProfile.last_analysis_at,
+                UserProfile.updated_at,
+            )
+            .where(UserProfile.user_id == user_id)
+        )).first()
+
+    if row is None:
+        profile = await get_or_create(user_id)
+        return ProfileView(
+            user_id=user_id,
+            tone_style=profile.tone_style,
+            personality=profile.personality,
+            message_length=profile.message_length,
+            patterns={'patterns': _strip_embeddings((profile.patterns or {}).get('patterns', []))},
+            insights=profile.insights or {'insights': []},
+            emotional_state=profile.emotional_state or {},
+            learning_preferences=profile.learning_preferences or {},
+            preferences=profile.preferences or {},
+            pattern_analysis_count=profile.pattern_analysis_count or 0,
+            last_analysis_at=profile.last_analysis_at,
+            updated_at=profile.updated_at,
+        )
+
+    return ProfileView(
+        user_id=user_id,
+        tone_style=row.tone_style,
+        personality=row.personality,
+        message_length=row.message_length,
+        patterns={'patterns': row.patterns},
+        insights=row.insights or {'insights': []},
+        emotional_state=row.emotional_state or {},
+        learning_preferences=row.learning_preferences or {},
+        preferences=row.preferences or {},
+        pattern_analysis_count=row.pattern_analysis_count or 0,
+        last_analysis_at=row.last_analysis_at,
+        updated_at=row.updated_at,
+    )
+
+
 async def get(user_id: int) -> UserProfile | None:
     """Получить профиль пользователя"""
     async with db() as session:
@@ -219,6 +416,49 @@ async def update_preferences(user_id: int, preferences: dict) -> None:
         await session.commit()
 
 
+def merge_response_hints(preferences: dict, hints: list[dict]) -> bool:
+    """
+    Дописать hints в preferences['active_response_hints'] (in-place)
+
+    Returns:
+        True если очередь hints не пуста и её нужно сохранить
+    """
+    existing_hints = [
+        hint for hint in preferences.get('active_response_hints', [])
+        if isinstance(hint, dict)
+    ]
+
+    existing_keys = { (hint.get('hint') or '').strip().lower(): hint for hint in existing_hints }
+
+    for hint in hints:
+        text = (hint.get('hint') or '').strip()
+        if not text:
+            continue
+
+        key = text.lower()
+        if key in existing_keys:
+            # Уже есть такой hint (ещё не использован) — пропускаем
+            continue
+
+        prepared_hint = {
+            'id': hint.get('id') or str(uuid4()),
+            'hint': text,
+            'source': hint.get('source') or {},
+            'status': hint.get('status') or 'pending',
+            'created_at': hint.get('created_at') or datetime.utcnow().isoformat()
+        }
+        existing_hints.append(prepared_hint)
+        existing_keys[key] = prepared_hint
+
+    if not existing_hints:
+        # Нечего сохранять
+        return False
+
+    # Ограничиваем очередь чтобы не раздувалась бесконечно
+    preferences['active_response_hints'] = existing_hints[-8:]
+    return True
+
+
 async def add_response_hints(user_id: int, hints: list[dict]) -> None:
     """Добавить активные response hints (очередь зеркал для ближайших ответов)."""
 
@@ -226,8 +466,11 @@ async def add_response_hints(user_id: int, hints: list[dict]) -> None:
         return
 
     async with db() as session:
+        # Нужны только preferences — остальные JSONB не грузим
         profile = await session.scalar(
-            select(UserProfile).where(UserProfile.user_id == user_id)
+            select(UserProfile)
+            .options(load_only(UserProfile.id, UserProfile.preferences))
+            .where(UserProfile.user_id == user_id)
         )
 
         if not profile:
@@ -244,40 +487,9 @@ async def add_response_hints(user_id: int, hints: list[dict]) -> None:
             await session.flush()
 
         preferences = dict(profile.preferences or {})
-        existing_hints = [
-            hint for hint in preferences.get('active_response_hints', [])
-            if isinstance(hint, dict)
-        ]
-
-        existing_keys = { (hint.get('hint') or '').strip().lower(): hint for hint in existing_hints }
-
-        for hint in hints:
-            text = (hint.get('hint') or '').strip()
-            if not text:
-                continue
-
-            key = text.lower()
-            if key in existing_keys:
-                # Уже есть такой hint (ещё не использован) — пропускаем
-                continue
-
-            prepared_hint = {
-                'id': hint.get('id') or str(uuid4()),
-                'hint': text,
-                'source': hint.get('source') or {},
-                'status': hint.get('status') or 'pending',
-                'created_at': hint.get('created_at') or datetime.utcnow().isoformat()
-            }
-            existing_hints.append(prepared_hint)
-            existing_keys[key] = prepared_hint
-
-        if not existing_hints:
-            # Нечего сохранять
+        if not merge_response_hints(preferences, hints):
             return
 
-        # Ограничиваем очередь чтобы не раздувалась бесконечно
-        preferences['active_response_hints'] = existing_hints[-8:]
-
         await session.execute(
             update(UserProfile)
             .where(UserProfile.user_id == user_id)
@@ -289,6 +501,50 @@ async def add_response_hints(user_id: int, hints: list[dict]) -> None:
         await session.commit()
 
 
+@tracing.traced()
+async def apply_changes(
+    user_id: int,
+    expected_updated_at: datetime,
+    values: dict,
+    count_analysis: bool = False
+) -> bool:
+    """
+    Сохранить изменения профиля одним UPDATE (optimistic concurrency)
+
+    UPDATE user_profiles SET ... WHERE user_id = $1 AND updated_at = $2
+
+    Args:
+        user_id: Telegram ID пользователя
+        expected_updated_at: updated_at профиля, на основе которого
+            посчитаны изменения
+        values: {колонка: новое значение}
+        count_analysis: Засчитать анализ паттернов
+            (pattern_analysis_count + 1, last_analysis_at)
+
+    Returns:
+        True если записано; False если профиль успели изменить
+    """
+    now = datetime.utcnow()
+    values = {**values, 'updated_at': now}
+    if count_analysis:
+        values['pattern_analysis_count'] = UserProfile.pattern_analysis_count + 1
+        values['last_analysis_at'] = now
+
+    async with db() as session:
+        result = await session.execute(
+            update(UserProfile)
+            .where(
+                UserProfile.user_id == user_id,
+                UserProfile.updated_at == expected_updated_at
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+        return result.rowcount > 0
+
+
 async def consume_response_hint(user_id: int, hint_id: str, status: str = 'consumed') -> None:
     """Пометить hint как использованный (по умолчанию удаляет его из очереди)."""
 
@@ -296,14 +552,11 @@ async def consume_response_hint(user_id: int, hint_id: str, status: str = 'consu
         return
 
     async with db() as session:
-        profile = await session.scalar(
-            select(UserProfile).where(UserProfile.user_id == user_id)
+        stored_preferences = await session.scalar(
+            select(UserProfile.preferences).where(UserProfile.user_id == user_id)
         )
 
-        if not profile:
-            return
-
-        preferences = dict(profile.preferences or {})
+        preferences = dict(stored_preferences or {})
         hints = [
             hint for hint in preferences.get('active_response_hints', [])
             if isinstance(hint, dict)
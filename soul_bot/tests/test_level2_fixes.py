@@ -121,7 +121,7 @@ class TestLevel2FixesSmoke:
             mock_profile.emotional_state = {}
             mock_profile.learning_preferences = {}
             
-            mock_user_profile.get_or_create = AsyncMock(return_value=mock_profile)
+            mock_user_profile.get_view = AsyncMock(return_value=mock_profile)
             
             with patch('bot.services.openai_service.db_user') as mock_db_user:
                 mock_user = Mock()
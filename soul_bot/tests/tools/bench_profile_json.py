@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSONB encode/decode for a realistic user profile.
+
+Usage (from soul_bot/):
+    python tests/tools/bench_profile_json.py [--iterations 50] [--patterns 20]
+
+The profile has 20 patterns with 1536-dim embeddings, evidence and topic
+vectors, plus insights, emotional state, learning preferences and response
+hints. The script measures the same CPU work the engine does per row:
+
+- save: SQLAlchemy JSONB bind processor + asyncpg jsonb encoder
+- load: asyncpg jsonb decoder (what the driver does for every fetched row)
+
+It compares SQLAlchemy's stock stdlib-json codecs with the engine setup
+from database/database.py (utils.json_codec). No database connection is needed.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy.dialects.postgresql import JSONB  # noqa: E402
+from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg  # noqa: E402
+
+from utils import json_codec  # noqa: E402
+
+_TOPICS = ["работа", "отношения", "деньги", "здоровье", "семья", "саморазвитие"]
+_EVIDENCE = [
+    "Опять сижу до ночи над отчётом, хотя никто не просил",
+    "Каждый раз, когда начальник пишет, у меня сжимается всё внутри",
+    "Не могу начать, пока не продумаю всё до мелочей",
+    "Мне кажется, что все вокруг справляются лучше",
+    "В выходные вообще не отдыхал, всё время думал о задачах",
+]
+
+
+def _pattern(index: int, rng: random.Random) -> dict:
+    detected = datetime(2025, 10, 1) + timedelta(days=index)
+    return {
+        "id": f"pattern-{index}",
+        "type": rng.choice(["behavioral", "emotional", "cognitive"]),
+        "title": f"Паттерн {index}: перфекционизм в задачах",
+        "description": "Откладывает задачи, пока не появится ощущение идеального плана",
+        "evidence": rng.sample(_EVIDENCE, 3),
+        "embedding": [rng.uniform(-0.1, 0.1) for _ in range(1536)],
+        "frequency": rng.choice(["high", "medium", "low"]),
+        "first_detected": detected.isoformat(),
+        "last_detected": (detected + timedelta(days=3)).isoformat(),
+        "occurrences": rng.randint(1, 12),
+        "tags": rng.sample(_TOPICS, 2),
+        "related_patterns": [f"pattern-{(index + k) % 20}" for k in (1, 2, 3)],
+        "confidence": round(rng.uniform(0.6, 0.95), 2),
+        "context_weights": {topic: round(rng.random(), 3) for topic in _TOPICS},
+        "primary_context": rng.choice(_TOPICS),
+        "response_hint": "Мягко напомнить, что достаточно хорошего результата",
+    }
+
+
+def build_profile(patterns: int = 20, seed: int = 7) -> dict:
+    """Значения JSONB-колонок профиля"""
+    rng = random.Random(seed)
+    return {
+        "patterns": {"patterns": [_pattern(i, rng) for i in range(patterns)]},
+        "insights": {"insights": [
+            {
+                "id": f"insight-{i}",
+                "category": "behavior",
+                "title": f"Инсайт {i}",
+                "description": "Связь между усталостью и самокритикой",
+                "impact": "negative",
+                "recommendations": ["Напоминать о достижениях", "Фокус на прогрессе"],
+                "derived_from": [f"pattern-{i}", f"pattern-{i + 1}"],
+                "created_at": "2025-10-24T10:00:00",
+                "priority": "high",
+            }
+            for i in range(10)
+        ]},
+        "emotional_state": {
+            "current_mood": "slightly_down",
+            "stress_level": "high",
+            "energy_level": "low",
+            "mood_history": [
+                {"date": f"2025-10-{day:02d}", "mood": "neutral", "triggers": ["работа"]}
+                for day in range(1, 31)
+            ],
+        },
+        "learning_preferences": {
+            "works_well": [f"конкретные шаги {i}" for i in range(10)],
+            "doesnt_work": [f"общие фразы {i}" for i in range(10)],
+        },
+        "preferences": {
+            "active_response_hints": [
+                {"id": f"hint-{i}", "hint": "Спросить про выходные", "status": "pending"}
+                for i in range(8)
+            ],
+        },
+    }
+
+
+class _CodecCapture:
+    """Fake asyncpg connection: remembers registered codecs"""
+
+    def __init__(self):
+        self.codecs = {}
+        self._connection = self
+
+    async def set_type_codec(self, typename, *, encoder, decoder, schema, format):
+        self.codecs[typename] = (encoder, decoder)
+
+
+def _stock_setup():
+    dialect = PGDialect_asyncpg()
+    capture = _CodecCapture()
+    asyncio.run(dialect.setup_asyncpg_jsonb_codec(capture))
+    return JSONB().bind_processor(dialect), capture.codecs["jsonb"]
+
+
+def _engine_setup():
+    dialect = PGDialect_asyncpg(json_serializer=json_codec.dumps, json_deserializer=json_codec.loads)
+    capture = _CodecCapture()
+    asyncio.run(dialect.setup_asyncpg_jsonb_codec(capture))
+    return JSONB().bind_processor(dialect), capture.codecs["jsonb"]
+
+
+def _timeit(func, iterations: int) -> float:
+    func()  # warm-up
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run(iterations: int, patterns: int) -> int:
+    profile = build_profile(patterns)
+    # Postgres отдаёт jsonb в своём текстовом виде (", " и ": ")
+    wire = {column: b"\x01" + json.dumps(value).encode() for column, value in profile.items()}
+    size_kb = sum(len(data) for data in wire.values()) / 1024
+
+    results = {}
+    for name, (bind, (encoder, decoder)) in (
+        ("stdlib json (SQLAlchemy default)", _stock_setup()),
+        (f"engine codec ({json_codec.JSON_BACKEND})", _engine_setup()),
+    ):
+        for column, data in wire.items():
+            assert decoder(data) == profile[column], f"{name}: {column} round-trip mismatch"
+
+        save = _timeit(lambda: [encoder(bind(value)) for value in profile.values()], iterations)
+        load = _timeit(lambda: [decoder(data) for data in wire.values()], iterations)
+        results[name] = (save, load)
+
+    print(f"Profile: {patterns} patterns, {size_kb:.0f} KiB of JSONB, {iterations} iterations (median)")
+    print(f"{'codec':<36} {'save, ms':>10} {'load, ms':>10}")
+    for name, (save, load) in results.items():
+        print(f"{name:<36} {save:>10.2f} {load:>10.2f}")
+
+    (base_save, base_load), (fast_save, fast_load) = results.values()
+    print(f"speedup: save x{base_save / fast_save:.1f}, load x{base_load / fast_load:.1f}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--patterns", type=int, default=20)
+    args = parser.parse_args()
+    return run(args.iterations, args.patterns)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
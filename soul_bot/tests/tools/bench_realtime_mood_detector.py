@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark for realtime_mood_detector on real-length chat messages.
+
+Usage (from soul_bot/):
+    python tests/tools/bench_realtime_mood_detector.py [--iterations 20]
+
+Compares the precompiled matcher with the legacy per-pattern re.search loop
+and checks the "< 1ms per message" budget from the module docstring.
+"""
+
+import argparse
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from bot.services.realtime_mood_detector import (  # noqa: E402
+    URGENT_KEYWORDS,
+    detect_urgent_emotional_signals,
+)
+
+BUDGET_MS = 1.0
+
+_SENTENCES = [
+    "Сегодня опять весь день просидел на работе и ничего толком не успел.",
+    "Начальник снова попросил переделать отчёт, хотя я сдал его ещё вчера.",
+    "Вечером поговорил с мамой, она как всегда переживает за меня.",
+    "Не понимаю, почему мне так сложно начать что-то новое.",
+    "Хочу наконец разобраться с деньгами и перестать тратить всё до зарплаты.",
+    "С партнёром вроде всё нормально, но иногда чувствую себя одиноко.",
+    "Думаю записаться в спортзал, но каждый раз откладываю.",
+    "Вчера долго не мог уснуть, крутились мысли о завтрашней встрече.",
+    "Подруга сказала, что я слишком много беру на себя.",
+    "В выходные съездили за город, было спокойно и хорошо.",
+]
+
+_SIGNAL_SENTENCES = [
+    "У меня паническая атака, задыхаюсь.",
+    "Я работаю по 12 часов каждый день, нет сил.",
+    "Забыла важную встречу, не могу думать.",
+    "Ура, получилось наконец!",
+    "Меня всё бесит, достали все.",
+    "Мне очень грустно и одиноко.",
+]
+
+
+def build_corpus(size: int = 2000, seed: int = 42) -> list[str]:
+    """Messages of 1-12 sentences (~60-900 chars), ~10% with signals."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        sentences = rng.choices(_SENTENCES, k=rng.randint(1, 12))
+        if rng.random() < 0.1:
+            sentences.insert(rng.randrange(len(sentences) + 1), rng.choice(_SIGNAL_SENTENCES))
+        corpus.append(" ".join(sentences))
+    return corpus
+
+
+def legacy_detect(message: str):
+    """Original implementation: re.search per pattern, early exit per emotion."""
+    if not message or len(message.strip()) < 3:
+        return None
+    message_lower = message.lower()
+    for emotion, config in URGENT_KEYWORDS.items():
+        matched = [p for p in config['keywords'] if re.search(p, message_lower)]
+        if matched:
+            return emotion, matched
+    return None
+
+
+def measure(func, corpus: list[str], iterations: int) -> list[float]:
+    """Per-message latencies in milliseconds."""
+    timings = []
+    for _ in range(iterations):
+        for message in corpus:
+            start = time.perf_counter()
+            func(message)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> float:
+    timings = sorted(timings)
+    p50 = statistics.median(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(
+        f"{name:<12} mean={statistics.fmean(timings):.4f}ms "
+        f"p50={p50:.4f}ms p99={p99:.4f}ms max={timings[-1]:.4f}ms"
+    )
+    return p99
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--size', type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.size)
+    avg_len = statistics.fmean(len(m) for m in corpus)
+    print(f"📊 {len(corpus)} messages, avg {avg_len:.0f} chars, {args.iterations} iterations\n")
+
+    mismatches = 0
+    for message in corpus:
+        legacy = legacy_detect(message)
+        signal = detect_urgent_emotional_signals(message)
+        current = (signal.emotion, signal.trigger_keywords) if signal else None
+        mismatches += legacy != current
+
+    report('legacy', measure(legacy_detect, corpus, args.iterations))
+    p99 = report('precompiled', measure(detect_urgent_emotional_signals, corpus, args.iterations))
+
+    print(f"\nmismatches vs legacy: {mismatches}")
+    within_budget = p99 < BUDGET_MS
+    print(f"{'✅' if within_budget else '❌'} p99 {'<' if within_budget else '>='} {BUDGET_MS}ms budget")
+    return 0 if within_budget and not mismatches else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
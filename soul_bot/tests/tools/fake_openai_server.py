@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI API and the Telegram Bot API.
+
+Usage (from soul_bot/):
+    python tests/tools/fake_openai_server.py [--port 8899] [--latency-ms 800] [--rate-429 0.02]
+
+    OPENAI_BASE_URL=http://127.0.0.1:8899/v1            (openai SDK picks it up)
+    TELEGRAM_API_SERVER=http://127.0.0.1:8899/telegram  (bot/loader.py)
+
+Endpoints:
+- POST /v1/chat/completions — plain and streaming (SSE) responses with
+  configurable latency. Requests with response_format get one JSON object
+  that carries every key the bot's analyzers read (patterns, new_patterns,
+  mood, insights, recommendations, question(s), ...).
+- POST /v1/embeddings — deterministic 1536-dim vectors, float or base64.
+- POST /telegram/bot<token>/<method> — sendMessage / editMessageText return
+  a Message, everything else returns true.
+
+A share of OpenAI requests (--rate-429) is answered with 429 and a
+retry-after-ms header, so the SDK's retry/backoff path is part of the run.
+tests/tools/load_pipeline.py starts this server in-process.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import struct
+import time
+from dataclasses import dataclass, field
+from itertools import count
+
+from aiohttp import web
+
+EMBEDDING_DIMENSIONS = 1536
+
+_REPLY_SENTENCES = [
+    "Похоже, ты сейчас много на себя берёшь и почти не оставляешь времени на отдых.",
+    "Давай попробуем разобрать, что именно в этой ситуации даётся тяжелее всего.",
+    "Ты уже заметил закономерность — это важный первый шаг.",
+    "Что изменится, если на этой неделе ты сделаешь всего одну маленькую вещь для себя?",
+    "Ощущение, что всё нужно сделать идеально, часто мешает вообще начать.",
+    "Расскажи, как ты обычно восстанавливаешься после таких дней?",
+]
+
+_PATTERN = {
+    "type": "behavioral",
+    "title": "Перфекционизм",
+    "description": "Откладывает задачи, пока не появится идеальный план",
+    "contradiction": "Хочет успевать больше, но тратит силы на доведение мелочей",
+    "hidden_dynamic": "Страх оценки заставляет перепроверять всё по много раз",
+    "blocked_resource": "Внимательность к деталям можно направить на приоритеты",
+    "evidence": ["Не могу начать, пока не продумаю всё до мелочей"],
+    "frequency": "high",
+    "confidence": 0.82,
+    "tags": ["работа"],
+    "response_hint": "Мягко напомнить, что достаточно хорошего результата",
+}
+
+_STRUCTURED_REPLY = {
+    "patterns": [_PATTERN],
+    "new_patterns": [_PATTERN],
+    "mood": {
+        "current_mood": "slightly_down",
+        "stress_level": "medium",
+        "energy_level": "medium",
+        "triggers": ["работа"],
+    },
+    "insights": [{
+        "category": "behavior",
+        "title": "Связь усталости и самокритики",
+        "description": "После длинных рабочих дней растёт самокритика",
+        "impact": "negative",
+        "recommendations": ["Отмечать завершённые задачи"],
+        "derived_from": ["Перфекционизм"],
+        "priority": "medium",
+    }],
+    "learning": {"works_well": ["конкретные шаги"], "doesnt_work": ["общие советы"]},
+    "recommendations": ["Выбрать одну задачу на день", "Заканчивать работу в одно время"],
+    "contradictions": [],
+}
+
+_QUESTION = {
+    "text": "Насколько тебе знакомо ощущение, что отдых нужно заслужить?",
+    "type": "scale",
+    "options": ["Совсем нет", "Скорее нет", "Иногда", "Скорее да", "Очень знакомо"],
+}
+
+# Генератор квиза читает вопрос из корня ответа, из "question" или "questions"
+_STRUCTURED_REPLY.update(_QUESTION, question=_QUESTION, questions=[_QUESTION])
+
+
+@dataclass
+class FakeUpstreamConfig:
+    """Поведение фейковых OpenAI / Telegram"""
+
+    latency_ms: float = 800.0
+    jitter_ms: float = 200.0
+    rate_429: float = 0.0
+    retry_after_ms: int = 200
+    stream_chunks: int = 12
+    telegram_latency_ms: float = 30.0
+    embedding_latency_ms: float = 60.0
+    seed: int = 42
+
+
+@dataclass
+class FakeUpstreamStats:
+    chat_completions: int = 0
+    streams: int = 0
+    embeddings: int = 0
+    rate_limited: int = 0
+    telegram_calls: dict[str, int] = field(default_factory=dict)
+
+
+class FakeUpstream:
+    """aiohttp-приложение с фейковыми OpenAI и Telegram API"""
+
+    def __init__(self, config: FakeUpstreamConfig | None = None):
+        self.config = config or FakeUpstreamConfig()
+        self.stats = FakeUpstreamStats()
+        # chat_id → текст последнего отправленного / отредактированного сообщения
+        self.last_text: dict[int, str] = {}
+        self._rng = random.Random(self.config.seed)
+        self._message_ids = count(1000)
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+        self.app = web.Application(client_max_size=32 * 1024 * 1024)
+        self.app.router.add_post('/v1/chat/completions', self._chat_completions)
+        self.app.router.add_post('/v1/embeddings', self._embeddings)
+        self.app.router.add_post('/telegram/bot{token}/{method}', self._telegram)
+
+    # ==========================================
+    # 🚀 LIFECYCLE
+    # ==========================================
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def openai_base_url(self) -> str:
+        return f"{self.base_url}/v1"
+
+    @property
+    def telegram_base_url(self) -> str:
+        return f"{self.base_url}/telegram"
+
+    # ==========================================
+    # 🤖 OPENAI
+    # ==========================================
+
+    async def _sleep(self, base_ms: float, jitter_ms: float = 0.0) -> None:
+        delay = max(0.0, base_ms + self._rng.uniform(-jitter_ms, jitter_ms))
+        await asyncio.sleep(delay / 1000)
+
+    def _rate_limited(self) -> web.Response | None:
+        if self.config.rate_429 and self._rng.random() < self.config.rate_429:
+            self.stats.rate_limited += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status=429,
+                headers={"retry-after-ms": str(self.config.retry_after_ms)},
+            )
+        return None
+
+    def _reply_text(self, body: dict) -> str:
+        if body.get('response_format'):
+            return json.dumps(_STRUCTURED_REPLY, ensure_ascii=False)
+        return " ".join(self._rng.sample(_REPLY_SENTENCES, 3))
+
+    @staticmethod
+    def _usage(body: dict, completion: str) -> dict:
+        prompt_tokens = sum(len(str(m.get('content') or '')) for m in body.get('messages', [])) // 4
+        completion_tokens = len(completion) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    async def _chat_completions(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        limited = self._rate_limited()
+        if limited is not None:
+            return limited
+
+        text = self._reply_text(body)
+        created = int(time.time())
+        completion_id = f"chatcmpl-fake-{next(self._message_ids)}"
+        model = body.get('model', 'gpt-4o-mini')
+
+        if not body.get('stream'):
+            self.stats.chat_completions += 1
+            await self._sleep(self.config.latency_ms, self.config.jitter_ms)
+            return web.json_response({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": self._usage(body, text),
+            })
+
+        self.stats.streams += 1
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        chunks = max(1, self.config.stream_chunks)
+        step = max(1, len(text) // chunks + 1)
+        # Первый токен — после ~трети задержки, остальное равномерно
+        await self._sleep(self.config.latency_ms / 3, self.config.jitter_ms / 3)
+        per_chunk_ms = (self.config.latency_ms * 2 / 3) / chunks
+
+        def _event(payload: dict) -> bytes:
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode('utf-8')
+
+        for offset in range(0, len(text), step):
+            await response.write(_event({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": text[offset:offset + step]}, "finish_reason": None}],
+            }))
+            await self._sleep(per_chunk_ms)
+
+        await response.write(_event({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }))
+        if (body.get('stream_options') or {}).get('include_usage'):
+            await response.write(_event({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": self._usage(body, text),
+            }))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    @staticmethod
+    def _embedding(text: str) -> list[float]:
+        digest = hashlib.sha256(text.encode('utf-8')).digest()
+        rng = random.Random(digest)
+        return [rng.uniform(-0.05, 0.05) for _ in range(EMBEDDING_DIMENSIONS)]
+
+    async def _embeddings(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        limited = self._rate_limited()
+        if limited is not None:
+            return limited
+
+        self.stats.embeddings += 1
+        inputs = body.get('input') or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+
+        await self._sleep(self.config.embedding_latency_ms)
+
+        as_base64 = body.get('encoding_format') == 'base64'
+        data = []
+        for index, text in enumerate(inputs):
+            vector = self._embedding(str(text))
+            if as_base64:
+                packed = struct.pack(f'<{len(vector)}f', *vector)
+                embedding = base64.b64encode(packed).decode('ascii')
+            else:
+                embedding = vector
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+
+        tokens = sum(len(str(text)) for text in inputs) // 4
+        return web.json_response({
+            "object": "list",
+            "data": data,
+            "model": body.get('model', 'text-embedding-3-small'),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    # ==========================================
+    # 📨 TELEGRAM
+    # ==========================================
+
+    async def _telegram(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        self.stats.telegram_calls[method] = self.stats.telegram_calls.get(method, 0) + 1
+        params = dict(await request.post())
+
+        await self._sleep(self.config.telegram_latency_ms)
+
+        if method in ('sendMessage', 'editMessageText', 'sendPhoto', 'sendVoice', 'sendDocument'):
+            chat_id = int(params.get('chat_id') or 0)
+            message_id = int(params.get('message_id') or next(self._message_ids))
+            text = params.get('text') or params.get('caption') or ""
+            self.last_text[chat_id] = text
+            result = {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": 1, "is_bot": True, "first_name": "SoulNear"},
+                "text": text,
+            }
+        elif method == 'getMe':
+            result = {"id": 1, "is_bot": True, "first_name": "SoulNear", "username": "soulnear_fake_bot"}
+        else:
+            result = True
+
+        return web.json_response({"ok": True, "result": result})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--latency-ms", type=float, default=800.0)
+    parser.add_argument("--jitter-ms", type=float, default=200.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(FakeUpstreamConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_429=args.rate_429,
+    ))
+
+    async def _serve() -> None:
+        base_url = await upstream.start(args.host, args.port)
+        print(f"OPENAI_BASE_URL={upstream.openai_base_url}")
+        print(f"TELEGRAM_API_SERVER={upstream.telegram_base_url}")
+        print(f"Serving on {base_url}, Ctrl+C to stop")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await upstream.stop()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
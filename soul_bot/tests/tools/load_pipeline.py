@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+Load test for the full message pipeline against a local OpenAI stand-in.
+
+Usage (from soul_bot/, with a local Postgres):
+    docker compose -f ../docker-compose.dev.yml up -d postgres
+    POSTGRES_HOST=localhost POSTGRES_PASSWORD=... POSTGRES_DB=soulnear_load \\
+        python tests/tools/load_pipeline.py --users 50 --messages 5 --flows chat,stream,quiz
+
+What runs:
+- fake_openai_server.FakeUpstream (OpenAI + Telegram Bot API) in-process,
+  wired in through OPENAI_BASE_URL and the bot's aiohttp session
+- chat: Telegram updates go through dp.feed_update with the production
+  middlewares, FSM storage and handlers (helper -> text_answer ->
+  get_chat_completion -> save_conversation)
+- stream: openai_service.stream_chat_completion (WebApp chat), TTFT + total
+- quiz: the same service calls the quiz handlers make: start from seeds,
+  answer every question (adaptive generation included), analyze_quiz_results
+  and complete
+
+Simulated users get ids from --user-id-base upwards. Their rows are deleted
+before and after the run (unless --keep-data).
+
+Report: p50/p95/p99 latency per flow, DB queries per message (counted by
+database.query_stats until the message finishes; create_safe_task background
+work is excluded, as in production), messages/sec, and fake
+upstream counters. --max-p95-ms / --max-queries make the exit code 1 when
+exceeded, so the script can gate a deploy. --json writes the report to a file.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from itertools import count
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_openai_server import FakeUpstream, FakeUpstreamConfig  # noqa: E402
+
+FLOWS = ("chat", "stream", "quiz")
+
+_MESSAGES = [
+    "Опять сижу до ночи над отчётом, хотя никто не просил. Почему я так делаю?",
+    "Не могу начать важный проект, пока не продумаю всё до мелочей",
+    "С партнёром вроде всё нормально, но иногда чувствую себя одиноко",
+    "Хочу наконец разобраться с деньгами и перестать тратить всё до зарплаты",
+    "Вчера долго не мог уснуть, крутились мысли о завтрашней встрече",
+    "Подруга сказала, что я слишком много беру на себя. Она права?",
+    "Каждый раз, когда начальник пишет, у меня сжимается всё внутри",
+]
+
+_QUIZ_CATEGORIES = ("relationships", "money", "purpose")
+
+
+# ==========================================
+# 📊 МЕТРИКИ
+# ==========================================
+
+@dataclass
+class Sample:
+    flow: str
+    latency_ms: float
+    queries: int
+    ok: bool
+    ttft_ms: Optional[float] = None
+
+
+@dataclass
+class FlowReport:
+    flow: str
+    count: int
+    errors: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_queries: float
+    max_queries: int
+    p50_ttft_ms: Optional[float] = None
+
+
+@dataclass
+class RunReport:
+    users: int
+    wall_s: float
+    messages: int
+    messages_per_s: float
+    flows: list[FlowReport] = field(default_factory=list)
+    upstream: dict = field(default_factory=dict)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), round(q / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+def _summarize(flow: str, samples: list[Sample]) -> FlowReport:
+    latencies = [s.latency_ms for s in samples]
+    queries = [s.queries for s in samples]
+    ttfts = [s.ttft_ms for s in samples if s.ttft_ms is not None]
+    return FlowReport(
+        flow=flow,
+        count=len(samples),
+        errors=sum(1 for s in samples if not s.ok),
+        p50_ms=_percentile(latencies, 50),
+        p95_ms=_percentile(latencies, 95),
+        p99_ms=_percentile(latencies, 99),
+        mean_queries=sum(queries) / len(queries) if queries else 0.0,
+        max_queries=max(queries, default=0),
+        p50_ttft_ms=_percentile(ttfts, 50) if ttfts else None,
+    )
+
+
+async def _measure(flow: str, samples: list[Sample], coro_factory) -> None:
+    """Выполнить шаг и записать latency + число запросов в его контексте"""
+    from database import query_stats
+
+    started = time.perf_counter()
+    # record=False: апдейты внутри feed_update уже попадают в агрегаты через EventsMiddleware
+    with query_stats.track(f"load {flow}", record=False) as stats:
+        try:
+            ok, ttft = await coro_factory(started)
+        except Exception as exc:
+            print(f"  ! {flow}: {type(exc).__name__}: {exc}", file=sys.stderr)
+            ok, ttft = False, None
+    samples.append(Sample(
+        flow=flow,
+        latency_ms=(time.perf_counter() - started) * 1000,
+        queries=stats.queries,
+        ok=ok,
+        ttft_ms=ttft,
+    ))
+
+
+# ==========================================
+# 👥 СИМУЛЯЦИЯ ПОЛЬЗОВАТЕЛЕЙ
+# ==========================================
+
+class LoadRunner:
+    def __init__(self, args: argparse.Namespace, upstream: FakeUpstream):
+        self.args = args
+        self.upstream = upstream
+        self.samples: list[Sample] = []
+        self.rng = random.Random(args.seed)
+        self._update_ids = count(1)
+        self._message_ids = count(1)
+        self.user_ids = [args.user_id_base + i for i in range(args.users)]
+
+    async def setup(self) -> None:
+        from aiogram.client.session.aiohttp import AiohttpSession
+        from aiogram.client.telegram import TelegramAPIServer
+        from bot.handlers import dp
+        from bot.handlers.error import register_error_handlers
+        from bot.loader import bot
+        from bot.middlewares.events import EventsMiddleware
+        from database.database import create_tables, db
+        from database.migration_runner import run_migrations
+
+        await create_tables()
+        await run_migrations(db.engine)
+
+        await bot.session.close()
+        bot.session = AiohttpSession(api=TelegramAPIServer.from_base(self.upstream.telegram_base_url))
+
+        dp.message.middleware(EventsMiddleware())
+        dp.callback_query.middleware(EventsMiddleware())
+        register_error_handlers(dp)
+
+        self.bot, self.dp, self.db = bot, dp, db
+
+        await self.cleanup()
+        await self._seed_users()
+
+    async def _seed_users(self) -> None:
+        from bot.states.states import get_prompt
+        from database.models import Aiogram_state, User
+
+        sub_date = datetime.now() + timedelta(days=30)
+        async with self.db() as session:
+            for user_id in self.user_ids:
+                session.add(User(
+                    user_id=user_id,
+                    name=f"load{user_id}",
+                    username=None,
+                    ref=None,
+                    sub_date=sub_date,
+                    reg_date=datetime.now(),
+                    real_name="Тест",
+                    age=30,
+                    gender=False,
+                ))
+                session.add(Aiogram_state(user_id=user_id, state=get_prompt.helper_prompt.state))
+            await session.commit()
+
+    async def cleanup(self) -> None:
+        from sqlalchemy import delete
+
+        from database.models import (
+            Aiogram_state, ConversationHistory, DeeplinkEvent, QuizSession, User, UserProfile,
+        )
+
+        low, high = self.user_ids[0], self.user_ids[-1]
+        async with self.db() as session:
+            for model in (DeeplinkEvent, ConversationHistory, QuizSession, UserProfile, Aiogram_state, User):
+                await session.execute(delete(model).where(model.user_id.between(low, high)))
+            await session.commit()
+
+    def _text(self) -> str:
+        return self.rng.choice(_MESSAGES)
+
+    # --- chat: Telegram update → dispatcher → text_answer ---
+
+    async def _chat_message(self, user_id: int) -> None:
+        from aiogram.types import Update
+
+        import bot.text as texts
+
+        update = Update.model_validate({
+            "update_id": next(self._update_ids),
+            "message": {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "Load"},
+                "text": self._text(),
+            },
+        }, context={"bot": self.bot})
+
+        async def _step(started: float):
+            await self.dp.feed_update(self.bot, update)
+            return self.upstream.last_text.get(user_id) != texts.gen_error, None
+
+        await _measure("chat", self.samples, _step)
+
+    # --- stream: WebApp chat ---
+
+    async def _stream_message(self, user_id: int) -> None:
+        from bot.services import openai_service
+
+        async def _step(started: float):
+            ttft = None
+            ok = False
+            async for event in openai_service.stream_chat_completion(user_id, self._text(), "helper"):
+                if event["type"] == "delta" and ttft is None:
+                    ttft = (time.perf_counter() - started) * 1000
+                ok = event["type"] == "done"
+            return ok, ttft
+
+        await _measure("stream", self.samples, _step)
+
+    # --- quiz: те же вызовы, что делают quiz-хендлеры ---
+
+    async def _quiz(self, user_id: int) -> None:
+        import bot.handlers.user.quiz as quiz_handlers
+        import database.repository.quiz_session as db_quiz_session
+        import database.repository.user_profile as db_user_profile
+        from bot.services.quiz_service import analyzer, generator
+
+        category = self.rng.choice(_QUIZ_CATEGORIES)
+        state = {}
+
+        async def _start(started: float):
+            profile_data = {"patterns": await db_user_profile.get_patterns_light(user_id)}
+            questions = generator.build_initial_questions(category, profile_data)
+            state["session"] = await db_quiz_session.create(
+                user_id=user_id,
+                category=category,
+                questions=questions,
+                total_questions=generator.TARGET_QUESTION_COUNT,
+            )
+            return True, None
+
+        await _measure("quiz_start", self.samples, _start)
+        if "session" not in state:
+            return
+
+        while state["session"].current_question_index < state["session"].total_questions:
+            async def _answer(started: float):
+                quiz_session = state["session"]
+                index = quiz_session.current_question_index
+                question = quiz_session.questions[index]
+                options = question.get("options") or []
+                value = options[0] if options else self._text()
+                updated = await db_quiz_session.update_answer(
+                    session_id=quiz_session.id,
+                    question_id=question["id"],
+                    answer_value=value,
+                    expected_index=index,
+                )
+                if updated is None:
+                    return False, None
+                state["session"] = await quiz_handlers._queue_next_question_if_needed(updated)
+                return True, None
+
+            before = state["session"].current_question_index
+            await _measure("quiz_answer", self.samples, _answer)
+            quiz_session = state["session"]
+            if quiz_session.current_question_index == before:
+                break
+            if (
+                quiz_session.current_question_index < quiz_session.total_questions
+                and len(quiz_session.questions or []) <= quiz_session.current_question_index
+            ):
+                break
+            await self._think()
+
+        async def _finish(started: float):
+            quiz_session = state["session"]
+            results = await analyzer.analyze_quiz_results(
+                user_id=user_id,
+                quiz_session={
+                    "data": {"questions": quiz_session.questions, "answers": quiz_session.answers},
+                    "category": quiz_session.category,
+                },
+                category=quiz_session.category,
+            )
+            await db_quiz_session.complete(quiz_session.id, results)
+            return "error" not in results, None
+
+        await _measure("quiz_finish", self.samples, _finish)
+
+    async def _think(self) -> None:
+        if self.args.think_ms:
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.args.think_ms / 1000)
+
+    async def _user(self, user_id: int, flows: tuple[str, ...]) -> None:
+        # Разносим старт пользователей по ramp-up
+        await asyncio.sleep(self.rng.uniform(0, self.args.ramp_up_s))
+        for _ in range(self.args.messages):
+            if "chat" in flows:
+                await self._chat_message(user_id)
+                await self._think()
+            if "stream" in flows:
+                await self._stream_message(user_id)
+                await self._think()
+        if "quiz" in flows:
+            await self._quiz(user_id)
+
+    async def run(self, flows: tuple[str, ...]) -> float:
+        started = time.perf_counter()
+        await asyncio.gather(*(self._user(user_id, flows) for user_id in self.user_ids))
+        return time.perf_counter() - started
+
+    async def drain_background(self, timeout: float) -> None:
+        """Дождаться фоновых задач бота (анализ паттернов, статистика)"""
+        current = asyncio.current_task()
+        tasks = [
+            task for task in asyncio.all_tasks()
+            if task is not current and _is_bot_task(task)
+        ]
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+
+def _is_bot_task(task: asyncio.Task) -> bool:
+    code = getattr(task.get_coro(), "cr_code", None)
+    if code is None:
+        return False
+    path = Path(code.co_filename)
+    return ROOT in path.parents and "tests" not in path.relative_to(ROOT).parts
+
+
+# ==========================================
+# 🚀 ЗАПУСК
+# ==========================================
+
+def _print_report(report: RunReport) -> None:
+    print(f"\nUsers: {report.users}, wall: {report.wall_s:.1f}s, "
+          f"messages: {report.messages}, throughput: {report.messages_per_s:.2f} msg/s")
+    print(f"{'flow':<12} {'count':>6} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'q/msg':>6} {'q max':>6} {'ttft p50':>9}")
+    for flow in report.flows:
+        ttft = f"{flow.p50_ttft_ms:.0f}" if flow.p50_ttft_ms is not None else "-"
+        print(f"{flow.flow:<12} {flow.count:>6} {flow.errors:>5} {flow.p50_ms:>9.0f} {flow.p95_ms:>9.0f} "
+              f"{flow.p99_ms:>9.0f} {flow.mean_queries:>6.1f} {flow.max_queries:>6} {ttft:>9}")
+    print(f"Upstream: {report.upstream}")
+
+
+def _check_thresholds(report: RunReport, args: argparse.Namespace) -> list[str]:
+    failures = []
+    for flow in report.flows:
+        if args.max_p95_ms and flow.p95_ms > args.max_p95_ms:
+            failures.append(f"{flow.flow}: p95 {flow.p95_ms:.0f} ms > {args.max_p95_ms:.0f} ms")
+        if args.max_queries and flow.flow in ("chat", "stream") and flow.mean_queries > args.max_queries:
+            failures.append(f"{flow.flow}: {flow.mean_queries:.1f} queries/message > {args.max_queries}")
+        if flow.errors > flow.count * args.max_error_rate:
+            failures.append(f"{flow.flow}: {flow.errors}/{flow.count} errors")
+    return failures
+
+
+async def _main(args: argparse.Namespace) -> int:
+    flows = tuple(flow.strip() for flow in args.flows.split(",") if flow.strip())
+    unknown = set(flows) - set(FLOWS)
+    if unknown:
+        print(f"Unknown flows: {', '.join(sorted(unknown))} (expected {', '.join(FLOWS)})", file=sys.stderr)
+        return 2
+
+    upstream = FakeUpstream(FakeUpstreamConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_429=args.rate_429,
+        seed=args.seed,
+    ))
+    await upstream.start()
+
+    # OpenAI-клиенты создаются при импорте модулей бота — окружение до импорта
+    os.environ["OPENAI_BASE_URL"] = upstream.openai_base_url
+    os.environ.setdefault("OPENAI_API_KEY", "sk-load-test")
+    os.environ.setdefault("BOT_TOKEN", "123456:LOADTEST")
+
+    runner = LoadRunner(args, upstream)
+    try:
+        await runner.setup()
+        logging.getLogger().setLevel(args.log_level)
+        wall = await runner.run(flows)
+        await runner.drain_background(args.drain_timeout_s)
+
+        messages = sum(1 for s in runner.samples if s.flow in ("chat", "stream"))
+        report = RunReport(
+            users=args.users,
+            wall_s=wall,
+            messages=messages,
+            messages_per_s=messages / wall if wall else 0.0,
+            flows=[
+                _summarize(flow, [s for s in runner.samples if s.flow == flow])
+                for flow in ("chat", "stream", "quiz_start", "quiz_answer", "quiz_finish")
+                if any(s.flow == flow for s in runner.samples)
+            ],
+            upstream=asdict(upstream.stats),
+        )
+    finally:
+        if not args.keep_data and hasattr(runner, "db"):
+            await runner.cleanup()
+        if hasattr(runner, "bot"):
+            await runner.bot.session.close()
+        await upstream.stop()
+
+    _print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(asdict(report), ensure_ascii=False, indent=2))
+
+    failures = _check_thresholds(report, args)
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=5, help="chat/stream messages per user")
+    parser.add_argument("--flows", default="chat,quiz", help=f"comma-separated: {','.join(FLOWS)}")
+    parser.add_argument("--think-ms", type=float, default=500.0, help="pause between a user's messages")
+    parser.add_argument("--ramp-up-s", type=float, default=2.0)
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="fake OpenAI latency")
+    parser.add_argument("--jitter-ms", type=float, default=200.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of OpenAI calls answered with 429")
+    parser.add_argument("--user-id-base", type=int, default=990_000_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--drain-timeout-s", type=float, default=60.0)
+    parser.add_argument("--keep-data", action="store_true")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--log-level", default="ERROR", help="bot logging level during the run")
+    parser.add_argument("--max-p95-ms", type=float, default=0.0)
+    parser.add_argument("--max-queries", type=float, default=0.0, help="mean DB queries per chat/stream message")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    args = parser.parse_args()
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import os
+
+for key, value in (
+    ("BOT_TOKEN", "123456:TESTTOKEN"),
+    ("OPENAI_API_KEY", "test-key"),
+    ("POSTGRES_PASSWORD", "test-password"),
+    ("POSTGRES_DB", "test-db"),
+    ("TEST", "true"),
+):
+    os.environ.setdefault(key, value)
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    from bot.services import pattern_analyzer
+
+    monkeypatch.setattr(pattern_analyzer, "is_feature_enabled", lambda name: True)
+    monkeypatch.setattr(pattern_analyzer, "_scheduler", pattern_analyzer._AnalysisScheduler())
+    return pattern_analyzer
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_merged_into_one_follow_up_run(analyzer, monkeypatch):
+    started = asyncio.Event()
+    release = asyncio.Event()
+    calls = []
+
+    async def fake_run(user_id, assistant_type, quick, deep):
+        calls.append((quick, deep))
+        started.set()
+        await release.wait()
+
+    monkeypatch.setattr(analyzer, "_run_analysis", fake_run)
+    scheduler = analyzer._scheduler
+
+    first = asyncio.create_task(scheduler.submit(1, "helper", quick=True, deep=False))
+    await started.wait()
+
+    # Пока идёт первый run, запросы только копятся и сразу возвращаются
+    await scheduler.submit(1, "helper", quick=True, deep=False)
+    await scheduler.submit(1, "helper", quick=False, deep=True)
+    assert calls == [(True, False)]
+    assert scheduler.is_running(1)
+
+    release.set()
+    await first
+
+    assert calls == [(True, False), (True, True)]
+    assert not scheduler.is_running(1)
+
+
+@pytest.mark.asyncio
+async def test_different_users_run_independently(analyzer, monkeypatch):
+    release = asyncio.Event()
+    running = set()
+
+    async def fake_run(user_id, assistant_type, quick, deep):
+        running.add(user_id)
+        await release.wait()
+
+    monkeypatch.setattr(analyzer, "_run_analysis", fake_run)
+
+    tasks = [
+        asyncio.create_task(analyzer._scheduler.submit(user_id, "helper", True, False))
+        for user_id in (1, 2)
+    ]
+    await asyncio.sleep(0)
+    assert running == {1, 2}
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_quick_and_deep_share_one_history_read(analyzer, monkeypatch):
+    history = [{"role": "user", "content": f"m{i}"} for i in range(30)]
+    get_context = AsyncMock(return_value=history)
+    quick = AsyncMock()
+    deep = AsyncMock()
+    monkeypatch.setattr(analyzer.conversation_history, "count_messages", AsyncMock(return_value=30))
+    monkeypatch.setattr(analyzer.conversation_history, "get_context", get_context)
+    monkeypatch.setattr(analyzer, "quick_analysis", quick)
+    monkeypatch.setattr(analyzer, "deep_analysis", deep)
+
+    await analyzer.analyze_if_needed(user_id=7)
+
+    get_context.assert_awaited_once()
+    assert quick.await_args.kwargs["messages"] == history[-analyzer.QUICK_ANALYSIS_CONTEXT_SIZE:]
+    assert deep.await_args.kwargs["messages"] == history
+
+
+@pytest.mark.asyncio
+async def test_failed_run_releases_user(analyzer, monkeypatch):
+    monkeypatch.setattr(analyzer, "_run_analysis", AsyncMock(side_effect=RuntimeError("boom")))
+
+    with pytest.raises(RuntimeError):
+        await analyzer._scheduler.submit(1, "helper", quick=True, deep=False)
+
+    assert not analyzer._scheduler.is_running(1)
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from utils import json_codec
+
+
+def test_dumps_matches_stdlib_semantics():
+    data = {"title": "Перфекционизм", 1: [np.float32(0.5), np.int64(3)], "embedding": np.array([0.25, -1.0])}
+
+    assert json_codec.loads(json_codec.dumps(data)) == {
+        "title": "Перфекционизм",
+        "1": [0.5, 3],
+        "embedding": [0.25, -1.0],
+    }
+    assert isinstance(json_codec.dumps(data), str)
+    assert isinstance(json_codec.dumps_bytes(data), bytes)
+
+
+def test_custom_default_receives_datetime():
+    stamp = datetime(2025, 1, 1, 12, 30)
+
+    assert json_codec.dumps({"at": stamp}, default=lambda value: "custom") == '{"at":"custom"}'
+
+    with pytest.raises(TypeError):
+        json_codec.dumps({"value": object()})
+
@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+import pytest
+
+from database import media_catalog as catalog_module
+from database.media_catalog import MediaCatalog, build_snapshot
+
+
+def _category(id, position, category='practices', name=None):
+    return SimpleNamespace(
+        id=id,
+        position=position,
+        name=name or f'Category {id}',
+        text='text',
+        category=category,
+        media_type=None,
+        media_id=None,
+        destination=None,
+    )
+
+
+def _media(id, category_id, position):
+    return SimpleNamespace(
+        id=id,
+        category_id=category_id,
+        position=position,
+        name=f'Media {id}',
+        text=None,
+        media_type='audio',
+        media_id=f'file-{id}',
+        destination=None,
+        file_url=None,
+    )
+
+
+def _rows():
+    first = _category(1, 1)
+    second = _category(2, 2, category='videos')
+    empty = _category(3, 3)
+    return [
+        (first, _media(10, 1, 1)),
+        (first, _media(11, 1, 2)),
+        (second, _media(20, 2, 1)),
+        (empty, None),
+    ]
+
+
+def test_build_snapshot_groups_joined_rows():
+    snapshot = build_snapshot(_rows(), version=1)
+
+    assert [c.id for c in snapshot.categories] == [1, 2, 3]
+    assert [m.id for m in snapshot.category(1).medias] == [10, 11]
+    assert snapshot.category(3).medias == ()
+    assert [c.id for c in snapshot.by_type('practices')] == [1, 3]
+    assert snapshot.media(20).category_id == 2
+    assert snapshot.media(999) is None
+
+
+def test_fingerprint_depends_only_on_content():
+    assert build_snapshot(_rows(), 1).fingerprint == build_snapshot(_rows(), 7).fingerprint
+
+    changed = _rows()
+    changed[0][1].name = 'Renamed'
+    assert build_snapshot(changed, 1).fingerprint != build_snapshot(_rows(), 1).fingerprint
+
+
+@pytest.mark.asyncio
+async def test_catalog_reloads_after_invalidate(monkeypatch):
+    loads = []
+    rows = _rows()
+
+    async def fake_load_rows():
+        loads.append(1)
+        return rows
+
+    monkeypatch.setattr(catalog_module, '_load_rows', fake_load_rows)
+    catalog = MediaCatalog(ttl=3600)
+
+    first = await catalog.get()
+    assert await catalog.get() is first
+    assert len(loads) == 1
+
+    # Без изменений содержимого version не растёт
+    catalog.invalidate()
+    assert await catalog.get() is first
+    assert len(loads) == 2
+
+    rows.append((_category(4, 4), None))
+    catalog.invalidate()
+    updated = await catalog.get()
+    assert updated.version == first.version + 1
+    assert updated.category(4) is not None
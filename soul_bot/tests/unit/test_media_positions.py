@@ -0,0 +1,55 @@
+import pytest
+
+from database.repository.media import POSITION_GAP, _plan_move
+
+
+def _apply(ordered, changes):
+    positions = dict(ordered)
+    positions.update(changes)
+    return [row_id for row_id, _ in sorted(positions.items(), key=lambda item: (item[1], item[0]))]
+
+
+GAPPED = [(1, 1 * POSITION_GAP), (2, 2 * POSITION_GAP), (3, 3 * POSITION_GAP)]
+
+
+@pytest.mark.parametrize(
+    "media_id, need_position, expected",
+    [
+        (3, 1, [3, 1, 2]),
+        (1, 3, [2, 3, 1]),
+        (1, 2, [2, 1, 3]),
+        (2, 99, [1, 3, 2]),
+        (3, 0, [3, 1, 2]),
+    ],
+)
+def test_move_with_gaps_touches_only_moved_row(media_id, need_position, expected):
+    changes = _plan_move(GAPPED, media_id, need_position)
+
+    assert list(changes) == [media_id]
+    assert _apply(GAPPED, changes) == expected
+
+
+def test_move_without_gap_renumbers_category():
+    # Старая сплошная нумерация 1..N из delete-all-and-reinsert
+    legacy = [(10, 1), (11, 2), (12, 3)]
+
+    changes = _plan_move(legacy, 12, 2)
+
+    assert _apply(legacy, changes) == [10, 12, 11]
+    assert sorted(changes.values()) == [POSITION_GAP, 2 * POSITION_GAP, 3 * POSITION_GAP]
+
+
+def test_repeated_moves_keep_order_consistent():
+    ordered = list(GAPPED)
+    for _ in range(20):
+        changes = _plan_move(ordered, 3, 2)
+        positions = dict(ordered)
+        positions.update(changes)
+        ordered = sorted(positions.items(), key=lambda item: (item[1], item[0]))
+        assert [row_id for row_id, _ in ordered] == [1, 3, 2]
+
+        changes = _plan_move(ordered, 2, 2)
+        positions = dict(ordered)
+        positions.update(changes)
+        ordered = sorted(positions.items(), key=lambda item: (item[1], item[0]))
+        assert [row_id for row_id, _ in ordered] == [1, 2, 3]
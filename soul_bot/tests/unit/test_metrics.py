@@ -0,0 +1,123 @@
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+for key, value in (
+    ("BOT_TOKEN", "123456:TESTTOKEN"),
+    ("OPENAI_API_KEY", "test-key"),
+    ("POSTGRES_PASSWORD", "test-password"),
+    ("POSTGRES_DB", "test-db"),
+    ("TEST", "true"),
+):
+    os.environ.setdefault(key, value)
+
+import pytest
+
+from utils import metrics
+
+
+@pytest.fixture
+def registry_metrics():
+    created = []
+
+    def make(cls, name, *args, **kwargs):
+        metric = cls(name, "test metric", *args, **kwargs)
+        created.append(metric)
+        return metric
+
+    yield make
+    for metric in created:
+        metrics.REGISTRY.unregister(metric)
+
+
+def test_counter_and_histogram_exposition(registry_metrics):
+    requests = registry_metrics(metrics.Counter, "test_requests_total", ["lane"])
+    latency = registry_metrics(metrics.Histogram, "test_latency_seconds", ["lane"], buckets=(0.1, 1.0))
+
+    requests.inc(lane="chat")
+    requests.inc(2, lane="chat")
+    latency.observe(0.05, lane="chat")
+    latency.observe(0.5, lane="chat")
+    latency.observe(3, lane="chat")
+
+    text = metrics.render().decode()
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_requests_total{lane="chat"} 3' in text
+    assert 'test_latency_seconds_bucket{lane="chat",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{lane="chat",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{lane="chat",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_sum{lane="chat"} 3.55' in text
+    assert 'test_latency_seconds_count{lane="chat"} 3' in text
+
+
+def test_wrong_labels_and_duplicates_rejected(registry_metrics):
+    counter = registry_metrics(metrics.Counter, "test_labeled_total", ["cache"])
+
+    with pytest.raises(ValueError):
+        counter.inc(user_id=1)
+    with pytest.raises(ValueError):
+        metrics.Counter("test_labeled_total", "duplicate")
+
+
+def test_gauge_collect_and_label_escaping(registry_metrics):
+    registry_metrics(
+        metrics.Gauge, "test_pool_connections", ["state"],
+        collect=lambda: {("checked_out",): 3, ('say "hi"',): 1},
+    )
+
+    text = metrics.render().decode()
+    assert 'test_pool_connections{state="checked_out"} 3' in text
+    assert 'test_pool_connections{state="say \\"hi\\""} 1' in text
+
+
+def test_task_kind_strips_ids():
+    assert metrics.task_kind("pattern_analysis_user_42") == "pattern_analysis_user"
+    assert metrics.task_kind("quiz_prefetch_17_3") == "quiz_prefetch"
+    assert metrics.task_kind("update_statistics") == "update_statistics"
+
+
+@pytest.mark.asyncio
+async def test_instrumented_client_records_latency_and_tokens():
+    usage = SimpleNamespace(prompt_tokens=120, completion_tokens=30, total_tokens=150)
+    client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(
+            create=AsyncMock(side_effect=[SimpleNamespace(usage=usage), RuntimeError("boom")])
+        )),
+        embeddings=SimpleNamespace(create=AsyncMock(return_value=SimpleNamespace(
+            usage=SimpleNamespace(prompt_tokens=8, total_tokens=8)
+        ))),
+    )
+    metrics.instrument_openai(client, lane="test_lane")
+    tokens_before = metrics.OPENAI_TOKENS.value(model="test-model", lane="test_lane", kind="prompt")
+
+    await client.chat.completions.create(model="test-model", messages=[])
+    with pytest.raises(RuntimeError):
+        await client.chat.completions.create(model="test-model", messages=[])
+    await client.embeddings.create(model="test-model", input="text")
+
+    labels = dict(endpoint="chat", model="test-model", lane="test_lane")
+    assert metrics.OPENAI_REQUEST_DURATION.count(**labels, status="ok") >= 1
+    assert metrics.OPENAI_REQUEST_DURATION.count(**labels, status="error") >= 1
+    assert metrics.OPENAI_TOKENS.value(model="test-model", lane="test_lane", kind="prompt") == tokens_before + 128
+
+
+@pytest.mark.asyncio
+async def test_http_server_serves_metrics(unused_tcp_port):
+    import aiohttp
+
+    runner = await metrics.start_http_server("127.0.0.1", unused_tcp_port)
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{unused_tcp_port}/metrics") as response:
+                body = await response.text()
+                content_type = response.headers["Content-Type"]
+    finally:
+        await runner.cleanup()
+
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert "# TYPE soulnear_update_duration_seconds histogram" in body
+
+
+@pytest.mark.asyncio
+async def test_disabled_http_server_returns_none():
+    assert await metrics.start_http_server("127.0.0.1", 0) is None
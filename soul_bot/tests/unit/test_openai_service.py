@@ -29,7 +29,7 @@ async def test_build_system_prompt_helper_includes_persona(monkeypatch):
         
     fake_user = SimpleNamespace(real_name='Аня', age=28, gender='female')
 
-    monkeypatch.setattr(openai_service.user_profile, 'get_or_create', AsyncMock(return_value=fake_profile))
+    monkeypatch.setattr(openai_service.user_profile, 'get_view', AsyncMock(return_value=fake_profile))
     monkeypatch.setattr(openai_service.db_user, 'get', AsyncMock(return_value=fake_user))
     monkeypatch.setattr(openai_service.conversation_history, 'get_context', AsyncMock(return_value=[]))
 
@@ -86,3 +86,220 @@ def test_format_response_with_headers_keeps_html():
     html_text = "<b>1. Заголовок:</b> это уже оформлено"
     assert format_response_with_headers(html_text) == html_text
 
+
+
+def test_validate_pattern_evidence_keeps_grounded_quotes_without_mutation():
+    """Evidence фильтруется по недавним сообщениям, исходные паттерны не мутируются."""
+    from bot.services.openai_service import _validate_pattern_evidence
+
+    pattern = {
+        'title': 'Перфекционизм',
+        'evidence': [
+            'переписываю отчёт',                      # точная цитата
+            'снова переписываю этот отчёт ночью',     # 80% слов
+            'никогда такого не говорил',              # галлюцинация
+        ],
+    }
+    recent = ['Я опять переписываю отчёт, уже третий раз', 'Снова ночью сижу над этим']
+
+    validated = _validate_pattern_evidence([pattern], recent)
+
+    assert validated[0]['evidence'] == [
+        'переписываю отчёт',
+        'снова переписываю этот отчёт ночью',
+    ]
+    assert len(pattern['evidence']) == 3
+
+
+def test_validate_pattern_evidence_recomputes_topic_vector():
+    """topic_vector валидированной копии считается только по подтверждённым цитатам."""
+    from bot.services.openai_service import _validate_pattern_evidence
+    from bot.services.pattern_context_filter import attach_topic_vector
+
+    pattern = attach_topic_vector({
+        'title': 'Избегание',
+        'description': '',
+        'evidence': ['ссоримся с партнёром', 'кредит давит'],
+    })
+    assert set(pattern['topic_vector']) == {'relationships', 'money'}
+
+    validated = _validate_pattern_evidence([pattern], ['Опять ссоримся с партнёром'])
+
+    assert validated[0]['evidence'] == ['ссоримся с партнёром']
+    assert set(validated[0]['topic_vector']) == {'relationships'}
+    assert set(pattern['topic_vector']) == {'relationships', 'money'}
+
+
+def test_get_validated_patterns_cached_per_profile_version(monkeypatch):
+    """Повторный вызов с той же версией профиля и историей не пересчитывает evidence."""
+    from datetime import datetime
+
+    from bot.services import openai_service
+
+    profile = SimpleNamespace(updated_at=datetime(2025, 1, 1))
+    patterns = [{'title': 'A', 'evidence': ['переписываю отчёт']}]
+    recent = ['переписываю отчёт']
+    calls = []
+    original = openai_service._validate_pattern_evidence
+
+    def counting(*args):
+        calls.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(openai_service, '_validate_pattern_evidence', counting)
+    monkeypatch.setattr(openai_service, '_EVIDENCE_CACHE', openai_service.OrderedDict())
+
+    first = openai_service._get_validated_patterns(7, profile, patterns, recent)
+    second = openai_service._get_validated_patterns(7, profile, patterns, recent)
+    openai_service._get_validated_patterns(7, profile, patterns, recent + ['новое сообщение'])
+
+    assert first is second
+    assert len(calls) == 2
+
+
+class _FakeStream:
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self._chunks:
+            yield chunk
+
+
+def _chunk(content=None, usage=None):
+    choices = [] if content is None else [SimpleNamespace(delta=SimpleNamespace(content=content))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+@pytest.mark.asyncio
+async def test_stream_chat_completion_yields_deltas_then_finalized_text(monkeypatch):
+    from bot.services import openai_service
+
+    context = SimpleNamespace(messages=[{"role": "user", "content": "hi"}], temperature=0.7)
+    monkeypatch.setattr(openai_service, "_prepare_completion", AsyncMock(return_value=context))
+    finalize = AsyncMock(return_value="Привет, друг!")
+    monkeypatch.setattr(openai_service, "_finalize_completion", finalize)
+
+    create = AsyncMock(return_value=_FakeStream([
+        _chunk("При"),
+        _chunk("вет"),
+        _chunk(usage=SimpleNamespace(total_tokens=42)),
+    ]))
+    monkeypatch.setattr(openai_service.client.chat.completions, "create", create)
+
+    events = [
+        event async for event in openai_service.stream_chat_completion(1, "hi", "helper")
+    ]
+
+    assert events == [
+        {'type': 'delta', 'content': 'При'},
+        {'type': 'delta', 'content': 'вет'},
+        {'type': 'done', 'response': 'Привет, друг!'},
+    ]
+    assert create.await_args.kwargs["stream"] is True
+    finalize.assert_awaited_once_with(context, "Привет", model="gpt-4-turbo-preview", tokens_used=42)
+
+
+@pytest.mark.asyncio
+async def test_stream_chat_completion_saves_partial_reply_on_disconnect(monkeypatch):
+    """Клиент закрыл стрим посреди ответа — частичный ответ всё равно сохраняется."""
+    import asyncio
+
+    from bot.services import openai_service
+
+    context = SimpleNamespace(
+        user_id=1, message="hi", assistant_type="helper",
+        messages=[{"role": "user", "content": "hi"}], temperature=0.7,
+    )
+    monkeypatch.setattr(openai_service, "_prepare_completion", AsyncMock(return_value=context))
+    finalize = AsyncMock()
+    monkeypatch.setattr(openai_service, "_finalize_completion", finalize)
+    save = AsyncMock()
+    monkeypatch.setattr(openai_service, "save_conversation", save)
+    monkeypatch.setattr(openai_service.client.chat.completions, "create", AsyncMock(
+        return_value=_FakeStream([_chunk("При"), _chunk("вет")])
+    ))
+
+    stream = openai_service.stream_chat_completion(1, "hi", "helper")
+    assert await stream.__anext__() == {'type': 'delta', 'content': 'При'}
+    await stream.aclose()
+    await asyncio.sleep(0)
+
+    finalize.assert_not_awaited()
+    save.assert_awaited_once()
+    kwargs = save.await_args.kwargs
+    assert kwargs["user_message"] == "hi"
+    assert kwargs["assistant_message"] == "При"
+    assert kwargs["assistant_metadata"] == {'interrupted': True}
+
+
+@pytest.mark.asyncio
+async def test_prepare_completion_keeps_profile_patterns_for_personalization(monkeypatch):
+    """Валидация evidence для промпта не урезает паттерны профиля, который уходит в персонализацию."""
+    from datetime import datetime
+
+    from bot.services import openai_service
+    from database.repository.user_profile import ProfileView
+
+    patterns = [{
+        'title': 'Избегание конфликтов',
+        'description': 'Молчит, когда злится',
+        'evidence': ['я опять промолчала на работе', 'не хочу ссориться с мамой'],
+        'confidence': 0.8,
+    }]
+    profile = ProfileView(user_id=42, patterns={'patterns': patterns}, updated_at=datetime(2025, 10, 1))
+    original = profile.patterns
+
+    monkeypatch.setattr(openai_service.user_profile, 'get_view', AsyncMock(return_value=profile))
+    monkeypatch.setattr(openai_service.db_user, 'get', AsyncMock(return_value=SimpleNamespace(real_name='Аня', age=28)))
+    monkeypatch.setattr(openai_service.conversation_history, 'get_context', AsyncMock(return_value=[
+        {'role': 'user', 'content': 'сегодня что-то грустно'},
+    ]))
+    openai_service._EVIDENCE_CACHE.clear()
+
+    context = await openai_service._prepare_completion(42, 'привет', 'helper', 10, 0.7)
+
+    assert context.profile is profile
+    assert context.profile.patterns is original
+    assert context.profile.patterns['patterns'][0]['evidence'] == patterns[0]['evidence']
+
+
+@pytest.mark.asyncio
+async def test_build_system_prompt_renders_only_grounded_evidence(monkeypatch):
+    """Цитата, которой нет в недавних сообщениях, не попадает в секцию паттернов промпта."""
+    from datetime import datetime
+
+    from bot.services import openai_service
+    from database.repository.user_profile import ProfileView
+
+    patterns = [{
+        'title': 'Перфекционизм',
+        'description': 'Переделывает работу до бесконечности',
+        'evidence': ['переписываю отчёт', 'никогда не сдаю вовремя'],
+        'confidence': 0.8,
+        'occurrences': 3,
+    }]
+    profile = ProfileView(user_id=42, patterns={'patterns': patterns}, updated_at=datetime(2025, 10, 1))
+
+    monkeypatch.setattr(openai_service.db_user, 'get', AsyncMock(return_value=SimpleNamespace(real_name='Аня', age=28)))
+    monkeypatch.setattr(openai_service.conversation_history, 'get_context', AsyncMock(return_value=[
+        {'role': 'user', 'content': 'Я опять переписываю отчёт, уже третий раз'},
+    ]))
+    monkeypatch.setattr(openai_service, '_EVIDENCE_CACHE', openai_service.OrderedDict())
+
+    prompt = await openai_service.build_system_prompt(
+        user_id=42, assistant_type='helper', user_message='опять работа', profile=profile,
+    )
+
+    assert 'переписываю отчёт' in prompt
+    assert 'никогда не сдаю вовремя' not in prompt
+    assert patterns[0]['evidence'] == ['переписываю отчёт', 'никогда не сдаю вовремя']
@@ -91,8 +91,7 @@ class TestPatternDeduplication:
         existing = sample_patterns.copy()
         
         with patch('bot.services.embedding_service.get_embedding', mock_embedding):
-            await pattern_analyzer._add_patterns_with_dedup(
-                user_id=12345,
+            await pattern_analyzer._merge_patterns(
                 new_patterns=new_patterns,
                 existing_patterns=existing
             )
@@ -130,8 +129,7 @@ class TestPatternDeduplication:
             with patch('bot.services.embedding_service.is_duplicate') as mock_is_dup:
                 mock_is_dup.return_value = (True, existing[0], 0.75)  # High similarity
                 
-                await pattern_analyzer._add_patterns_with_dedup(
-                    user_id=12345,
+                await pattern_analyzer._merge_patterns(
                     new_patterns=new_patterns,
                     existing_patterns=existing
                 )
@@ -159,8 +157,7 @@ class TestPatternDeduplication:
             with patch('bot.services.embedding_service.is_duplicate') as mock_is_dup:
                 mock_is_dup.return_value = (False, None, 0.30)  # Low similarity
                 
-                await pattern_analyzer._add_patterns_with_dedup(
-                    user_id=12345,
+                await pattern_analyzer._merge_patterns(
                     new_patterns=new_patterns,
                     existing_patterns=existing
                 )
@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta
 
+import pytest
+
 from bot.services.pattern_context_filter import (
     detect_topic_from_message,
     filter_patterns_by_relevance,
@@ -159,3 +161,80 @@ def test_chat_allows_cross_topic_with_snippet():
     assert titles[0] == "Money Flow"
     assert "Relationship Fear" in titles
 
+
+
+def test_detect_topics_from_text_matches_words_by_stem():
+    from bot.services.pattern_context_filter import detect_topics_from_text
+
+    scores = detect_topics_from_text("Боюсь, что начальник снова завалит проект")
+
+    assert scores == {"work": 2, "fears": 1}
+
+
+@pytest.mark.parametrize("text", [
+    "Чувствую неуверенность в себе",
+    "у меня недоверие к партнёру",
+    "на подработке завал",
+    "переработка опять",
+    "Боюсь, что начальник снова завалит проект",
+])
+def test_detect_topics_from_text_matches_stems_inside_words(text):
+    from bot.services.pattern_context_filter import TOPIC_KEYWORDS, detect_topics_from_text
+
+    # Прежний алгоритм: подстрока по всему тексту (стемы от 3 букв)
+    lowered = text.lower()
+    expected = {}
+    for topic, keywords in TOPIC_KEYWORDS.items():
+        count = sum(1 for keyword in keywords if len(keyword) >= 3 and keyword in lowered)
+        if count:
+            expected[topic] = count
+
+    assert detect_topics_from_text(text) == expected
+
+
+def test_detect_topics_from_text_prefixed_words():
+    from bot.services.pattern_context_filter import detect_topics_from_text
+
+    assert "confidence" in detect_topics_from_text("Чувствую неуверенность в себе")
+    assert detect_topics_from_text("у меня недоверие к партнёру")["relationships"] == 2
+    assert detect_topics_from_text("на подработке завал") == {"work": 1}
+    assert detect_topics_from_text("переработка опять") == {"work": 1}
+
+
+def test_detect_topics_from_text_short_stems_need_whole_word():
+    from bot.services.pattern_context_filter import detect_topics_from_text
+
+    assert "self" not in detect_topics_from_text("Ясно, завтра позвоню")
+    assert detect_topics_from_text("Я устала")["self"] == 2
+
+
+def test_attach_topic_vector_prefers_evidence_over_description():
+    from bot.services.pattern_context_filter import attach_topic_vector
+
+    pattern = attach_topic_vector(
+        _pattern(
+            "Money Avoidance",
+            description="Избегает разговоров о деньгах и работе",
+            evidence=["Не хочу смотреть на зарплату и долги"],
+        )
+    )
+
+    assert pattern["topic_vector"] == {"money": 2, "work": 1}
+
+
+def test_stored_topic_vector_drives_semantic_relevance():
+    pattern = _pattern(
+        "Silent Treatment",
+        evidence=["Мы опять молчим после ссоры"],
+        last_detected=datetime.utcnow().isoformat(),
+        context_snippets={"relationships": ["Мы опять молчим после ссоры"]},
+    )
+    pattern["topic_vector"] = {"relationships": 3}
+
+    result = filter_patterns_by_relevance(
+        [pattern],
+        current_topic="relationships",
+        user_message="Снова ссора с партнёром",
+    )
+
+    assert result == [pattern]
@@ -0,0 +1,188 @@
+import os
+
+for key, value in (
+    ("BOT_TOKEN", "123456:TESTTOKEN"),
+    ("OPENAI_API_KEY", "test-key"),
+    ("POSTGRES_PASSWORD", "test-password"),
+    ("POSTGRES_DB", "test-db"),
+    ("TEST", "true"),
+):
+    os.environ.setdefault(key, value)
+
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+
+def _profile(updated_at=datetime(2025, 1, 1), **overrides):
+    data = dict(
+        user_id=42,
+        updated_at=updated_at,
+        patterns={"patterns": [{"id": "p1", "title": "Перфекционизм", "occurrences": 2}]},
+        insights={"insights": []},
+        emotional_state={"current_mood": "neutral", "mood_history": []},
+        learning_preferences={"works_well": [], "doesnt_work": []},
+        preferences={},
+    )
+    data.update(overrides)
+    return SimpleNamespace(**data)
+
+
+class _FakeSession:
+    def __init__(self, rowcount):
+        self.rowcount = rowcount
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return SimpleNamespace(rowcount=self.rowcount)
+
+    async def commit(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_apply_changes_is_one_conditional_update(monkeypatch):
+    from database.repository import user_profile as repo
+
+    session = _FakeSession(rowcount=1)
+    monkeypatch.setattr(repo, "db", lambda: session)
+
+    written = await repo.apply_changes(
+        42,
+        datetime(2025, 1, 1),
+        {"patterns": {"patterns": []}, "emotional_state": {}},
+        count_analysis=True,
+    )
+
+    assert written
+    assert len(session.statements) == 1
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE user_profiles SET")
+    assert "user_profiles.user_id = " in sql
+    assert "user_profiles.updated_at = " in sql
+    assert "pattern_analysis_count + " in sql
+    assert "insights" not in sql
+
+
+@pytest.mark.asyncio
+async def test_analysis_changes_flush_together(monkeypatch):
+    from bot.services import pattern_analyzer, profile_delta
+
+    apply_changes = AsyncMock(return_value=True)
+    monkeypatch.setattr(profile_delta.user_profile, "apply_changes", apply_changes)
+
+    async def apply(delta):
+        pattern_analyzer._update_emotional_state(delta, {"current_mood": "down", "stress_level": "high"})
+        pattern_analyzer._update_learning_preferences(delta, {"works_well": ["конкретные шаги"]})
+        delta.add_response_hints([{"hint": "Спросить про выходные"}])
+
+    delta = await profile_delta.commit(42, apply, profile=_profile())
+
+    apply_changes.assert_awaited_once()
+    user_id, expected_updated_at, values = apply_changes.await_args.args
+    assert (user_id, expected_updated_at) == (42, datetime(2025, 1, 1))
+    assert set(values) == {"emotional_state", "learning_preferences", "preferences"}
+    assert values["emotional_state"]["current_mood"] == "down"
+    assert values["preferences"]["active_response_hints"][0]["hint"] == "Спросить про выходные"
+    assert apply_changes.await_args.kwargs["count_analysis"] is False
+    assert delta.changed_fields == {"emotional_state", "learning_preferences", "preferences"}
+
+
+@pytest.mark.asyncio
+async def test_conflict_reloads_profile_and_reapplies(monkeypatch):
+    from bot.services import profile_delta
+
+    fresh = _profile(
+        updated_at=datetime(2025, 1, 2),
+        insights={"insights": [{"id": "i0", "title": "Уже есть"}]},
+    )
+    monkeypatch.setattr(profile_delta.user_profile, "get_or_create", AsyncMock(return_value=fresh))
+    apply_changes = AsyncMock(side_effect=[False, True])
+    monkeypatch.setattr(profile_delta.user_profile, "apply_changes", apply_changes)
+
+    async def apply(delta):
+        delta.set_insights(delta.insights + [{"id": "i1", "title": "Новый"}])
+
+    delta = await profile_delta.commit(42, apply, profile=_profile())
+
+    assert apply_changes.await_count == 2
+    _, expected_updated_at, values = apply_changes.await_args.args
+    assert expected_updated_at == datetime(2025, 1, 2)
+    assert [insight["id"] for insight in values["insights"]["insights"]] == ["i0", "i1"]
+    assert delta.expected_updated_at == datetime(2025, 1, 2)
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts(monkeypatch):
+    from bot.services import profile_delta
+
+    monkeypatch.setattr(profile_delta.user_profile, "get_or_create", AsyncMock(return_value=_profile()))
+    apply_changes = AsyncMock(return_value=False)
+    monkeypatch.setattr(profile_delta.user_profile, "apply_changes", apply_changes)
+
+    async def apply(delta):
+        delta.set_insights([{"id": "i1"}])
+
+    assert await profile_delta.commit(42, apply, max_attempts=2) is None
+    assert apply_changes.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_no_changes_skip_update(monkeypatch):
+    from bot.services import profile_delta
+
+    apply_changes = AsyncMock(return_value=True)
+    monkeypatch.setattr(profile_delta.user_profile, "apply_changes", apply_changes)
+
+    async def apply(delta):
+        delta.add_response_hints([])
+
+    assert await profile_delta.commit(42, apply, profile=_profile()) is not None
+    apply_changes.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_quick_analysis_reads_once_and_writes_once(monkeypatch):
+    from bot.services import pattern_analyzer, profile_delta
+
+    monkeypatch.setattr(pattern_analyzer, "is_feature_enabled", lambda name: True)
+    get_or_create = AsyncMock(return_value=_profile())
+    monkeypatch.setattr(pattern_analyzer.user_profile, "get_or_create", get_or_create)
+    apply_changes = AsyncMock(return_value=True)
+    monkeypatch.setattr(profile_delta.user_profile, "apply_changes", apply_changes)
+    monkeypatch.setattr(
+        pattern_analyzer.embedding_service, "is_duplicate", AsyncMock(return_value=(False, None, 0.1))
+    )
+    monkeypatch.setattr(
+        pattern_analyzer.embedding_service, "get_embedding", AsyncMock(return_value=[0.1, 0.2])
+    )
+    monkeypatch.setattr(pattern_analyzer, "_analyze_conversation_quick", AsyncMock(return_value={
+        "new_patterns": [{
+            "title": "Тревога",
+            "description": "Переживает перед встречами",
+            "evidence": [],
+            "confidence": 0.8,
+            "response_hint": "Спросить, что пугает во встречах",
+        }],
+        "mood": {"current_mood": "anxious", "stress_level": "medium", "energy_level": "low"},
+    }))
+
+    messages = [{"role": "user", "content": "переживаю перед встречей"}] * 4
+    await pattern_analyzer.quick_analysis(42, messages=messages)
+
+    get_or_create.assert_awaited_once()
+    apply_changes.assert_awaited_once()
+    values = apply_changes.await_args.args[2]
+    assert set(values) == {"patterns", "preferences", "emotional_state"}
+    assert [p["title"] for p in values["patterns"]["patterns"]] == ["Перфекционизм", "Тревога"]
+    assert apply_changes.await_args.kwargs["count_analysis"] is True
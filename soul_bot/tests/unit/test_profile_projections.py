@@ -0,0 +1,134 @@
+import os
+import re
+
+for key, value in (
+    ("BOT_TOKEN", "123456:TESTTOKEN"),
+    ("OPENAI_API_KEY", "test-key"),
+    ("POSTGRES_PASSWORD", "test-password"),
+    ("POSTGRES_DB", "test-db"),
+    ("TEST", "true"),
+):
+    os.environ.setdefault(key, value)
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+
+class _FakeResult:
+    def __init__(self, row):
+        self._row = row
+
+    def first(self):
+        return self._row
+
+
+class _FakeSession:
+    def __init__(self, row=None, scalar=None):
+        self.row = row
+        self.scalar_value = scalar
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return _FakeResult(self.row)
+
+    async def scalar(self, stmt):
+        self.statements.append(stmt)
+        return self.scalar_value
+
+    def sql(self):
+        return str(self.statements[-1].compile(dialect=postgresql.dialect()))
+
+
+def _patch_db(monkeypatch, **kwargs):
+    from database.repository import user_profile as repo
+
+    session = _FakeSession(**kwargs)
+    monkeypatch.setattr(repo, "db", lambda: session)
+    return repo, session
+
+
+@pytest.mark.asyncio
+async def test_get_style_selects_only_style_columns(monkeypatch):
+    row = SimpleNamespace(tone_style="formal", personality=None, message_length="detailed")
+    repo, session = _patch_db(monkeypatch, row=row)
+
+    style = await repo.get_style(42)
+
+    assert style == repo.ProfileStyle(tone_style="formal", personality="coach", message_length="detailed")
+    select_list = session.sql().split("FROM")[0]
+    assert "tone_style" in select_list
+    for heavy in ("patterns", "insights", "emotional_state", "preferences"):
+        assert heavy not in select_list
+
+
+@pytest.mark.asyncio
+async def test_get_style_creates_missing_profile(monkeypatch):
+    repo, _ = _patch_db(monkeypatch, row=None)
+    created = SimpleNamespace(tone_style="friendly", personality="coach", message_length="brief")
+    get_or_create = AsyncMock(return_value=created)
+    monkeypatch.setattr(repo, "get_or_create", get_or_create)
+
+    assert await repo.get_style(42) == repo.ProfileStyle()
+    get_or_create.assert_awaited_once_with(42)
+
+
+@pytest.mark.asyncio
+async def test_emotional_state_projection(monkeypatch):
+    repo, session = _patch_db(monkeypatch, scalar={"current_mood": "good"})
+
+    assert await repo.get_emotional_state(42) == {"current_mood": "good"}
+    assert session.sql().startswith("SELECT user_profiles.emotional_state")
+
+
+@pytest.mark.asyncio
+async def test_patterns_light_strips_embeddings_in_sql(monkeypatch):
+    repo, session = _patch_db(monkeypatch, scalar=[{"id": "p1"}])
+
+    assert await repo.get_patterns_light(42) == [{"id": "p1"}]
+    sql = session.sql()
+    assert "jsonb_array_elements(user_profiles.patterns" in sql
+    assert "WITH ORDINALITY" in sql
+    assert re.search(r"value - CAST\(.+ AS TEXT\) ORDER BY anon_\d+\.position", sql)
+
+
+@pytest.mark.asyncio
+async def test_get_view_builds_profile_without_embeddings(monkeypatch):
+    row = SimpleNamespace(
+        tone_style="friendly",
+        personality="mentor",
+        message_length="brief",
+        patterns=[{"id": "p1", "title": "Перфекционизм"}],
+        insights=None,
+        emotional_state={"stress_level": "high"},
+        learning_preferences={},
+        preferences={"active_response_hints": []},
+        pattern_analysis_count=3,
+        last_analysis_at=None,
+        updated_at=None,
+    )
+    repo, session = _patch_db(monkeypatch, row=row)
+
+    view = await repo.get_view(42)
+
+    assert view.patterns == {"patterns": [{"id": "p1", "title": "Перфекционизм"}]}
+    assert view.insights == {"insights": []}
+    assert view.emotional_state == {"stress_level": "high"}
+    assert "user_profiles.patterns," not in session.sql()
+
+
+def test_strip_embeddings_for_new_profile():
+    from database.repository.user_profile import _strip_embeddings
+
+    patterns = [{"id": "p1", "embedding": [0.1] * 4, "title": "A"}, "junk"]
+    assert _strip_embeddings(patterns) == [{"id": "p1", "title": "A"}]
+    assert "embedding" in patterns[0]
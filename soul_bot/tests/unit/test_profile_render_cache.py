@@ -0,0 +1,97 @@
+"""Unit tests for cached /my_profile rendering and message splitting."""
+
+import os
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+for key, value in (
+    ("BOT_TOKEN", "123456:TESTTOKEN"),
+    ("OPENAI_API_KEY", "test-key"),
+    ("POSTGRES_PASSWORD", "test-password"),
+    ("POSTGRES_DB", "test-db"),
+    ("TEST", "true"),
+):
+    os.environ.setdefault(key, value)
+
+import pytest
+
+import bot.handlers.user.profile as profile_handlers
+from bot.handlers.user.profile import MAX_MESSAGE_LENGTH, _split_message
+
+
+def test_short_text_is_single_part():
+    assert _split_message("Привет") == ["Привет"]
+
+
+def test_long_text_split_within_limit_with_headers():
+    paragraphs = [f"Абзац {i}\n" + "слово " * 150 for i in range(20)]
+    paragraphs.insert(5, "x" * (MAX_MESSAGE_LENGTH * 2))
+    text = "\n\n".join(paragraphs)
+
+    parts = _split_message(text)
+
+    assert len(parts) > 2
+    assert all(len(part) <= MAX_MESSAGE_LENGTH for part in parts)
+    assert parts[0].startswith(f"📄 <b>Часть 1/{len(parts)}</b>")
+    assert parts[-1].startswith(f"📄 <b>Часть {len(parts)}/{len(parts)}</b>")
+    assert "Абзац 19" in parts[-1]
+
+
+@pytest.fixture
+def render_env(monkeypatch):
+    profile_handlers._PROFILE_RENDER_CACHE.clear()
+    user = SimpleNamespace(real_name="Анна", age=30)
+    version = {"updated_at": datetime(2025, 10, 1, 12, 0)}
+
+    async def get_view(user_id):
+        return SimpleNamespace(
+            patterns={"patterns": []},
+            insights={"insights": []},
+            emotional_state={},
+            learning_preferences={},
+            updated_at=version["updated_at"],
+        )
+
+    get_view_mock = AsyncMock(side_effect=get_view)
+    monkeypatch.setattr(profile_handlers.db_user, "get", AsyncMock(return_value=user))
+    monkeypatch.setattr(
+        profile_handlers.db_user_profile,
+        "get_updated_at",
+        AsyncMock(side_effect=lambda user_id: version["updated_at"]),
+    )
+    monkeypatch.setattr(profile_handlers.db_user_profile, "get_view", get_view_mock)
+    yield SimpleNamespace(user=user, version=version, get_view=get_view_mock)
+    profile_handlers._PROFILE_RENDER_CACHE.clear()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_profile_served_from_cache(render_env):
+    first = await profile_handlers._render_profile_parts(7)
+    second = await profile_handlers._render_profile_parts(7)
+
+    assert second is first
+    assert "Анна" in first[0]
+    assert render_env.get_view.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_profile_or_user_change_rerenders(render_env):
+    await profile_handlers._render_profile_parts(7)
+
+    render_env.version["updated_at"] = datetime(2025, 10, 2, 9, 0)
+    await profile_handlers._render_profile_parts(7)
+    assert render_env.get_view.await_count == 2
+
+    render_env.user.real_name = "Аня"
+    parts = await profile_handlers._render_profile_parts(7)
+    assert render_env.get_view.await_count == 3
+    assert "Аня" in parts[0]
+
+
+@pytest.mark.asyncio
+async def test_missing_user_returns_none(render_env, monkeypatch):
+    monkeypatch.setattr(profile_handlers.db_user, "get", AsyncMock(return_value=None))
+
+    assert await profile_handlers._render_profile_parts(7) is None
+    render_env.get_view.assert_not_awaited()
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import os
+from types import SimpleNamespace
+
+for key, value in (
+    ("BOT_TOKEN", "123456:TESTTOKEN"),
+    ("OPENAI_API_KEY", "test-key"),
+    ("POSTGRES_PASSWORD", "test-password"),
+    ("POSTGRES_DB", "test-db"),
+    ("TEST", "true"),
+):
+    os.environ.setdefault(key, value)
+
+import pytest
+
+from database import query_stats
+
+
+@pytest.fixture(autouse=True)
+def clean_aggregates():
+    query_stats.reset()
+    yield
+    query_stats.reset()
+
+
+def _execute(statement: str) -> None:
+    """Прогнать хуки engine так, как их вызывает SQLAlchemy"""
+    context = SimpleNamespace()
+    query_stats._before_cursor_execute(None, None, statement, (), context, False)
+    query_stats._after_cursor_execute(None, None, statement, (), context, False)
+
+
+def test_fingerprint_normalizes_literals_and_params():
+    first = query_stats.fingerprint(
+        "SELECT users.id FROM users\n  WHERE users.user_id = $1 AND users.id IN ($2, $3, $4) LIMIT 10"
+    )
+    second = query_stats.fingerprint("SELECT users.id FROM users WHERE users.user_id = $1 AND users.id IN ($2) LIMIT 5")
+
+    assert first == "SELECT users.id FROM users WHERE users.user_id = ? AND users.id IN (?...) LIMIT ?"
+    assert second.endswith("IN (?) LIMIT ?")
+    assert query_stats.fingerprint("SELECT 'x' FROM anon_1") == "SELECT ? FROM anon_1"
+    assert len(query_stats.fingerprint("SELECT " + "a, " * 200)) == query_stats.FINGERPRINT_MAX_LENGTH
+
+
+def test_queries_outside_track_are_ignored():
+    _execute("SELECT 1")
+
+    assert query_stats.current() is None
+    assert query_stats.summary() is None
+
+
+def test_track_counts_queries_and_feeds_summary():
+    with query_stats.track("update Message user=1") as stats:
+        _execute("SELECT * FROM users WHERE user_id = $1")
+        _execute("SELECT * FROM users WHERE user_id = $1")
+        _execute("INSERT INTO conversation_history VALUES ($1, $2)")
+
+    assert stats.queries == 3
+    assert stats.statements["SELECT * FROM users WHERE user_id = ?"] == 2
+    summary = query_stats.summary()
+    assert (summary.updates, summary.max_queries, summary.slow_updates) == (1, 3, 0)
+
+
+@pytest.mark.asyncio
+async def test_background_task_counted_separately():
+    from utils import task_helpers
+
+    async def background():
+        _execute("SELECT * FROM user_profiles")
+
+    with query_stats.track("update Message user=1") as stats:
+        _execute("SELECT 1")
+        await task_helpers.create_safe_task(background(), "pattern_analysis_user_1")
+
+    assert stats.queries == 1
+    assert query_stats.summary().updates == 1
+
+
+def test_nested_track_adds_into_outer():
+    with query_stats.track("load chat", record=False) as outer:
+        _execute("SELECT 1")
+        with query_stats.track("update Message user=1"):
+            _execute("SELECT 2")
+
+    assert outer.queries == 2
+    assert query_stats.summary().updates == 1
+
+
+def test_slow_update_logged_with_top_statements(monkeypatch, caplog):
+    monkeypatch.setattr(query_stats, "SLOW_UPDATE_QUERIES", 2)
+
+    with caplog.at_level(logging.WARNING, logger="database.query_stats"):
+        with query_stats.track("update Message user=7"):
+            for _ in range(3):
+                _execute("SELECT * FROM users WHERE user_id = $1")
+
+    assert "update Message user=7: 3 queries" in caplog.text
+    assert "3× SELECT * FROM users WHERE user_id = ?" in caplog.text
+    assert query_stats.summary().slow_updates == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_updates_do_not_mix():
+    async def update(user_id: int, count: int):
+        with query_stats.track(f"update Message user={user_id}") as stats:
+            for _ in range(count):
+                _execute("SELECT 1")
+                await asyncio.sleep(0)
+        return stats.queries
+
+    assert await asyncio.gather(update(1, 2), update(2, 5)) == [2, 5]
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from bot.services.quiz_service import analyzer
+
+
+QUIZ_DATA = {
+    "data": {
+        "questions": [{"id": "q1", "text": "Как часто?", "type": "scale"}],
+        "answers": [{"question_id": "q1", "value": "Часто"}],
+    }
+}
+PATTERN = {"title": "Страх уязвимости", "contradiction": "Хочу близости, но ухожу"}
+
+
+@pytest.mark.asyncio
+async def test_recommendations_run_while_profile_updates(monkeypatch):
+    events = []
+
+    async def fake_patterns(answers, category):
+        return [PATTERN]
+
+    async def fake_update(user_id, patterns):
+        events.append("profile:start")
+        await asyncio.sleep(0.05)
+        events.append("profile:end")
+        return patterns
+
+    async def fake_recommendations(patterns, category):
+        events.append("recommendations:start")
+        await asyncio.sleep(0.05)
+        events.append("recommendations:end")
+        return ["Сделай шаг"]
+
+    async def on_patterns(partial):
+        events.append(("patterns", partial["recommendations"]))
+
+    monkeypatch.setattr(analyzer, "_generate_patterns_from_quiz", fake_patterns)
+    monkeypatch.setattr(analyzer, "_update_profile_with_patterns", fake_update)
+    monkeypatch.setattr(analyzer, "_generate_recommendations", fake_recommendations)
+
+    result = await analyzer.analyze_quiz_results(1, QUIZ_DATA, "relationships", on_patterns=on_patterns)
+
+    assert result["new_patterns"] == [PATTERN]
+    assert result["recommendations"] == ["Сделай шаг"]
+    # Рекомендации стартовали до окончания обновления профиля
+    assert events.index("recommendations:start") < events.index("profile:end")
+    # Паттерны отданы раньше рекомендаций
+    assert ("patterns", []) in events
+
+
+@pytest.mark.asyncio
+async def test_steps_share_timeout_budget(monkeypatch):
+    async def slow_patterns(answers, category):
+        await asyncio.sleep(1)
+        return [PATTERN]
+
+    async def fake_update(user_id, patterns):
+        return patterns
+
+    async def slow_recommendations(patterns, category):
+        await asyncio.sleep(1)
+        return ["never"]
+
+    monkeypatch.setattr(analyzer, "QUIZ_ANALYSIS_TIMEOUT", 0.05)
+    monkeypatch.setattr(analyzer, "_generate_patterns_from_quiz", slow_patterns)
+    monkeypatch.setattr(analyzer, "_update_profile_with_patterns", fake_update)
+    monkeypatch.setattr(analyzer, "_generate_recommendations", slow_recommendations)
+
+    result = await asyncio.wait_for(
+        analyzer.analyze_quiz_results(1, QUIZ_DATA, "relationships"),
+        timeout=0.8,
+    )
+
+    assert result["new_patterns"] == []
+    assert result["recommendations"] == ["Продолжайте практики самопознания"]
+
+
+@pytest.mark.asyncio
+async def test_split_formatting_matches_full_text():
+    results = {
+        "category": "relationships",
+        "new_patterns": [dict(PATTERN, confidence=0.8)],
+        "recommendations": ["Сделай шаг"],
+    }
+
+    full = await analyzer.format_results_for_telegram(results, user_id=1)
+
+    assert full == "\n\n".join([
+        analyzer.format_patterns_for_telegram(results),
+        analyzer.format_recommendations_for_telegram(results),
+    ])
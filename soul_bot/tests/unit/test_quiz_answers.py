@@ -0,0 +1,77 @@
+import os
+
+for key, value in (
+    ("BOT_TOKEN", "123456:TESTTOKEN"),
+    ("OPENAI_API_KEY", "test-key"),
+    ("POSTGRES_PASSWORD", "test-password"),
+    ("POSTGRES_DB", "test-db"),
+    ("TEST", "true"),
+):
+    os.environ.setdefault(key, value)
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+
+class _FakeResult:
+    def __init__(self, row):
+        self._row = row
+
+    def scalar_one_or_none(self):
+        return self._row
+
+
+class _FakeSession:
+    def __init__(self, row):
+        self.row = row
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return _FakeResult(self.row)
+
+    async def commit(self):
+        pass
+
+
+def _patch_db(monkeypatch, row):
+    from database.repository import quiz_session as repo
+
+    session = _FakeSession(row)
+    monkeypatch.setattr(repo, "db", lambda: session)
+    return repo, session
+
+
+@pytest.mark.asyncio
+async def test_update_answer_appends_in_single_update(monkeypatch):
+    row = SimpleNamespace(current_question_index=3, total_questions=10)
+    repo, session = _patch_db(monkeypatch, row)
+
+    result = await repo.update_answer(7, "q3", "Часто", expected_index=2)
+
+    assert result is row
+    assert len(session.statements) == 1
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE quiz_sessions")
+    assert "||" in sql
+    assert "current_question_index + " in sql
+    assert "quiz_sessions.current_question_index = " in sql
+    assert "RETURNING" in sql
+
+
+@pytest.mark.asyncio
+async def test_update_answer_skips_duplicate_click(monkeypatch):
+    repo, _ = _patch_db(monkeypatch, None)
+
+    assert await repo.update_answer(7, "q3", "Часто", expected_index=2) is None
+
+    with pytest.raises(ValueError):
+        await repo.update_answer(7, "q3", "Часто")
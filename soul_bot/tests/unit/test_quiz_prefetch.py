@@ -0,0 +1,96 @@
+import os
+
+for key, value in (
+    ("BOT_TOKEN", "123456:TESTTOKEN"),
+    ("OPENAI_API_KEY", "test-key"),
+    ("POSTGRES_PASSWORD", "test-password"),
+    ("POSTGRES_DB", "test-db"),
+    ("TEST", "true"),
+):
+    os.environ.setdefault(key, value)
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+
+def _session(**overrides):
+    data = dict(
+        id=1,
+        user_id=42,
+        category="relationships",
+        is_in_progress=True,
+        current_question_index=0,
+        total_questions=10,
+        questions=[{"id": "q1", "text": "Как часто?", "type": "scale", "options": ["Редко", "Часто"]}],
+        answers=[],
+        prefetched_questions=None,
+    )
+    data.update(overrides)
+    return SimpleNamespace(**data)
+
+
+def test_prefetch_options_only_for_choice_questions_without_next():
+    from bot.handlers.user.quiz import _prefetch_options
+
+    assert _prefetch_options(_session()) == ["Редко", "Часто"]
+
+    text_question = [{"id": "q1", "text": "Расскажи", "type": "text"}]
+    assert _prefetch_options(_session(questions=text_question)) == []
+
+    seeded = _session().questions + [{"id": "q2", "text": "...", "type": "text"}]
+    assert _prefetch_options(_session(questions=seeded)) == []
+
+    already = {"question_index": 0, "branches": {}}
+    assert _prefetch_options(_session(prefetched_questions=already)) == []
+
+
+@pytest.mark.asyncio
+async def test_take_prefetched_question_serves_matching_branch_and_clears():
+    from bot.handlers.user import quiz
+
+    next_question = {"id": "q2", "text": "Почему часто?", "type": "text"}
+    session = _session(
+        current_question_index=1,
+        answers=[{"question_id": "q1", "value": "Часто"}],
+        prefetched_questions={"question_index": 0, "branches": {"Часто": next_question}},
+    )
+
+    assert quiz._prefetched_branch_ready(session)
+    assert await quiz._take_prefetched_question(session) == next_question
+    assert session.prefetched_questions is None
+
+
+@pytest.mark.asyncio
+async def test_take_prefetched_question_discards_other_branch():
+    from bot.handlers.user import quiz
+
+    session = _session(
+        current_question_index=1,
+        answers=[{"question_id": "q1", "value": "Редко"}],
+        prefetched_questions={"question_index": 0, "branches": {"Часто": {"id": "q2"}}},
+    )
+
+    assert await quiz._take_prefetched_question(session) is None
+    assert session.prefetched_questions is None
+
+
+@pytest.mark.asyncio
+async def test_prefetch_generates_candidate_per_option(monkeypatch):
+    from bot.handlers.user import quiz
+
+    async def fake_generate(category, question_number, previous_answers, user_profile):
+        return {"id": f"q{question_number}", "text": f"После «{previous_answers[-1]['answer_value']}»", "type": "text"}
+
+    monkeypatch.setattr(quiz.generator, "generate_adaptive_question", fake_generate)
+    monkeypatch.setattr(quiz.db_user_profile, "get_patterns_light", AsyncMock(return_value=[]))
+    save = AsyncMock(return_value=True)
+    monkeypatch.setattr(quiz.db_quiz_session, "save_prefetched_questions", save)
+
+    await quiz._prefetch_next_question(_session(), ["Редко", "Часто"])
+
+    session_id, question_index, branches = save.await_args.args
+    assert (session_id, question_index) == (1, 0)
+    assert set(branches) == {"Редко", "Часто"}
+    assert "Часто" in branches["Часто"]["text"]
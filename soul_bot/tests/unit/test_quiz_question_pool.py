@@ -0,0 +1,80 @@
+import pytest
+
+from bot.services.quiz_service import generator, question_pool
+
+
+POOL = [
+    {"id": "pool_1", "text": "Когда ты в последний раз просил о помощи?", "type": "text", "options": []},
+    {
+        "id": "pool_2",
+        "text": "Что ты делаешь, когда близкий человек молчит?",
+        "type": "multiple_choice",
+        "options": ["Жду", "Пишу первым", "Обижаюсь"],
+    },
+]
+
+
+@pytest.fixture(autouse=True)
+def _pool(monkeypatch):
+    async def fake_get_by_category(category):
+        return [dict(question) for question in POOL]
+
+    monkeypatch.setattr(question_pool.db_question_pool, "get_by_category", fake_get_by_category)
+    monkeypatch.setattr(question_pool, "_pools", {})
+
+
+def test_seed_clones_do_not_share_state():
+    first = generator._clone_seed_questions("relationships")
+    first[1]["options"].append("Мутация")
+    first[0]["text"] = "Мутация"
+
+    second = generator._clone_seed_questions("relationships")
+    assert second[0]["text"] != "Мутация"
+    assert "Мутация" not in second[1]["options"]
+    assert [q["id"] for q in second] == [q["id"] for q in generator.SEED_QUESTIONS["relationships"]]
+
+
+def test_initial_questions_need_no_gpt():
+    questions = generator.build_initial_questions("money", None)
+
+    assert [q["id"] for q in questions] == [q["id"] for q in generator.SEED_QUESTIONS["money"][:3]]
+
+
+def test_validate_questions_drops_broken_and_duplicates():
+    seed_text = generator.SEED_QUESTIONS["relationships"][0]["text"]
+    validated = question_pool.validate_questions(
+        [
+            POOL[0],
+            dict(POOL[0]),
+            {"text": "Коротко?", "type": "text"},
+            {"text": "Выбери вариант, который тебе ближе всего", "type": "multiple_choice", "options": ["Да"]},
+            {"text": seed_text, "type": "text"},
+        ],
+        "relationships",
+    )
+
+    assert [q["text"] for q in validated] == [POOL[0]["text"]]
+    assert validated[0]["id"].startswith("pool_")
+
+
+@pytest.mark.asyncio
+async def test_pick_questions_skips_asked():
+    picked = await question_pool.pick_questions("relationships", 2, exclude_texts=[POOL[0]["text"]])
+
+    assert [q["id"] for q in picked] == ["pool_2"]
+
+
+@pytest.mark.asyncio
+async def test_dynamic_questions_topped_up_from_pool(monkeypatch):
+    async def slow_gpt(**kwargs):
+        return []
+
+    monkeypatch.setattr(generator, "_generate_dynamic_batch", slow_gpt)
+
+    questions = await generator.generate_dynamic_questions(
+        category="relationships",
+        needed=1,
+        existing_questions=[{"text": POOL[1]["text"]}],
+    )
+
+    assert [q["id"] for q in questions] == ["pool_1"]
@@ -0,0 +1,64 @@
+import re
+
+import pytest
+
+from bot.services.realtime_mood_detector import (
+    URGENT_KEYWORDS,
+    detect_urgent_emotional_signals,
+    scan_emotional_signals,
+)
+
+
+def _legacy_matches(message: str) -> dict[str, list[str]]:
+    message_lower = message.lower()
+    hits = {}
+    for emotion, config in URGENT_KEYWORDS.items():
+        matched = [p for p in config['keywords'] if re.search(p, message_lower)]
+        if matched:
+            hits[emotion] = matched
+    return hits
+
+
+@pytest.mark.parametrize(
+    "message, emotion, urgency",
+    [
+        ("у меня паническая атака", "panic", "high"),
+        ("не хочу жить больше", "despair", "high"),
+        ("бесит этот мир", "anger", "medium"),
+        ("ура получилось!", "joy", "low"),
+        ("я работаю по 12 часов каждый день, нет сил", "burnout", "high"),
+        ("забыла важную встречу, не могу думать", "burnout", "high"),
+    ],
+)
+def test_detects_expected_emotion(message, emotion, urgency):
+    signal = detect_urgent_emotional_signals(message)
+
+    assert signal is not None
+    assert signal.emotion == emotion
+    assert signal.urgency == urgency
+
+
+@pytest.mark.parametrize("message", ["", "ок", "какая погода сегодня"])
+def test_no_signal(message):
+    assert detect_urgent_emotional_signals(message) is None
+    assert scan_emotional_signals(message) == {}
+
+
+def test_scan_returns_all_emotions_in_priority_order():
+    message = "Паническая атака, всё бесит, и мне очень грустно"
+
+    hits = scan_emotional_signals(message)
+
+    assert list(hits) == ["panic", "anger", "sadness"]
+    assert hits == _legacy_matches(message)
+
+
+def test_scan_matches_legacy_loop_on_overlapping_keywords():
+    message = "Круто получилось наконец, я сделала это! Работала по 10 часов без выходных"
+
+    hits = scan_emotional_signals(message)
+    signal = detect_urgent_emotional_signals(message)
+
+    assert hits == _legacy_matches(message)
+    assert signal.emotion == next(iter(hits))
+    assert signal.trigger_keywords == hits[signal.emotion]
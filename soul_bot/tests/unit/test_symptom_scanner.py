@@ -0,0 +1,131 @@
+import logging
+import re
+
+import pytest
+
+from bot.services import symptom_scanner
+from bot.services.pattern_analyzer import (
+    _calculate_burnout_score,
+    _calculate_depression_score,
+    _extract_burnout_evidence,
+    _extract_depression_evidence,
+)
+
+
+def _legacy_score(recent_text: str, category: str) -> int:
+    # Старый алгоритм: каждый pattern отдельно по склеенному тексту
+    return sum(
+        rule.weight
+        for rule in symptom_scanner.SCORE_RULES[category]
+        if re.search(rule.pattern, recent_text)
+    )
+
+
+def _legacy_evidence(messages: list[dict], category: str, max_evidence: int = 3) -> list[str]:
+    evidence = []
+    for msg in messages:
+        if msg.get('role') != 'user':
+            continue
+        content = msg.get('content', '')
+        for rule in symptom_scanner.EVIDENCE_RULES[category]:
+            if re.search(rule.pattern, content.lower()) and content not in evidence:
+                evidence.append(content)
+                break
+        if len(evidence) >= max_evidence:
+            break
+    return evidence
+
+
+# Диалоги из tests/test_pattern_critical_detection.py и test_pattern_analyzer_v2.py
+CONVERSATIONS = [
+    ["Работаю по 14 часов в день", "Нет сил вообще", "Забыл про встречу"],
+    ["Работаю по 14 часов в день", "Нет сил вообще", "Забыл про важную встречу", "Не могу сконцентрироваться"],
+    ["Нет смысла стараться", "Не помню когда был счастлив", "Чувствую себя полным лузером"],
+    ["Немного устал сегодня", "Работаю нормально"],
+    ["Работаю по 14 часов в день уже месяц", "Нет сил вообще. Забыл про важную встречу", "Не могу сконцентрироваться"],
+    ["Работаю по 14 часов в день", "Не могу сконцентрироваться", "Как робот какой-то"],
+    ["Всё бессмысленно", "Зачем стараться"],
+    ["Иногда думаю что всё бессмысленно", "Зачем вообще жить если ничего не меняется"],
+    ["я работаю по 14 часов в день уже месяц"],
+    ["хочу умереть, нет смысла жить"],
+    ["все хорошо, работаю нормально, отдыхаю"],
+    # `A.*B` через границу сообщений
+    ["Я опять забыл", "про важную встречу"],
+    ["не помню когда", "ничего не изменилось", "был счастлив"],
+    ["забыл\nи ещё", "про дедлайн"],
+    ["забыл", "вот так\nвсё", "про дедлайн"],
+    ["забыл", "", "про дедлайн"],
+    ["про дедлайн", "забыл"],
+    # Не `A.*B` — тоже через границу
+    ["я так устал", "от всего"],
+    ["работаю", "по 12 часов"],
+    ["нет", "сил", "совсем"],
+]
+
+
+@pytest.mark.parametrize('texts', CONVERSATIONS)
+@pytest.mark.parametrize('category', ['burnout', 'depression'])
+def test_one_pass_scan_matches_joined_text_scores(texts, category):
+    lowered = [text.lower() for text in texts]
+
+    scan = symptom_scanner.scan_messages(lowered)
+
+    assert scan.score(category) == _legacy_score(' '.join(lowered), category)
+
+
+@pytest.mark.parametrize('texts', CONVERSATIONS)
+@pytest.mark.parametrize('category', ['burnout', 'depression'])
+def test_evidence_matches_legacy(texts, category):
+    messages = []
+    for text in texts:
+        messages.append({'role': 'user', 'content': text})
+        messages.append({'role': 'assistant', 'content': 'Понимаю'})
+
+    assert symptom_scanner.extract_evidence(messages, category) == _legacy_evidence(messages, category)
+
+
+def test_wrappers_keep_scores():
+    assert _calculate_burnout_score("я работаю по 14 часов в день уже месяц, нет сил") == 5
+    assert _calculate_depression_score("хочу умереть, нет смысла жить") == 11
+    messages = [{'role': 'user', 'content': 'Как робот'}, {'role': 'user', 'content': 'Зачем стараться'}]
+    assert _extract_burnout_evidence(messages) == ['Как робот']
+    assert _extract_depression_evidence(messages) == ['Зачем стараться']
+
+
+def test_hits_carry_evidence_spans():
+    scan = symptom_scanner.scan_messages(["всё ок", "нет сил совсем"])
+
+    hit = next(h for h in scan.hits['burnout'] if h.rule == 'no_energy')
+    assert hit.message_index == 1
+    assert scan.texts[1][slice(*hit.span)] == "нет сил"
+    assert scan.evidence_indexes('burnout') == [1]
+
+
+def test_cross_message_hit_points_to_starting_message():
+    scan = symptom_scanner.scan_messages(["всё ок", "я так устал", "от всего"])
+
+    hit = next(h for h in scan.hits['depression'] if h.rule == 'tired_of_everything')
+    assert hit.message_index == 1
+    assert scan.texts[1][slice(*hit.span)] == "устал"
+
+
+def test_critical_depression_symptom_logged_as_warning(caplog):
+    with caplog.at_level(logging.DEBUG, logger='bot.services.pattern_analyzer'):
+        _calculate_depression_score("хочу умереть, нет сил")
+
+    levels = {record.getMessage(): record.levelno for record in caplog.records}
+    assert levels["🚨 CRITICAL depression symptom detected: suicidal_ideation"] == logging.WARNING
+    assert levels["🔎 depression symptom detected: no_energy"] == logging.DEBUG
+
+
+@pytest.mark.parametrize('pattern, prefix', [
+    (r'нет сил', 'нет сил'),
+    (r'устал\w* от всего', 'устал'),
+    (r'работа\w* (по )?\d+ час', 'работа'),
+    (r'(лузер|неудачник)', ''),
+    (r'работа[ю|л|ла] по \d+ час', 'работа'),
+    (r'ab?c', 'a'),
+    (r'ab|cd', ''),
+])
+def test_literal_prefix(pattern, prefix):
+    assert symptom_scanner.literal_prefix(pattern) == prefix
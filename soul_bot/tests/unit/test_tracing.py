@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+for key, value in (
+    ("BOT_TOKEN", "123456:TESTTOKEN"),
+    ("OPENAI_API_KEY", "test-key"),
+    ("POSTGRES_PASSWORD", "test-password"),
+    ("POSTGRES_DB", "test-db"),
+    ("TEST", "true"),
+):
+    os.environ.setdefault(key, value)
+
+import pytest
+
+from utils import tracing
+
+
+class _CaptureExporter:
+    def __init__(self):
+        self.batches = []
+
+    def export(self, spans):
+        self.batches.append(list(spans))
+
+    def names(self):
+        return [[span.name for span in batch] for batch in self.batches]
+
+
+@pytest.fixture
+def exporter():
+    capture = _CaptureExporter()
+    tracing.set_exporter(capture)
+    yield capture
+    tracing.set_exporter(None)
+
+
+@pytest.mark.asyncio
+async def test_nested_spans_share_trace_and_export_with_root(exporter):
+    @tracing.traced()
+    async def get_view(user_id):
+        await asyncio.sleep(0)
+        return user_id
+
+    with tracing.span("telegram.update", user_id=1) as root:
+        await get_view(1)
+        with tracing.span("openai.chat.completions") as api:
+            api.set(tokens=42)
+        breakdown = tracing.timings()
+
+    assert exporter.names() == [["test_tracing.get_view", "openai.chat.completions", "telegram.update"]]
+    spans = exporter.batches[0]
+    assert {span.trace.trace_id for span in spans} == {root.trace.trace_id}
+    assert spans[0].parent_id == root.span_id
+    assert spans[1].attributes == {"tokens": 42}
+    assert set(breakdown) == {"test_tracing.get_view", "openai.chat.completions", "total"}
+    assert tracing.current_span() is None
+
+
+@pytest.mark.asyncio
+async def test_background_task_gets_own_trace(exporter, monkeypatch):
+    from utils import task_helpers
+
+    async def background():
+        with tracing.span("pattern_analysis"):
+            await asyncio.sleep(0)
+
+    with tracing.span("telegram.update") as root:
+        task = task_helpers.create_safe_task(background(), "pattern_analysis_user_1")
+    await task
+
+    update_batch, task_batch = exporter.batches
+    assert [span.name for span in update_batch] == ["telegram.update"]
+    assert [span.name for span in task_batch] == ["pattern_analysis", "background_task"]
+    task_root = task_batch[-1]
+    assert task_root.is_root
+    assert task_root.trace.trace_id != root.trace.trace_id
+    assert task_root.attributes == {"task_name": "pattern_analysis_user_1", "parent_trace_id": root.trace.trace_id}
+
+
+def test_span_records_error(exporter):
+    with pytest.raises(ValueError):
+        with tracing.span("save_conversation"):
+            raise ValueError("boom")
+
+    assert exporter.batches[0][0].error == "ValueError"
+
+
+@pytest.mark.asyncio
+async def test_finalize_completion_writes_timings_into_metadata(monkeypatch):
+    from bot.services import openai_service
+
+    monkeypatch.setattr(openai_service, "build_personalized_response", AsyncMock(return_value="Ответ"))
+    monkeypatch.setattr(openai_service, "_update_statistics", AsyncMock())
+    save = AsyncMock()
+    monkeypatch.setattr(openai_service, "save_conversation", save)
+
+    context = SimpleNamespace(
+        user_id=1,
+        assistant_type="helper",
+        profile=None,
+        message="привет",
+        dialogue_state=None,
+        expected_dialogue_role=None,
+        urgent_signal=None,
+    )
+    with tracing.span("chat_completion"):
+        with tracing.span("openai.chat.completions"):
+            pass
+        await openai_service._finalize_completion(context, "Ответ", model="gpt-4o-mini", tokens_used=10)
+
+    timings = save.await_args.kwargs["assistant_metadata"]["timings_ms"]
+    assert {"openai.chat.completions", "build_personalized_response", "total"} <= set(timings)
+
+
+@pytest.mark.asyncio
+async def test_stream_spans_do_not_leak_across_yields(exporter, monkeypatch):
+    from bot.services import openai_service
+
+    class _Stream:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def __aiter__(self):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="Hi"))], usage=None)
+            yield SimpleNamespace(choices=[], usage=SimpleNamespace(total_tokens=7))
+
+    context = SimpleNamespace(messages=[], temperature=0.7)
+    monkeypatch.setattr(openai_service, "_prepare_completion", AsyncMock(return_value=context))
+    monkeypatch.setattr(openai_service, "_finalize_completion", AsyncMock(return_value="Hi!"))
+    monkeypatch.setattr(openai_service.client.chat.completions, "create", AsyncMock(return_value=_Stream()))
+
+    seen = []
+    async for event in openai_service.stream_chat_completion(1, "hi", "helper"):
+        seen.append((event["type"], tracing.current_span()))
+
+    assert seen == [("delta", None), ("done", None)]
+    (batch,) = exporter.batches
+    assert [span.name for span in batch] == ["openai.chat.completions", "chat_completion"]
+    assert batch[0].attributes["tokens"] == 7
+    assert "ttft_ms" in batch[0].attributes
+
+
+def test_jsonl_exporter_writes_one_line_per_span(tmp_path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    tracing.set_exporter(tracing.JsonlExporter(str(path)))
+    try:
+        with tracing.span("telegram.update", user_id=5):
+            with tracing.span("user.get"):
+                pass
+    finally:
+        tracing.set_exporter(None)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["name"] for record in records] == ["user.get", "telegram.update"]
+    assert records[0]["parent_id"] == records[1]["span_id"]
+    assert records[1]["attributes"] == {"user_id": 5}
+
+
+def test_otlp_payload_shape():
+    capture = _CaptureExporter()
+    tracing.set_exporter(capture)
+    try:
+        with tracing.span("chat_completion", model="gpt-4o-mini", stream=False):
+            with tracing.span("openai.chat.completions"):
+                pass
+    finally:
+        tracing.set_exporter(None)
+
+    payload = tracing.OtlpHttpExporter("http://collector")._payload(capture.batches[0])
+    spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    child, root = spans
+    assert child["parentSpanId"] == root["spanId"]
+    assert "parentSpanId" not in root
+    assert len(root["traceId"]) == 32 and len(root["spanId"]) == 16
+    assert int(root["endTimeUnixNano"]) >= int(root["startTimeUnixNano"])
+    assert {"key": "stream", "value": {"boolValue": False}} in root["attributes"]
@@ -0,0 +1,171 @@
+import os
+
+for key, value in (
+    ("BOT_TOKEN", "123456:TESTTOKEN"),
+    ("OPENAI_API_KEY", "test-key"),
+    ("POSTGRES_PASSWORD", "test-password"),
+    ("POSTGRES_DB", "test-db"),
+    ("TEST", "true"),
+):
+    os.environ.setdefault(key, value)
+
+from collections import OrderedDict
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+
+class _FakeSpeechResponse:
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def iter_bytes(self):
+        for chunk in self._chunks:
+            yield chunk
+
+
+@pytest.fixture
+def tts(monkeypatch):
+    """ChatGPT с пустым кэшем и фейковым streaming TTS: текст → чанки"""
+    from bot.functions import ChatGPT
+
+    def create(*, input, **kwargs):
+        return _FakeSpeechResponse([b"OggS", input.encode("utf-8")] if input else [])
+
+    create_mock = Mock(side_effect=create)
+    monkeypatch.setattr(ChatGPT, "_tts_cache", OrderedDict())
+    monkeypatch.setattr(ChatGPT, "client", SimpleNamespace(audio=SimpleNamespace(speech=SimpleNamespace(
+        with_streaming_response=SimpleNamespace(create=create_mock)
+    ))))
+    return ChatGPT, create_mock
+
+
+@pytest.mark.asyncio
+async def test_generate_audio_streams_chunks_into_memory(tts):
+    from bot.services.constants import MODEL_TTS, TTS_RESPONSE_FORMAT, TTS_VOICE
+
+    ChatGPT, create = tts
+
+    audio = await ChatGPT.generate_audio("привет")
+
+    assert audio == b"OggS" + "привет".encode("utf-8")
+    create.assert_called_once_with(
+        model=MODEL_TTS, voice=TTS_VOICE, input="привет", response_format=TTS_RESPONSE_FORMAT,
+    )
+
+
+@pytest.mark.asyncio
+async def test_generate_audio_cache_hit_skips_tts(tts):
+    ChatGPT, create = tts
+
+    first = await ChatGPT.generate_audio("привет")
+    second = await ChatGPT.generate_audio("привет")
+    await ChatGPT.generate_audio("пока")
+
+    assert second is first
+    assert create.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_generate_audio_evicts_least_recently_used(tts, monkeypatch):
+    ChatGPT, create = tts
+    monkeypatch.setattr(ChatGPT, "TTS_CACHE_MAX_ITEMS", 2)
+
+    await ChatGPT.generate_audio("a")
+    await ChatGPT.generate_audio("b")
+    await ChatGPT.generate_audio("a")  # hit: "a" становится самым свежим
+    await ChatGPT.generate_audio("c")  # вытесняет "b"
+
+    assert list(ChatGPT._tts_cache) == [ChatGPT._tts_cache_key("a"), ChatGPT._tts_cache_key("c")]
+    await ChatGPT.generate_audio("b")
+    assert create.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_generate_audio_empty_response_not_cached(tts):
+    ChatGPT, _ = tts
+
+    assert await ChatGPT.generate_audio("") is None
+    assert not ChatGPT._tts_cache
+
+
+def _voice_message(user_id):
+    gen_message = SimpleNamespace(delete=AsyncMock(), edit_text=AsyncMock())
+    message = SimpleNamespace(
+        from_user=SimpleNamespace(id=user_id),
+        voice=SimpleNamespace(file_id="file-id"),
+        bot=SimpleNamespace(
+            get_file=AsyncMock(return_value=SimpleNamespace(file_path="voice/file.oga")),
+            download_file=AsyncMock(),
+        ),
+        answer=AsyncMock(return_value=gen_message),
+        answer_voice=AsyncMock(),
+    )
+    return message, gen_message
+
+
+@pytest.fixture
+def voice_pipeline(monkeypatch):
+    """voice_answer без Telegram, ffmpeg и Whisper"""
+    from bot.functions import other
+
+    monkeypatch.setattr(other, "check_sub", AsyncMock(return_value=True))
+    monkeypatch.setattr(other, "bot", SimpleNamespace(send_chat_action=AsyncMock()))
+    monkeypatch.setattr(other, "convert_voice", Mock())
+    monkeypatch.setattr(other, "transcribe_audio", AsyncMock(return_value="мне тревожно"))
+    monkeypatch.setattr(other, "get_assistant_response", AsyncMock(return_value="Что именно тревожит?"))
+    monkeypatch.setattr(other, "report_exception", AsyncMock())
+    return other
+
+
+@pytest.mark.asyncio
+async def test_voice_answer_sends_tts_bytes_as_buffered_file(voice_pipeline, monkeypatch):
+    from aiogram.types import BufferedInputFile
+
+    other = voice_pipeline
+    monkeypatch.setattr(other, "generate_audio", AsyncMock(return_value=b"OggS-audio"))
+    message, gen_message = _voice_message(user_id=501)
+
+    await other.voice_answer(message, "helper")
+
+    other.generate_audio.assert_awaited_once_with("Что именно тревожит?")
+    voice = message.answer_voice.await_args.args[0]
+    assert isinstance(voice, BufferedInputFile)
+    assert voice.data == b"OggS-audio"
+    assert voice.filename == "voice.ogg"
+    gen_message.delete.assert_awaited_once()
+    assert not other.is_waiting(501)
+
+
+@pytest.mark.asyncio
+async def test_voice_answer_releases_user_when_tts_fails(voice_pipeline, monkeypatch):
+    other = voice_pipeline
+    monkeypatch.setattr(other, "generate_audio", AsyncMock(side_effect=RuntimeError("tts down")))
+    message, _ = _voice_message(user_id=502)
+
+    await other.voice_answer(message, "helper")
+
+    message.answer_voice.assert_not_awaited()
+    assert other.report_exception.await_args.args[0] == "voice_answer"
+    assert not other.is_waiting(502)
+
+
+@pytest.mark.asyncio
+async def test_voice_answer_releases_user_when_send_fails(voice_pipeline, monkeypatch):
+    other = voice_pipeline
+    monkeypatch.setattr(other, "generate_audio", AsyncMock(return_value=b"OggS-audio"))
+    message, gen_message = _voice_message(user_id=503)
+    message.answer_voice.side_effect = RuntimeError("telegram down")
+
+    await other.voice_answer(message, "helper")
+
+    assert other.report_exception.await_args.args[0] == "voice_answer.send_voice"
+    gen_message.delete.assert_awaited_once()
+    assert not other.is_waiting(503)
@@ -0,0 +1,85 @@
+"""
+JSON codec для JSONB-колонок и web API
+
+orjson, если установлен (в разы быстрее stdlib на профилях с embeddings),
+иначе — stdlib json с тем же поведением:
+- dumps() возвращает str (так ждёт SQLAlchemy), dumps_bytes() — bytes
+- loads() принимает str / bytes / memoryview
+- ключи dict не-строки (int и т.п.) приводятся к строкам, как в stdlib
+- numpy-массивы и скаляры сериализуются как списки / числа
+"""
+import json
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson есть в requirements
+    orjson = None
+
+_Default = Optional[Callable[[Any], Any]]
+
+
+def _fallback_default(obj: Any) -> Any:
+    # numpy.ndarray / numpy scalar
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    # Подклассы float/int/str, которые orjson не берёт
+    for base in (float, int, str):
+        if isinstance(obj, base):
+            return base(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    JSON_BACKEND = 'orjson'
+
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    # С пользовательским default datetime/dataclass отдаются ему — как в stdlib
+    _PASSTHROUGH = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def dumps_bytes(obj: Any, default: _Default = None) -> bytes:
+        """Сериализовать в UTF-8 bytes"""
+        if default is None:
+            return orjson.dumps(obj, default=_fallback_default, option=_OPTIONS)
+
+        def _default(value: Any) -> Any:
+            try:
+                return default(value)
+            except TypeError:
+                return _fallback_default(value)
+
+        return orjson.dumps(obj, default=_default, option=_OPTIONS | _PASSTHROUGH)
+
+    def dumps(obj: Any, default: _Default = None) -> str:
+        """Сериализовать в str"""
+        return dumps_bytes(obj, default).decode('utf-8')
+
+    def loads(data: str | bytes | bytearray | memoryview) -> Any:
+        """Разобрать JSON"""
+        return orjson.loads(data)
+
+else:  # pragma: no cover
+    JSON_BACKEND = 'json'
+
+    def dumps(obj: Any, default: _Default = None) -> str:
+        """Сериализовать в str"""
+        def _default(value: Any) -> Any:
+            if default is not None:
+                try:
+                    return default(value)
+                except TypeError:
+                    pass
+            return _fallback_default(value)
+
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default)
+
+    def dumps_bytes(obj: Any, default: _Default = None) -> bytes:
+        """Сериализовать в UTF-8 bytes"""
+        return dumps(obj, default).encode('utf-8')
+
+    def loads(data: str | bytes | bytearray | memoryview) -> Any:
+        """Разобрать JSON"""
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
@@ -0,0 +1,343 @@
+"""
+Метрики процесса в формате Prometheus (text exposition 0.0.4)
+
+Реестр в памяти: Counter / Histogram / Gauge с метками. Бот отдаёт
+/metrics через отдельный aiohttp-сервер (METRICS_PORT), Quart-приложения
+webapp_api — маршрутом /metrics. Внешних зависимостей нет.
+
+    metrics.cache_lookup('profile_render', hit=cached is not None)
+    with metrics.UPDATE_DURATION.time(event='Message', status='ok'): ...
+
+Метки должны быть низкой кардинальности: никаких user_id / session_id.
+"""
+import logging
+import math
+import re
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional
+
+from config import METRICS_HOST, METRICS_PORT
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+# ==========================================
+# 📐 ТИПЫ МЕТРИК
+# ==========================================
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f'# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n'
+        return header + ''.join(f'{line}\n' for line in self._samples())
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError(f"{self.name}: counters only go up")
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key → [счётчики по бакетам (не кумулятивные) + overflow, сумма, количество]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        state[0][index] += 1
+        state[1] += value
+        state[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Наблюдать длительность блока в секундах"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def _samples(self) -> Iterator[str]:
+        for key, (bucket_counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), bucket_counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}'
+            labels = _format_labels(self.labelnames, key)
+            yield f'{self.name}_sum{labels} {_format_value(total)}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+class Gauge(_Metric):
+    """
+    Gauge: значения через set() или снимаются при каждом scrape через collect()
+
+    collect возвращает {кортеж значений меток: значение} — например,
+    состояние пула соединений SQLAlchemy.
+    """
+    kind = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        collect: Optional[Callable[[], dict]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+        self._collect = collect
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def _samples(self) -> Iterator[str]:
+        values = dict(self._values)
+        if self._collect is not None:
+            try:
+                values.update(self._collect())
+            except Exception as e:
+                logger.debug("Gauge %s collect failed: %s", self.name, e)
+        for key, value in values.items():
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def unregister(self, metric: _Metric) -> None:
+        self._metrics.pop(metric.name, None)
+
+    def render(self) -> str:
+        return ''.join(metric.render() for metric in self._metrics.values())
+
+
+REGISTRY = Registry()
+
+
+def render() -> bytes:
+    """Все метрики процесса в text exposition format"""
+    return REGISTRY.render().encode('utf-8')
+
+
+# ==========================================
+# 📊 МЕТРИКИ ПРИЛОЖЕНИЯ
+# ==========================================
+
+UPDATE_DURATION = Histogram(
+    'soulnear_update_duration_seconds',
+    'Telegram update handling time (EventsMiddleware)',
+    ['event', 'status'],
+)
+
+OPENAI_REQUEST_DURATION = Histogram(
+    'soulnear_openai_request_duration_seconds',
+    'OpenAI API call latency (streams: until the stream is open)',
+    ['endpoint', 'model', 'lane', 'status'],
+)
+
+OPENAI_TOKENS = Counter(
+    'soulnear_openai_tokens_total',
+    'OpenAI tokens used',
+    ['model', 'lane', 'kind'],
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    'soulnear_http_request_duration_seconds',
+    'WebApp API request time until the response starts',
+    ['app', 'method', 'route', 'status'],
+)
+
+CACHE_REQUESTS = Counter(
+    'soulnear_cache_requests_total',
+    'In-process cache lookups',
+    ['cache', 'result'],
+)
+
+BACKGROUND_TASKS = Counter(
+    'soulnear_background_tasks_total',
+    'Finished create_safe_task jobs',
+    ['task', 'status'],
+)
+
+MAILING_MESSAGES = Counter(
+    'soulnear_mailing_messages_total',
+    'Admin mailing deliveries',
+    ['result'],
+)
+
+DB_QUERIES_PER_UPDATE = Histogram(
+    'soulnear_db_queries_per_update',
+    'SQL statements per Telegram update (database.query_stats)',
+    buckets=(5, 10, 15, 20, 25, 30, 40, 60, 100),
+)
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+_TASK_ID_RE = re.compile(r'_\d+')
+
+
+def task_kind(task_name: str) -> str:
+    """Имя фоновой задачи без id: pattern_analysis_user_42 → pattern_analysis_user"""
+    return _TASK_ID_RE.sub('', task_name) or 'background_task'
+
+
+# ==========================================
+# 🤖 OPENAI
+# ==========================================
+
+def record_usage(usage, model: str, lane: str) -> None:
+    """Токены prompt/completion из usage ответа (для стримов — из последнего чанка)"""
+    if usage is None:
+        return
+    prompt = getattr(usage, 'prompt_tokens', None) or 0
+    completion = getattr(usage, 'completion_tokens', None) or 0
+    if prompt:
+        OPENAI_TOKENS.inc(prompt, model=model, lane=lane, kind='prompt')
+    if completion:
+        OPENAI_TOKENS.inc(completion, model=model, lane=lane, kind='completion')
+
+
+def _timed_create(create: Callable, endpoint: str, lane: str) -> Callable:
+    async def wrapper(*args, **kwargs):
+        model = str(kwargs.get('model', 'unknown'))
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            response = await create(*args, **kwargs)
+            status = 'ok'
+        finally:
+            OPENAI_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                endpoint=endpoint, model=model, lane=lane, status=status,
+            )
+        # Стрим: usage придёт последним чанком — его записывает вызывающий код
+        if not kwargs.get('stream'):
+            record_usage(getattr(response, 'usage', None), model, lane)
+        return response
+
+    wrapper.__wrapped__ = create
+    return wrapper
+
+
+def instrument_openai(client, lane: str):
+    """
+    Считать latency и токены всех вызовов клиента под меткой lane
+
+    lane — подсистема, которой принадлежит клиент (chat, pattern_analysis,
+    quiz, embeddings): по ней видно, кто тратит токены.
+    """
+    client.chat.completions.create = _timed_create(client.chat.completions.create, 'chat', lane)
+    client.embeddings.create = _timed_create(client.embeddings.create, 'embeddings', lane)
+    return client
+
+
+# ==========================================
+# 🌐 HTTP
+# ==========================================
+
+async def start_http_server(host: str = METRICS_HOST, port: int = METRICS_PORT):
+    """
+    Поднять /metrics на aiohttp (процесс бота)
+
+    Returns:
+        AppRunner (для cleanup) или None, если METRICS_PORT не задан
+    """
+    if not port:
+        return None
+
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(body=render(), headers={'Content-Type': CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"📈 Metrics endpoint: http://{host}:{port}/metrics")
+    return runner
@@ -6,6 +6,8 @@ import logging
 from typing import Coroutine, Any
 
 from bot.services.error_notifier import schedule_exception_report
+from database import query_stats
+from utils import metrics, tracing
 
 logger = logging.getLogger(__name__)
 
@@ -28,15 +30,22 @@ def create_safe_task(coro: Coroutine[Any, Any, Any], task_name: str = "backgroun
         asyncio.Task
     """
     async def safe_wrapper():
-        try:
-            await coro
-        except Exception as e:
-            logger.error(f"❌ Background task '{task_name}' failed: {e}", exc_info=True)
-            schedule_exception_report(
-                "background_task",
-                e,
-                extras={"task_name": task_name},
-            )
+        # Свой trace: фоновая работа не растягивает trace ответа пользователю
+        # и свой счётчик запросов (в slow-лог, но не в агрегаты обновлений)
+        with tracing.span("background_task", root=True, task_name=task_name) as task_span, \
+                query_stats.track(f"task {task_name}", root=True, record=False):
+            try:
+                await coro
+                metrics.BACKGROUND_TASKS.inc(task=metrics.task_kind(task_name), status='ok')
+            except Exception as e:
+                task_span.error = type(e).__name__
+                metrics.BACKGROUND_TASKS.inc(task=metrics.task_kind(task_name), status='error')
+                logger.error(f"❌ Background task '{task_name}' failed: {e}", exc_info=True)
+                schedule_exception_report(
+                    "background_task",
+                    e,
+                    extras={"task_name": task_name},
+                )
     
     return asyncio.create_task(safe_wrapper(), name=task_name)
 
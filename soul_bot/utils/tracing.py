@@ -0,0 +1,324 @@
+"""
+Лёгкий трейсинг запросов: span'ы через contextvars
+
+Trace — одно Telegram-обновление (EventsMiddleware) или один вызов
+openai_service, если он пришёл не из бота (WebApp). Вложенные span'ы
+(repository, OpenAI, персонализация) цепляются к текущему автоматически:
+контекст наследуется через await и asyncio.create_task.
+create_safe_task открывает для фоновой задачи отдельный trace
+(с parent_trace_id), чтобы она не растягивала trace ответа.
+
+    with tracing.span("openai.chat.completions", model=model) as s:
+        response = await client.chat.completions.create(...)
+        s.set(tokens=response.usage.total_tokens)
+
+    @tracing.traced()
+    async def get_view(user_id): ...
+
+Экспорт законченных trace'ов (config.TRACING_EXPORTER):
+- ''     — только в памяти (разбивка по времени для metadata)
+- 'log'  — JSON lines в TRACING_LOG_PATH
+- 'otlp' — OTLP/HTTP JSON в локальный collector (TRACING_OTLP_ENDPOINT)
+"""
+import asyncio
+import functools
+import logging
+import os
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional
+
+from config import TRACING_EXPORTER, TRACING_LOG_PATH, TRACING_OTLP_ENDPOINT
+from utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================
+# 🧵 SPAN / TRACE
+# ==========================================
+
+@dataclass
+class Trace:
+    trace_id: str
+    spans: list['Span'] = field(default_factory=list)
+    exported: bool = False
+    started: float = field(default_factory=time.perf_counter, repr=False)
+
+
+@dataclass
+class Span:
+    name: str
+    trace: Trace
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    attributes: dict[str, Any] = field(default_factory=dict)
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def is_root(self) -> bool:
+        return self.parent_id is None
+
+    def set(self, **attributes: Any) -> None:
+        """Добавить атрибуты (str / int / float / bool)"""
+        self.attributes.update(attributes)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000
+
+    def end(self) -> None:
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = self.elapsed_ms()
+        self.trace.spans.append(self)
+        if self.is_root:
+            _export(self.trace, self.trace.spans)
+            self.trace.exported = True
+        elif self.trace.exported:
+            # Span фоновой работы, закончившийся после корня
+            _export(self.trace, [self])
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar('tracing_current_span', default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, *, root: bool = False, **attributes: Any) -> Span:
+    """
+    Создать span (не делая его текущим)
+
+    Args:
+        root: начать новый trace, даже если есть текущий span —
+            id родительского trace сохраняется в parent_trace_id
+    """
+    parent = _current_span.get()
+    if parent is None or root:
+        trace = Trace(trace_id=secrets.token_hex(16))
+        if parent is not None:
+            attributes['parent_trace_id'] = parent.trace.trace_id
+        parent_id = None
+    else:
+        trace = parent.trace
+        parent_id = parent.span_id
+
+    return Span(
+        name=name,
+        trace=trace,
+        span_id=secrets.token_hex(8),
+        parent_id=parent_id,
+        start_ns=time.time_ns(),
+        attributes=attributes,
+    )
+
+
+@contextmanager
+def use_span(active: Span) -> Iterator[Span]:
+    """
+    Сделать span текущим на время блока (без завершения)
+
+    Нужно для async-генераторов: contextvar нельзя держать через yield,
+    поэтому span активируется только на участках между yield.
+    """
+    token = _current_span.set(active)
+    try:
+        yield active
+    except BaseException as e:
+        active.error = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name: str, *, root: bool = False, **attributes: Any) -> Iterator[Span]:
+    """Span на время блока (работает и вокруг await)"""
+    new_span = start_span(name, root=root, **attributes)
+    try:
+        with use_span(new_span):
+            yield new_span
+    finally:
+        new_span.end()
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Декоратор для async-функций: span на каждый вызов
+
+    Имя по умолчанию — "<модуль>.<функция>", например user_profile.get_view.
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(span_name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def timings(target: Optional[Span] = None) -> dict[str, float]:
+    """
+    Разбивка времени текущего trace: имя span'а → мс (сумма по одноимённым)
+
+    Учитываются уже закончившиеся span'ы; 'total' — время от начала
+    trace до момента вызова.
+    """
+    target = target or _current_span.get()
+    if target is None:
+        return {}
+
+    result: dict[str, float] = {}
+    for finished in target.trace.spans:
+        result[finished.name] = result.get(finished.name, 0.0) + finished.duration_ms
+
+    result = {key: round(value, 1) for key, value in result.items()}
+    result['total'] = round((time.perf_counter() - target.trace.started) * 1000, 1)
+    return result
+
+
+# ==========================================
+# 📤 ЭКСПОРТ
+# ==========================================
+
+def _span_record(item: Span) -> dict:
+    return {
+        'trace_id': item.trace.trace_id,
+        'span_id': item.span_id,
+        'parent_id': item.parent_id,
+        'name': item.name,
+        'start_ns': item.start_ns,
+        'duration_ms': round(item.duration_ms or 0.0, 3),
+        'attributes': item.attributes,
+        'error': item.error,
+    }
+
+
+class JsonlExporter:
+    """Span'ы JSON lines в файл (запись в executor, не блокирует loop)"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _write(self, data: bytes) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'ab') as file:
+            file.write(data)
+
+    def export(self, spans: list[Span]) -> None:
+        data = b''.join(json_codec.dumps_bytes(_span_record(item)) + b'\n' for item in spans)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(data)
+            return
+        loop.run_in_executor(None, self._write, data)
+
+
+class OtlpHttpExporter:
+    """OTLP/HTTP JSON (Jaeger, Tempo, otel-collector на :4318)"""
+
+    def __init__(self, endpoint: str, service_name: str = 'soulnear_bot'):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._session = None
+        self._pending: set[asyncio.Task] = set()
+
+    @staticmethod
+    def _attribute(key: str, value: Any) -> dict:
+        if isinstance(value, bool):
+            wrapped = {'boolValue': value}
+        elif isinstance(value, int):
+            wrapped = {'intValue': str(value)}
+        elif isinstance(value, float):
+            wrapped = {'doubleValue': value}
+        else:
+            wrapped = {'stringValue': str(value)}
+        return {'key': key, 'value': wrapped}
+
+    def _payload(self, spans: list[Span]) -> dict:
+        otlp_spans = []
+        for item in spans:
+            end_ns = item.start_ns + int((item.duration_ms or 0.0) * 1e6)
+            otlp_span = {
+                'traceId': item.trace.trace_id,
+                'spanId': item.span_id,
+                'name': item.name,
+                'kind': 1,
+                'startTimeUnixNano': str(item.start_ns),
+                'endTimeUnixNano': str(end_ns),
+                'attributes': [self._attribute(k, v) for k, v in item.attributes.items()],
+                'status': {'code': 2, 'message': item.error} if item.error else {'code': 1},
+            }
+            if item.parent_id:
+                otlp_span['parentSpanId'] = item.parent_id
+            otlp_spans.append(otlp_span)
+
+        return {'resourceSpans': [{
+            'resource': {'attributes': [self._attribute('service.name', self.service_name)]},
+            'scopeSpans': [{'scope': {'name': 'soulnear.tracing'}, 'spans': otlp_spans}],
+        }]}
+
+    async def _post(self, body: bytes) -> None:
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
+        try:
+            async with self._session.post(
+                self.endpoint, data=body, headers={'Content-Type': 'application/json'}
+            ) as response:
+                if response.status >= 400:
+                    logger.debug("OTLP export rejected: HTTP %s", response.status)
+        except Exception as e:
+            logger.debug("OTLP export failed: %s", e)
+
+    def export(self, spans: list[Span]) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._post(json_codec.dumps_bytes(self._payload(spans))))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+
+def _build_exporter(kind: str):
+    if kind == 'log':
+        return JsonlExporter(TRACING_LOG_PATH)
+    if kind == 'otlp':
+        return OtlpHttpExporter(TRACING_OTLP_ENDPOINT)
+    if kind not in ('', 'off', 'none'):
+        logger.warning("Unknown TRACING_EXPORTER=%r, traces are not exported", kind)
+    return None
+
+
+_exporter = _build_exporter(TRACING_EXPORTER)
+
+
+def set_exporter(exporter) -> None:
+    """Подменить exporter (тесты, нагрузочный стенд); None — выключить экспорт"""
+    global _exporter
+    _exporter = exporter
+
+
+def _export(trace: Trace, spans: list[Span]) -> None:
+    if _exporter is None or not spans:
+        return
+    try:
+        _exporter.export(spans)
+    except Exception as e:
+        logger.debug("Trace export failed: %s", e)
@@ -1,387 +1,246 @@
-from quart import Quart, request, jsonify
+from quart import Quart, Response, request, jsonify
 from quart_cors import cors
 import os
+import sys
 import logging
 import asyncio
+import time
+import weakref
+import httpx
 from datetime import datetime
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
 from typing import Optional
-from contextlib import asynccontextmanager
 
-from asyncpg import DuplicateDatabaseError, InvalidCatalogNameError
-from sqlalchemy import URL, select, text, update
-from sqlalchemy.exc import OperationalError
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
-from sqlalchemy import VARCHAR, DateTime, Integer, Boolean, TEXT
-from datetime import datetime as dt
+from asyncpg.exceptions import UndefinedColumnError
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from static_assets import StaticAssets
+
+# Add soul_bot to path to import shared code (same DB engine and chat pipeline as the bot)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'soul_bot'))
+
+from database.database import db
+from database.media_catalog import media_catalog
+from database.repository import conversation_history
+from bot.services.openai_service import client, get_chat_completion
+from utils import metrics
+
+from json_provider import FastJSONProvider
+from metrics_routes import register_metrics
 
 # Load environment variables
 load_dotenv()
 
 app = Quart(__name__)
+app.json = FastJSONProvider(app)
 cors(app, allow_origin="*", allow_methods=["GET", "POST", "OPTIONS"])
+register_metrics(app, 'webapp_api')
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# httpx логирует полный URL запроса, а в нём токен бота
+logging.getLogger('httpx').setLevel(logging.WARNING)
 
-# OpenAI configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
-HELPER_ID = os.getenv('HELPER_ID', '')
-SOULSLEEP_ID = os.getenv('SOULSLEEP_ID', '')
-RELATIONSHIPS_ID = os.getenv('RELATIONSHIPS_ID', '')
-MONEY_ID = os.getenv('MONEY_ID', '')
-CONFIDENCE_ID = os.getenv('CONFIDENCE_ID', '')
-FEARS_ID = os.getenv('FEARS_ID', '')
-
-client = AsyncOpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
-
-# Database configuration (same as bot)
-POSTGRES_USER = os.getenv('POSTGRES_USER', 'postgres')
 POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', '')
-POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
-POSTGRES_PORT = int(os.getenv('POSTGRES_PORT', '5432'))
-POSTGRES_DB = os.getenv('POSTGRES_DB', 'soul_bot')
-
-
-def _build_engine(database_name: str) -> AsyncEngine:
-    return create_async_engine(
-        URL(
-            drivername='postgresql+asyncpg',
-            username=POSTGRES_USER,
-            password=POSTGRES_PASSWORD,
-            host=POSTGRES_HOST,
-            port=POSTGRES_PORT,
-            database=database_name,
-            query={},
-        ),
-        future=True,
-        pool_size=10,
-        max_overflow=5,
-        pool_pre_ping=True,
-        pool_recycle=3600,
+
+# Same model as the v2 API (webapp_api/app_v2.py)
+CHAT_MODEL = 'gpt-4o-mini'
+# Assistant types known to the ChatCompletion pipeline; anything else falls back to helper
+ASSISTANT_TYPES = ('helper', 'sleeper', 'relationships', 'money', 'confidence', 'fears')
+
+
+# ==========================================
+# Legacy Assistants API threads
+# ==========================================
+# Раньше WebApp вёл диалог в OpenAI threads (users.*_thread_id). Теперь ответы
+# идут через ChatCompletion с историей в conversation_history. Чтобы у старых
+# пользователей не потерялся контекст, при первом сообщении переносим хвост
+# их thread в историю и обнуляем *_thread_id — дальше один вызов модели.
+LEGACY_THREAD_COLUMNS = {
+    'helper': 'helper_thread_id',
+    'sleeper': 'sleeper_thread_id',
+}
+LEGACY_THREAD_DEFAULT_COLUMN = 'assistant_thread_id'
+# relationships / money / confidence / fears писали в один общий assistant_thread_id.
+# Разделить его по темам нельзя, поэтому он переносится один раз и всегда в эту историю
+LEGACY_SHARED_THREAD_TYPE = 'relationships'
+LEGACY_THREAD_IMPORT_LIMIT = 20
+# SQLSTATE undefined_column: колонки *_thread_id удалены миграцией 003
+UNDEFINED_COLUMN_SQLSTATE = '42703'
+
+# False, когда колонок *_thread_id уже нет в схеме (другие ошибки БД не выключают перенос)
+_legacy_threads_enabled = True
+# Один перенос на (user, колонку) в процессе; lock живёт, пока его кто-то держит
+_legacy_import_locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+
+def _legacy_thread_target(assistant_type: str) -> tuple[str, str]:
+    """(колонка users, тип истории, в которую переносится thread)"""
+    column = LEGACY_THREAD_COLUMNS.get(assistant_type)
+    if column:
+        return column, assistant_type
+    return LEGACY_THREAD_DEFAULT_COLUMN, LEGACY_SHARED_THREAD_TYPE
+
+
+def _is_undefined_column(error: DBAPIError) -> bool:
+    orig = error.orig
+    return (
+        getattr(orig, 'sqlstate', None) == UNDEFINED_COLUMN_SQLSTATE
+        or isinstance(getattr(orig, '__cause__', None), UndefinedColumnError)
     )
 
 
-_engine: AsyncEngine = _build_engine(POSTGRES_DB)
-_session_factory = async_sessionmaker(_engine, expire_on_commit=False, class_=AsyncSession)
-
-
-class DatabaseManager:
-    """Self-healing database engine for the Quart API."""
-
-    def __init__(self, engine_obj: AsyncEngine, session_factory: async_sessionmaker) -> None:
-        self._engine = engine_obj
-        self._session_factory = session_factory
-        self._lock = asyncio.Lock()
-
-    @property
-    def engine(self) -> AsyncEngine:
-        return self._engine
-
-    async def ensure_ready(self) -> None:
-        async with self._lock:
-            retries = 0
-            while True:
-                try:
-                    async with self._engine.connect() as conn:
-                        await conn.execute(text('SELECT 1'))
-                    return
-                except InvalidCatalogNameError:
-                    logger.warning("WebApp DB '%s' missing, creating...", POSTGRES_DB)
-                    await self._create_database()
-                    await self._reset_engine()
-                except OperationalError as exc:
-                    if not self._is_missing_database(exc):
-                        raise
-                    logger.warning("WebApp DB '%s' missing (OperationalError), creating...", POSTGRES_DB)
-                    await self._create_database()
-                    await self._reset_engine()
-
-                retries += 1
-                if retries > 3:
-                    raise RuntimeError(f"Unable to prepare database '{POSTGRES_DB}' for WebApp")
-
-    def _is_missing_database(self, exc: OperationalError) -> bool:
-        origin = getattr(exc, 'orig', None)
-        if isinstance(origin, InvalidCatalogNameError):
-            return True
-        message = str(exc).lower()
-        return POSTGRES_DB.lower() in message and 'does not exist' in message
-
-    async def _create_database(self) -> None:
-        admin_engine = _build_engine('postgres')
-        try:
-            async with admin_engine.begin() as conn:
-                await conn.execute(text(f'CREATE DATABASE "{POSTGRES_DB}"'))
-                logger.info("Created WebApp database '%s'", POSTGRES_DB)
-        except DuplicateDatabaseError:
-            logger.info("WebApp database '%s' already exists", POSTGRES_DB)
-        finally:
-            await admin_engine.dispose()
-
-    async def _reset_engine(self) -> None:
-        global _engine, _session_factory
-
-        await self._engine.dispose()
-        self._engine = _build_engine(POSTGRES_DB)
-        self._session_factory = async_sessionmaker(self._engine, expire_on_commit=False, class_=AsyncSession)
-        _engine = self._engine
-        _session_factory = self._session_factory
-
-    @asynccontextmanager
-    async def _session_context(self):
-        await self.ensure_ready()
-        async with self._session_factory() as session:
-            yield session
-
-    @asynccontextmanager
-    async def _begin_context(self):
-        await self.ensure_ready()
-        async with self._session_factory().begin() as session:
-            yield session
-
-    def __call__(self):
-        return self._session_context()
-
-    def begin(self):
-        return self._begin_context()
-
-
-AsyncSessionLocal = DatabaseManager(_engine, _session_factory)
-
-# Database models (copy from bot, read-only)
-class Base(DeclarativeBase):
-    pass
-
-class User(Base):
-    __tablename__ = 'users'
-
-    user_id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str] = mapped_column(VARCHAR(length=64))
-    username: Mapped[str] = mapped_column(VARCHAR(length=32), nullable=True)
-    ref: Mapped[str] = mapped_column(VARCHAR(length=32), nullable=True)
-
-    helper_thread_id: Mapped[str] = mapped_column(VARCHAR(length=32), nullable=True)
-    assistant_thread_id: Mapped[str] = mapped_column(VARCHAR(length=32), nullable=True)
-    sleeper_thread_id: Mapped[str] = mapped_column(VARCHAR(length=32), nullable=True)
-
-    reg_date: Mapped[DateTime] = mapped_column(DateTime, default=dt.now())
-    active_date: Mapped[DateTime] = mapped_column(DateTime, default=dt.now())
-    sub_date: Mapped[DateTime] = mapped_column(DateTime)
-    block_date: Mapped[DateTime] = mapped_column(DateTime, nullable=True)
-
-    helper_requests: Mapped[int] = mapped_column(Integer, default=10)
-    assistant_requests: Mapped[int] = mapped_column(Integer, default=12)
-    sleeper_requests: Mapped[int] = mapped_column(Integer, default=3)
-
-    real_name: Mapped[str] = mapped_column(VARCHAR(length=32), nullable=True)
-    age: Mapped[int] = mapped_column(Integer, nullable=True)
-    gender: Mapped[bool] = mapped_column(Boolean, nullable=True)
-
-class MediaCategory(Base):
-    __tablename__ = 'media_categories'
-
-    id: Mapped[int] = mapped_column(primary_key=True)
-    position: Mapped[int] = mapped_column(Integer)
-    name: Mapped[str] = mapped_column(VARCHAR(length=32))
-    text: Mapped[str] = mapped_column(VARCHAR(length=2048))
-    category: Mapped[str] = mapped_column(VARCHAR(length=32))
-    media_type: Mapped[str] = mapped_column(VARCHAR(length=8), nullable=True)
-    media_id: Mapped[str] = mapped_column(VARCHAR(length=128), nullable=True)
-    destination: Mapped[str] = mapped_column(VARCHAR(length=128), nullable=True)
-
-class Media(Base):
-    __tablename__ = 'medias'
-
-    id: Mapped[int] = mapped_column(primary_key=True)
-    category_id: Mapped[int] = mapped_column(Integer)
-    position: Mapped[int] = mapped_column(Integer)
-    name: Mapped[str] = mapped_column(VARCHAR(length=64))
-    text: Mapped[str] = mapped_column(VARCHAR(length=2048), nullable=True)
-    media_type: Mapped[str] = mapped_column(VARCHAR(length=8), nullable=True)
-    media_id: Mapped[str] = mapped_column(VARCHAR(length=128), nullable=True)
-    destination: Mapped[str] = mapped_column(VARCHAR(length=128), nullable=True)
-    file_url: Mapped[Optional[str]] = mapped_column(TEXT(), nullable=True)
-
-# Helper functions (copied from bot's ChatGPT.py)
-async def get_user_from_db(user_id: int):
-    """Get user from database"""
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(User).where(User.user_id == user_id))
-        return result.scalar_one_or_none()
-
-async def update_user_thread(user_id: int, thread_id: str, assistant_type: str):
-    """Update user thread ID in database"""
-    async with AsyncSessionLocal() as session:
-        if assistant_type == 'helper':
-            stmt = update(User).where(User.user_id == user_id).values(helper_thread_id=thread_id)
-        elif assistant_type == 'sleeper':
-            stmt = update(User).where(User.user_id == user_id).values(sleeper_thread_id=thread_id)
-        else:  # analysis assistants
-            stmt = update(User).where(User.user_id == user_id).values(assistant_thread_id=thread_id)
-
-        await session.execute(stmt)
-        await session.commit()
+async def _get_legacy_thread_id(user_id: int, column: str) -> Optional[str]:
+    """Read the user's legacy thread id (None if the legacy columns are gone)"""
+    global _legacy_threads_enabled
 
-async def get_assistant_response(user_id: int, prompt: str, assistant_type: str) -> str | None:
-    """
-    Get response from OpenAI Assistant
-    Copied logic from soul_bot/bot/functions/ChatGPT.py
-    """
-    if not client:
-        logger.error("OpenAI client not initialized")
+    try:
+        async with db() as session:
+            result = await session.execute(
+                text(f'SELECT {column} FROM users WHERE user_id = :user_id'),
+                {'user_id': user_id}
+            )
+            return result.scalar_one_or_none()
+    except DBAPIError as e:
+        if not _is_undefined_column(e):
+            raise
+        _legacy_threads_enabled = False
+        logger.info(f"Legacy thread migration disabled: column {column} does not exist")
         return None
 
-    user = await get_user_from_db(user_id)
 
-    # Map assistant type to assistant ID
-    assistant_ids = {
-        'helper': HELPER_ID,
-        'sleeper': SOULSLEEP_ID,
-        'relationships': RELATIONSHIPS_ID,
-        'money': MONEY_ID,
-        'confidence': CONFIDENCE_ID,
-        'fears': FEARS_ID
-    }
+async def _clear_legacy_thread_id(user_id: int, column: str, thread_id: Optional[str] = None) -> None:
+    """Clear the thread id (with thread_id: only if it was not replaced meanwhile)"""
+    global _legacy_threads_enabled
 
-    assistant_id = assistant_ids.get(assistant_type, HELPER_ID)
+    condition = f' AND {column} = :thread_id' if thread_id else ''
+    try:
+        async with db.begin() as session:
+            await session.execute(
+                text(f'UPDATE users SET {column} = NULL WHERE user_id = :user_id{condition}'),
+                {'user_id': user_id, 'thread_id': thread_id}
+            )
+    except DBAPIError as e:
+        if not _is_undefined_column(e):
+            raise
+        _legacy_threads_enabled = False
 
-    if not assistant_id:
-        logger.error(f"Assistant ID not found for type: {assistant_type}")
-        return None
 
-    # Get or create thread
-    thread_id = None
-    if user:
-        if assistant_type == 'helper':
-            thread_id = user.helper_thread_id
-        elif assistant_type == 'sleeper':
-            thread_id = user.sleeper_thread_id
-        else:
-            thread_id = user.assistant_thread_id
-
-    # Create new thread if needed
-    if not thread_id:
-        thread = await client.beta.threads.create()
-        thread_id = thread.id
-        await update_user_thread(user_id, thread_id, assistant_type)
-        logger.info(f"Created new thread {thread_id} for user {user_id}, type {assistant_type}")
-
-    # Add message to thread
-    await client.beta.threads.messages.create(
-        thread_id=thread_id,
-        role="user",
-        content=[{"type": "text", "text": prompt}]
-    )
+async def _import_legacy_thread(user_id: int, assistant_type: str) -> None:
+    """Copy the tail of a legacy OpenAI thread into conversation_history (once per user/thread)"""
+    if not _legacy_threads_enabled:
+        return
 
-    try:
-        # Run assistant
-        run = await client.beta.threads.runs.create_and_poll(
+    column, history_type = _legacy_thread_target(assistant_type)
+    lock = _legacy_import_locks.get((user_id, column))
+    if lock is None:
+        lock = _legacy_import_locks[(user_id, column)] = asyncio.Lock()
+
+    async with lock:
+        if await conversation_history.count_messages(user_id, history_type):
+            return
+
+        thread_id = await _get_legacy_thread_id(user_id, column)
+        if not thread_id:
+            return
+
+        # Ошибка OpenAI пробрасывается: thread id остаётся, перенос повторится
+        page = await client.beta.threads.messages.list(
             thread_id=thread_id,
-            assistant_id=assistant_id,
-            model='gpt-4-turbo-preview'
+            order='desc',
+            limit=LEGACY_THREAD_IMPORT_LIMIT
         )
 
-        # Handle failed runs
-        max_attempts = 5
-        attempt = 0
-        while run.status != 'completed' and attempt < max_attempts:
-            if run.status == 'failed':
-                await client.beta.threads.messages.create(
-                    thread_id=thread_id,
-                    role="user",
-                    content=[{"type": "text", "text": prompt}]
-                )
-                run = await client.beta.threads.runs.create(
-                    thread_id=thread_id,
-                    assistant_id=assistant_id,
-                    model='gpt-4-turbo-preview'
-                )
-                attempt += 1
-                if attempt >= max_attempts:
-                    logger.error(f"Max attempts reached for user {user_id}")
-                    return None
+        for message in reversed(page.data):
+            content = ''.join(
+                part.text.value for part in message.content if getattr(part, 'type', None) == 'text'
+            ).strip()
+            if not content or message.role not in ('user', 'assistant'):
                 continue
+            await conversation_history.add_message(
+                user_id=user_id,
+                assistant_type=history_type,
+                role=message.role,
+                content=content,
+                extra_metadata={'legacy_thread_id': thread_id}
+            )
 
-            run = await client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
-
-        if run.status != 'completed':
-            logger.error(f"Run not completed for user {user_id}: {run.status}")
-            return None
+        await _clear_legacy_thread_id(user_id, column, thread_id)
+        logger.info(f"Imported legacy thread {thread_id} for user {user_id}, type {history_type}")
 
-        # Get messages
-        messages = await client.beta.threads.messages.list(thread_id=thread_id)
-        assistant_messages = [msg for msg in messages.data if msg.role == 'assistant']
 
-        if not assistant_messages:
-            logger.error(f"No assistant messages for user {user_id}")
-            return None
+async def get_assistant_response(user_id: int, prompt: str, assistant_type: str) -> str | None:
+    """
+    Get response through the bot's ChatCompletion pipeline
+    (personalization, history, pattern analysis — same as in Telegram)
+    """
+    if assistant_type not in ASSISTANT_TYPES:
+        assistant_type = 'helper'
 
-        last_message = assistant_messages[0]
-        response_text = last_message.content[0].text.value if isinstance(last_message.content, list) else ""
+    try:
+        await _import_legacy_thread(user_id, assistant_type)
+    except Exception as e:
+        logger.warning(f"Legacy thread import failed for user {user_id}: {e}")
 
-        # Clean response (like in bot)
-        response_text = response_text.replace('*', '').replace('#', '').strip()
+    response_text = await get_chat_completion(
+        user_id=user_id,
+        message=prompt,
+        assistant_type=assistant_type,
+        model=CHAT_MODEL
+    )
+    if response_text is None:
+        return None
 
-        logger.info(f"Response generated for user {user_id}, length: {len(response_text)}")
-        return response_text
+    # Clean response (like in bot)
+    response_text = response_text.replace('*', '').replace('#', '').strip()
 
-    except Exception as e:
-        logger.error(f"Error in get_assistant_response: {e}", exc_info=True)
-        return None
+    logger.info(f"Response generated for user {user_id}, length: {len(response_text)}")
+    return response_text
 
 # Routes for serving webapp files
+WEBAPP_DIR = os.getenv('WEBAPP_DIR', '/home/soulnear_webapp')
+static_assets = StaticAssets(WEBAPP_DIR)
+
+
+@app.before_serving
+async def load_static_assets():
+    await static_assets.start()
+
+
+@app.after_serving
+async def stop_static_assets():
+    await static_assets.stop()
+
+
+async def _serve_asset(path: str, not_found: str):
+    response = await static_assets.serve(path)
+    if response is None:
+        return not_found, 404
+    return response
+
+
 @app.route('/')
 async def index():
     """Serve the main webapp page"""
-    try:
-        with open('/home/soulnear_webapp/index.html', 'r', encoding='utf-8') as f:
-            return f.read(), 200, {'Content-Type': 'text/html; charset=utf-8'}
-    except FileNotFoundError:
-        return 'WebApp not found', 404
+    return await _serve_asset('index.html', 'WebApp not found')
 
 @app.route('/styles.css')
 async def styles():
     """Serve CSS styles"""
-    try:
-        with open('/home/soulnear_webapp/styles.css', 'r', encoding='utf-8') as f:
-            return f.read(), 200, {'Content-Type': 'text/css; charset=utf-8'}
-    except FileNotFoundError:
-        return 'CSS not found', 404
+    return await _serve_asset('styles.css', 'CSS not found')
 
 @app.route('/app.js')
 async def webapp_js():
     """Serve JavaScript file"""
-    try:
-        with open('/home/soulnear_webapp/app.js', 'r', encoding='utf-8') as f:
-            return f.read(), 200, {'Content-Type': 'application/javascript; charset=utf-8'}
-    except FileNotFoundError:
-        return 'JavaScript not found', 404
+    return await _serve_asset('app.js', 'JavaScript not found')
 
 @app.route('/<path:filename>')
 async def serve_static(filename):
     """Serve static files (images, etc.)"""
-    try:
-        file_path = f'/home/soulnear_webapp/{filename}'
-        with open(file_path, 'rb') as f:
-            content = f.read()
-
-        # Determine content type
-        if filename.endswith('.png'):
-            content_type = 'image/png'
-        elif filename.endswith(('.jpg', '.jpeg')):
-            content_type = 'image/jpeg'
-        elif filename.endswith('.svg'):
-            content_type = 'image/svg+xml'
-        else:
-            content_type = 'application/octet-stream'
-
-        return content, 200, {'Content-Type': content_type}
-    except FileNotFoundError:
-        return 'File not found', 404
+    return await _serve_asset(filename, 'File not found')
 
 # API endpoints
 @app.route('/api/chat', methods=['POST', 'OPTIONS'])
@@ -421,7 +280,7 @@ async def chat():
 
 @app.route('/api/reset', methods=['POST', 'OPTIONS'])
 async def reset_context():
-    """Reset chat context (create new thread)"""
+    """Reset chat context (clear conversation history)"""
     if request.method == 'OPTIONS':
         return '', 204
 
@@ -433,12 +292,15 @@ async def reset_context():
         if not user_id:
             return jsonify({'error': 'user_id required'}), 400
 
-        # Create new thread
-        thread = await client.beta.threads.create()
-        thread_id = thread.id
+        if assistant_type not in ASSISTANT_TYPES:
+            assistant_type = 'helper'
 
-        # Update in database
-        await update_user_thread(user_id, thread_id, assistant_type)
+        # Контекст ChatCompletion — это история сообщений; legacy thread тоже забываем
+        await conversation_history.clear_history(user_id=user_id, assistant_type=assistant_type)
+        column, history_type = _legacy_thread_target(assistant_type)
+        # Общий thread тем переносится в свою историю — сбрасываем его только вместе с ней
+        if _legacy_threads_enabled and history_type == assistant_type:
+            await _clear_legacy_thread_id(user_id, column)
 
         logger.info(f"Reset context for user {user_id}, type {assistant_type}")
 
@@ -480,83 +342,166 @@ async def get_practices():
         return '', 204
 
     try:
-        async with AsyncSessionLocal() as session:
-            # Get all media categories
-            categories_result = await session.execute(
-                select(MediaCategory).order_by(MediaCategory.position)
-            )
-            categories = categories_result.scalars().all()
-
-            logger.info(f"Found {len(categories)} categories")
+        catalog = await media_catalog.get()
 
-            # Get all media items
-            media_result = await session.execute(
-                select(Media).order_by(Media.category_id, Media.position)
-            )
-            media_items = media_result.scalars().all()
+        # Organize data by category type
+        practices_data = {
+            'practices': [],  # Медитации
+            'videos': [],     # Йога и видео
+            'music': []       # Ханг музыка
+        }
 
-            logger.info(f"Found {len(media_items)} media items")
+        for category in catalog.categories:
+            if category.category not in ('practices', 'videos'):
+                continue
 
-            # Organize data by category type
-            practices_data = {
-                'practices': [],  # Медитации
-                'videos': [],     # Йога и видео
-                'music': []       # Ханг музыка
+            category_data = {
+                'id': category.id,
+                'name': category.name,
+                'text': category.text,
+                'category': category.category,
+                'media_type': category.media_type,
+                'media_id': category.media_id,
+                'items': []
             }
 
-            # Group by category
-            for category in categories:
-                logger.info(f"Processing category: {category.name} ({category.category})")
-                category_media = [m for m in media_items if m.category_id == category.id]
-
-                category_data = {
-                    'id': category.id,
-                    'name': category.name,
-                    'text': category.text,
-                    'category': category.category,
-                    'media_type': category.media_type,
-                    'media_id': category.media_id,
-                    'items': []
+            for media in category.medias:
+                media_dict = {
+                    'id': media.id,
+                    'name': media.name,
+                    'text': media.text,
+                    'media_type': media.media_type,
+                    'media_id': media.media_id,
+                    'position': media.position
                 }
+                # Add file_url if available (from S3)
+                if media.file_url:
+                    media_dict['url'] = media.file_url
+                category_data['items'].append(media_dict)
+
+            # Add to appropriate section
+            practices_data[category.category].append(category_data)
+
+        # Add Hang music
+        for track in HANG_MUSIC:
+            practices_data['music'].append({
+                'name': track['name'],
+                'url': track['url'],
+                'duration': track['duration'],
+                'media_type': 'audio'
+            })
 
-                for media in category_media:
-                    media_dict = {
-                        'id': media.id,
-                        'name': media.name,
-                        'text': media.text,
-                        'media_type': media.media_type,
-                        'media_id': media.media_id,
-                        'position': media.position
-                    }
-                    # Add file_url if available (from S3)
-                    if hasattr(media, 'file_url') and media.file_url:
-                        media_dict['url'] = media.file_url
-                    category_data['items'].append(media_dict)
-
-                # Add to appropriate section
-                if category.category == 'practices':
-                    practices_data['practices'].append(category_data)
-                elif category.category == 'videos':
-                    practices_data['videos'].append(category_data)
-
-            # Add Hang music
-            for track in HANG_MUSIC:
-                practices_data['music'].append({
-                    'name': track['name'],
-                    'url': track['url'],
-                    'duration': track['duration'],
-                    'media_type': 'audio'
-                })
-
-            return jsonify({
-                'status': 'success',
-                'data': practices_data
-            }), 200
+        return jsonify({
+            'status': 'success',
+            'data': practices_data
+        }), 200
 
     except Exception as e:
         logger.error(f"Error in get_practices: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+# ==========================================
+# Telegram files: file_id → file_path (cached) + streaming proxy
+# ==========================================
+TELEGRAM_API_URL = 'https://api.telegram.org'
+# Telegram гарантирует, что file_path живёт минимум час — берём с запасом
+TELEGRAM_FILE_PATH_TTL = 50 * 60
+TELEGRAM_FILE_CACHE_MAX_SIZE = 4096
+# Тело отдаём как есть (aiter_raw), поэтому Content-Length/Content-Range
+# и Content-Encoding апстрима остаются верными для клиента
+PROXY_PASSTHROUGH_HEADERS = (
+    'Content-Type', 'Content-Length', 'Content-Encoding', 'Content-Range', 'Accept-Ranges',
+    'Last-Modified', 'ETag',
+)
+
+_telegram_http: Optional[httpx.AsyncClient] = None
+
+
+def get_telegram_http() -> httpx.AsyncClient:
+    """Shared pooled HTTP client for Telegram Bot API (keep-alive between requests)"""
+    global _telegram_http
+    if _telegram_http is None or _telegram_http.is_closed:
+        _telegram_http = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0, read=60.0),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return _telegram_http
+
+
+class TelegramFileResolver:
+    """TTL cache for getFile with request coalescing.
+
+    Concurrent lookups of the same file_id share one in-flight getFile call.
+    """
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self._ttl = ttl
+        self._max_size = max_size
+        self._cache: dict[str, tuple[str, float]] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def get_file_path(self, bot_token: str, file_id: str) -> Optional[str]:
+        cached = self._cache.get(file_id)
+        hit = bool(cached) and cached[1] > time.monotonic()
+        metrics.cache_lookup('telegram_file_path', hit=hit)
+        if hit:
+            return cached[0]
+
+        task = self._inflight.get(file_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(bot_token, file_id))
+            self._inflight[file_id] = task
+            task.add_done_callback(lambda _task, key=file_id: self._inflight.pop(key, None))
+
+        # shield: отмена одного клиента не отменяет общий запрос для остальных
+        return await asyncio.shield(task)
+
+    def invalidate(self, file_id: str) -> None:
+        self._cache.pop(file_id, None)
+
+    async def _fetch(self, bot_token: str, file_id: str) -> Optional[str]:
+        response = await get_telegram_http().get(
+            f'{TELEGRAM_API_URL}/bot{bot_token}/getFile',
+            params={'file_id': file_id}
+        )
+        data = response.json()
+
+        if not (data.get('ok') and data.get('result')):
+            logger.error(f"Failed to get file info: {data}")
+            return None
+
+        file_path = data['result']['file_path']
+        self._store(file_id, file_path)
+        return file_path
+
+    def _store(self, file_id: str, file_path: str) -> None:
+        now = time.monotonic()
+        if len(self._cache) >= self._max_size:
+            self._cache = {key: value for key, value in self._cache.items() if value[1] > now}
+            if len(self._cache) >= self._max_size:
+                self._cache.pop(next(iter(self._cache)))
+        self._cache[file_id] = (file_path, now + self._ttl)
+
+
+telegram_files = TelegramFileResolver(TELEGRAM_FILE_PATH_TTL, TELEGRAM_FILE_CACHE_MAX_SIZE)
+
+
+async def _open_telegram_file(bot_token: str, file_path: str, headers: dict) -> httpx.Response:
+    http = get_telegram_http()
+    upstream_request = http.build_request(
+        'GET',
+        f'{TELEGRAM_API_URL}/file/bot{bot_token}/{file_path}',
+        headers=headers,
+    )
+    return await http.send(upstream_request, stream=True)
+
+
+@app.after_serving
+async def close_telegram_http():
+    if _telegram_http is not None:
+        await _telegram_http.aclose()
+
+
 @app.route('/api/audio/<file_id>', methods=['GET', 'OPTIONS'])
 async def get_audio_url(file_id):
     """Get audio file URL from Telegram file_id"""
@@ -564,38 +509,83 @@ async def get_audio_url(file_id):
         return '', 204
 
     try:
-        import httpx
-
         # Получаем информацию о файле от Telegram Bot API
         bot_token = os.getenv('BOT_TOKEN', '')
         if not bot_token:
             return jsonify({'status': 'error', 'error': 'Bot token not configured'}), 500
 
-        async with httpx.AsyncClient() as client:
-            # Получаем file_path
-            response = await client.get(
-                f'https://api.telegram.org/bot{bot_token}/getFile',
-                params={'file_id': file_id}
-            )
-            data = response.json()
+        file_path = await telegram_files.get_file_path(bot_token, file_id)
+        if not file_path:
+            return jsonify({'status': 'error', 'error': 'File not found'}), 404
+
+        # Формируем прямую ссылку на файл
+        file_url = f'{TELEGRAM_API_URL}/file/bot{bot_token}/{file_path}'
+
+        return jsonify({
+            'status': 'success',
+            'url': file_url,
+            'stream_url': f'/api/audio/{file_id}/stream'
+        }), 200
 
-            if data.get('ok') and data.get('result'):
-                file_path = data['result']['file_path']
-                # Формируем прямую ссылку на файл
-                file_url = f'https://api.telegram.org/file/bot{bot_token}/{file_path}'
+    except Exception as e:
+        logger.error(f"Error getting audio URL: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'error': str(e)}), 500
 
-                logger.info(f"Got audio URL for {file_id}: {file_url}")
 
-                return jsonify({
-                    'status': 'success',
-                    'url': file_url
-                }), 200
-            else:
-                logger.error(f"Failed to get file info: {data}")
+@app.route('/api/audio/<file_id>/stream', methods=['GET', 'OPTIONS'])
+async def stream_audio(file_id):
+    """Stream Telegram file bytes through the API (Range passthrough, token stays server-side)"""
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        bot_token = os.getenv('BOT_TOKEN', '')
+        if not bot_token:
+            return jsonify({'status': 'error', 'error': 'Bot token not configured'}), 500
+
+        file_path = await telegram_files.get_file_path(bot_token, file_id)
+        if not file_path:
+            return jsonify({'status': 'error', 'error': 'File not found'}), 404
+
+        upstream_headers = {}
+        if 'Range' in request.headers:
+            upstream_headers['Range'] = request.headers['Range']
+
+        upstream = await _open_telegram_file(bot_token, file_path, upstream_headers)
+
+        if upstream.status_code == 404:
+            # file_path протух раньше TTL — резолвим заново один раз
+            await upstream.aclose()
+            telegram_files.invalidate(file_id)
+            file_path = await telegram_files.get_file_path(bot_token, file_id)
+            if not file_path:
                 return jsonify({'status': 'error', 'error': 'File not found'}), 404
+            upstream = await _open_telegram_file(bot_token, file_path, upstream_headers)
+
+        if upstream.status_code not in (200, 206):
+            logger.error(f"Telegram file download failed for {file_id}: HTTP {upstream.status_code}")
+            await upstream.aclose()
+            return jsonify({'status': 'error', 'error': 'Upstream error'}), 502
+
+        headers = {
+            name: upstream.headers[name]
+            for name in PROXY_PASSTHROUGH_HEADERS
+            if name in upstream.headers
+        }
+        headers.setdefault('Accept-Ranges', 'bytes')
+        headers['Cache-Control'] = 'private, max-age=3600'
+
+        async def body():
+            try:
+                async for chunk in upstream.aiter_raw():
+                    yield chunk
+            finally:
+                await upstream.aclose()
+
+        return Response(body(), status=upstream.status_code, headers=headers)
 
     except Exception as e:
-        logger.error(f"Error getting audio URL: {e}", exc_info=True)
+        logger.error(f"Error streaming audio {file_id}: {e}", exc_info=True)
         return jsonify({'status': 'error', 'error': str(e)}), 500
 
 @app.route('/health')
@@ -604,7 +594,7 @@ async def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'openai_configured': client is not None,
+        'openai_configured': bool(OPENAI_API_KEY),
         'database_configured': POSTGRES_PASSWORD != ''
     }), 200
 
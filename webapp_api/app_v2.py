@@ -11,7 +11,8 @@ Key features:
 - Mood tracking
 - Quiz integration
 """
-from quart import Quart, request, jsonify
+from quart import Quart, Response, request, jsonify
+import hashlib
 import os
 import sys
 import logging
@@ -26,11 +27,14 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'soul_bot'))
 from database.database import db as database_manager
 from database.repository import conversation_history, user_profile
 import database.repository.user as db_user
-import database.repository.media as db_media
-import database.repository.media_category as db_media_category
+from database.media_catalog import media_catalog
+from utils import json_codec
 
 # Import OpenAI service from soul_bot
-from bot.services.openai_service import get_chat_completion
+from bot.services.openai_service import get_chat_completion, stream_chat_completion
+
+from json_provider import FastJSONProvider
+from metrics_routes import register_metrics
 
 # Load environment variables
 load_dotenv()
@@ -46,6 +50,8 @@ def patched_init(self, *args, **kwargs):
 flask.config.Config.__init__ = patched_init
 
 app = Quart(__name__)
+app.json = FastJSONProvider(app)
+register_metrics(app, 'webapp_api_v2')
 
 # CORS headers for all responses
 @app.after_request
@@ -132,30 +138,129 @@ async def chat():
         return jsonify({'error': str(e)}), 500
 
 
+def _sse_event(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode('utf-8') + b"\ndata: " + json_codec.dumps_bytes(data) + b"\n\n"
+
+
+@app.route('/chat/stream', methods=['POST'])
+async def chat_stream():
+    """
+    Same as /chat, but streams the answer as Server-Sent Events
+
+    Events:
+    - delta: {"content": "..."} — next chunk of the model output
+    - done: {"response": "...", "assistant_type": "..."} — final text
+      (personalized and formatted, as saved to history); replaces the deltas
+    - error: {"error": "..."}
+    """
+    # Ошибки тела запроса отдаём как 400 до начала стрима, а не 500 из Quart
+    data = await request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'JSON object body is required'}), 400
+    user_id = data.get('user_id')
+    message = data.get('message')
+    assistant_type = data.get('assistant_type', 'helper')
+
+    if not user_id or not message:
+        return jsonify({'error': 'user_id and message are required'}), 400
+    if not isinstance(message, str) or not isinstance(assistant_type, str):
+        return jsonify({'error': 'message and assistant_type must be strings'}), 400
+
+    async def generate():
+        async for event in stream_chat_completion(
+            user_id=user_id,
+            message=message,
+            assistant_type=assistant_type,
+            model="gpt-4o-mini",
+            max_history_messages=10,
+            temperature=0.7
+        ):
+            if event['type'] == 'delta':
+                yield _sse_event('delta', {'content': event['content']})
+            elif event['type'] == 'done':
+                yield _sse_event('done', {
+                    'response': event['response'],
+                    'assistant_type': assistant_type
+                })
+            else:
+                yield _sse_event('error', {'error': 'Failed to get AI response'})
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Отключаем буферизацию в nginx, иначе токены придут одним куском
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.timeout = None
+    return response
+
+
+HISTORY_PAGE_MAX_SIZE = 200
+
+
+def _message_dto(message) -> dict:
+    """Компактное представление сообщения для фронтенда"""
+    return {
+        'id': message.id,
+        'role': message.role,
+        'content': message.content,
+        'timestamp': message.timestamp.isoformat() if message.timestamp else None
+    }
+
+
+def _optional_int(value: Optional[str]) -> Optional[int]:
+    return int(value) if value not in (None, '') else None
+
+
 @app.route('/chat/history/<int:user_id>', methods=['GET'])
 async def get_chat_history(user_id: int):
     """
-    Get chat history for user
-    Supports filtering by assistant_type and thread_id
+    Get chat history for user (cursor-based)
+
+    Query params:
+    - assistant_type: default 'helper'
+    - limit: page size (max HISTORY_PAGE_MAX_SIZE)
+    - before: message id — return messages older than it
+    - after: message id — return messages newer than it
+
+    Without a cursor returns the latest page. Messages are ordered
+    old → new; use data.next_before to load the previous page.
+    The old offset param is rejected with 400 instead of being ignored.
     """
+    if 'offset' in request.args:
+        return jsonify({'error': 'offset is not supported, use before=<data.next_before>'}), 400
+
     try:
         assistant_type = request.args.get('assistant_type', 'helper')
-        limit = int(request.args.get('limit', 50))
-        offset = int(request.args.get('offset', 0))
+        limit = min(max(int(request.args.get('limit', 50)), 1), HISTORY_PAGE_MAX_SIZE)
+        before_id = _optional_int(request.args.get('before'))
+        after_id = _optional_int(request.args.get('after'))
+    except ValueError:
+        return jsonify({'error': 'limit, before and after must be integers'}), 400
 
-        # Get history from conversation_history table
-        messages = await conversation_history.get_history(
-            user_id=user_id,
-            assistant_type=assistant_type,
-            limit=limit,
-            offset=offset
+    try:
+        # Берём на одно сообщение больше, чтобы узнать, есть ли ещё страница
+        messages, total = await asyncio.gather(
+            conversation_history.get_history_page(
+                user_id=user_id,
+                assistant_type=assistant_type,
+                limit=limit + 1,
+                before_id=before_id,
+                after_id=after_id
+            ),
+            conversation_history.count_messages(user_id, assistant_type)
         )
 
+        has_more = len(messages) > limit
+        if has_more:
+            messages = messages[:limit] if after_id is not None else messages[1:]
+
         return jsonify({
             'status': 'success',
             'data': {
-                'messages': messages,
-                'total': len(messages)
+                'messages': [_message_dto(message) for message in messages],
+                'total': total,
+                'has_more': has_more,
+                'next_before': messages[0].id if messages else None,
+                'next_after': messages[-1].id if messages else None
             }
         })
 
@@ -164,6 +269,33 @@ async def get_chat_history(user_id: int):
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/chat/history/<int:user_id>/export', methods=['GET'])
+async def export_chat_history(user_id: int):
+    """
+    Export full conversation as NDJSON (one message per line)
+
+    Messages are streamed in batches straight from the database,
+    so the whole history is never held in memory.
+    """
+    assistant_type = request.args.get('assistant_type', 'helper')
+
+    async def generate():
+        try:
+            async for message in conversation_history.iter_history(user_id, assistant_type):
+                yield json_codec.dumps_bytes(_message_dto(message)) + b'\n'
+        except Exception as e:
+            # Заголовки уже отправлены — сообщаем об ошибке последней строкой
+            logger.error(f"Export history error: {e}", exc_info=True)
+            yield json_codec.dumps_bytes({'error': str(e)}) + b'\n'
+
+    response = Response(generate(), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="history_{user_id}_{assistant_type}.ndjson"'
+    )
+    response.timeout = None
+    return response
+
+
 @app.route('/chat/save', methods=['POST'])
 async def save_chat_message():
     """
@@ -262,9 +394,9 @@ async def get_user(user_id: int):
 
 @app.route('/profile/<int:user_id>', methods=['GET'])
 async def get_profile(user_id: int):
-    """Get user profile with patterns, insights, and preferences"""
+    """Get user profile with patterns (without embeddings), insights, and preferences"""
     try:
-        profile = await user_profile.get_or_create(user_id)
+        profile = await user_profile.get_view(user_id)
 
         if not profile:
             return jsonify({'error': 'Profile not found'}), 404
@@ -292,13 +424,13 @@ async def get_profile(user_id: int):
 
 @app.route('/profile/<int:user_id>/patterns', methods=['GET'])
 async def get_patterns(user_id: int):
-    """Get user patterns"""
+    """Get user patterns (without embeddings)"""
     try:
-        profile = await user_profile.get_or_create(user_id)
+        patterns = await user_profile.get_patterns_light(user_id)
 
         return jsonify({
             'status': 'success',
-            'data': profile.patterns
+            'data': {'patterns': patterns}
         })
 
     except Exception as e:
@@ -310,7 +442,7 @@ async def get_patterns(user_id: int):
 async def get_insights(user_id: int):
     """Get user insights"""
     try:
-        profile = await user_profile.get_or_create(user_id)
+        profile = await user_profile.get_view(user_id)
 
         return jsonify({
             'status': 'success',
@@ -326,11 +458,11 @@ async def get_insights(user_id: int):
 async def get_emotional_state(user_id: int):
     """Get user emotional state"""
     try:
-        profile = await user_profile.get_or_create(user_id)
+        emotional_state = await user_profile.get_emotional_state(user_id)
 
         return jsonify({
             'status': 'success',
-            'data': profile.emotional_state
+            'data': emotional_state
         })
 
     except Exception as e:
@@ -342,6 +474,96 @@ async def get_emotional_state(user_id: int):
 # 🧘 PRACTICES ENDPOINTS
 # ==========================================
 
+# Hardcoded hang music tracks (from bot sounds.py)
+# TODO: Move this to database later
+HANG_MUSIC = (
+    {"name": "Macadamia", "media_id": "CQACAgIAAxkBAAIaWme6IHocOTKeWabBMRFMAo30j0RxAAIUcQACMpLRSTh0TJb9ws2pNgQ", "duration": "3:47", "media_type": "audio"},
+    {"name": "New Horizons", "media_id": "CQACAgIAAxkBAAIaXGe6IJtFfe3ZnHnTn72SEbEHtJ_kAAIZcQACMpLRSQm3SlOEcP70NgQ", "duration": "2:21", "media_type": "audio"},
+    {"name": "Sunny Way", "media_id": "CQACAgIAAxkBAAIaXme6ILRQFjmomRTaU3S_LweBO4KcAAIbcQACMpLRScrLXVN5ihmENgQ", "duration": "5:23", "media_type": "audio"},
+    {"name": "Seven Wonders", "media_id": "CQACAgIAAxkBAAIaYGe6IMFSka-PeboFTY749cTdqO1YAAIdcQACMpLRSTfG0XkQqWr5NgQ", "duration": "3:05", "media_type": "audio"},
+    {"name": "The Flow", "media_id": "CQACAgIAAxkBAAIaYme6INjiJa78R71Tgilz1cHoVNE5AAIecQACMpLRSZnku-mQlkNgNgQ", "duration": "5:18", "media_type": "audio"},
+    {"name": "Immersion", "media_id": "CQACAgIAAxkBAAIaZGe6IO62dHDYLfZ6ApYx5JAO5IB6AAIfcQACMpLRSU0Hq8D0hVztNgQ", "duration": "3:46", "media_type": "audio"},
+    {"name": "Spring", "media_id": "CQACAgIAAxkBAAIaZme6IPo_U0KLRwhniaCdH6PHbdq1AAIgcQACMpLRSRyrUTuiVBMDNgQ", "duration": "3:32", "media_type": "audio"},
+    {"name": "Rainbow", "media_id": "CQACAgIAAxkBAAIaaGe6IQkaE72Z22xs5phmwjNnD-OfAAIjcQACMpLRSXmo6_o-tdlNNgQ", "duration": "4:33", "media_type": "audio"},
+    {"name": "Blissful", "media_id": "CQACAgIAAxkBAAIaame6IRhI9YHGUNDzGXdyYXjTlOBfAAIlcQACMpLRSdMBcbkGn_SqNgQ", "duration": "5:14", "media_type": "audio"},
+    {"name": "Ocean Inside", "media_id": "CQACAgIAAxkBAAIabGe6IR--hH94dPduMd_xOVWwW9HiAAImcQACMpLRSUS6P8YcBJJWNgQ", "duration": "2:32", "media_type": "audio"},
+    {"name": "Gravity", "media_id": "CQACAgIAAxkBAAIabme6ITnuagYXIOA-x5dEkW1BqOtxAAIqcQACMpLRSXiK8U0F0yHjNgQ", "duration": "3:06", "media_type": "audio"},
+    {"name": "Cappadocia", "media_id": "CQACAgIAAxkBAAIacGe6IU0FqF8GNMKuUAxzCEFcsCSEAAIucQACMpLRSYay1XS2zvn7NgQ", "duration": "4:06", "media_type": "audio"},
+    {"name": "Reggae", "media_id": "CQACAgIAAxkBAAIacme6IWWKZbY-7FQG6aQ3p0QS2LWiAAIxcQACMpLRSYlpu2L73SnvNgQ", "duration": "3:12", "media_type": "audio"},
+    {"name": "Macadamia Remix", "media_id": "CQACAgIAAxkBAAIadGe6IXuMKffmitJKgPE4YjVuCql9AAI0cQACMpLRSXqbQKD9N4c9NgQ", "duration": "4:31", "media_type": "audio"},
+    {"name": "Sunny Way Remix", "media_id": "CQACAgIAAxkBAAIadme6IYc32RhDe3f-n1eaeYAccwj9AAI2cQACMpLRSXwwwGBfYacZNgQ", "duration": "5:12", "media_type": "audio"},
+    {"name": "Breath of Spring Remix", "media_id": "CQACAgIAAxkBAAIaeGe6IY5EARlEtekD_9KAxuK1iEcGAAI3cQACMpLRSVTbvohBGOngNgQ", "duration": "3:31", "media_type": "audio"},
+    {"name": "Ocean Inside Remix", "media_id": "CQACAgIAAxkBAAIaeme6IaGK7nwa_UEJ3HxRIzkwr_NHAAI6cQACMpLRSXm8c2FvvzFSNgQ", "duration": "5:11", "media_type": "audio"},
+    {"name": "J. Remix", "media_id": "CQACAgIAAxkBAAIafGe6Iax5rwOE8jZe_8IIPcRPoSHrAAI8cQACMpLRSd60kiEAAcn2UTYE", "duration": "3:46", "media_type": "audio"},
+)
+
+# Сериализованный ответ /practices: (catalog fingerprint, body, etag)
+_practices_cache: Optional[tuple[str, bytes, str]] = None
+
+
+def _media_item(media) -> dict:
+    return {
+        'id': media.id,
+        'name': media.name,
+        'text': media.text,
+        'media_type': media.media_type,
+        'media_id': media.media_id,
+        'url': media.file_url,
+        'file_url': media.file_url,
+        'destination': media.destination,
+        'position': media.position
+    }
+
+
+def _build_practices_payload(catalog) -> dict:
+    """Organize catalog snapshot by type: practices (audio), videos, music"""
+    practices_list = []
+    videos_list = []
+    music_list = []
+
+    # Process practices categories
+    for category in catalog.by_type('practices'):
+        # Separate video content into videos list
+        audio_items = [_media_item(m) for m in category.medias if m.media_type != 'video']
+        video_items = [_media_item(m) for m in category.medias if m.media_type == 'video']
+
+        # Check if this is music based on category name
+        category_name = category.name.lower()
+        if 'музык' in category_name or 'ханг' in category_name:
+            music_list.extend(audio_items)
+            continue
+
+        if audio_items:
+            practices_list.append({'name': category.name, 'items': audio_items})
+
+        # Add video items to videos list as separate category
+        if video_items:
+            videos_list.append({'name': category.name, 'items': video_items})
+
+    # Process video categories (yoga, etc)
+    for category in catalog.by_type('videos'):
+        if category.medias:
+            videos_list.append({
+                'name': category.name,
+                'items': [_media_item(m) for m in category.medias]
+            })
+
+    # Process music categories if they exist
+    for category in catalog.by_type('music'):
+        music_list.extend(_media_item(m) for m in category.medias)
+
+    music_list.extend(dict(track) for track in HANG_MUSIC)
+
+    return {
+        'status': 'success',
+        'data': {
+            'practices': practices_list,
+            'videos': videos_list,
+            'music': music_list
+        }
+    }
+
+
 @app.route('/practices', methods=['GET'])
 async def get_practices():
     """Get all practices organized by categories
@@ -352,147 +574,30 @@ async def get_practices():
         videos: [{name: "🧘 Йога", items: [...]}],      // Video content
         music: [{name: "Track", url: "...", ...}]       // Music tracks (flat array)
     }
+
+    Ответ сериализуется один раз на версию каталога; ETag — хэш тела,
+    поэтому If-None-Match работает одинаково во всех воркерах.
     """
+    global _practices_cache
+
     try:
-        # Get all categories: practices, videos, and potentially music
-        practices_categories = await db_media_category.get_all_by_type(category='practices')
-        videos_categories = await db_media_category.get_all_by_type(category='videos')
+        catalog = await media_catalog.get()
 
-        # Try to get music categories if they exist
-        try:
-            music_categories = await db_media_category.get_all_by_type(category='music')
-        except:
-            music_categories = []
-
-        # Organize by type: practices (audio), videos, music
-        practices_list = []
-        videos_list = []
-        music_list = []
-
-        # Process practices categories
-        for category in practices_categories:
-            medias = await db_media.get_all_by_category(category_id=category.id)
-            if not medias:
-                continue
-
-            # Separate by media type
-            audio_items = []
-            video_items = []
-
-            for media in medias:
-                item = {
-                    'id': media.id,
-                    'name': media.name,
-                    'text': media.text,
-                    'media_type': media.media_type,
-                    'media_id': media.media_id,
-                    'url': media.file_url,
-                    'file_url': media.file_url,
-                    'destination': media.destination,
-                    'position': media.position
-                }
-
-                # Separate video content into videos list
-                if media.media_type == 'video':
-                    video_items.append(item)
-                else:
-                    audio_items.append(item)
-
-            # Check if this is music based on category name
-            category_name = category.name.lower()
-            if 'музык' in category_name or 'ханг' in category_name:
-                music_list.extend(audio_items)
-            else:
-                # Only add if there are audio items
-                if audio_items:
-                    practices_list.append({
-                        'name': category.name,
-                        'items': audio_items
-                    })
-
-                # Add video items to videos list as separate category
-                if video_items:
-                    videos_list.append({
-                        'name': category.name,
-                        'items': video_items
-                    })
-
-        # Process video categories (yoga, etc)
-        for category in videos_categories:
-            medias = await db_media.get_all_by_category(category_id=category.id)
-            if not medias:
-                continue
-
-            media_items = []
-            for media in medias:
-                item = {
-                    'id': media.id,
-                    'name': media.name,
-                    'text': media.text,
-                    'media_type': media.media_type,
-                    'media_id': media.media_id,
-                    'url': media.file_url,
-                    'file_url': media.file_url,
-                    'destination': media.destination,
-                    'position': media.position
-                }
-                media_items.append(item)
+        if _practices_cache is None or _practices_cache[0] != catalog.fingerprint:
+            body = app.json.dumps(_build_practices_payload(catalog)).encode('utf-8')
+            etag = hashlib.sha1(body).hexdigest()
+            _practices_cache = (catalog.fingerprint, body, etag)
 
-            videos_list.append({
-                'name': category.name,
-                'items': media_items
-            })
+        _, body, etag = _practices_cache
 
-        # Process music categories if they exist
-        for category in music_categories:
-            medias = await db_media.get_all_by_category(category_id=category.id)
-            if medias:
-                for media in medias:
-                    item = {
-                        'id': media.id,
-                        'name': media.name,
-                        'text': media.text,
-                        'media_type': media.media_type,
-                        'media_id': media.media_id,
-                        'url': media.file_url,
-                        'file_url': media.file_url,
-                        'destination': media.destination,
-                        'position': media.position
-                    }
-                    music_list.append(item)
-
-        # Add hardcoded hang music tracks (from bot sounds.py)
-        # TODO: Move this to database later
-        hang_music = [
-            {"name": "Macadamia", "media_id": "CQACAgIAAxkBAAIaWme6IHocOTKeWabBMRFMAo30j0RxAAIUcQACMpLRSTh0TJb9ws2pNgQ", "duration": "3:47", "media_type": "audio"},
-            {"name": "New Horizons", "media_id": "CQACAgIAAxkBAAIaXGe6IJtFfe3ZnHnTn72SEbEHtJ_kAAIZcQACMpLRSQm3SlOEcP70NgQ", "duration": "2:21", "media_type": "audio"},
-            {"name": "Sunny Way", "media_id": "CQACAgIAAxkBAAIaXme6ILRQFjmomRTaU3S_LweBO4KcAAIbcQACMpLRScrLXVN5ihmENgQ", "duration": "5:23", "media_type": "audio"},
-            {"name": "Seven Wonders", "media_id": "CQACAgIAAxkBAAIaYGe6IMFSka-PeboFTY749cTdqO1YAAIdcQACMpLRSTfG0XkQqWr5NgQ", "duration": "3:05", "media_type": "audio"},
-            {"name": "The Flow", "media_id": "CQACAgIAAxkBAAIaYme6INjiJa78R71Tgilz1cHoVNE5AAIecQACMpLRSZnku-mQlkNgNgQ", "duration": "5:18", "media_type": "audio"},
-            {"name": "Immersion", "media_id": "CQACAgIAAxkBAAIaZGe6IO62dHDYLfZ6ApYx5JAO5IB6AAIfcQACMpLRSU0Hq8D0hVztNgQ", "duration": "3:46", "media_type": "audio"},
-            {"name": "Spring", "media_id": "CQACAgIAAxkBAAIaZme6IPo_U0KLRwhniaCdH6PHbdq1AAIgcQACMpLRSRyrUTuiVBMDNgQ", "duration": "3:32", "media_type": "audio"},
-            {"name": "Rainbow", "media_id": "CQACAgIAAxkBAAIaaGe6IQkaE72Z22xs5phmwjNnD-OfAAIjcQACMpLRSXmo6_o-tdlNNgQ", "duration": "4:33", "media_type": "audio"},
-            {"name": "Blissful", "media_id": "CQACAgIAAxkBAAIaame6IRhI9YHGUNDzGXdyYXjTlOBfAAIlcQACMpLRSdMBcbkGn_SqNgQ", "duration": "5:14", "media_type": "audio"},
-            {"name": "Ocean Inside", "media_id": "CQACAgIAAxkBAAIabGe6IR--hH94dPduMd_xOVWwW9HiAAImcQACMpLRSUS6P8YcBJJWNgQ", "duration": "2:32", "media_type": "audio"},
-            {"name": "Gravity", "media_id": "CQACAgIAAxkBAAIabme6ITnuagYXIOA-x5dEkW1BqOtxAAIqcQACMpLRSXiK8U0F0yHjNgQ", "duration": "3:06", "media_type": "audio"},
-            {"name": "Cappadocia", "media_id": "CQACAgIAAxkBAAIacGe6IU0FqF8GNMKuUAxzCEFcsCSEAAIucQACMpLRSYay1XS2zvn7NgQ", "duration": "4:06", "media_type": "audio"},
-            {"name": "Reggae", "media_id": "CQACAgIAAxkBAAIacme6IWWKZbY-7FQG6aQ3p0QS2LWiAAIxcQACMpLRSYlpu2L73SnvNgQ", "duration": "3:12", "media_type": "audio"},
-            {"name": "Macadamia Remix", "media_id": "CQACAgIAAxkBAAIadGe6IXuMKffmitJKgPE4YjVuCql9AAI0cQACMpLRSXqbQKD9N4c9NgQ", "duration": "4:31", "media_type": "audio"},
-            {"name": "Sunny Way Remix", "media_id": "CQACAgIAAxkBAAIadme6IYc32RhDe3f-n1eaeYAccwj9AAI2cQACMpLRSXwwwGBfYacZNgQ", "duration": "5:12", "media_type": "audio"},
-            {"name": "Breath of Spring Remix", "media_id": "CQACAgIAAxkBAAIaeGe6IY5EARlEtekD_9KAxuK1iEcGAAI3cQACMpLRSVTbvohBGOngNgQ", "duration": "3:31", "media_type": "audio"},
-            {"name": "Ocean Inside Remix", "media_id": "CQACAgIAAxkBAAIaeme6IaGK7nwa_UEJ3HxRIzkwr_NHAAI6cQACMpLRSXm8c2FvvzFSNgQ", "duration": "5:11", "media_type": "audio"},
-            {"name": "J. Remix", "media_id": "CQACAgIAAxkBAAIafGe6Iax5rwOE8jZe_8IIPcRPoSHrAAI8cQACMpLRSd60kiEAAcn2UTYE", "duration": "3:46", "media_type": "audio"},
-        ]
-        music_list.extend(hang_music)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
 
-        return jsonify({
-            'status': 'success',
-            'data': {
-                'practices': practices_list,
-                'videos': videos_list,
-                'music': music_list
-            }
-        })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
 
     except Exception as e:
         logger.error(f"Get practices error: {e}", exc_info=True)
@@ -514,11 +619,8 @@ async def save_mood():
         if not user_id or not mood:
             return jsonify({'error': 'user_id and mood are required'}), 400
 
-        # Get profile and update emotional_state
-        profile = await user_profile.get_or_create(user_id)
-
         # Update emotional state with current mood
-        emotional_state = profile.emotional_state or {}
+        emotional_state = await user_profile.get_emotional_state(user_id)
         emotional_state['current_mood'] = mood
         emotional_state['updated_at'] = datetime.now().isoformat()
 
@@ -541,9 +643,7 @@ async def save_mood():
 async def get_mood_history(user_id: int):
     """Get mood history (from emotional_state)"""
     try:
-        profile = await user_profile.get_or_create(user_id)
-
-        emotional_state = profile.emotional_state or {}
+        emotional_state = await user_profile.get_emotional_state(user_id)
 
         return jsonify({
             'status': 'success',
@@ -0,0 +1,32 @@
+"""
+JSON provider for the WebApp APIs
+
+jsonify / app.json use soul_bot's json_codec (orjson when installed)
+instead of the stdlib json module. Profile and history responses carry
+large nested JSONB payloads, so encoding is a visible part of request time.
+
+Types orjson does not handle natively (datetime, date, UUID, dataclasses,
+objects with __html__) go through Quart's default hook, so responses look
+the same as before. Keys are no longer sorted and output is always compact.
+"""
+from typing import Any
+
+from quart import Response
+from quart.json.provider import DefaultJSONProvider
+
+from utils import json_codec
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider backed by json_codec"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return json_codec.dumps(obj, default=kwargs.get("default", self.default))
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return json_codec.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        body = json_codec.dumps_bytes(obj, default=self.default) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,40 @@
+"""
+Prometheus metrics for the WebApp APIs
+
+register_metrics(app, name) adds GET /metrics (soul_bot's utils.metrics
+registry: OpenAI latency/tokens, DB pool, caches, background tasks made
+by the shared services) and a request-time histogram per route.
+
+Time is measured until the response object is ready, so for streaming
+endpoints (/chat/stream, audio proxy) it is time to first byte.
+"""
+import time
+
+from quart import Quart, Response, g, request
+
+from utils import metrics
+
+
+def register_metrics(app: Quart, app_name: str) -> None:
+    @app.before_request
+    async def _start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    async def _observe_request(response):
+        started = g.get('metrics_started')
+        if started is not None:
+            # Шаблон маршрута, а не путь: /chat/history/<int:user_id>, не id пользователя
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                app=app_name,
+                method=request.method,
+                route=route,
+                status=response.status_code,
+            )
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    async def prometheus_metrics():
+        return Response(metrics.render(), headers={'Content-Type': metrics.CONTENT_TYPE})
@@ -0,0 +1,192 @@
+"""
+Static assets for the WebApp frontend
+
+Files from WEBAPP_DIR are read once (in a worker thread), fingerprinted and
+kept in memory together with gzip/brotli variants. Requests are served from
+memory with ETag, Cache-Control, conditional requests and Range support.
+A background task re-scans the directory so a redeploy of the frontend is
+picked up without restarting the API.
+
+Files larger than STATIC_MAX_INMEMORY_BYTES are not cached: they are sent
+with Quart's send_file, which reads them asynchronously.
+"""
+import asyncio
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from quart import Response, request, send_file
+
+try:
+    import brotli
+except ImportError:  # brotli is optional: without it we only serve gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_RESCAN_INTERVAL = 10
+STATIC_MAX_INMEMORY_BYTES = 5 * 1024 * 1024
+STATIC_MIN_COMPRESS_BYTES = 512
+STATIC_CACHE_MAX_AGE = 300
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/javascript',
+    'application/json',
+    'application/manifest+json',
+    'image/svg+xml',
+)
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    path: str
+    content_type: str
+    etag: str
+    mtime_ns: int
+    size: int
+    body: Optional[bytes] = None
+    gzip_body: Optional[bytes] = None
+    brotli_body: Optional[bytes] = None
+
+
+def _content_type(path: str) -> str:
+    content_type, _ = mimetypes.guess_type(path)
+    content_type = content_type or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type == 'application/javascript':
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+def _compress(content_type: str, body: bytes) -> tuple[Optional[bytes], Optional[bytes]]:
+    if len(body) < STATIC_MIN_COMPRESS_BYTES or not content_type.startswith(COMPRESSIBLE_TYPES):
+        return None, None
+
+    gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+    brotlied = brotli.compress(body, quality=11) if brotli is not None else None
+
+    # Сжатый вариант, который не меньше оригинала, не отдаём
+    return (
+        gzipped if len(gzipped) < len(body) else None,
+        brotlied if brotlied is not None and len(brotlied) < len(body) else None,
+    )
+
+
+def _load_asset(path: str, full_path: str, stat: os.stat_result) -> StaticAsset:
+    content_type = _content_type(path)
+
+    if stat.st_size > STATIC_MAX_INMEMORY_BYTES:
+        etag = f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+        return StaticAsset(path, content_type, etag, stat.st_mtime_ns, stat.st_size)
+
+    with open(full_path, 'rb') as f:
+        body = f.read()
+
+    gzip_body, brotli_body = _compress(content_type, body)
+    return StaticAsset(
+        path=path,
+        content_type=content_type,
+        etag=hashlib.sha1(body).hexdigest(),
+        mtime_ns=stat.st_mtime_ns,
+        size=len(body),
+        body=body,
+        gzip_body=gzip_body,
+        brotli_body=brotli_body,
+    )
+
+
+def _scan(root: str, previous: dict[str, StaticAsset]) -> dict[str, StaticAsset]:
+    """Blocking directory scan; unchanged files are reused from previous"""
+    assets = {}
+
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            full_path = os.path.join(dirpath, filename)
+            path = os.path.relpath(full_path, root).replace(os.sep, '/')
+            try:
+                stat = os.stat(full_path)
+                cached = previous.get(path)
+                if cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+                    assets[path] = cached
+                else:
+                    assets[path] = _load_asset(path, full_path, stat)
+            except OSError as e:
+                logger.warning("Failed to load static asset %s: %s", full_path, e)
+
+    return assets
+
+
+class StaticAssets:
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._assets: dict[str, StaticAsset] = {}
+        self._watcher: Optional[asyncio.Task] = None
+
+    async def load(self) -> None:
+        assets = await asyncio.to_thread(_scan, self.root, self._assets)
+        if assets.keys() != self._assets.keys() or any(
+            assets[path] is not self._assets.get(path) for path in assets
+        ):
+            logger.info("Static assets loaded from %s: %s files", self.root, len(assets))
+        self._assets = assets
+
+    async def start(self) -> None:
+        await self.load()
+        self._watcher = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(STATIC_RESCAN_INTERVAL)
+            try:
+                await self.load()
+            except Exception as e:
+                logger.warning("Static assets rescan failed: %s", e)
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        return self._assets.get(path)
+
+    async def serve(self, path: str) -> Optional[Response]:
+        """Response for the asset or None if there is no such file"""
+        asset = self.get(path)
+        if asset is None:
+            return None
+
+        if asset.body is None:
+            response = await send_file(
+                os.path.join(self.root, asset.path),
+                mimetype=asset.content_type,
+                conditional=True,
+            )
+        else:
+            body, encoding = asset.body, None
+            # Range отдаём только по несжатому представлению
+            if 'Range' not in request.headers:
+                accepted = request.accept_encodings
+                if asset.brotli_body is not None and accepted['br']:
+                    body, encoding = asset.brotli_body, 'br'
+                elif asset.gzip_body is not None and accepted['gzip']:
+                    body, encoding = asset.gzip_body, 'gzip'
+
+            response = Response(body, content_type=asset.content_type)
+            response.set_etag(f'{asset.etag}-{encoding}' if encoding else asset.etag)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+            if asset.gzip_body is not None or asset.brotli_body is not None:
+                response.vary.add('Accept-Encoding')
+            await response.make_conditional(request, accept_ranges=True, complete_length=len(body))
+
+        if asset.content_type.startswith('text/html'):
+            # HTML ссылается на ассеты без версии в URL — всегда ревалидируем
+            response.headers['Cache-Control'] = 'no-cache'
+        else:
+            response.headers['Cache-Control'] = f'public, max-age={STATIC_CACHE_MAX_AGE}'
+        return response
@@ -108,12 +108,15 @@ class ApiService {
     }
   }
 
-  async loadChatHistory(userId: number, assistantType: string = 'helper', threadId: string = 'main', limit: number = 100, offset: number = 0) {
+  // Cursor pagination: pass nextBefore from the previous page to load older messages
+  async loadChatHistory(userId: number, assistantType: string = 'helper', threadId: string = 'main', limit: number = 100, before?: number) {
     try {
-      const response = await fetch(`${this.baseUrl}/api/chat/history/${userId}?assistant_type=${assistantType}&thread_id=${threadId}&limit=${limit}&offset=${offset}`);
+      const cursor = before !== undefined ? `&before=${before}` : '';
+      const response = await fetch(`${this.baseUrl}/api/chat/history/${userId}?assistant_type=${assistantType}&thread_id=${threadId}&limit=${limit}${cursor}`);
       if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
       const data = await response.json();
-      return { success: true, data: data.messages || [] };
+      const page = data.data || data;
+      return { success: true, data: page.messages || [], hasMore: Boolean(page.has_more), nextBefore: page.next_before ?? undefined };
     } catch (error) {
       return { success: false, error: error instanceof Error ? error.message : 'Unknown error' };
     }